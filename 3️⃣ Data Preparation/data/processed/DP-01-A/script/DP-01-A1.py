@@ -27,6 +27,14 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+# Conversor numérico compartilhado (3️⃣ Data Preparation/scripts/conversor_numerico.py)
+try:
+    from conversor_numerico import ConversorNumerico
+except ImportError:
+    import sys
+    sys.path.append(str(Path(__file__).resolve().parents[4] / 'scripts'))
+    from conversor_numerico import ConversorNumerico
+
 class ProcessadorDadosINE:
     """Classe principal para processar dados do INE e criar modelo relacional normalizado."""
 
@@ -99,9 +107,9 @@ class ProcessadorDadosINE:
                     m_2011 = self._clean_number(row.iloc[6]) if len(row) > 6 else 0
 
                     # Variação: HM, H, M
-                    var_hm = self._clean_number(row.iloc[7], is_percentage=True) if len(row) > 7 else 0
-                    var_h = self._clean_number(row.iloc[8], is_percentage=True) if len(row) > 8 else 0
-                    var_m = self._clean_number(row.iloc[9], is_percentage=True) if len(row) > 9 else 0
+                    var_hm = self._clean_number(row.iloc[7]) if len(row) > 7 else 0
+                    var_h = self._clean_number(row.iloc[8]) if len(row) > 8 else 0
+                    var_m = self._clean_number(row.iloc[9]) if len(row) > 9 else 0
 
                     if hm_2021 > 0 or hm_2011 > 0:  # Pelo menos um valor válido
                         linhas_dados.append({
@@ -196,15 +204,15 @@ class ProcessadorDadosINE:
                     g_65_mais = self._clean_number(row.iloc[5]) if len(row) > 5 else 0
 
                     # Grupos etários percentuais
-                    p_0_14 = self._clean_number(row.iloc[6], is_percentage=True) if len(row) > 6 else 0
-                    p_15_24 = self._clean_number(row.iloc[7], is_percentage=True) if len(row) > 7 else 0
-                    p_25_64 = self._clean_number(row.iloc[8], is_percentage=True) if len(row) > 8 else 0
-                    p_65_mais = self._clean_number(row.iloc[9], is_percentage=True) if len(row) > 9 else 0
+                    p_0_14 = self._clean_number(row.iloc[6]) if len(row) > 6 else 0
+                    p_15_24 = self._clean_number(row.iloc[7]) if len(row) > 7 else 0
+                    p_25_64 = self._clean_number(row.iloc[8]) if len(row) > 8 else 0
+                    p_65_mais = self._clean_number(row.iloc[9]) if len(row) > 9 else 0
 
                     # Idades médias
-                    idade_media_hm = self._clean_number(row.iloc[10], is_percentage=True) if len(row) > 10 else 0
-                    idade_media_h = self._clean_number(row.iloc[11], is_percentage=True) if len(row) > 11 else 0
-                    idade_media_m = self._clean_number(row.iloc[12], is_percentage=True) if len(row) > 12 else 0
+                    idade_media_hm = self._clean_number(row.iloc[10]) if len(row) > 10 else 0
+                    idade_media_h = self._clean_number(row.iloc[11]) if len(row) > 11 else 0
+                    idade_media_m = self._clean_number(row.iloc[12]) if len(row) > 12 else 0
 
                     if total_pop > 0:
                         linhas_dados.append({
@@ -229,31 +237,14 @@ class ProcessadorDadosINE:
         self.dados_originais['q1_3_limpo'] = pd.DataFrame(linhas_dados)
         print(f"✅ Q1.3 processado: {len(linhas_dados)} nacionalidades com dados etários")
 
-    def _clean_number(self, value, is_percentage=False):
-        """Limpa e converte valores numéricos."""
-        if pd.isna(value) or value == '':
-            return 0
-
-        # Convert to string and clean
-        str_val = str(value).strip()
-
-        # Remove espaços, vírgulas como separadores de milhares
-        str_val = str_val.replace(' ', '').replace(',', '')
+    def _clean_number(self, value):
+        """Limpa e converte valores numéricos (formato INE 2021: '10 343 066', '-2.1', '12.5%')."""
+        numero = ConversorNumerico.converter_valor(value, separador_decimal='.', padrao=0)
 
-        # Trata percentuais
-        if is_percentage and '%' in str_val:
-            str_val = str_val.replace('%', '')
-
-        try:
-            # Tenta converter para float
-            if '.' in str_val or ',' in str_val:
-                # Substitui vírgula por ponto para decimais
-                str_val = str_val.replace(',', '.')
-                return float(str_val)
-            else:
-                return int(str_val)
-        except:
-            return 0
+        # Mantém inteiros para contagens e float para valores com casas decimais
+        if float(numero).is_integer() and '.' not in str(value):
+            return int(numero)
+        return numero
 
     def criar_tabela_populacao_residente(self):
         """Cria a tabela PopulaçãoResidente (entidade principal)."""
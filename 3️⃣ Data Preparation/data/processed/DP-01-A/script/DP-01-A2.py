@@ -18,6 +18,14 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+# Conversor numérico compartilhado (3️⃣ Data Preparation/scripts/conversor_numerico.py)
+try:
+    from conversor_numerico import ConversorNumerico
+except ImportError:
+    import sys
+    sys.path.append(str(Path(__file__).resolve().parents[4] / 'scripts'))
+    from conversor_numerico import ConversorNumerico
+
 class ProcessadorEducacaoINE:
     """Classe para processar dados educacionais e integrar ao modelo ER existente."""
 
@@ -134,25 +142,13 @@ class ProcessadorEducacaoINE:
         print(f"✅ Q2.1 processado: {len(linhas_dados)} nacionalidades com dados educacionais")
 
     def _clean_number(self, value):
-        """Limpa e converte valores numéricos."""
-        if pd.isna(value) or value == '':
-            return 0
-
-        # Convert to string and clean
-        str_val = str(value).strip()
-
-        # Remove espaços e vírgulas como separadores de milhares
-        str_val = str_val.replace(' ', '').replace(',', '')
+        """Limpa e converte valores numéricos (formato INE 2021: '10 343 066', '-2.1')."""
+        numero = ConversorNumerico.converter_valor(value, separador_decimal='.', padrao=0)
 
-        try:
-            # Tenta converter para int
-            return int(str_val)
-        except:
-            try:
-                # Se falhar, tenta float
-                return float(str_val)
-            except:
-                return 0
+        # Mantém inteiros para contagens e float para valores com casas decimais
+        if float(numero).is_integer() and '.' not in str(value):
+            return int(numero)
+        return numero
 
     def criar_tabela_nivel_educacao(self):
         """Cria a tabela NivelEducacao com todos os níveis educacionais."""
@@ -31,15 +31,28 @@ SAÍDA:
 =============================================================================
 """
 
+import argparse
+import codecs
+import os
 import pandas as pd
 import numpy as np
 import logging
 import warnings
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+# Módulos compartilhados (3️⃣ Data Preparation/scripts/)
+try:
+    from formatos_tabela import EscritorTabelas, localizar_tabela, ler_tabela
+except ImportError:
+    sys.path.append(str(Path(__file__).resolve().parents[5] / 'scripts'))
+    from formatos_tabela import EscritorTabelas, localizar_tabela, ler_tabela
+from integridade_referencial import VerificadorIntegridade
+from resolvedor_nacionalidades import ResolvedorNacionalidades
+from decodificacao_entradas import DecodificadorEntradas, reparar_serie, reparar_texto
+
 # ============================================================================
 # CONFIGURAÇÃO
 # ============================================================================
@@ -62,10 +75,42 @@ warnings.filterwarnings('ignore')
 class ETLLaboralProcessor:
     """Processador ETL para dados laborais dos Censos 2021"""
     
-    def __init__(self):
-        """Inicializa o processador ETL"""
+    # IDs de Dim_Nacionalidade (nomes resolvidos por ResolvedorNacionalidades)
+    NACIONALIDADES_IDS = {
+        'População residente': 14, 'Nacionalidade portuguesa': 12,
+        'Nacionalidade estrangeira': 11, 'Brasil': 4, 'Angola': 2,
+        'Cabo Verde': 5, 'Reino Unido': 15, 'Ucrânia': 18, 'França': 8,
+        'China': 6, 'Guiné-Bissau': 9, 'Índia': 19, 'Roménia': 16,
+        'Itália': 10, 'Nepal': 13, 'Espanha': 7, 'Alemanha': 1,
+        'São Tomé e Príncipe': 17, 'Apátridas': 3
+    }
+    
+    # Encodings testados (por ordem) sobre a amostra inicial de cada ficheiro;
+    # a decisão fica guardada pela impressão digital do ficheiro. latin1 aceita
+    # qualquer byte, por isso fica em último
+    ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+    ENCODING_SAMPLE_BYTES = 1024 * 1024
+    
+    def __init__(self, output_format: str = 'csv', output_compression: Optional[str] = None,
+                 chunk_size: Optional[int] = None):
+        """
+        Inicializa o processador ETL
+        
+        Args:
+            output_format: 'csv', 'parquet' ou 'feather' (binários exigem pyarrow)
+            output_compression: Codec do formato binário (None = padrão)
+            chunk_size: Linhas por bloco no modo streaming. None carrega cada
+                quadro em memória; com um valor, os quadros são lidos e limpos
+                bloco a bloco diretamente pelas tabelas de fato (memória limitada
+                para quadros ao nível do município)
+        """
         self.logger = logging.getLogger(__name__)
+        self.writer = EscritorTabelas(output_format, output_compression, self.logger)
+        self.chunk_size = chunk_size
+        self.resolvedor_nacionalidades = ResolvedorNacionalidades(list(self.NACIONALIDADES_IDS))
+        self.decodificador = DecodificadorEntradas(self.ENCODINGS, self.ENCODING_SAMPLE_BYTES)
         self.raw_data = {}
+        self.streams = {}
         self.reference_tables = {}
         self.dimensional_tables = {}
         self.fact_tables = {}
@@ -96,21 +141,11 @@ class ETLLaboralProcessor:
     # ========================================================================
 
     def normalize_text(self, text: str) -> str:
-        """Normaliza texto removendo caracteres especiais"""
+        """Normaliza texto removendo caracteres especiais (mojibake cirílico/latin-1)"""
         if pd.isna(text) or not isinstance(text, str):
             return text
-            
-        replacements = {
-            'гo': 'ção', 'уo': 'ão', 'гг': 'çã', 'у': 'ã', 'й': 'é',
-            'ь': 'í', 'з': 'ç', 'р': 'á', 'ш': 'õ', 'ж': 'ê',
-            'щ': 'ú', 'ъ': 'ó', 'ю': 'û', 'я': 'ü'
-        }
         
-        normalized = text
-        for old, new in replacements.items():
-            normalized = normalized.replace(old, new)
-            
-        return normalized.strip()
+        return reparar_texto(text).strip()
 
     def find_available_file(self, file_variations: List[str]) -> Optional[str]:
         """Encontra qual variação do arquivo está disponível"""
@@ -120,35 +155,28 @@ class ETLLaboralProcessor:
         return None
 
     def get_nacionalidade_id(self, nome: str) -> Optional[int]:
-        """Mapeia nome de nacionalidade para ID"""
+        """Mapeia nome de nacionalidade para ID (mojibake, acentos e variantes via resolvedor)"""
         if pd.isna(nome) or nome == '':
             return None
-            
-        nome_norm = self.normalize_text(str(nome).strip())
-        
-        mapping = {
-            'População residente': 14, 'Nacionalidade portuguesa': 12,
-            'Nacionalidade estrangeira': 11, 'Brasil': 4, 'Angola': 2,
-            'Cabo Verde': 5, 'Reino Unido': 15, 'Ucrânia': 18, 'França': 8,
-            'China': 6, 'Guiné-Bissau': 9, 'Índia': 19, 'Roménia': 16,
-            'Itália': 10, 'Nepal': 13, 'Espanha': 7, 'Alemanha': 1,
-            'São Tomé e Príncipe': 17, 'Apátridas': 3
-        }
         
-        return mapping.get(nome_norm)
+        return self.NACIONALIDADES_IDS.get(self.resolvedor_nacionalidades.resolver(nome))
 
     # ========================================================================
     # EXTRAÇÃO E LIMPEZA
     # ========================================================================
 
-    def clean_dataframe(self, df: pd.DataFrame, file_name: str) -> pd.DataFrame:
-        """Limpa e padroniza DataFrame"""
-        self.logger.info(f"🧹 Limpando {file_name}...")
+    def clean_dataframe(self, df: pd.DataFrame, file_name: str, verbose: bool = True) -> pd.DataFrame:
+        """
+        Limpa e padroniza DataFrame (quadro inteiro ou um bloco do streaming)
         
-        df_clean = df.copy()
+        Cada linha é tratada de forma independente, por isso o resultado
+        é o mesmo quer o quadro seja limpo de uma vez ou bloco a bloco.
+        """
+        if verbose:
+            self.logger.info(f"🧹 Limpando {file_name}...")
         
-        # Remover linhas vazias
-        df_clean = df_clean.dropna(how='all')
+        # Remover linhas vazias (dropna já devolve um novo DataFrame)
+        df_clean = df.dropna(how='all')
         
         # Filtrar linhas de metadados
         mask = df_clean.iloc[:, 0].astype(str).str.contains(
@@ -161,20 +189,101 @@ class ETLLaboralProcessor:
         df_clean = df_clean[df_clean.iloc[:, 0].notna()]
         df_clean = df_clean[~df_clean.iloc[:, 0].astype(str).isin(['0', 'nan', ''])]
         
-        # Normalizar primeira coluna
-        df_clean.iloc[:, 0] = df_clean.iloc[:, 0].apply(self.normalize_text)
+        # Normalizar primeira coluna (coluna inteira, um cálculo por valor distinto)
+        df_clean.iloc[:, 0] = reparar_serie(df_clean.iloc[:, 0], aparar=True)
         
-        # Converter colunas numéricas
-        for col_idx in range(1, len(df_clean.columns)):
-            if df_clean.iloc[:, col_idx].dtype == 'object':
-                df_clean.iloc[:, col_idx] = (df_clean.iloc[:, col_idx]
-                    .astype(str).str.replace(' ', '').str.replace(',', '.'))
-                df_clean.iloc[:, col_idx] = pd.to_numeric(
-                    df_clean.iloc[:, col_idx], errors='coerce').fillna(0)
+        # Converter colunas numéricas (todas lidas como texto: o tipo não
+        # depende do conteúdo de cada bloco)
+        for col in df_clean.columns[1:]:
+            if not pd.api.types.is_numeric_dtype(df_clean[col].dtype):
+                df_clean[col] = pd.to_numeric(
+                    df_clean[col].astype(str).str.replace(' ', '').str.replace(',', '.'),
+                    errors='coerce').fillna(0)
         
-        self.logger.info(f"✅ {file_name}: {len(df)} → {len(df_clean)} registros")
+        if verbose:
+            self.logger.info(f"✅ {file_name}: {len(df)} → {len(df_clean)} registros")
         return df_clean
 
+    def detect_encoding(self, file_path: str) -> str:
+        """Deteta o encoding uma única vez a partir de uma amostra de bytes"""
+        try:
+            return self.decodificador.codificacao(file_path)
+        except ValueError:
+            raise Exception(f"Erro de encoding em {file_path}")
+
+    def next_encoding(self, file_path: str, failed: str) -> str:
+        """Encoding seguinte quando `failed` não descodifica o ficheiro inteiro"""
+        encoding = self.decodificador.corrigir(file_path, failed)
+        if encoding is None:
+            raise Exception(f"Erro de encoding em {file_path}")
+        self.logger.warning(f"⚠️ {file_path}: {failed} falhou depois da amostra, a tentar {encoding}")
+        return encoding
+
+    def read_clean_table(self, file_path: str, encoding: str) -> pd.DataFrame:
+        """Lê e limpa o quadro inteiro, passando ao encoding seguinte se a leitura falhar"""
+        while True:
+            try:
+                return next(self.read_clean_blocks(file_path, encoding))
+            except UnicodeDecodeError:
+                encoding = self.next_encoding(file_path, encoding)
+
+    def verify_encoding(self, file_path: str, encoding: str) -> str:
+        """
+        Confirma o encoding sobre o ficheiro inteiro antes do streaming
+        
+        Um erro de descodificação a meio do streaming deixaria as tabelas de
+        fato com blocos já agregados; a verificação lê só bytes, bloco a bloco.
+        """
+        while True:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(self.ENCODING_SAMPLE_BYTES), b''):
+                        decoder.decode(block)
+                    decoder.decode(b'', final=True)
+                return encoding
+            except UnicodeDecodeError:
+                encoding = self.next_encoding(file_path, encoding)
+
+    def read_clean_blocks(self, file_path: str, encoding: str,
+                          chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê um quadro INE e devolve blocos já limpos
+        
+        Com chunk_size=None devolve um único bloco com o quadro inteiro.
+        """
+        reader = pd.read_csv(file_path, encoding=encoding, header=None, dtype=str,
+                             chunksize=chunk_size)
+        if chunk_size is None:
+            yield self.clean_dataframe(reader, file_path)
+            return
+        
+        with reader:
+            for chunk in reader:
+                block = self.clean_dataframe(chunk, file_path, verbose=False)
+                if len(block) > 0:
+                    yield block
+
+    def iter_blocks(self, key: str) -> Iterator[pd.DataFrame]:
+        """Blocos limpos de um quadro: em memória ou lidos do ficheiro (streaming)"""
+        if key in self.raw_data:
+            yield self.raw_data[key]
+            return
+        
+        file_path, encoding = self.streams[key]
+        total = 0
+        for block in self.read_clean_blocks(file_path, encoding, self.chunk_size):
+            total += len(block)
+            yield block
+        
+        self.statistics['records_input'] += total
+        self.logger.info(f"✅ {file_path}: {total} registros lidos em blocos de {self.chunk_size}")
+
+    def iter_rows(self, key: str) -> Iterator[Tuple[int, pd.Series]]:
+        """Linhas limpas de um quadro, bloco a bloco"""
+        for block in self.iter_blocks(key):
+            yield from block.iterrows()
+
     def load_reference_tables(self) -> None:
         """Carrega tabelas de referência existentes"""
         try:
@@ -187,9 +296,11 @@ class ETLLaboralProcessor:
             
             for name, file in ref_files.items():
                 try:
-                    df = pd.read_csv(file, encoding='utf-8')
+                    # Prefere .parquet/.feather gerados pelo pipeline de Educação
+                    path = localizar_tabela('.', file) or Path(file)
+                    df = ler_tabela(path, encoding='utf-8')
                     self.reference_tables[name] = df
-                    self.logger.info(f"✅ {name}: {len(df)} registros")
+                    self.logger.info(f"✅ {name}: {len(df)} registros ({path.name})")
                 except FileNotFoundError:
                     self.logger.warning(f"⚠️ {file} não encontrado - criando padrão")
                     self._create_minimal_reference(name)
@@ -252,19 +363,17 @@ class ETLLaboralProcessor:
                 
                 self.logger.info(f"📄 Processando: {found_file}")
                 
-                # Tentar diferentes encodings
-                df = None
-                for encoding in ['utf-8', 'latin1', 'cp1252']:
-                    try:
-                        df = pd.read_csv(found_file, encoding=encoding, header=None)
-                        break
-                    except UnicodeDecodeError:
-                        continue
+                encoding = self.detect_encoding(found_file)
                 
-                if df is None:
-                    raise Exception(f"Erro de encoding em {found_file}")
+                # Streaming: os blocos são lidos e limpos pelas tabelas de fato
+                if self.chunk_size:
+                    encoding = self.verify_encoding(found_file, encoding)
+                    self.streams[key] = (found_file, encoding)
+                    self.statistics['files_processed'] += 1
+                    self.logger.info(f"🌊 {found_file}: streaming em blocos de {self.chunk_size} linhas ({encoding})")
+                    continue
                 
-                df_clean = self.clean_dataframe(df, found_file)
+                df_clean = self.read_clean_table(found_file, encoding)
                 
                 if len(df_clean) == 0:
                     self.logger.warning(f"⚠️ {found_file}: 0 registros após limpeza!")
@@ -461,7 +570,7 @@ class ETLLaboralProcessor:
         
         for name, func, source in facts:
             try:
-                if source in self.raw_data:
+                if source in self.raw_data or source in self.streams:
                     func()
                     recs = len(self.fact_tables.get(name, []))
                     self.logger.info(f"✅ {name}: {recs} registros")
@@ -472,11 +581,10 @@ class ETLLaboralProcessor:
 
     def _create_populacao_condicao(self) -> None:
         """PopulacaoPorCondicao de Q3.1"""
-        df = self.raw_data['Q3.1']
         records = []
         record_id = 1
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q3.1'):
             nac_id = self.get_nacionalidade_id(row.iloc[0])
             if not nac_id:
                 continue
@@ -499,11 +607,10 @@ class ETLLaboralProcessor:
 
     def _create_empregados_profissao(self) -> None:
         """EmpregadosPorProfissao de Q3.2"""
-        df = self.raw_data['Q3.2']
         records = []
         record_id = 1
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q3.2'):
             nac_id = self.get_nacionalidade_id(row.iloc[0])
             if not nac_id:
                 continue
@@ -525,11 +632,10 @@ class ETLLaboralProcessor:
 
     def _create_empregados_setor(self) -> None:
         """EmpregadosPorSetor de Q3.3"""
-        df = self.raw_data['Q3.3']
         records = []
         record_id = 1
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q3.3'):
             nac_id = self.get_nacionalidade_id(row.iloc[0])
             if not nac_id:
                 continue
@@ -551,11 +657,10 @@ class ETLLaboralProcessor:
 
     def _create_empregados_situacao(self) -> None:
         """EmpregadosPorSituacao de Q3.4"""
-        df = self.raw_data['Q3.4']
         records = []
         record_id = 1
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q3.4'):
             nac_id = self.get_nacionalidade_id(row.iloc[0])
             if not nac_id:
                 continue
@@ -577,7 +682,6 @@ class ETLLaboralProcessor:
 
     def _create_empregados_prof_sexo(self) -> None:
         """EmpregadosProfSexo de Q20"""
-        df = self.raw_data['Q20']
         records = []
         record_id = 1
         
@@ -587,7 +691,7 @@ class ETLLaboralProcessor:
             'indústria', 'Operadores', 'não qualificados'
         ]
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q20'):
             prof_nome = str(row.iloc[0])
             prof_id = None
             
@@ -617,7 +721,6 @@ class ETLLaboralProcessor:
 
     def _create_empregados_regiao_setor(self) -> None:
         """EmpregadosRegiaoSetor de Q21"""
-        df = self.raw_data['Q21']
         records = []
         record_id = 1
         
@@ -626,7 +729,7 @@ class ETLLaboralProcessor:
             'Alentejo': 5, 'Algarve': 6, 'RA Açores': 7, 'RA Madeira': 8
         }
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q21'):
             nuts_id = regiao_map.get(str(row.iloc[0]))
             if not nuts_id:
                 continue
@@ -648,7 +751,6 @@ class ETLLaboralProcessor:
 
     def _create_pop_trabalho_esc(self) -> None:
         """PopulacaoTrabalhoEscolaridade de Q23"""
-        df = self.raw_data['Q23']
         records = []
         record_id = 1
         
@@ -659,7 +761,7 @@ class ETLLaboralProcessor:
         
         condicoes = ['Empregada', 'Desempregada', 'Não activa']
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q23'):
             nivel_nome = str(row.iloc[0])
             nivel_id = None
             
@@ -695,7 +797,6 @@ class ETLLaboralProcessor:
 
     def _create_pop_rendimento_regiao(self) -> None:
         """PopulacaoRendimentoRegiao de Q24"""
-        df = self.raw_data['Q24']
         records = []
         record_id = 1
         
@@ -704,7 +805,7 @@ class ETLLaboralProcessor:
             'Alentejo': 5, 'Algarve': 6, 'RA Açores': 7, 'RA Madeira': 8
         }
         
-        for idx, row in df.iterrows():
+        for idx, row in self.iter_rows('Q24'):
             nuts_id = regiao_map.get(str(row.iloc[0]))
             if not nuts_id:
                 continue
@@ -736,25 +837,29 @@ class ETLLaboralProcessor:
         
         results = {'errors': [], 'warnings': [], 'passed': []}
         
-        # Validar nacionalidades
-        nac_ref = set(self.reference_tables['Nacionalidade']['nacionalidade_id'])
-        for name, df in self.fact_tables.items():
-            if 'nacionalidade_id' in df.columns:
-                invalid = set(df['nacionalidade_id']) - nac_ref
-                if invalid:
-                    results['errors'].append(f"{name}: IDs inválidos {invalid}")
-                else:
-                    results['passed'].append(f"{name}: Nacionalidades ✓")
-        
-        # Validar sexos
-        sex_ref = set(self.reference_tables['Sexo']['sexo_id'])
-        for name, df in self.fact_tables.items():
-            if 'sexo_id' in df.columns:
-                invalid = set(df['sexo_id']) - sex_ref
-                if invalid:
-                    results['errors'].append(f"{name}: Sexo IDs inválidos {invalid}")
-                else:
-                    results['passed'].append(f"{name}: Sexos ✓")
+        # Validar nacionalidades e sexos numa única passagem (nulos contam como inválidos)
+        tables = {**self.fact_tables, **{f"Ref_{k}": v for k, v in self.reference_tables.items()}}
+        relationships = [
+            {'fato': name, 'fk': fk, 'dimensao': f"Ref_{ref}", 'pk': fk}
+            for fk, ref in (('nacionalidade_id', 'Nacionalidade'), ('sexo_id', 'Sexo'))
+            for name, df in self.fact_tables.items() if fk in df.columns
+        ]
+        labels = {'nacionalidade_id': ('IDs inválidos', 'Nacionalidades ✓'),
+                  'sexo_id': ('Sexo IDs inválidos', 'Sexos ✓')}
+        
+        checker = VerificadorIntegridade(nulos_sao_orfaos=True)
+        for res in checker.verificar(tables, relationships):
+            error_label, ok_label = labels[res['fk']]
+            if res['status'] == 'orfaos':
+                results['errors'].append(
+                    f"{res['fato']}: {error_label} {res['amostra_valores']} "
+                    f"({res['linhas_orfas']} linhas, ex.: {res['amostra_linhas']})"
+                )
+            elif res['status'] == 'ok':
+                results['passed'].append(f"{res['fato']}: {ok_label}")
+            else:
+                results['errors'].append(res['mensagem'])
+        results['integrity'] = checker.resultados
         
         # Validar não-negativos
         for name, df in {**self.dimensional_tables, **self.fact_tables}.items():
@@ -782,16 +887,14 @@ class ETLLaboralProcessor:
         self.logger.info("=" * 60)
         
         for name, df in self.dimensional_tables.items():
-            filename = f"{name}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8')
+            path = self.writer.salvar(df, '.', name)
             self.statistics['records_output'] += len(df)
-            self.logger.info(f"💾 {filename}: {len(df)} registros")
+            self.logger.info(f"💾 {path.name}: {len(df)} registros")
         
         for name, df in self.fact_tables.items():
-            filename = f"{name}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8')
+            path = self.writer.salvar(df, '.', name)
             self.statistics['records_output'] += len(df)
-            self.logger.info(f"💾 {filename}: {len(df)} registros")
+            self.logger.info(f"💾 {path.name}: {len(df)} registros")
         
         self._create_index()
 
@@ -801,7 +904,7 @@ class ETLLaboralProcessor:
         
         for name, df in self.dimensional_tables.items():
             index.append({
-                'arquivo': f"{name}.csv",
+                'arquivo': self.writer.nome_arquivo(name),
                 'tabela': name,
                 'tipo': 'Dimensional',
                 'registros': len(df),
@@ -810,7 +913,7 @@ class ETLLaboralProcessor:
         
         for name, df in self.fact_tables.items():
             index.append({
-                'arquivo': f"{name}.csv",
+                'arquivo': self.writer.nome_arquivo(name),
                 'tabela': name,
                 'tipo': 'Fato',
                 'registros': len(df),
@@ -844,9 +947,9 @@ class ETLLaboralProcessor:
         ]
         
         for name in self.dimensional_tables.keys():
-            lines.append(f"  {name}.csv")
+            lines.append(f"  {self.writer.nome_arquivo(name)}")
         for name in self.fact_tables.keys():
-            lines.append(f"  {name}.csv")
+            lines.append(f"  {self.writer.nome_arquivo(name)}")
         
         lines.extend(["", "✅ PROCESSAMENTO CONCLUÍDO"])
         
@@ -872,7 +975,7 @@ class ETLLaboralProcessor:
             self.load_reference_tables()
             self.extract_data()
             
-            if not self.raw_data:
+            if not self.raw_data and not self.streams:
                 self.logger.error("❌ Nenhum arquivo carregado!")
                 return False
             
@@ -939,7 +1042,7 @@ def download_results():
         print("📦 Criando ZIP...")
         
         outputs = []
-        for file in Path('.').glob('*.csv'):
+        for file in sorted(Path('.').glob('*.csv')) + sorted(Path('.').glob('*.parquet')) + sorted(Path('.').glob('*.feather')):
             if any(file.name.startswith(x) for x in ['Condicao', 'Grupo', 'Profissao', 'Setor', 'Situacao', 'Fonte', 'Regiao', 'Populacao', 'Empregados', 'INDICE']):
                 outputs.append(file.name)
         
@@ -959,7 +1062,7 @@ def download_results():
     except:
         print("📂 Arquivos salvos no diretório atual")
 
-def run_colab_etl():
+def run_colab_etl(chunk_size: Optional[int] = None):
     """Função principal para Colab"""
     print("🇵🇹 ETL DADOS LABORAIS CENSOS 2021 PORTUGAL")
     print("=" * 50)
@@ -968,7 +1071,7 @@ def run_colab_etl():
     upload_files()
     
     print("\n🔄 Processando...")
-    processor = ETLLaboralProcessor()
+    processor = ETLLaboralProcessor(chunk_size=chunk_size)
     success = processor.run_etl()
     
     if success:
@@ -980,14 +1083,26 @@ def run_colab_etl():
 # MAIN
 # ============================================================================
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Opções da linha de comando (--chunk-size N ou ETL_CHUNK_SIZE=N)"""
+    parser = argparse.ArgumentParser(description='ETL dados laborais Censos 2021')
+    parser.add_argument('--chunk-size', type=int, default=os.environ.get('ETL_CHUNK_SIZE') or None,
+                        help='Linhas por bloco no modo streaming (padrão: quadro inteiro em memória)')
+    # parse_known_args: o kernel do Colab passa os seus próprios argumentos (-f ...)
+    args, _ = parser.parse_known_args(argv)
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        args.chunk_size = None
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
         import google.colab
         print("🔍 Google Colab detectado")
-        success = run_colab_etl()
+        success = run_colab_etl(args.chunk_size)
     except:
         print("🖥️ Execução local")
-        processor = ETLLaboralProcessor()
+        processor = ETLLaboralProcessor(chunk_size=args.chunk_size)
         success = processor.run_etl()
     
     if success:
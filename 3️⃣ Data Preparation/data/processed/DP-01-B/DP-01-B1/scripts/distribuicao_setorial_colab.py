@@ -19,12 +19,24 @@ SAÍDA:
 ============================================================
 """
 
+import sys
+from pathlib import Path
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from google.colab import files
 import io
 
+# Módulos partilhados (3️⃣ Data Preparation/scripts; no Colab, enviar para /content)
+try:
+    _pasta_scripts = Path(__file__).resolve().parents[5] / 'scripts'
+except NameError:
+    _pasta_scripts = Path.cwd()
+if str(_pasta_scripts) not in sys.path:
+    sys.path.insert(0, str(_pasta_scripts))
+
+from resolvedor_nacionalidades import ResolvedorNacionalidades
+
 print("="*60)
 print("PROCESSAMENTO DE DISTRIBUIÇÃO SETORIAL POR NACIONALIDADE")
 print("CAE Rev.3 - Censos 2021 Portugal")
@@ -80,27 +92,22 @@ print()
 print("🗺️  ETAPA 3: Mapeamento de Nacionalidades")
 print("-" * 60)
 
-# Identificar IDs relevantes
-portuguesa_id = df_nacionalidades[
-    df_nacionalidades['nome_nacionalidade'] == 'Nacionalidade portuguesa'
-]['nacionalidade_id'].values[0]
-
-estrangeira_id = df_nacionalidades[
-    df_nacionalidades['nome_nacionalidade'] == 'Nacionalidade estrangeira'
-]['nacionalidade_id'].values[0]
+# Identificar IDs relevantes (tolerante a acentos/mojibake no CSV enviado)
+resolvedor = ResolvedorNacionalidades.de_dimensao(
+    df_nacionalidades, 'nome_nacionalidade', 'nacionalidade_id'
+)
+portuguesa_id = resolvedor.ids[resolvedor.resolver('Nacionalidade portuguesa')]
+estrangeira_id = resolvedor.ids[resolvedor.resolver('Nacionalidade estrangeira')]
 
 print(f"✓ ID Nacionalidade Portuguesa: {portuguesa_id}")
 print(f"✓ ID Nacionalidade Estrangeira: {estrangeira_id}")
 print()
 
 # Criar mapeamento de nacionalidade
-def mapear_nacionalidade(nac_id):
-    if nac_id == portuguesa_id:
-        return 'Portuguesa'
-    elif nac_id == estrangeira_id:
-        return 'Estrangeira (Imigrantes)'
-    else:
-        return None
+ROTULOS_NACIONALIDADE = {
+    portuguesa_id: 'Portuguesa',
+    estrangeira_id: 'Estrangeira (Imigrantes)'
+}
 
 # ============================================================
 # ETAPA 4: PROCESSAMENTO SETORIAL
@@ -114,7 +121,7 @@ df_filtrado = df_empregados_setor[
 ].copy()
 
 # Adicionar mapeamento de nacionalidade
-df_filtrado['nacionalidade'] = df_filtrado['nacionalidade_id'].apply(mapear_nacionalidade)
+df_filtrado['nacionalidade'] = df_filtrado['nacionalidade_id'].map(ROTULOS_NACIONALIDADE)
 
 # Fazer merge com setores (apenas CAE Rev.3)
 df_processado = df_filtrado.merge(
@@ -1,25 +1,41 @@
 """
 ETL AIMA/SEF para Google Colab - v2.0
-Processa RIFA 2020-2022 e RMA 2023-2024
+Processa RIFA 2020-2022 e RMA 2023-2024 (e novos anos RIFA/RMA encontrados)
 Conforme Diagrama ER: diagrama-er-completo-aima-integrado.mermaid
 
 Autor: Cline - Concurso Prepara Portugal 2025
-Execução: 100% Google Colab (Upload CSV → Transform → Download)
+Execução: Google Colab (Upload CSV → Transform → Download) ou local
+          (ETL_FONTE_DADOS=pasta ou .zip com os CSVs)
 """
 
 # ========== SEÇÃO 1: INSTALAÇÃO E IMPORTS ==========
 print("📦 Instalando dependências...")
-!pip install pandas -q
+# !pip install pandas -q
 
+import sys
+from pathlib import Path
 import pandas as pd
 import io
-from google.colab import files
 import warnings
 warnings.filterwarnings('ignore')
 
+# Módulos partilhados (3️⃣ Data Preparation/scripts)
+try:
+    _pasta_scripts = Path(__file__).resolve().parents[4] / 'scripts'
+except NameError:
+    _pasta_scripts = Path.cwd()
+if str(_pasta_scripts) not in sys.path:
+    sys.path.insert(0, str(_pasta_scripts))
+
+from fontes_dados import criar_fonte
+from ingestao_aima import IngestorAIMA, RegistroParsersAIMA
+from resolvedor_nacionalidades import ResolvedorNacionalidades
+
 print("✅ Dependências instaladas!\n")
 
 # ========== SEÇÃO 2: CONFIGURAÇÕES GLOBAIS ==========
+# Anos conhecidos (exemplos/AnoRelatorio sem dados); os anos processados
+# são os descobertos nos nomes dos CSVs ('<RIFA|RMA><ano> - <tipo>.csv')
 ANOS_CONFIG = {
     2020: 'RIFA',
     2021: 'RIFA',
@@ -28,6 +44,9 @@ ANOS_CONFIG = {
     2024: 'RMA'
 }
 
+# Tipo de ficheiro -> parser (ver @REGISTRO_PARSERS.registrar na secção 3)
+REGISTRO_PARSERS = RegistroParsersAIMA()
+
 TIPO_RELATORIO_MAP = {
     1: 'ConcessaoTitulos',
     2: 'PopulacaoEstrangeira',
@@ -46,12 +65,18 @@ def normalizar_coluna_sexo(valor):
     """Normaliza valores de sexo para M/F"""
     return SEXO_NORMALIZADO.get(valor, valor)
 
-def parse_concessao_residencia(content_str, ano):
+def ler_csv_aima(content_str):
+    """Lê um CSV AIMA/SEF: o ponto separa milhares (28.907 -> 28907)"""
+    return pd.read_csv(io.StringIO(content_str), thousands='.')
+
+@REGISTRO_PARSERS.registrar('concessoes_nac_sexo', r'concessao-titulos-residencia',
+                           descricao='Concessões por Nacionalidade/Sexo')
+def parse_concessao_residencia(content_str, ano, fonte):
     """
     Transforma: concessao-titulos-residencia.csv
     Saída: ConcessoesPorNacionalidadeSexo (long format)
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     # Renomear colunas padronizadas
@@ -73,17 +98,19 @@ def parse_concessao_residencia(content_str, ano):
     
     df_long['sexo_raw'] = df_long['sexo_raw'].map({'homens': 'M', 'mulheres': 'F'})
     df_long['ano'] = ano
-    df_long['fonte'] = ANOS_CONFIG[ano]
+    df_long['fonte'] = fonte
     df_long['tipo_relatorio'] = 1
     
     return df_long[['ano', 'fonte', 'tipo_relatorio', 'nacionalidade_aima_raw', 'sexo_raw', 'quantidade']]
 
-def parse_populacao_estrangeira(content_str, ano):
+@REGISTRO_PARSERS.registrar('pop_est_nac_sexo', r'populacao-estrangeira-residente',
+                           descricao='População Estrangeira por Nacionalidade/Sexo')
+def parse_populacao_estrangeira(content_str, ano, fonte):
     """
     Transforma: populacao-estrangeira-residente.csv
     Saída: PopulacaoEstrangeiraPorNacionalidadeSexo
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     col_map = {
@@ -102,17 +129,19 @@ def parse_populacao_estrangeira(content_str, ano):
     
     df_long['sexo_raw'] = df_long['sexo_raw'].map({'homens': 'M', 'mulheres': 'F'})
     df_long['ano'] = ano
-    df_long['fonte'] = ANOS_CONFIG[ano]
+    df_long['fonte'] = fonte
     df_long['tipo_relatorio'] = 2
     
     return df_long[['ano', 'fonte', 'tipo_relatorio', 'nacionalidade_aima_raw', 'sexo_raw', 'quantidade']]
 
-def parse_despachos_concessao(content_str, ano):
+@REGISTRO_PARSERS.registrar('concessoes_despacho', r'concessao-titulos_despachos',
+                           descricao='Concessões por Despacho')
+def parse_despachos_concessao(content_str, ano, fonte):
     """
     Transforma: concessao-titulos_despachos.csv
     Saída: ConcessoesPorDespacho
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     df = df.rename(columns={
@@ -121,17 +150,19 @@ def parse_despachos_concessao(content_str, ano):
     })
     
     df['ano'] = ano
-    df['fonte'] = ANOS_CONFIG[ano]
+    df['fonte'] = fonte
     df['tipo_relatorio'] = 1
     
     return df[['ano', 'fonte', 'tipo_relatorio', 'codigo_despacho', 'concessoes']]
 
-def parse_despachos_descricao(content_str):
+@REGISTRO_PARSERS.registrar('despacho_dim', r'despachos-descricao',
+                           descricao='Despachos (Dimensão)')
+def parse_despachos_descricao(content_str, ano=None, fonte=None):
     """
     Transforma: despachos-descricao.csv
     Saída: Despacho (dimensão)
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     df = df.rename(columns={
@@ -141,12 +172,14 @@ def parse_despachos_descricao(content_str):
     
     return df[['codigo_despacho', 'descricao']]
 
-def parse_distribuicao_etaria_concessoes(content_str, ano):
+@REGISTRO_PARSERS.registrar('dist_etaria_conc', r'concessao-titulos_distribuicao-etaria',
+                           descricao='Distribuição Etária de Concessões')
+def parse_distribuicao_etaria_concessoes(content_str, ano, fonte):
     """
     Transforma: concessao-titulos_distribuicao-etaria.csv
     Saída: DistribuicaoEtariaConcessoes
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     df = df.rename(columns={
@@ -164,17 +197,19 @@ def parse_distribuicao_etaria_concessoes(content_str, ano):
     
     df_long['sexo_raw'] = df_long['sexo_raw'].map({'homens': 'M', 'mulheres': 'F'})
     df_long['ano'] = ano
-    df_long['fonte'] = ANOS_CONFIG[ano]
+    df_long['fonte'] = fonte
     df_long['tipo_relatorio'] = 1
     
     return df_long[['ano', 'fonte', 'tipo_relatorio', 'grupo_etario_raw', 'sexo_raw', 'quantidade']]
 
-def parse_motivos_concessao(content_str, ano):
+@REGISTRO_PARSERS.registrar('concessoes_motivo', r'concessao-titulos_motivo',
+                           descricao='Concessões por Motivo')
+def parse_motivos_concessao(content_str, ano, fonte):
     """
     Transforma: concessao-titulos_motivo.csv
     Saída: ConcessoesPorMotivoNacionalidade
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     # Identificar coluna país
@@ -190,16 +225,18 @@ def parse_motivos_concessao(content_str, ano):
     
     df_long['nacionalidade_aima_raw'] = df_long[pais_col]
     df_long['ano'] = ano
-    df_long['fonte'] = ANOS_CONFIG[ano]
+    df_long['fonte'] = fonte
     
     return df_long[['ano', 'fonte', 'motivo_raw', 'nacionalidade_aima_raw', 'total_motivo']]
 
-def parse_populacao_residente_etaria(content_str, ano):
+@REGISTRO_PARSERS.registrar('pop_res_etaria', r'populacao-residente[-_]distribuicao-etaria',
+                           descricao='População Residente Etária')
+def parse_populacao_residente_etaria(content_str, ano, fonte):
     """
     Transforma: populacao-residente_distribuicao-etaria.csv
     Saída: PopulacaoResidenteEtaria
     """
-    df = pd.read_csv(io.StringIO(content_str))
+    df = ler_csv_aima(content_str)
     df.columns = df.columns.str.strip()
     
     df = df.rename(columns={
@@ -209,78 +246,76 @@ def parse_populacao_residente_etaria(content_str, ano):
     })
     
     df['ano'] = ano
-    df['fonte'] = ANOS_CONFIG[ano]
+    df['fonte'] = fonte
     df['tipo_relatorio'] = 3
     
     return df[['ano', 'fonte', 'tipo_relatorio', 'grupo_etario_raw', 'total']]
 
 # ========== SEÇÃO 4: PROCESSAMENTO POR ANO ==========
 
-def processar_ano(ano):
+def _mostrar_tabelas_ano(ano, dados_ano):
+    """Resumo das tabelas obtidas num ano"""
+    for chave in dados_ano:
+        print(f"  ✓ {REGISTRO_PARSERS.descricao(chave)}")
+    print(f"\n✅ {ano} processado: {len(dados_ano)} tabelas criadas")
+
+def processar_anos(fonte_dados=None, anos=None):
     """
-    Solicita upload e processa todos CSVs de um ano específico
+    Processa todos os anos encontrados na fonte de uma só vez
+    
+    Os anos e a família (RIFA/RMA) vêm dos nomes dos CSVs: uma nova pasta
+    (ex.: RMA2025_csv) entra sem alterar o código. Todos os pares
+    (ano, ficheiro) são lidos e processados em paralelo.
+    
+    Returns:
+        (dados por ano, família por ano)
     """
-    fonte = ANOS_CONFIG[ano]
-    print(f"\n{'='*60}")
-    print(f"📅 ANO {ano} ({fonte})")
-    print(f"{'='*60}")
-    print(f"\n📤 Faça upload dos CSVs de {fonte}{ano}:")
-    print(f"   Exemplo: {fonte}{ano} - concessao-titulos-residencia.csv")
+    fonte_dados = criar_fonte(fonte_dados)
+    print(f"\n📤 CSVs dos relatórios AIMA ({fonte_dados.descricao}):")
+    print(f"   Exemplo: RIFA2020 - concessao-titulos-residencia.csv")
     print(f"   (Você pode selecionar múltiplos arquivos de uma vez)\n")
     
-    uploaded = files.upload()
-    dados_ano = {}
-    
-    print(f"\n🔄 Processando {len(uploaded)} arquivo(s)...")
-    
-    for filename, file_bytes in uploaded.items():
-        content = file_bytes.decode('utf-8')
-        
-        # Detectar tipo de arquivo e aplicar parsing
-        if 'concessao-titulos-residencia' in filename.lower():
-            dados_ano['concessoes_nac_sexo'] = parse_concessao_residencia(content, ano)
-            print(f"  ✓ Concessões por Nacionalidade/Sexo")
-            
-        elif 'populacao-estrangeira-residente' in filename.lower() and 'evolucao' not in filename.lower():
-            dados_ano['pop_est_nac_sexo'] = parse_populacao_estrangeira(content, ano)
-            print(f"  ✓ População Estrangeira por Nacionalidade/Sexo")
-            
-        elif 'concessao-titulos_despachos' in filename.lower():
-            dados_ano['concessoes_despacho'] = parse_despachos_concessao(content, ano)
-            print(f"  ✓ Concessões por Despacho")
-            
-        elif 'despachos-descricao' in filename.lower():
-            dados_ano['despacho_dim'] = parse_despachos_descricao(content)
-            print(f"  ✓ Despachos (Dimensão)")
-            
-        elif 'concessao-titulos_distribuicao-etaria' in filename.lower():
-            dados_ano['dist_etaria_conc'] = parse_distribuicao_etaria_concessoes(content, ano)
-            print(f"  ✓ Distribuição Etária de Concessões")
-            
-        elif 'concessao-titulos_motivo' in filename.lower():
-            dados_ano['concessoes_motivo'] = parse_motivos_concessao(content, ano)
-            print(f"  ✓ Concessões por Motivo")
-            
-        elif 'populacao-residente-distribuicao-etaria' in filename.lower() or \
-             'populacao-residente_distribuicao-etaria' in filename.lower():
-            dados_ano['pop_res_etaria'] = parse_populacao_residente_etaria(content, ano)
-            print(f"  ✓ População Residente Etária")
+    ingestor = IngestorAIMA(REGISTRO_PARSERS)
+    todos_dados = ingestor.ingerir(fonte_dados, anos)
+    print(f"🔄 {len(ingestor.arquivos)} arquivo(s) processados em paralelo "
+          f"({len(todos_dados)} ano(s))")
     
-    print(f"\n✅ {ano} processado: {len(dados_ano)} tabelas criadas")
-    return dados_ano
+    for ano, dados_ano in todos_dados.items():
+        print(f"\n{'='*60}")
+        print(f"📅 ANO {ano} ({ingestor.familias[ano]})")
+        print(f"{'='*60}")
+        _mostrar_tabelas_ano(ano, dados_ano)
+    
+    if ingestor.sem_parser:
+        print(f"\n  ⚠️  {len(ingestor.sem_parser)} arquivo(s) sem parser registado (ignorados):")
+        for nome in ingestor.sem_parser:
+            print(f"     • {Path(nome).name}")
+    
+    familias = {ano: ingestor.familias[ano] for ano in todos_dados}
+    return todos_dados, familias
+
+def processar_ano(ano, fonte_dados=None):
+    """
+    Localiza (ou solicita upload) e processa todos CSVs de um ano específico
+    """
+    todos_dados, _ = processar_anos(fonte_dados, anos={ano})
+    return todos_dados.get(ano, {})
 
 # ========== SEÇÃO 5: CONSTRUÇÃO DE DIMENSÕES ==========
 
-def construir_dimensoes(todos_dados):
+def construir_dimensoes(todos_dados, fonte_dados=None, familias=None):
     """
     Constrói tabelas de dimensão únicas a partir dos dados de todos os anos
+    
+    Args:
+        familias: Ano -> família (RIFA/RMA) dos anos processados (None = ANOS_CONFIG)
     """
     print(f"\n{'='*60}")
     print("🏗️  CONSTRUINDO DIMENSÕES GLOBAIS")
     print(f"{'='*60}\n")
     
     # AnoRelatorio
-    ano_dim = pd.DataFrame(list(ANOS_CONFIG.items()), columns=['ano', 'fonte'])
+    ano_dim = pd.DataFrame(sorted((familias or ANOS_CONFIG).items()), columns=['ano', 'fonte'])
     print(f"  ✓ AnoRelatorio: {len(ano_dim)} linhas")
     
     # TipoRelatorio
@@ -295,13 +330,13 @@ def construir_dimensoes(todos_dados):
     print(f"  ✓ Sexo: {len(sexo_dim)} linhas")
     
     # Nacionalidade (DIMENSÃO COMPARTILHADA - solicitar CSV processado)
-    print(f"\n📤 Upload necessário: Nacionalidade.csv (dimensão compartilhada)")
+    print(f"\n📤 Necessário: Nacionalidade.csv (dimensão compartilhada)")
     print("   Localização: 3️⃣ Data Preparation/data/processed/DP-01-A/Nacionalidade.csv")
-    uploaded_nac = files.upload()
+    fonte_dados = criar_fonte(fonte_dados)
+    nac_file = fonte_dados.localizar('Nacionalidade.csv')
     
-    if uploaded_nac:
-        nac_file = list(uploaded_nac.keys())[0]
-        nacionalidade_base = pd.read_csv(io.BytesIO(uploaded_nac[nac_file]))
+    if nac_file:
+        nacionalidade_base = fonte_dados.ler_csv(nac_file)
         print(f"  ✓ Nacionalidade (base): {len(nacionalidade_base)} linhas\n")
     else:
         print("  ⚠️  Nacionalidade.csv não carregado - criando base mínima\n")
@@ -323,11 +358,23 @@ def construir_dimensoes(todos_dados):
     nacionalidade_aima_dim['nacionalidade_aima_id'] = range(1, len(nacionalidade_aima_dim) + 1)
     
     # MAPEAMENTO: NacionalidadeAIMA -> Nacionalidade (FK)
-    # Fazer merge fuzzy/manual mapping (simplified version)
-    nacionalidade_aima_dim['nacionalidade_id'] = None  # FK placeholder
-    # Nota: Mapeamento completo requer lógica adicional ou tabela auxiliar
+    # Variantes/acentos/mojibake + correspondência aproximada; países sem
+    # entrada própria na dimensão partilhada ficam sem FK (o id 11 é o total
+    # 'Nacionalidade estrangeira' e não pode receber países individuais)
+    resolvedor = ResolvedorNacionalidades.de_dimensao(
+        nacionalidade_base, 'nome_nacionalidade', 'nacionalidade_id'
+    )
+    nacionalidade_aima_dim['nacionalidade_id'] = resolvedor.resolver_ids(
+        nacionalidade_aima_dim['nome_nacionalidade_aima']
+    )
+    mapeadas = nacionalidade_aima_dim['nacionalidade_id'].notna().sum()
+    sem_fk = len(nacionalidade_aima_dim) - mapeadas
     
-    print(f"  ✓ NacionalidadeAIMA: {len(nacionalidade_aima_dim)} linhas (com FK para Nacionalidade)")
+    print(f"  ✓ NacionalidadeAIMA: {len(nacionalidade_aima_dim)} linhas "
+          f"(FK para Nacionalidade: {mapeadas}/{len(nacionalidade_aima_dim)})")
+    if sem_fk:
+        print(f"  ⚠️  {sem_fk} nacionalidades AIMA sem entrada em Nacionalidade "
+              f"(nacionalidade_id nulo)")
     
     # Despacho (união de todos despachos)
     despachos = []
@@ -398,9 +445,13 @@ def consolidar_fatos(todos_dados):
 
 # ========== SEÇÃO 7: EXECUÇÃO PRINCIPAL ==========
 
-def main():
+def main(fonte_dados=None, output_dir=None):
     """
     Pipeline ETL completo
+    
+    Args:
+        fonte_dados: Pasta, arquivo .zip ou 'colab' (None = ETL_FONTE_DADOS / Colab / pasta atual)
+        output_dir: Pasta de saída (None = /content/data no Colab, ./data localmente)
     """
     import os
     
@@ -408,19 +459,20 @@ def main():
     print("🚀 ETL AIMA/SEF - INÍCIO")
     print("="*60)
     
-    # Processar todos os anos
-    todos_dados = {}
-    for ano in sorted(ANOS_CONFIG.keys()):
-        todos_dados[ano] = processar_ano(ano)
+    fonte_dados = criar_fonte(fonte_dados)
+    
+    # Processar todos os anos (descobertos na fonte, em paralelo)
+    todos_dados, familias = processar_anos(fonte_dados)
     
     # Construir dimensões
-    dimensoes = construir_dimensoes(todos_dados)
+    dimensoes = construir_dimensoes(todos_dados, fonte_dados, familias)
     
     # Consolidar fatos
     fatos = consolidar_fatos(todos_dados)
     
-    # Criar pasta data no Colab
-    output_dir = '/content/data'
+    # Criar pasta data (Colab: /content/data)
+    if output_dir is None:
+        output_dir = '/content/data' if os.path.isdir('/content') else 'data'
     os.makedirs(output_dir, exist_ok=True)
     
     # Salvar todos os CSVs na pasta
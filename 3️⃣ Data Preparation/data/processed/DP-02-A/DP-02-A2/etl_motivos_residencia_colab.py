@@ -1,6 +1,6 @@
 """
 ETL - Motivos de Concessão de Títulos de Residência (2020-2024)
-Google Colab - Script Modular
+Google Colab ou execução local - Script Modular
 Concurso Prepara Portugal 2025
 
 Objetivo: Consolidar dados históricos de motivos de concessão de títulos de residência
@@ -17,14 +17,13 @@ print("ETL - MOTIVOS DE CONCESSÃO DE TÍTULOS DE RESIDÊNCIA (2020-2024)")
 print("="*70)
 print("\n📦 Instalando e importando bibliotecas...\n")
 
-# Instalação silenciosa
-!pip install pandas numpy -q
+# Instalação silenciosa (apenas no Colab)
+# !pip install pandas numpy -q
 
 # Importações
+import sys
+from pathlib import Path
 import pandas as pd
-import numpy as np
-from google.colab import files
-import io
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -36,11 +35,26 @@ pd.set_option('display.width', None)
 print("✅ Bibliotecas carregadas com sucesso!")
 print("\n📂 Criando estrutura de diretórios...\n")
 
+# Módulos partilhados (3️⃣ Data Preparation/scripts)
+try:
+    _pasta_scripts = Path(__file__).resolve().parents[4] / 'scripts'
+except NameError:
+    _pasta_scripts = Path.cwd()
+if str(_pasta_scripts) not in sys.path:
+    sys.path.insert(0, str(_pasta_scripts))
+
+from fontes_dados import criar_fonte, carregar_em_paralelo, entregar_arquivo
+from layout_aima import classificar_colunas, para_formato_longo
+
+# Fonte dos CSVs: upload no Colab, ou pasta / .zip em ETL_FONTE_DADOS
+FONTE = criar_fonte()
+
 # Criar estrutura de diretórios
 import os
-os.makedirs('/content/data/processed', exist_ok=True)
+PASTA_SAIDA = '/content/data/processed' if os.path.isdir('/content') else os.path.join('data', 'processed')
+os.makedirs(PASTA_SAIDA, exist_ok=True)
 
-print("✅ Diretório '/content/data/processed/' criado!")
+print(f"✅ Diretório '{PASTA_SAIDA}/' criado!")
 
 
 # ============================================================================
@@ -50,39 +64,37 @@ print("\n" + "="*70)
 print("PARTE 2: FUNÇÃO DE UPLOAD DE ARQUIVOS")
 print("="*70 + "\n")
 
-def solicitar_arquivo_csv(nome_arquivo, descricao=""):
+def solicitar_arquivo_csv(nome_arquivo, descricao="", fonte=None):
     """
-    Solicita upload individual de arquivo CSV com nome específico.
+    Localiza (ou solicita upload de) um arquivo CSV com nome específico.
     
     Args:
         nome_arquivo (str): Nome esperado do arquivo CSV
         descricao (str): Descrição opcional do arquivo
+        fonte (FonteDados): Fonte dos arquivos (padrão: FONTE)
         
     Returns:
         pd.DataFrame: DataFrame pandas com os dados do arquivo
         
     Raises:
-        ValueError: Se o upload falhar ou arquivo inválido
+        ValueError: Se o arquivo não for encontrado ou for inválido
     """
-    print(f"📤 Por favor, faça upload do arquivo: {nome_arquivo}.csv")
+    fonte = fonte or FONTE
+    print(f"📤 Arquivo: {nome_arquivo}.csv ({fonte.descricao})")
     if descricao:
         print(f"   Descrição: {descricao}")
     print(f"   {'-'*60}")
     
     try:
-        # Solicitar upload
-        uploaded = files.upload()
+        # Localizar arquivo (no Colab abre o diálogo de upload)
+        arquivo_carregado = fonte.localizar(f"{nome_arquivo}.csv")
         
-        # Validar upload
-        if not uploaded:
+        # Validar
+        if arquivo_carregado is None:
             raise ValueError("❌ Nenhum arquivo foi carregado!")
         
-        # Obter primeiro arquivo carregado
-        arquivo_carregado = list(uploaded.keys())[0]
-        conteudo = uploaded[arquivo_carregado]
-        
         # Ler CSV
-        df = pd.read_csv(io.BytesIO(conteudo))
+        df = fonte.ler_csv(arquivo_carregado)
         
         print(f"   ✅ Arquivo '{arquivo_carregado}' carregado com sucesso!")
         print(f"   📊 Dimensões: {df.shape[0]} linhas x {df.shape[1]} colunas\n")
@@ -112,6 +124,12 @@ ANOS = [2020, 2021, 2022, 2023, 2024]
 print("📋 Serão solicitados arquivos CSV para os anos: 2020-2024")
 print("   Formato esperado: ConcessoesPorMotivoNacionalidade_AAAA.csv\n")
 
+# Ler os arquivos de todos os anos em paralelo (os ausentes são pedidos
+# individualmente abaixo)
+carregados = carregar_em_paralelo(
+    FONTE, {ano: f"ConcessoesPorMotivoNacionalidade_{ano}.csv" for ano in ANOS}
+)
+
 # Carregar dados de cada ano
 for ano in ANOS:
     print(f"\n{'─'*70}")
@@ -123,7 +141,12 @@ for ano in ANOS:
     descricao = f"Dados de motivos de concessão para o ano {ano}"
     
     try:
-        df = solicitar_arquivo_csv(nome_arquivo, descricao)
+        if ano in carregados:
+            arquivo_carregado, df = carregados[ano]
+            print(f"   ✅ Arquivo '{arquivo_carregado}' carregado com sucesso!")
+            print(f"   📊 Dimensões: {df.shape[0]} linhas x {df.shape[1]} colunas\n")
+        else:
+            df = solicitar_arquivo_csv(nome_arquivo, descricao)
         
         # Exibir primeiras linhas
         print(f"   🔍 Primeiras 3 linhas do arquivo:\n")
@@ -141,7 +164,7 @@ for ano in ANOS:
 print(f"\n{'='*70}")
 print(f"✅ CARREGAMENTO CONCLUÍDO!")
 print(f"   Total de anos carregados: {len(dados_anos)}/{len(ANOS)}")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -155,6 +178,10 @@ def padronizar_colunas_motivos(df, ano):
     """
     Padroniza nomes de colunas relacionadas a motivos de residência.
     
+    O papel de cada coluna (motivo, nacionalidade, total, ano) é detetado
+    pelo nome e pelo tipo dos valores (layout_aima.classificar_colunas);
+    tabelas com motivos nas colunas (formato largo) passam a formato longo.
+    
     Args:
         df (pd.DataFrame): DataFrame com dados brutos
         ano (int): Ano de referência dos dados
@@ -164,50 +191,32 @@ def padronizar_colunas_motivos(df, ano):
     """
     # Copiar DataFrame
     df_padronizado = df.copy()
+    df_padronizado.columns = df_padronizado.columns.str.strip()
     
-    # Dicionário de mapeamento de colunas
-    mapeamento_colunas = {
-        # Variações de motivo
-        'motivo_raw': 'motivo',
-        'Motivo': 'motivo',
-        'MOTIVO': 'motivo',
-        'motivo_concessao': 'motivo',
-        
-        # Variações de nacionalidade
-        'nacionalidade_aima_raw': 'nacionalidade',
-        'Nacionalidade': 'nacionalidade',
-        'NACIONALIDADE': 'nacionalidade',
-        'pais': 'nacionalidade',
-        'país': 'nacionalidade',
-        
-        # Variações de total
-        'total_motivo': 'total',
-        'Total': 'total',
-        'TOTAL': 'total',
-        'quantidade': 'total',
-        'concessoes': 'total'
-    }
-    
-    # Aplicar mapeamento
-    df_padronizado.rename(columns=mapeamento_colunas, inplace=True)
+    # Detetar papéis das colunas
+    papeis = classificar_colunas(df_padronizado)
     
     # Garantir colunas mínimas necessárias
-    colunas_obrigatorias = ['motivo', 'total']
-    colunas_faltantes = [col for col in colunas_obrigatorias if col not in df_padronizado.columns]
+    if papeis['formato'] == 'largo':
+        colunas_faltantes = [] if papeis['colunas_motivos'] else ['motivo']
+    else:
+        colunas_faltantes = [
+            papel for papel in ('motivo', 'total') if papeis[f'coluna_{papel}'] is None
+        ]
     
     if colunas_faltantes:
         raise ValueError(f"Colunas obrigatórias faltando: {colunas_faltantes}")
     
+    # Renomear para motivo / nacionalidade / total (e ano)
+    df_padronizado = para_formato_longo(df_padronizado, papeis)
+    if papeis['coluna_ano'] is not None:
+        df_padronizado = df_padronizado.rename(columns={papeis['coluna_ano']: 'ano'})
+    
     # Adicionar coluna de ano se não existir
     if 'ano' not in df_padronizado.columns:
         df_padronizado['ano'] = ano
     
-    # Limpar espaços em branco
-    df_padronizado.columns = df_padronizado.columns.str.strip()
-    if 'motivo' in df_padronizado.columns:
-        df_padronizado['motivo'] = df_padronizado['motivo'].str.strip()
-    
-    print(f"   ✅ Ano {ano}: {len(df_padronizado)} registros padronizados")
+    print(f"   ✅ Ano {ano}: {len(df_padronizado)} registros padronizados ({papeis['formato']})")
     print(f"      Colunas: {list(df_padronizado.columns)}")
     
     return df_padronizado
@@ -228,7 +237,7 @@ for ano, df in dados_anos.items():
 print(f"\n{'='*70}")
 print(f"✅ PADRONIZAÇÃO CONCLUÍDA!")
 print(f"   Anos padronizados: {len(dados_padronizados)}")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -319,7 +328,7 @@ for ano, df in dados_padronizados.items():
 
 print(f"{'='*70}")
 print(f"✅ MAPEAMENTO DE CATEGORIAS CONCLUÍDO!")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -354,7 +363,7 @@ print(df_agrupado.head(10).to_string(index=False))
 
 print(f"\n{'='*70}")
 print(f"✅ CONSOLIDAÇÃO TEMPORAL CONCLUÍDA!")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -394,7 +403,7 @@ print(df_final.head(15).to_string(index=False))
 
 print(f"\n{'='*70}")
 print(f"✅ CÁLCULO DE PERCENTAGENS CONCLUÍDO!")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -405,7 +414,7 @@ print("PARTE 8: GERAÇÃO DE SAÍDA")
 print("="*70 + "\n")
 
 # Definir caminho de saída
-ARQUIVO_SAIDA = '/content/data/processed/motivos_residencia_2020_2024.csv'
+ARQUIVO_SAIDA = os.path.join(PASTA_SAIDA, 'motivos_residencia_2020_2024.csv')
 
 print(f"💾 Salvando dados finais em: {ARQUIVO_SAIDA}\n")
 
@@ -424,7 +433,7 @@ print(df_final.tail(10).to_string(index=False))
 
 print(f"\n{'='*70}")
 print(f"✅ GERAÇÃO DE SAÍDA CONCLUÍDA!")
-print(f"={'*70}\n")
+print(f"{'='*70}\n")
 
 
 # ============================================================================
@@ -437,12 +446,12 @@ print("="*70 + "\n")
 print(f"📥 Preparando download de: {ARQUIVO_SAIDA}\n")
 
 try:
-    # Download do arquivo
-    files.download(ARQUIVO_SAIDA)
+    # Download do arquivo (fora do Colab o arquivo fica em PASTA_SAIDA)
+    entregar_arquivo(ARQUIVO_SAIDA)
     
-    print(f"   ✅ Download iniciado com sucesso!")
+    print(f"   ✅ Arquivo entregue com sucesso!")
     print(f"   📂 Arquivo: motivos_residencia_2020_2024.csv")
-    print(f"   📍 Localização: /content/data/processed/")
+    print(f"   📍 Localização: {PASTA_SAIDA}/")
     
 except Exception as e:
     print(f"   ❌ Erro ao fazer download: {str(e)}")
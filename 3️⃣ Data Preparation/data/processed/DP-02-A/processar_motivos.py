@@ -1,6 +1,29 @@
 import os
+from pathlib import Path
 import pandas as pd
 
+# Registo de parsers / ingestão paralela / deteção de layout compartilhados
+# (3️⃣ Data Preparation/scripts/)
+try:
+    from ingestao_aima import IngestorAIMA, RegistroParsersAIMA
+except ImportError:
+    import sys
+    sys.path.append(str(Path(__file__).resolve().parents[3] / 'scripts'))
+    from ingestao_aima import IngestorAIMA, RegistroParsersAIMA
+from layout_aima import CAMINHO_CACHE_LAYOUTS, DetetorLayoutAIMA
+
+# Layout de cada ficheiro (largo/longo, separador, codificação, colunas)
+# detetado uma vez e guardado por impressão digital
+DETETOR_LAYOUT = DetetorLayoutAIMA(caminho_cache=CAMINHO_CACHE_LAYOUTS)
+
+REGISTRO_MOTIVOS = RegistroParsersAIMA()
+
+@REGISTRO_MOTIVOS.registrar('motivos', r'concessao-titulos_motivo', descricao='Concessões por Motivo',
+                            binario=True)
+def ler_motivos(conteudo, ano, familia):
+    """CSV de concessões por motivo de um ano, em formato longo (nacionalidade, motivo, total)"""
+    return DETETOR_LAYOUT.ler(conteudo)
+
 def processar_motivos_residencia():
     print("🚀 INICIANDO PROCESSAMENTO DE MOTIVOS DE RESIDÊNCIA")
     print("=" * 50)
@@ -8,61 +31,42 @@ def processar_motivos_residencia():
     # Configuração do caminho
     caminho_base = "2️⃣ Data Understanding/data/raw/aima/extraidas/"
     
-    # Anos para processar
-    anos_config = [
-        ('2020', 'RIFA2020_csv'),
-        ('2021', 'RIFA2021_csv'),
-        ('2022', 'RIFA2022_csv'), 
-        ('2023', 'RMA2023_csv'),
-        ('2024', 'RMA2024_csv')
-    ]
+    # Anos descobertos pelas pastas/ficheiros RIFA<ano>_csv, RMA<ano>_csv, ...
+    # (um novo ano entra sem alterar o código); lidos todos em paralelo
+    ingestor = IngestorAIMA(REGISTRO_MOTIVOS)
+    lidos = ingestor.ingerir(caminho_base)
     
     dados_todos = []
     
-    for ano, pasta in anos_config:
+    # Anos com relatórios na fonte (mesmo sem o ficheiro de motivos)
+    for ano_relatorio in sorted(ingestor.familias):
+        ano = str(ano_relatorio)
         print(f"\n📅 PROCESSANDO ANO {ano}...")
         
-        caminho_pasta = os.path.join(caminho_base, pasta)
-        
-        # Encontrar arquivo de concessões por motivo
-        arquivos = os.listdir(caminho_pasta)
-        arquivo_concessao = None
-        
-        for arquivo in arquivos:
-            if 'concessao' in arquivo.lower() and 'motivo' in arquivo.lower():
-                arquivo_concessao = arquivo
-                break
-        
+        arquivo_concessao = ingestor.arquivos.get((ano_relatorio, 'motivos'))
         if not arquivo_concessao:
             print(f"   ❌ Arquivo de motivos não encontrado para {ano}")
             continue
             
-        print(f"   📂 Arquivo: {arquivo_concessao}")
+        print(f"   📂 Arquivo: {Path(arquivo_concessao).name}")
         
-        try:
-            # Ler o arquivo
-            caminho_arquivo = os.path.join(caminho_pasta, arquivo_concessao)
-            
-            # Tentar diferentes encodings
-            try:
-                df = pd.read_csv(caminho_arquivo, sep=';', encoding='utf-8')
-            except:
-                try:
-                    df = pd.read_csv(caminho_arquivo, sep=';', encoding='latin1')
-                except:
-                    df = pd.read_csv(caminho_arquivo, sep=';', encoding='iso-8859-1')
-            
-            print(f"   ✅ Carregado: {len(df)} registros")
-            print(f"   📊 Colunas: {list(df.columns)}")
-            print(f"   🔍 Primeiras linhas:")
-            print(df.head(2))
-            
-            # Adicionar coluna de ano
-            df['Ano'] = ano
-            dados_todos.append(df)
-            
-        except Exception as e:
-            print(f"   ❌ Erro ao ler arquivo: {e}")
+        df = lidos[ano_relatorio].get('motivos')
+        if df is None:
+            print(f"   ❌ Erro ao ler arquivo: {ingestor.erros.get(arquivo_concessao)}")
+            continue
+        
+        layout = df.attrs['layout']
+        print(f"   ✅ Carregado: {len(df)} registros")
+        print(f"   📊 Layout: {layout['formato']} (sep={layout['separador']!r}, {layout['codificacao']}, "
+              f"colunas: {layout['usecols']})")
+        print(f"   🔍 Primeiras linhas:")
+        print(df.head(2))
+        
+        # Adicionar coluna de ano
+        df['Ano'] = ano
+        dados_todos.append(df)
+    
+    DETETOR_LAYOUT.guardar_cache()
     
     # VERIFICAR SE TEMOS DADOS
     if not dados_todos:
@@ -71,80 +75,16 @@ def processar_motivos_residencia():
     
     print(f"\n✅ DADOS CARREGADOS: {len(dados_todos)} anos")
     
-    # PROCESSAR CADA ANO SEPARADAMENTE (estruturas diferentes)
+    # Todos os anos já vêm em formato longo (nacionalidade, motivo, total),
+    # qualquer que seja o layout do ficheiro de origem
     resultados_finais = []
     
     for df in dados_todos:
         ano = df['Ano'].iloc[0]
-        print(f"\n🎯 PROCESSANDO ESTRUTURA DO ANO {ano}...")
-        
-        # Ver estrutura específica de cada ano
-        colunas = df.columns.tolist()
-        primeira_linha = df.iloc[0].tolist() if len(df) > 0 else []
-        
-        print(f"   Colunas: {colunas}")
-        print(f"   Primeira linha: {primeira_linha[:3]}...")  # Mostra só os primeiros valores
-        
-        # ANOS 2020, 2021, 2022 - Estrutura com países nas linhas
-        if ano in ['2020', '2021', '2022']:
-            # Esses arquivos têm países nas linhas e motivos nas colunas
-            # Precisamos transformar: de wide para long format
-            try:
-                # A primeira coluna geralmente é o país
-                coluna_pais = colunas[0]
-                
-                # Identificar colunas de motivos (não são 'Ano' e não são a primeira)
-                colunas_motivos = []
-                for col in colunas:
-                    if col != 'Ano' and col != coluna_pais:
-                        # Verificar se a coluna tem valores numéricos
-                        if pd.to_numeric(df[col].iloc[0], errors='coerce') is not None:
-                            colunas_motivos.append(col)
-                
-                print(f"   🎯 Colunas de motivos identificadas: {colunas_motivos}")
-                
-                if colunas_motivos:
-                    # Transformar para formato longo
-                    df_long = pd.melt(df, 
-                                    id_vars=[coluna_pais, 'Ano'], 
-                                    value_vars=colunas_motivos,
-                                    var_name='Motivo', 
-                                    value_name='Total')
-                    
-                    # Converter total para numérico
-                    df_long['Total'] = pd.to_numeric(df_long['Total'], errors='coerce')
-                    
-                    # Limpar dados
-                    df_long = df_long.dropna(subset=['Total'])
-                    
-                    resultados_finais.append(df_long)
-                    print(f"   ✅ {ano}: {len(df_long)} registros processados")
-                
-            except Exception as e:
-                print(f"   ❌ Erro ao processar {ano}: {e}")
-        
-        # ANOS 2023, 2024 - Estrutura com motivos nas linhas
-        elif ano in ['2023', '2024']:
-            try:
-                # Esses anos têm motivos diretamente nas linhas
-                # A primeira coluna é o motivo, a segunda é o total
-                coluna_motivo = colunas[0]
-                coluna_total = colunas[1] if len(colunas) > 1 else None
-                
-                if coluna_total:
-                    # Criar dataframe padronizado
-                    df_processed = df[[coluna_motivo, coluna_total, 'Ano']].copy()
-                    df_processed.columns = ['Motivo', 'Total', 'Ano']
-                    
-                    # Converter total para numérico
-                    df_processed['Total'] = pd.to_numeric(df_processed['Total'], errors='coerce')
-                    df_processed = df_processed.dropna(subset=['Total'])
-                    
-                    resultados_finais.append(df_processed)
-                    print(f"   ✅ {ano}: {len(df_processed)} registros processados")
-                    
-            except Exception as e:
-                print(f"   ❌ Erro ao processar {ano}: {e}")
+        df_processed = df.rename(columns={'motivo': 'Motivo', 'total': 'Total'})
+        df_processed = df_processed.dropna(subset=['Total'])
+        resultados_finais.append(df_processed)
+        print(f"   ✅ {ano}: {len(df_processed)} registros processados")
     
     # COMBINAR TODOS OS RESULTADOS
     if not resultados_finais:
@@ -170,12 +110,16 @@ def processar_motivos_residencia():
         'TRABALHO INDEPENDENTE': 'ATIVIDADE PROFISSIONAL',
         'ATIVIDADE PROFISSIONAL': 'ATIVIDADE PROFISSIONAL',
         'ATIVIDADE PROFISSIONAL ': 'ATIVIDADE PROFISSIONAL',
+        'ATIVIDADE PROFISSIONAL (%)': 'ATIVIDADE PROFISSIONAL',
+        'ACTIVIDADE PROFISSIONAL': 'ATIVIDADE PROFISSIONAL',
         'ESTUDO': 'ESTUDO',
+        'ESTUDO (%)': 'ESTUDO',
         'REAGRUPAMENTO FAMILIAR': 'REAGRUPAMENTO FAMILIAR',
         'REAGRUPAMENTO FAMILIAR (%)': 'REAGRUPAMENTO FAMILIAR',
         'ARTIGO 89': 'REAGRUPAMENTO FAMILIAR',
         'ARTIGO 87A': 'AR CPLP',
         'AR CPLP': 'AR CPLP',
+        'ACORDO CPLP': 'AR CPLP',
         'CRS': 'OUTROS',
         'CRS (%)': 'OUTROS',
         'OUTROS MOTIVOS': 'OUTROS',
@@ -9,11 +9,32 @@ Google Colab
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from google.colab import files
 import io
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Módulos compartilhados pelos três pipelines (scripts/*.py)
+try:
+    _PASTA_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    # Google Colab: célula sem __file__ (enviar os módulos compartilhados para /content)
+    _PASTA_SCRIPTS = os.getcwd()
+if _PASTA_SCRIPTS not in sys.path:
+    sys.path.append(_PASTA_SCRIPTS)
+
+from conversor_numerico import ConversorNumerico
+from formatos_tabela import BufferRegistros, EscritorTabelas, EsquemaTabelas, RegistroTabelas
+from agendador_dag import AgendadorDAG, workers_padrao
+from integridade_referencial import IndiceChaves, VerificadorIntegridade, preparar_chaves, orfaos_fk, resumo_nao_resolvidas
+from instrumentacao import INSTRUMENTACAO, PREFIXOS_ETAPAS
+from resolvedor_nacionalidades import RESOLVEDOR_NACIONALIDADES, ResolvedorNacionalidades, VARIANTES_NACIONALIDADES
+from fontes_dados import COLAB_DISPONIVEL, criar_fonte, carregar_em_paralelo, entregar_arquivo
+from exportacao_zip import ExportadorZip
+from cubo_agregados import GRUPOS_NACIONALIDADE
+from dimensoes_conformes import ARMAZEM_DIMENSOES
+
 # ============================================================
 # CONFIGURAÇÕES GLOBAIS
 # ============================================================
@@ -150,6 +171,17 @@ class Config:
     OUTPUT_ENCODING = 'utf-8'
     OUTPUT_SEPARATOR = ','
     OUTPUT_INDEX = False
+    OUTPUT_FORMATO = 'csv'       # 'csv', 'parquet' ou 'feather' (binários exigem pyarrow)
+    OUTPUT_COMPRESSAO = None     # None = padrão do formato (snappy/zstd)
+    
+    # Execução paralela de criar_dim_*/criar_fact_* (agendador_dag.py)
+    DAG_WORKERS = workers_padrao()  # ETL_DAG_WORKERS ou min(4, núcleos); 1 = sequencial
+    DAG_MODO = 'thread'             # 'thread' ou 'processo'
+    
+    # Origem dos ficheiros de entrada (fontes_dados.py): pasta, ficheiro .zip
+    # ou 'colab'. None = ETL_FONTE_DADOS; sem ela, Colab se disponível, senão a pasta atual
+    ORIGEM_DADOS = None
+    PASTA_SAIDA = 'output'          # Ficheiros gerados (download no Colab)
     
     # Tabelas a serem geradas (12 tabelas AIMA)
     TABELAS_DIMENSOES = [
@@ -199,41 +231,12 @@ class Constantes:
     """Constantes utilizadas no pipeline AIMA"""
     
     # Mapeamento de variações de nomes de nacionalidades
-    # Para padronização com ETL_EDUCACAO
-    NACIONALIDADES_VARIANTES = {
-        'Brasil': ['Brasil', 'Brazil', 'Brazilian'],
-        'Angola': ['Angola', 'Angolan'],
-        'Cabo Verde': ['Cabo Verde', 'Cape Verde'],
-        'Guiné-Bissau': ['Guiné-Bissau', 'Guinea-Bissau', 'Guiné Bissau'],
-        'São Tomé e Príncipe': ['São Tomé e Príncipe', 'Sao Tome e Principe', 'S. Tomé e Príncipe'],
-        'Moçambique': ['Moçambique', 'Mozambique'],
-        'Portugal': ['Portugal', 'Portuguese'],
-        'Espanha': ['Espanha', 'Spain', 'Spanish'],
-        'França': ['França', 'France', 'French'],
-        'Reino Unido': ['Reino Unido', 'United Kingdom', 'UK', 'British', 'Reino Unido (British Subject)'],
-        'Itália': ['Itália', 'Italy', 'Italian'],
-        'Alemanha': ['Alemanha', 'Germany', 'German'],
-        'Roménia': ['Roménia', 'Romania', 'Romenia', 'Romanian'],
-        'Ucrânia': ['Ucrânia', 'Ukraine', 'Ukrainian'],
-        'República da Moldávia': ['República da Moldávia', 'Moldova', 'Moldávia'],
-        'Rússia': ['Rússia', 'Russia', 'Russian', 'Federação Russa'],
-        'República Popular da China': ['República Popular da China', 'China', 'Chinese'],
-        'Índia': ['Índia', 'India', 'Indian'],
-        'Paquistão': ['Paquistão', 'Pakistan', 'Pakistani'],
-        'Bangladesh': ['Bangladesh', 'Bangladeshi'],
-        'Nepal': ['Nepal', 'Nepalese']
-    }
+    # Para padronização com ETL_EDUCACAO (tabela partilhada em resolvedor_nacionalidades.py)
+    NACIONALIDADES_VARIANTES = VARIANTES_NACIONALIDADES
     
-    # Continentes
-    CONTINENTES = {
-        'PALOP': ['Angola', 'Cabo Verde', 'Guiné-Bissau', 'Moçambique', 'São Tomé e Príncipe'],
-        'CPLP': ['Angola', 'Brasil', 'Cabo Verde', 'Guiné-Bissau', 'Moçambique', 
-                 'São Tomé e Príncipe', 'Timor-Leste', 'Guiné Equatorial'],
-        'UE': ['Alemanha', 'Espanha', 'França', 'Itália', 'Roménia', 'Portugal'],
-        'LESTE_EUROPEU': ['Ucrânia', 'República da Moldávia', 'Rússia', 'Bulgária'],
-        'ASIA': ['República Popular da China', 'Índia', 'Paquistão', 'Bangladesh', 'Nepal'],
-        'AMERICA': ['Brasil', 'Venezuela', 'EUA', 'Canadá']
-    }
+    # Continentes / grupos de nacionalidades
+    # (tabela partilhada com os cubos de agregados em cubo_agregados.py)
+    CONTINENTES = GRUPOS_NACIONALIDADE
     
     # Tipos de sexo (compatível com ETL_EDUCACAO)
     SEXOS = [
@@ -260,34 +263,25 @@ class Formatadores:
     
     @staticmethod
     def limpar_numero(valor):
-        """Limpa e converte string numérica para número"""
-        if pd.isna(valor) or valor == '':
-            return None
-        
-        valor_str = str(valor)
-        valor_str = valor_str.replace('%', '').replace(' ', '').strip()
-        valor_str = valor_str.replace('.', '').replace(',', '.')
-        
-        try:
-            return float(valor_str)
-        except:
-            return None
+        """
+        Limpa e converte string numérica para número
+        Exemplos: '1.234,56' -> 1234.56, '3,7%' -> 3.7, '34,9 anos' -> 34.9, 'x' -> None
+        """
+        return ConversorNumerico.converter_valor(valor)
+    
+    @staticmethod
+    def limpar_coluna(serie, tipo='float', logger=None):
+        """
+        Versão vetorizada de limpar_numero para uma coluna inteira
+        Retorna float64 (tipo='float') ou Int64 (tipo='int'); células não
+        convertidas ficam nulas e são contadas no aviso do logger
+        """
+        return ConversorNumerico.converter_serie(serie, tipo=tipo, logger=logger)
     
     @staticmethod
     def normalizar_nacionalidade(nome):
-        """Normaliza nome de nacionalidade para padrão"""
-        if pd.isna(nome):
-            return None
-        
-        nome_limpo = str(nome).strip()
-        
-        # Buscar variante conhecida
-        for padrao, variantes in Constantes.NACIONALIDADES_VARIANTES.items():
-            if nome_limpo in variantes:
-                return padrao
-        
-        # Retornar nome limpo se não encontrar
-        return nome_limpo
+        """Normaliza nome de nacionalidade para padrão (nome limpo se não houver variante)"""
+        return RESOLVEDOR_NACIONALIDADES.normalizar(nome)
     
     @staticmethod
     def normalizar_motivo(texto):
@@ -352,8 +346,9 @@ class Formatadores:
 class Logger:
     """Sistema de logging para o pipeline AIMA"""
     
-    def __init__(self, nome_modulo="ETL-AIMA"):
+    def __init__(self, nome_modulo="ETL-AIMA", instrumentacao=None):
         self.nome_modulo = nome_modulo
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO  # partilhada pelo processo
         self.contador_erros = 0
         self.contador_avisos = 0
         self.contador_integracao = 0  # Novo: contador de problemas de integração
@@ -401,6 +396,26 @@ class Logger:
         if atual == total:
             print()
     
+    def medir(self, etapa, linhas_entrada=None):
+        """Context manager: tempo, CPU, linhas e pico de memória de um bloco"""
+        return self.instrumentacao.medir(etapa, self.nome_modulo, linhas_entrada)
+    
+    def instrumentar(self, objeto, prefixos=PREFIXOS_ETAPAS):
+        """Mede cada chamada criar_dim_*/criar_fact_*/carregar_*/exportar_* do objeto"""
+        return self.instrumentacao.instrumentar_objeto(objeto, self.nome_modulo, prefixos)
+    
+    def gravar_metricas(self, caminho):
+        """Grava as métricas das etapas em JSON-lines"""
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Métricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        """Imprime as etapas ordenadas por tempo (mais lentas primeiro)"""
+        self.subsecao("MÉTRICAS POR ETAPA")
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
+    
     def resumo_final(self):
         """Exibe resumo de erros e avisos"""
         print("\n" + "=" * 60)
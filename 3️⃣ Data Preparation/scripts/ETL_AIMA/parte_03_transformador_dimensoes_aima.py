@@ -8,7 +8,7 @@ Google Colab
 
 import pandas as pd
 import numpy as np
-from parte_01_imports_config import Config, Constantes, Formatadores, Logger
+from parte_01_imports_config import Config, Constantes, Formatadores, Logger, AgendadorDAG, IndiceChaves, RegistroTabelas, ResolvedorNacionalidades
 from parte_02_classes_base_ref import DimensaoBase
 
 # ============================================================
@@ -20,7 +20,7 @@ class TransformadorDimensoesAIMA:
     
     def __init__(self, logger=None):
         self.logger = logger or Logger("TransformadorDimensoesAIMA")
-        self.dimensoes = {}
+        self.dimensoes = RegistroTabelas()
     
     def criar_dim_ano_relatorio(self):
         """
@@ -192,39 +192,37 @@ class TransformadorDimensoesAIMA:
         registros = []
         nacionalidade_aima_id = 1
         
-        # Criar lookup de nacionalidades base se disponível
-        lookup_base = {}
-        if dim_nacionalidade_base is not None:
-            for _, row in dim_nacionalidade_base.iterrows():
-                nome_base = row['nome_nacionalidade']
-                id_base = row['nacionalidade_id']
-                lookup_base[nome_base] = id_base
-        
         # Processar cada nacionalidade AIMA
         for nome_aima in sorted(nomes_unicos):
             if pd.isna(nome_aima) or nome_aima == '':
                 continue
             
-            nome_aima_clean = str(nome_aima).strip()
-            
-            # Normalizar para encontrar correspondência
-            nome_normalizado = Formatadores.normalizar_nacionalidade(nome_aima_clean)
-            
-            # Tentar encontrar ID na base
-            nacionalidade_id = lookup_base.get(nome_normalizado, None)
-            
-            if nacionalidade_id is None and len(lookup_base) > 0:
-                self.logger.aviso(f"Nacionalidade '{nome_aima_clean}' sem correspondência em Dim_Nacionalidade")
-            
             registros.append({
                 'nacionalidade_aima_id': nacionalidade_aima_id,
-                'nome_nacionalidade_aima': nome_aima_clean,
-                'nacionalidade_id': nacionalidade_id
+                'nome_nacionalidade_aima': str(nome_aima).strip(),
+                'nacionalidade_id': None
             })
             nacionalidade_aima_id += 1
         
         df_nacionalidade_aima = pd.DataFrame(registros)
         
+        # FK para Dim_Nacionalidade: variantes, grafias e correspondência aproximada;
+        # países sem entrada própria ficam sem FK ('Nacionalidade estrangeira' é um total)
+        if dim_nacionalidade_base is not None and len(df_nacionalidade_aima) > 0:
+            resolvedor = ResolvedorNacionalidades.de_dimensao(
+                dim_nacionalidade_base, 'nome_nacionalidade', 'nacionalidade_id'
+            )
+            nomes = df_nacionalidade_aima['nome_nacionalidade_aima']
+            df_nacionalidade_aima['nacionalidade_id'] = resolvedor.resolver_ids(nomes)
+            
+            sem_fk = nomes[df_nacionalidade_aima['nacionalidade_id'].isna()].tolist()
+            if sem_fk:
+                self.logger.aviso(
+                    f"{len(sem_fk)} nacionalidades AIMA sem correspondência em Dim_Nacionalidade "
+                    f"(nacionalidade_id nulo; a dimensão partilhada não tem entrada própria para estes países), "
+                    f"ex.: {', '.join(sem_fk[:5])}"
+                )
+        
         # Estatísticas de mapeamento
         total = len(df_nacionalidade_aima)
         mapeados = df_nacionalidade_aima['nacionalidade_id'].notna().sum()
@@ -253,24 +251,32 @@ class TransformadorDimensoesAIMA:
         dados_brutos = dados_brutos or {}
         dimensoes_base = dimensoes_base or {}
         
+        # As 5 dimensões são independentes entre si: executadas em paralelo
+        dag = AgendadorDAG(Config.DAG_WORKERS, Config.DAG_MODO, self.logger, "Dimensões AIMA")
+        
         # 1. Dim_AnoRelatorio
-        self.criar_dim_ano_relatorio()
+        dag.adicionar('Dim_AnoRelatorio', self.criar_dim_ano_relatorio)
         
         # 2. Dim_TipoRelatorio
-        self.criar_dim_tipo_relatorio()
+        dag.adicionar('Dim_TipoRelatorio', self.criar_dim_tipo_relatorio)
         
         # 3. Dim_Despacho
         dados_despachos = dados_brutos.get('despachos', None)
-        self.criar_dim_despacho(dados_despachos)
+        dag.adicionar('Dim_Despacho', self.criar_dim_despacho, dados_despachos)
         
         # 4. Dim_MotivoConcessao
         dados_motivos = dados_brutos.get('motivos', None)
-        self.criar_dim_motivo_concessao(dados_motivos)
+        dag.adicionar('Dim_MotivoConcessao', self.criar_dim_motivo_concessao, dados_motivos)
         
         # 5. Dim_NacionalidadeAIMA
         dados_nacionalidades = dados_brutos.get('nacionalidades', [])
         dim_nacionalidade_base = dimensoes_base.get('Dim_Nacionalidade', None)
-        self.criar_dim_nacionalidade_aima(dados_nacionalidades, dim_nacionalidade_base)
+        dag.adicionar('Dim_NacionalidadeAIMA', self.criar_dim_nacionalidade_aima,
+                      dados_nacionalidades, dim_nacionalidade_base)
+        
+        dag.executar()
+        dag.sincronizar(self.dimensoes)
+        dag.relatorio_tempos()
         
         self.logger.secao(f"DIMENSÕES CRIADAS: {len(self.dimensoes)}")
         
@@ -298,6 +304,15 @@ class TransformadorDimensoesAIMA:
 class LookupDimensoesAIMA:
     """Classe para lookup rápido de IDs das dimensões AIMA"""
     
+    # Nome do índice em lote -> atributo com o dict de lookup
+    INDICES = {
+        'ano': 'lookup_ano',
+        'tipo': 'lookup_tipo',
+        'despacho': 'lookup_despacho',
+        'motivo': 'lookup_motivo',
+        'nacionalidade_aima': 'lookup_nac_aima',
+    }
+    
     def __init__(self, dimensoes):
         """
         Args:
@@ -343,6 +358,39 @@ class LookupDimensoesAIMA:
             self.lookup_nac_aima = dict(zip(df_nac_aima['nome_nacionalidade_aima'], df_nac_aima['nacionalidade_aima_id']))
         else:
             self.lookup_nac_aima = {}
+        
+        # Índices para resolução em lote (mesmas chaves dos dicts)
+        self._indices_lote = {}
+        for nome in self.INDICES:
+            self._indice_lote(nome)
+    
+    def _indice_lote(self, nome_indice):
+        """
+        IndiceChaves do dict lookup_* correspondente, reconstruído apenas
+        se o dict for substituído ou mudar de tamanho
+        """
+        mapa = getattr(self, self.INDICES[nome_indice])
+        assinatura = (id(mapa), len(mapa))
+        em_cache = self._indices_lote.get(nome_indice)
+        if em_cache is None or em_cache[0] != assinatura:
+            em_cache = (assinatura, IndiceChaves.de_dict(mapa))
+            self._indices_lote[nome_indice] = em_cache
+        return em_cache[1]
+    
+    def resolver(self, nome_indice, valores):
+        """
+        Resolve uma coluna de chaves naturais numa só passagem
+        
+        Args:
+            nome_indice: 'ano', 'tipo', 'despacho', 'motivo' ou 'nacionalidade_aima'
+            valores: Series/lista de chaves naturais
+            
+        Returns:
+            (ids Int64, máscara das linhas não resolvidas)
+        """
+        if nome_indice not in self.INDICES:
+            raise ValueError(f"Índice desconhecido: {nome_indice}")
+        return self._indice_lote(nome_indice).resolver(valores)
     
     def get_ano_id(self, ano):
         """Retorna ano_id para um ano"""
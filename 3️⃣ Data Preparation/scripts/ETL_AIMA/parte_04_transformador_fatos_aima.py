@@ -8,7 +8,7 @@ Google Colab
 
 import pandas as pd
 import numpy as np
-from parte_01_imports_config import Config, Constantes, Formatadores, Logger
+from parte_01_imports_config import Config, Constantes, Formatadores, Logger, AgendadorDAG, RegistroTabelas, resumo_nao_resolvidas
 from parte_02_classes_base_ref import FatoBase
 from parte_03_transformador_dimensoes_aima import LookupDimensoesAIMA
 
@@ -29,15 +29,106 @@ class TransformadorFatosAIMA:
         self.dimensoes = dimensoes
         self.lookup = lookup
         self.logger = logger or Logger("TransformadorFatosAIMA")
-        self.fatos = {}
+        self.fatos = RegistroTabelas()
         
         # Lookup de Sexo (assumindo compatibilidade com ETL_EDUCACAO)
         self.sexo_lookup = {'Masculino': 1, 'Feminino': 2, 'Homens': 1, 'Mulheres': 2}
     
+    # ============================================================
+    # UTILITÁRIOS COLUNARES
+    # ============================================================
+    
+    @staticmethod
+    def _obter_coluna(dados, nomes, padrao=None):
+        """
+        Retorna a primeira coluna existente entre os nomes alternativos
+        (equivalente a row.get('Ano', row.get('ano')) aplicado à tabela inteira)
+        """
+        for nome in nomes:
+            if nome in dados.columns:
+                return dados[nome]
+        return pd.Series([padrao] * len(dados), index=dados.index, dtype=object)
+    
+    @staticmethod
+    def _mapear_valores_unicos(serie, funcao):
+        """Aplica uma função escalar apenas uma vez por valor distinto da coluna"""
+        unicos = serie.dropna().unique()
+        return serie.map({valor: funcao(valor) for valor in unicos})
+    
+    def _resolver_fk(self, nome_indice, valores):
+        """
+        Resolve uma coluna de chaves naturais via LookupDimensoesAIMA.resolver
+        e avisa quantas linhas ficaram sem correspondência na dimensão
+        """
+        ids, nao_resolvidos = self.lookup.resolver(nome_indice, valores)
+        if nao_resolvidos.any():
+            resumo = resumo_nao_resolvidas(valores, nao_resolvidos)
+            self.logger.aviso(
+                f"FK '{nome_indice}': {resumo['linhas']} linhas sem correspondência "
+                f"({resumo['valores']} valores distintos, ex.: {resumo['amostra_valores']})"
+            )
+        return ids
+    
+    @staticmethod
+    def _id_valido(serie_ids):
+        """Máscara equivalente ao teste 'if id:' (exclui None, NaN e 0)"""
+        return serie_ids.notna() & (serie_ids != 0)
+    
+    @staticmethod
+    def _montar_fato(df, pk_nome, colunas):
+        """
+        Gera PK sequencial e ordena colunas da tabela fato
+        Retorna DataFrame vazio (sem colunas) quando não há registros
+        """
+        if len(df) == 0:
+            return pd.DataFrame()
+        
+        df = df.reset_index(drop=True)
+        df.insert(0, pk_nome, np.arange(1, len(df) + 1, dtype='int64'))
+        return df[[pk_nome] + colunas]
+    
+    def _expandir_por_sexo(self, base, homens, mulheres, chaves):
+        """
+        Converte colunas Homens/Mulheres em linhas (melt), mantendo a ordem
+        original: registro masculino seguido do feminino para cada linha
+        
+        Args:
+            base: DataFrame com as FKs já resolvidas e filtradas
+            homens, mulheres: Series numéricas já limpas (mesmo índice de base)
+            chaves: Colunas de base a manter no resultado
+        """
+        largo = base[chaves].copy()
+        largo['_ordem'] = np.arange(len(largo))
+        largo[self.sexo_lookup['Homens']] = homens.loc[base.index].values
+        largo[self.sexo_lookup['Mulheres']] = mulheres.loc[base.index].values
+        
+        longo = largo.melt(
+            id_vars=chaves + ['_ordem'],
+            value_vars=[self.sexo_lookup['Homens'], self.sexo_lookup['Mulheres']],
+            var_name='sexo_id',
+            value_name='total_homens_mulheres'
+        )
+        longo = longo.sort_values(['_ordem', 'sexo_id'], kind='stable')
+        longo = longo[longo['total_homens_mulheres'] > 0].copy()
+        
+        longo['sexo_id'] = longo['sexo_id'].astype('int64')
+        longo['total_homens_mulheres'] = longo['total_homens_mulheres'].astype('int64')
+        return longo.drop(columns='_ordem')
+    
+    def _lookup_grupo_etario(self, dim_grupo_etario):
+        """Cria lookup faixa_etaria -> grupoetario_id"""
+        if dim_grupo_etario is None:
+            return {}
+        return dict(zip(dim_grupo_etario['faixa_etaria'], dim_grupo_etario['grupoetario_id']))
+    
+    # ============================================================
+    # CRIAÇÃO DOS FATOS
+    # ============================================================
+    
     def criar_fact_concessoes_por_nacionalidade_sexo(self, dados_concessoes):
         """
         Cria Fact_ConcessoesPorNacionalidadeSexo
-        Estrutura: concessao_nac_sexo_id, ano_id, tipo_id, nacionalidade_aima_id, 
+        Estrutura: concessao_nac_sexo_id, ano_id, tipo_id, nacionalidade_aima_id,
                    sexo_id, total_homens_mulheres
         
         Args:
@@ -50,45 +141,26 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de concessões fornecido")
             return pd.DataFrame()
         
-        registros = []
-        concessao_id = 1
         tipo_id = self.lookup.get_tipo_id('Concessão de Títulos')
         
-        for _, row in dados_concessoes.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            nacionalidade = row.get('Nacionalidade', row.get('nacionalidade', row.get('País')))
-            homens = Formatadores.limpar_numero(row.get('Homens', row.get('homens', 0)))
-            mulheres = Formatadores.limpar_numero(row.get('Mulheres', row.get('mulheres', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            nacionalidade_aima_id = self.lookup.get_nacionalidade_aima_id(nacionalidade)
-            
-            if ano_id and nacionalidade_aima_id:
-                # Registro para Homens
-                if homens and homens > 0:
-                    registros.append({
-                        'concessao_nac_sexo_id': concessao_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'nacionalidade_aima_id': nacionalidade_aima_id,
-                        'sexo_id': 1,  # Masculino
-                        'total_homens_mulheres': int(homens)
-                    })
-                    concessao_id += 1
-                
-                # Registro para Mulheres
-                if mulheres and mulheres > 0:
-                    registros.append({
-                        'concessao_nac_sexo_id': concessao_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'nacionalidade_aima_id': nacionalidade_aima_id,
-                        'sexo_id': 2,  # Feminino
-                        'total_homens_mulheres': int(mulheres)
-                    })
-                    concessao_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        base = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_concessoes, ['Ano', 'ano'])),
+            'nacionalidade_aima_id': self._resolver_fk('nacionalidade_aima', self._obter_coluna(
+                dados_concessoes, ['Nacionalidade', 'nacionalidade', 'País']
+            ))
+        }, index=dados_concessoes.index)
+        base = base[self._id_valido(base['ano_id']) & self._id_valido(base['nacionalidade_aima_id'])].astype('int64')
+        base['tipo_id'] = tipo_id
+        
+        homens = Formatadores.limpar_coluna(self._obter_coluna(dados_concessoes, ['Homens', 'homens'], 0))
+        mulheres = Formatadores.limpar_coluna(self._obter_coluna(dados_concessoes, ['Mulheres', 'mulheres'], 0))
+        
+        chaves = ['ano_id', 'tipo_id', 'nacionalidade_aima_id']
+        df_fato = self._montar_fato(
+            self._expandir_por_sexo(base, homens, mulheres, chaves),
+            'concessao_nac_sexo_id',
+            chaves + ['sexo_id', 'total_homens_mulheres']
+        )
         
         self.logger.sucesso(f"Fact_ConcessoesPorNacionalidadeSexo criada: {len(df_fato)} registros")
         self.fatos['Fact_ConcessoesPorNacionalidadeSexo'] = df_fato
@@ -110,29 +182,30 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de despachos fornecido")
             return pd.DataFrame()
         
-        registros = []
-        concessao_id = 1
         tipo_id = self.lookup.get_tipo_id('Concessão de Títulos')
         
-        for _, row in dados_despachos.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            codigo_despacho = row.get('Despacho', row.get('despacho', row.get('codigo_despacho')))
-            total = Formatadores.limpar_numero(row.get('Total', row.get('total', row.get('Concessoes', 0))))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            despacho_id = self.lookup.get_despacho_id(codigo_despacho)
-            
-            if ano_id and despacho_id and total and total > 0:
-                registros.append({
-                    'concessao_despacho_id': concessao_id,
-                    'ano_id': ano_id,
-                    'tipo_id': tipo_id,
-                    'despacho_id': despacho_id,
-                    'concessoes': int(total)
-                })
-                concessao_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        df = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_despachos, ['Ano', 'ano'])),
+            'tipo_id': tipo_id,
+            'despacho_id': self._resolver_fk('despacho', self._obter_coluna(
+                dados_despachos, ['Despacho', 'despacho', 'codigo_despacho']
+            )),
+            'concessoes': Formatadores.limpar_coluna(
+                self._obter_coluna(dados_despachos, ['Total', 'total', 'Concessoes'], 0)
+            )
+        }, index=dados_despachos.index)
+        
+        df = df[
+            self._id_valido(df['ano_id']) &
+            self._id_valido(df['despacho_id']) &
+            (df['concessoes'] > 0)
+        ].copy()
+        for coluna in ['ano_id', 'despacho_id', 'concessoes']:
+            df[coluna] = df[coluna].astype('int64')
+        
+        df_fato = self._montar_fato(
+            df, 'concessao_despacho_id', ['ano_id', 'tipo_id', 'despacho_id', 'concessoes']
+        )
         
         self.logger.sucesso(f"Fact_ConcessoesPorDespacho criada: {len(df_fato)} registros")
         self.fatos['Fact_ConcessoesPorDespacho'] = df_fato
@@ -142,7 +215,7 @@ class TransformadorFatosAIMA:
     def criar_fact_concessoes_por_motivo_nacionalidade(self, dados_motivos):
         """
         Cria Fact_ConcessoesPorMotivoNacionalidade
-        Estrutura: concessao_motivo_nac_id, ano_id, motivo_id, 
+        Estrutura: concessao_motivo_nac_id, ano_id, motivo_id,
                    nacionalidade_aima_id, total_motivo
         
         Args:
@@ -155,30 +228,25 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de motivos fornecido")
             return pd.DataFrame()
         
-        registros = []
-        concessao_id = 1
-        
-        for _, row in dados_motivos.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            motivo = row.get('Motivo', row.get('motivo'))
-            nacionalidade = row.get('Nacionalidade', row.get('nacionalidade', row.get('País')))
-            total = Formatadores.limpar_numero(row.get('Total', row.get('total', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            motivo_id = self.lookup.get_motivo_id(motivo)
-            nacionalidade_aima_id = self.lookup.get_nacionalidade_aima_id(nacionalidade)
-            
-            if ano_id and motivo_id and nacionalidade_aima_id and total and total > 0:
-                registros.append({
-                    'concessao_motivo_nac_id': concessao_id,
-                    'ano_id': ano_id,
-                    'motivo_id': motivo_id,
-                    'nacionalidade_aima_id': nacionalidade_aima_id,
-                    'total_motivo': int(total)
-                })
-                concessao_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        df = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_motivos, ['Ano', 'ano'])),
+            'motivo_id': self._resolver_fk('motivo', self._obter_coluna(dados_motivos, ['Motivo', 'motivo'])),
+            'nacionalidade_aima_id': self._resolver_fk('nacionalidade_aima', self._obter_coluna(
+                dados_motivos, ['Nacionalidade', 'nacionalidade', 'País']
+            )),
+            'total_motivo': Formatadores.limpar_coluna(self._obter_coluna(dados_motivos, ['Total', 'total'], 0))
+        }, index=dados_motivos.index)
+        
+        df = df[
+            self._id_valido(df['ano_id']) &
+            self._id_valido(df['motivo_id']) &
+            self._id_valido(df['nacionalidade_aima_id']) &
+            (df['total_motivo'] > 0)
+        ].astype('int64')
+        
+        df_fato = self._montar_fato(
+            df, 'concessao_motivo_nac_id', ['ano_id', 'motivo_id', 'nacionalidade_aima_id', 'total_motivo']
+        )
         
         self.logger.sucesso(f"Fact_ConcessoesPorMotivoNacionalidade criada: {len(df_fato)} registros")
         self.fatos['Fact_ConcessoesPorMotivoNacionalidade'] = df_fato
@@ -188,7 +256,7 @@ class TransformadorFatosAIMA:
     def criar_fact_populacao_estrangeira_por_nacionalidade_sexo(self, dados_pop_estrangeira):
         """
         Cria Fact_PopulacaoEstrangeiraPorNacionalidadeSexo
-        Estrutura: pop_est_nac_sexo_id, ano_id, tipo_id, 
+        Estrutura: pop_est_nac_sexo_id, ano_id, tipo_id,
                    nacionalidade_aima_id, sexo_id, total_homens_mulheres
         
         Args:
@@ -201,45 +269,26 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de população estrangeira fornecido")
             return pd.DataFrame()
         
-        registros = []
-        pop_id = 1
         tipo_id = self.lookup.get_tipo_id('População Estrangeira Residente')
         
-        for _, row in dados_pop_estrangeira.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            nacionalidade = row.get('Nacionalidade', row.get('nacionalidade', row.get('País')))
-            homens = Formatadores.limpar_numero(row.get('Homens', row.get('homens', 0)))
-            mulheres = Formatadores.limpar_numero(row.get('Mulheres', row.get('mulheres', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            nacionalidade_aima_id = self.lookup.get_nacionalidade_aima_id(nacionalidade)
-            
-            if ano_id and nacionalidade_aima_id:
-                # Registro para Homens
-                if homens and homens > 0:
-                    registros.append({
-                        'pop_est_nac_sexo_id': pop_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'nacionalidade_aima_id': nacionalidade_aima_id,
-                        'sexo_id': 1,  # Masculino
-                        'total_homens_mulheres': int(homens)
-                    })
-                    pop_id += 1
-                
-                # Registro para Mulheres
-                if mulheres and mulheres > 0:
-                    registros.append({
-                        'pop_est_nac_sexo_id': pop_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'nacionalidade_aima_id': nacionalidade_aima_id,
-                        'sexo_id': 2,  # Feminino
-                        'total_homens_mulheres': int(mulheres)
-                    })
-                    pop_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        base = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_pop_estrangeira, ['Ano', 'ano'])),
+            'nacionalidade_aima_id': self._resolver_fk('nacionalidade_aima', self._obter_coluna(
+                dados_pop_estrangeira, ['Nacionalidade', 'nacionalidade', 'País']
+            ))
+        }, index=dados_pop_estrangeira.index)
+        base = base[self._id_valido(base['ano_id']) & self._id_valido(base['nacionalidade_aima_id'])].astype('int64')
+        base['tipo_id'] = tipo_id
+        
+        homens = Formatadores.limpar_coluna(self._obter_coluna(dados_pop_estrangeira, ['Homens', 'homens'], 0))
+        mulheres = Formatadores.limpar_coluna(self._obter_coluna(dados_pop_estrangeira, ['Mulheres', 'mulheres'], 0))
+        
+        chaves = ['ano_id', 'tipo_id', 'nacionalidade_aima_id']
+        df_fato = self._montar_fato(
+            self._expandir_por_sexo(base, homens, mulheres, chaves),
+            'pop_est_nac_sexo_id',
+            chaves + ['sexo_id', 'total_homens_mulheres']
+        )
         
         self.logger.sucesso(f"Fact_PopulacaoEstrangeiraPorNacionalidadeSexo criada: {len(df_fato)} registros")
         self.fatos['Fact_PopulacaoEstrangeiraPorNacionalidadeSexo'] = df_fato
@@ -249,7 +298,7 @@ class TransformadorFatosAIMA:
     def criar_fact_distribuicao_etaria_concessoes(self, dados_etaria, dim_grupo_etario=None):
         """
         Cria Fact_DistribuicaoEtariaConcessoes
-        Estrutura: dist_etaria_conc_id, ano_id, tipo_id, 
+        Estrutura: dist_etaria_conc_id, ano_id, tipo_id,
                    grupoetario_id, sexo_id, total_homens_mulheres
         
         Args:
@@ -263,53 +312,30 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de distribuição etária fornecido")
             return pd.DataFrame()
         
-        registros = []
-        dist_id = 1
         tipo_id = self.lookup.get_tipo_id('Concessão de Títulos')
-        
-        # Criar lookup de grupos etários
-        lookup_etario = {}
-        if dim_grupo_etario is not None:
-            for _, row in dim_grupo_etario.iterrows():
-                faixa = row['faixa_etaria']
-                grupo_id = row['grupoetario_id']
-                lookup_etario[faixa] = grupo_id
-        
-        for _, row in dados_etaria.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            faixa_etaria = Formatadores.extrair_faixa_etaria(row.get('FaixaEtaria', row.get('faixa_etaria')))
-            homens = Formatadores.limpar_numero(row.get('Homens', row.get('homens', 0)))
-            mulheres = Formatadores.limpar_numero(row.get('Mulheres', row.get('mulheres', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            grupoetario_id = lookup_etario.get(faixa_etaria, None)
-            
-            if ano_id and grupoetario_id:
-                # Registro para Homens
-                if homens and homens > 0:
-                    registros.append({
-                        'dist_etaria_conc_id': dist_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'grupoetario_id': grupoetario_id,
-                        'sexo_id': 1,  # Masculino
-                        'total_homens_mulheres': int(homens)
-                    })
-                    dist_id += 1
-                
-                # Registro para Mulheres
-                if mulheres and mulheres > 0:
-                    registros.append({
-                        'dist_etaria_conc_id': dist_id,
-                        'ano_id': ano_id,
-                        'tipo_id': tipo_id,
-                        'grupoetario_id': grupoetario_id,
-                        'sexo_id': 2,  # Feminino
-                        'total_homens_mulheres': int(mulheres)
-                    })
-                    dist_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        lookup_etario = self._lookup_grupo_etario(dim_grupo_etario)
+        
+        faixas = self._mapear_valores_unicos(
+            self._obter_coluna(dados_etaria, ['FaixaEtaria', 'faixa_etaria']),
+            Formatadores.extrair_faixa_etaria
+        )
+        
+        base = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_etaria, ['Ano', 'ano'])),
+            'grupoetario_id': faixas.map(lookup_etario)
+        }, index=dados_etaria.index)
+        base = base[self._id_valido(base['ano_id']) & self._id_valido(base['grupoetario_id'])].astype('int64')
+        base['tipo_id'] = tipo_id
+        
+        homens = Formatadores.limpar_coluna(self._obter_coluna(dados_etaria, ['Homens', 'homens'], 0))
+        mulheres = Formatadores.limpar_coluna(self._obter_coluna(dados_etaria, ['Mulheres', 'mulheres'], 0))
+        
+        chaves = ['ano_id', 'tipo_id', 'grupoetario_id']
+        df_fato = self._montar_fato(
+            self._expandir_por_sexo(base, homens, mulheres, chaves),
+            'dist_etaria_conc_id',
+            chaves + ['sexo_id', 'total_homens_mulheres']
+        )
         
         self.logger.sucesso(f"Fact_DistribuicaoEtariaConcessoes criada: {len(df_fato)} registros")
         self.fatos['Fact_DistribuicaoEtariaConcessoes'] = df_fato
@@ -319,12 +345,12 @@ class TransformadorFatosAIMA:
     def criar_fact_evolucao_populacao_estrangeira(self, dados_evolucao):
         """
         Cria Fact_EvolucaoPopulacaoEstrangeira
-        Estrutura: evolucao_pop_id, ano_id, titulos_residencia, 
+        Estrutura: evolucao_pop_id, ano_id, titulos_residencia,
                    concessao_ap, prorrogacao_vld, total, variacao_percent
         
         Args:
             dados_evolucao: DataFrame com evolução anual da população estrangeira
-                           Esperado: Ano, TitulosResidencia, ConcessaoAP, 
+                           Esperado: Ano, TitulosResidencia, ConcessaoAP,
                                     ProrrogacaoVLD, Total
         """
         self.logger.subsecao("Criando Fact_EvolucaoPopulacaoEstrangeira")
@@ -336,38 +362,36 @@ class TransformadorFatosAIMA:
         # Ordenar por ano para calcular variação
         dados_evolucao = dados_evolucao.sort_values('Ano' if 'Ano' in dados_evolucao.columns else 'ano')
         
-        registros = []
-        evolucao_id = 1
-        total_anterior = None
-        
-        for _, row in dados_evolucao.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            titulos = Formatadores.limpar_numero(row.get('TitulosResidencia', row.get('titulos_residencia', 0)))
-            concessao_ap = Formatadores.limpar_numero(row.get('ConcessaoAP', row.get('concessao_ap', 0)))
-            prorrogacao = Formatadores.limpar_numero(row.get('ProrrogacaoVLD', row.get('prorrogacao_vld', 0)))
-            total = Formatadores.limpar_numero(row.get('Total', row.get('total', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            
-            # Calcular variação percentual
-            variacao_percent = None
-            if total_anterior is not None and total is not None:
-                variacao_percent = Formatadores.calcular_variacao_percentual(total, total_anterior)
-            
-            if ano_id:
-                registros.append({
-                    'evolucao_pop_id': evolucao_id,
-                    'ano_id': ano_id,
-                    'titulos_residencia': int(titulos) if titulos else 0,
-                    'concessao_ap': int(concessao_ap) if concessao_ap else 0,
-                    'prorrogacao_vld': int(prorrogacao) if prorrogacao else 0,
-                    'total': int(total) if total else 0,
-                    'variacao_percent': round(variacao_percent, 2) if variacao_percent is not None else None
-                })
-                evolucao_id += 1
-                total_anterior = total
-        
-        df_fato = pd.DataFrame(registros)
+        df = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_evolucao, ['Ano', 'ano'])),
+            'titulos_residencia': Formatadores.limpar_coluna(
+                self._obter_coluna(dados_evolucao, ['TitulosResidencia', 'titulos_residencia'], 0)
+            ),
+            'concessao_ap': Formatadores.limpar_coluna(
+                self._obter_coluna(dados_evolucao, ['ConcessaoAP', 'concessao_ap'], 0)
+            ),
+            'prorrogacao_vld': Formatadores.limpar_coluna(
+                self._obter_coluna(dados_evolucao, ['ProrrogacaoVLD', 'prorrogacao_vld'], 0)
+            ),
+            'total': Formatadores.limpar_coluna(self._obter_coluna(dados_evolucao, ['Total', 'total'], 0))
+        }, index=dados_evolucao.index)
+        df = df[self._id_valido(df['ano_id'])].copy()
+        
+        # Variação percentual em relação ao registro anterior (já ordenado por ano)
+        total_anterior = df['total'].shift(1)
+        df['variacao_percent'] = (
+            (df['total'] - total_anterior) / total_anterior * 100
+        ).where(total_anterior.notna() & (total_anterior != 0)).round(2)
+        if df['variacao_percent'].isna().all():
+            df['variacao_percent'] = pd.Series([None] * len(df), index=df.index, dtype=object)
+        
+        for coluna in ['ano_id', 'titulos_residencia', 'concessao_ap', 'prorrogacao_vld', 'total']:
+            df[coluna] = df[coluna].fillna(0).astype('int64')
+        
+        df_fato = self._montar_fato(
+            df, 'evolucao_pop_id',
+            ['ano_id', 'titulos_residencia', 'concessao_ap', 'prorrogacao_vld', 'total', 'variacao_percent']
+        )
         
         self.logger.sucesso(f"Fact_EvolucaoPopulacaoEstrangeira criada: {len(df_fato)} registros")
         self.fatos['Fact_EvolucaoPopulacaoEstrangeira'] = df_fato
@@ -390,37 +414,32 @@ class TransformadorFatosAIMA:
             self.logger.aviso("Nenhum dado de população residente fornecido")
             return pd.DataFrame()
         
-        registros = []
-        pop_id = 1
         tipo_id = self.lookup.get_tipo_id('População Residente - Distribuição Etária')
-        
-        # Criar lookup de grupos etários
-        lookup_etario = {}
-        if dim_grupo_etario is not None:
-            for _, row in dim_grupo_etario.iterrows():
-                faixa = row['faixa_etaria']
-                grupo_id = row['grupoetario_id']
-                lookup_etario[faixa] = grupo_id
-        
-        for _, row in dados_pop_residente.iterrows():
-            ano = row.get('Ano', row.get('ano'))
-            faixa_etaria = Formatadores.extrair_faixa_etaria(row.get('FaixaEtaria', row.get('faixa_etaria')))
-            total = Formatadores.limpar_numero(row.get('Total', row.get('total', 0)))
-            
-            ano_id = self.lookup.get_ano_id(ano)
-            grupoetario_id = lookup_etario.get(faixa_etaria, None)
-            
-            if ano_id and grupoetario_id and total and total > 0:
-                registros.append({
-                    'pop_res_etaria_id': pop_id,
-                    'ano_id': ano_id,
-                    'tipo_id': tipo_id,
-                    'grupoetario_id': grupoetario_id,
-                    'total': int(total)
-                })
-                pop_id += 1
-        
-        df_fato = pd.DataFrame(registros)
+        lookup_etario = self._lookup_grupo_etario(dim_grupo_etario)
+        
+        faixas = self._mapear_valores_unicos(
+            self._obter_coluna(dados_pop_residente, ['FaixaEtaria', 'faixa_etaria']),
+            Formatadores.extrair_faixa_etaria
+        )
+        
+        df = pd.DataFrame({
+            'ano_id': self._resolver_fk('ano', self._obter_coluna(dados_pop_residente, ['Ano', 'ano'])),
+            'tipo_id': tipo_id,
+            'grupoetario_id': faixas.map(lookup_etario),
+            'total': Formatadores.limpar_coluna(self._obter_coluna(dados_pop_residente, ['Total', 'total'], 0))
+        }, index=dados_pop_residente.index)
+        
+        df = df[
+            self._id_valido(df['ano_id']) &
+            self._id_valido(df['grupoetario_id']) &
+            (df['total'] > 0)
+        ].copy()
+        for coluna in ['ano_id', 'grupoetario_id', 'total']:
+            df[coluna] = df[coluna].astype('int64')
+        
+        df_fato = self._montar_fato(
+            df, 'pop_res_etaria_id', ['ano_id', 'tipo_id', 'grupoetario_id', 'total']
+        )
         
         self.logger.sucesso(f"Fact_PopulacaoResidenteEtaria criada: {len(df_fato)} registros")
         self.fatos['Fact_PopulacaoResidenteEtaria'] = df_fato
@@ -443,33 +462,49 @@ class TransformadorFatosAIMA:
         dimensoes_base = dimensoes_base or {}
         dim_grupo_etario = dimensoes_base.get('Dim_GrupoEtario', None)
         
+        # Os fatos dependem apenas das dimensões (já resolvidas no lookup):
+        # executados em paralelo
+        dag = AgendadorDAG(Config.DAG_WORKERS, Config.DAG_MODO, self.logger, "Fatos AIMA")
+        
         # 1. Fact_ConcessoesPorNacionalidadeSexo
         if 'concessoes_nacionalidade' in dados_brutos:
-            self.criar_fact_concessoes_por_nacionalidade_sexo(dados_brutos['concessoes_nacionalidade'])
+            dag.adicionar('Fact_ConcessoesPorNacionalidadeSexo', self.criar_fact_concessoes_por_nacionalidade_sexo,
+                          dados_brutos['concessoes_nacionalidade'])
         
         # 2. Fact_ConcessoesPorDespacho
         if 'concessoes_despacho' in dados_brutos:
-            self.criar_fact_concessoes_por_despacho(dados_brutos['concessoes_despacho'])
+            dag.adicionar('Fact_ConcessoesPorDespacho', self.criar_fact_concessoes_por_despacho,
+                          dados_brutos['concessoes_despacho'])
         
         # 3. Fact_ConcessoesPorMotivoNacionalidade
         if 'concessoes_motivo' in dados_brutos:
-            self.criar_fact_concessoes_por_motivo_nacionalidade(dados_brutos['concessoes_motivo'])
+            dag.adicionar('Fact_ConcessoesPorMotivoNacionalidade', self.criar_fact_concessoes_por_motivo_nacionalidade,
+                          dados_brutos['concessoes_motivo'])
         
         # 4. Fact_PopulacaoEstrangeiraPorNacionalidadeSexo
         if 'populacao_estrangeira' in dados_brutos:
-            self.criar_fact_populacao_estrangeira_por_nacionalidade_sexo(dados_brutos['populacao_estrangeira'])
+            dag.adicionar('Fact_PopulacaoEstrangeiraPorNacionalidadeSexo',
+                          self.criar_fact_populacao_estrangeira_por_nacionalidade_sexo,
+                          dados_brutos['populacao_estrangeira'])
         
         # 5. Fact_DistribuicaoEtariaConcessoes
         if 'distribuicao_etaria' in dados_brutos:
-            self.criar_fact_distribuicao_etaria_concessoes(dados_brutos['distribuicao_etaria'], dim_grupo_etario)
+            dag.adicionar('Fact_DistribuicaoEtariaConcessoes', self.criar_fact_distribuicao_etaria_concessoes,
+                          dados_brutos['distribuicao_etaria'], dim_grupo_etario)
         
         # 6. Fact_EvolucaoPopulacaoEstrangeira
         if 'evolucao_populacao' in dados_brutos:
-            self.criar_fact_evolucao_populacao_estrangeira(dados_brutos['evolucao_populacao'])
+            dag.adicionar('Fact_EvolucaoPopulacaoEstrangeira', self.criar_fact_evolucao_populacao_estrangeira,
+                          dados_brutos['evolucao_populacao'])
         
         # 7. Fact_PopulacaoResidenteEtaria
         if 'populacao_residente_etaria' in dados_brutos:
-            self.criar_fact_populacao_residente_etaria(dados_brutos['populacao_residente_etaria'], dim_grupo_etario)
+            dag.adicionar('Fact_PopulacaoResidenteEtaria', self.criar_fact_populacao_residente_etaria,
+                          dados_brutos['populacao_residente_etaria'], dim_grupo_etario)
+        
+        dag.executar()
+        dag.sincronizar(self.fatos)
+        dag.relatorio_tempos()
         
         self.logger.secao(f"FATOS CRIADOS: {len(self.fatos)}")
         
@@ -2,18 +2,21 @@
 ============================================================
 PARTE 5: ORQUESTRADOR PRINCIPAL
 Pipeline ETL - AIMA Integrado (DP-02-A)
-Google Colab
+Google Colab ou execução local (pasta / ZIP com os CSVs)
 ============================================================
 """
 
 import pandas as pd
 import numpy as np
-from google.colab import files
-import io
-import zipfile
+import os
 from datetime import datetime
+from pathlib import Path
 
-from parte_01_imports_config import Config, Constantes, Formatadores, Logger
+from parte_01_imports_config import (
+    Config, Constantes, Formatadores, Logger, EscritorTabelas, RegistroTabelas,
+    COLAB_DISPONIVEL, criar_fonte, carregar_em_paralelo, entregar_arquivo, ExportadorZip,
+    ARMAZEM_DIMENSOES
+)
 from parte_02_classes_base_ref import GerenciadorIntegridade, ValidadorIntegracao
 from parte_03_transformador_dimensoes_aima import TransformadorDimensoesAIMA, LookupDimensoesAIMA
 from parte_04_transformador_fatos_aima import TransformadorFatosAIMA
@@ -25,10 +28,16 @@ from parte_04_transformador_fatos_aima import TransformadorFatosAIMA
 class OrquestradorPipelineAIMA:
     """Orquestrador principal do pipeline ETL AIMA"""
     
-    def __init__(self):
+    def __init__(self, fonte=None):
+        """
+        Args:
+            fonte: FonteDados, pasta, ficheiro .zip ou 'colab' com os CSVs AIMA
+                   (None = Config.ORIGEM_DADOS / ETL_FONTE_DADOS)
+        """
         self.logger = Logger("OrquestradorAIMA")
-        self.dimensoes = {}
-        self.fatos = {}
+        self.fonte = fonte
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
         self.dados_brutos = {}
         self.dimensoes_base = {}  # Dimensões do ETL_EDUCACAO/LABORAL
         self.lookup = None
@@ -36,38 +45,47 @@ class OrquestradorPipelineAIMA:
     
     def fase_1_upload_dados(self):
         """
-        FASE 1: Upload de dados via Google Colab
-        Permite upload de múltiplos arquivos CSV por ano (2020-2024)
+        FASE 1: Carregamento dos CSVs AIMA (2020-2024)
+        Fonte: pasta local, arquivo ZIP ou upload no Google Colab;
+        todos os arquivos são lidos em paralelo
         """
-        self.logger.secao("FASE 1: UPLOAD DE DADOS AIMA")
-        
-        print("\n📁 INSTRUÇÕES DE UPLOAD:")
-        print("=" * 60)
-        print("Por favor, faça upload dos arquivos CSV AIMA por ano:")
-        print("  - Organize por ano: 2020, 2021, 2022, 2023, 2024")
-        print("  - Arquivos esperados por ano:")
-        for arquivo in Config.ARQUIVOS_POR_ANO:
-            print(f"    • {arquivo}")
-        print("\nVocê pode fazer upload de todos os arquivos de uma vez.")
-        print("=" * 60)
-        
-        # Upload de arquivos
-        uploaded = files.upload()
-        
-        if not uploaded:
-            self.logger.erro("Nenhum arquivo foi carregado")
+        self.logger.secao("FASE 1: CARREGAMENTO DE DADOS AIMA")
+        
+        if self.fonte is None and COLAB_DISPONIVEL and not (Config.ORIGEM_DADOS or os.environ.get('ETL_FONTE_DADOS')):
+            print("\n📁 INSTRUÇÕES DE UPLOAD:")
+            print("=" * 60)
+            print("Por favor, faça upload dos arquivos CSV AIMA por ano:")
+            print("  - Organize por ano: 2020, 2021, 2022, 2023, 2024")
+            print("  - Arquivos esperados por ano:")
+            for arquivo in Config.ARQUIVOS_POR_ANO:
+                print(f"    • {arquivo}")
+            print("\nVocê pode fazer upload de todos os arquivos de uma vez.")
+            print("=" * 60)
+        
+        self.fonte = criar_fonte(self.fonte or Config.ORIGEM_DADOS, padrao='*.csv')
+        arquivos = self.fonte.filtrar('*.csv')
+        
+        if not arquivos:
+            self.logger.erro(f"Nenhum arquivo CSV encontrado em {self.fonte.descricao}")
             return False
         
-        self.logger.sucesso(f"{len(uploaded)} arquivo(s) carregado(s)")
+        self.logger.sucesso(f"{len(arquivos)} arquivo(s) encontrado(s) em {self.fonte.descricao}")
         
-        # Processar arquivos carregados
-        for filename, content in uploaded.items():
-            try:
-                df = pd.read_csv(io.BytesIO(content), encoding='utf-8', sep=',')
-                self.dados_brutos[filename] = df
-                self.logger.info(f"Arquivo processado: {filename} ({len(df)} linhas)")
-            except Exception as e:
-                self.logger.erro(f"Erro ao processar {filename}: {e}")
+        # Ler todos os arquivos em paralelo
+        with self.logger.medir('carregar_arquivos_aima') as etapa:
+            lidos = carregar_em_paralelo(
+                self.fonte,
+                arquivos,
+                leitor=lambda fonte, nome: fonte.ler_csv(nome, encoding='utf-8', sep=','),
+                workers=Config.DAG_WORKERS,
+                logger=self.logger
+            )
+            etapa['linhas_saida'] = sum(len(df) for _, df in lidos.values())
+        
+        for nome, (_, df) in lidos.items():
+            filename = Path(nome).name
+            self.dados_brutos[filename] = df
+            self.logger.info(f"Arquivo processado: {filename} ({len(df)} linhas)")
         
         self.logger.sucesso(f"Total de arquivos processados: {len(self.dados_brutos)}")
         return True
@@ -79,9 +97,16 @@ class OrquestradorPipelineAIMA:
         Args:
             dimensoes_educacao_laboral: Dict com dimensões compartilhadas dos outros pipelines
                                        Ex: {'Dim_Nacionalidade': df, 'Dim_Sexo': df, ...}
+                                       Se None, usa as dimensões de DP-01-A do ARMAZEM_DIMENSOES
+                                       (as mesmas já lidas pelos outros pipelines do processo)
         """
         self.logger.secao("FASE 2: INTEGRAÇÃO COM ETL_EDUCACAO E ETL_LABORAL")
         
+        if dimensoes_educacao_laboral is None:
+            dimensoes_educacao_laboral = ARMAZEM_DIMENSOES.dimensoes_base() or None
+            if dimensoes_educacao_laboral is not None:
+                self.logger.info("Dimensões base lidas do armazém de dimensões conformes (DP-01-A)")
+        
         if dimensoes_educacao_laboral is None:
             self.logger.aviso("Nenhuma dimensão base fornecida. Pipeline executará em modo standalone.")
             self.logger.info("Para integração completa, forneça dimensões via parâmetro.")
@@ -116,6 +141,9 @@ class OrquestradorPipelineAIMA:
         for filename, df in self.dados_brutos.items():
             # Procurar colunas de nacionalidade
             for col in df.columns:
+                # Só colunas de nomes (nacionalidade_id e afins são chaves numéricas)
+                if pd.api.types.is_numeric_dtype(df[col]):
+                    continue
                 if any(keyword in col.lower() for keyword in ['nacionalidade', 'país', 'pais', 'country']):
                     nacs = df[col].dropna().unique()
                     nacionalidades_set.update(nacs)
@@ -281,7 +309,7 @@ class OrquestradorPipelineAIMA:
         """
         self.logger.secao("FASE 4: TRANSFORMAÇÃO - DIMENSÕES")
         
-        transformador = TransformadorDimensoesAIMA(self.logger)
+        transformador = self.logger.instrumentar(TransformadorDimensoesAIMA(self.logger))
         
         # Criar dimensões
         self.dimensoes = transformador.criar_todas_dimensoes(
@@ -296,7 +324,7 @@ class OrquestradorPipelineAIMA:
         transformador.gerar_relatorio_dimensoes()
         
         # Estatísticas
-        self.estatisticas['dimensoes'] = lookup.estatisticas_lookup()
+        self.estatisticas['dimensoes'] = self.lookup.estatisticas_lookup()
         
         return True
     
@@ -310,7 +338,7 @@ class OrquestradorPipelineAIMA:
             self.logger.erro("Lookup não inicializado. Execute fase_4_transformacao_dimensoes primeiro.")
             return False
         
-        transformador = TransformadorFatosAIMA(self.dimensoes, self.lookup, self.logger)
+        transformador = self.logger.instrumentar(TransformadorFatosAIMA(self.dimensoes, self.lookup, self.logger))
         
         # Criar fatos
         self.fatos = transformador.criar_todos_fatos(
@@ -374,7 +402,8 @@ class OrquestradorPipelineAIMA:
         # Estatísticas
         self.estatisticas['validacao'] = {
             'erros_integridade': len(erros),
-            'relacionamentos_validados': len(gerenciador.relacionamentos)
+            'relacionamentos_validados': len(gerenciador.relacionamentos),
+            'linhas_orfas': sum(r['linhas_orfas'] for r in gerenciador.resultados)
         }
         
         return len(erros) == 0
@@ -427,19 +456,20 @@ class OrquestradorPipelineAIMA:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         zip_filename = f'ETL_AIMA_StarSchema_{timestamp}.zip'
         
-        # Criar arquivo ZIP em memória
-        zip_buffer = io.BytesIO()
+        # Formato das tabelas dentro do ZIP (Config.OUTPUT_FORMATO)
+        escritor = EscritorTabelas(Config.OUTPUT_FORMATO, Config.OUTPUT_COMPRESSAO, self.logger)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        # ZIP gravado diretamente em PASTA_SAIDA (membros comprimidos em
+        # paralelo, com manifesto de checksums)
+        caminho_zip = Path(Config.PASTA_SAIDA) / zip_filename
+        
+        with ExportadorZip(caminho_zip, escritor, logger=self.logger) as exportador:
             for nome_tabela, df in tabelas.items():
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8')
-                zip_file.writestr(f'{nome_tabela}.csv', csv_buffer.getvalue())
-                self.logger.info(f"Adicionado: {nome_tabela}.csv ({len(df)} registros)")
+                nome_arquivo = exportador.adicionar_tabela(nome_tabela, df)
+                self.logger.info(f"Adicionado: {nome_arquivo} ({len(df)} registros)")
         
-        # Download do ZIP
-        zip_buffer.seek(0)
-        files.download(zip_filename, zip_buffer.getvalue())
+        # Baixar (download apenas no Colab)
+        entregar_arquivo(caminho_zip, self.logger)
         
         self.logger.sucesso(f"Exportação concluída: {zip_filename}")
         self.logger.info(f"Total de tabelas: {len(tabelas)}")
@@ -450,9 +480,14 @@ class OrquestradorPipelineAIMA:
         """Exporta cada tabela como arquivo CSV individual"""
         self.logger.subsecao("Exportando arquivos individuais")
         
+        pasta_saida = Path(Config.PASTA_SAIDA)
+        pasta_saida.mkdir(parents=True, exist_ok=True)
+        
         for nome_tabela, df in tabelas.items():
-            csv_content = df.to_csv(index=False, encoding='utf-8')
-            files.download(f'{nome_tabela}.csv', csv_content)
+            caminho = pasta_saida / f'{nome_tabela}.csv'
+            with self.logger.medir(f'exportar_{nome_tabela}', len(df)):
+                df.to_csv(caminho, index=False, encoding='utf-8')
+            entregar_arquivo(caminho, self.logger)
             self.logger.info(f"Exportado: {nome_tabela}.csv ({len(df)} registros)")
         
         self.logger.sucesso(f"Exportação concluída: {len(tabelas)} arquivos")
@@ -516,6 +551,14 @@ class OrquestradorPipelineAIMA:
             import traceback
             traceback.print_exc()
             return False
+        
+        finally:
+            self._registrar_metricas()
+    
+    def _registrar_metricas(self):
+        """Grava as métricas por etapa (JSON-lines) junto das saídas e mostra o resumo"""
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas(Path(Config.PASTA_SAIDA) / 'metricas_DP-02-A.jsonl')
     
     def gerar_relatorio_final(self, duracao):
         """Gera relatório final da execução"""
@@ -539,13 +582,14 @@ class OrquestradorPipelineAIMA:
 # FUNÇÃO PRINCIPAL PARA EXECUÇÃO NO COLAB
 # ============================================================
 
-def executar_pipeline_aima(dimensoes_base=None, modo_download='zip'):
+def executar_pipeline_aima(dimensoes_base=None, modo_download='zip', fonte=None):
     """
-    Função wrapper para executar pipeline AIMA no Google Colab
+    Função wrapper para executar pipeline AIMA (Google Colab ou local)
     
     Args:
         dimensoes_base: Dict com dimensões do ETL_EDUCACAO/LABORAL (opcional)
         modo_download: 'zip' ou 'individual'
+        fonte: Pasta, ficheiro .zip ou 'colab' com os CSVs AIMA (opcional)
     
     Returns:
         OrquestradorPipelineAIMA: Instância do orquestrador com resultados
@@ -559,7 +603,7 @@ def executar_pipeline_aima(dimensoes_base=None, modo_download='zip'):
         >>>     'Dim_GrupoEtario': df_grupoetario
         >>> })
     """
-    orquestrador = OrquestradorPipelineAIMA()
+    orquestrador = OrquestradorPipelineAIMA(fonte)
     sucesso = orquestrador.executar_pipeline_completo(
         dimensoes_educacao_laboral=dimensoes_base,
         modo_exportacao=modo_download
@@ -595,6 +639,8 @@ if __name__ == "__main__":
     print("2. Execute:")
     print("   from parte_05_orquestrador_aima import executar_pipeline_aima")
     print("   orquestrador = executar_pipeline_aima()")
+    print("\n   Execução local (sem upload):")
+    print("   orquestrador = executar_pipeline_aima(fonte='pasta/ou/dados_aima.zip')")
     print("\n3. Para integração com outros pipelines:")
     print("   orquestrador = executar_pipeline_aima(dimensoes_base={")
     print("       'Dim_Nacionalidade': df_nac,")
@@ -7,18 +7,23 @@ Versao Hibrida e Portavel - Windows Compatible
 Autor: Germano Silva | Data: Dezembro 2025
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-import io
+import os
 import sys
 import warnings
-import zipfile
 warnings.filterwarnings('ignore')
 
-# Configurar output UTF-8 para Windows
-if sys.platform == 'win32':
+from formatos_tabela import EscritorTabelas, RegistroTabelas, localizar_tabela, ler_tabela
+from dimensoes_conformes import ARMAZEM_DIMENSOES
+from manifesto_build import ManifestoBuild, arquivos_codigo
+from agendador_dag import AgendadorDAG, workers_padrao
+from instrumentacao import INSTRUMENTACAO
+from exportacao_zip import ExportadorZip
+
+# Configurar output UTF-8 para Windows (uma vez por processo: executar_tudo.py importa os tres ETL)
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
@@ -67,10 +72,9 @@ class ConfigAmbiente:
     @staticmethod
     def salvar_arquivo(filename, dataframe):
         pasta_output = ConfigAmbiente.get_pasta_output()
-        pasta_output.mkdir(parents=True, exist_ok=True)
-        filepath = pasta_output / filename
-        dataframe.to_csv(filepath, index=False, encoding='utf-8')
-        print(f"[SALVO] {filename} -> {filepath}")
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA)
+        filepath = escritor.salvar(dataframe, pasta_output, filename)
+        print(f"[SALVO] {filepath.name} -> {filepath}")
         return filepath
 
 
@@ -99,11 +103,45 @@ class Config:
         'DistribuicaoEtariaConcessoes': 'DistribuicaoEtariaConcessoes.csv',
         'PopulacaoResidenteEtaria': 'PopulacaoResidenteEtaria.csv'
     }
+    
+    # Formato de saida das tabelas: 'csv', 'parquet' ou 'feather'
+    # (parquet/feather exigem pyarrow; sem ele o export volta para CSV)
+    FORMATO_SAIDA = os.environ.get('ETL_FORMATO_SAIDA', 'csv')
+    COMPRESSAO_SAIDA = os.environ.get('ETL_COMPRESSAO_SAIDA') or None
+    
+    # Etapas independentes correm em paralelo (agendador_dag.py)
+    # ETL_DAG_WORKERS=1 executa tudo em sequencia
+    DAG_WORKERS = workers_padrao()
+    
+    # Build incremental (output/manifesto_build.json)
+    # ETL_REBUILD_COMPLETO=1 ignora o manifesto e reconstroi tudo
+    ESTAGIO_BUILD = 'AIMA'
+    REBUILD_COMPLETO = os.environ.get('ETL_REBUILD_COMPLETO', '') == '1'
+    
+    # Entradas de que depende cada tabela de saida
+    # (DP-01-A/ = tabelas base, DP-02-A2/ = tabelas AIMA processadas)
+    DEPENDENCIAS_TABELAS = {
+        'Dim_Nacionalidade': ['DP-01-A/Nacionalidade.csv'],
+        'Dim_Sexo': ['DP-01-A/Sexo.csv', 'DP-02-A2/Sexo.csv'],
+        'Dim_AnoRelatorio': ['DP-02-A2/AnoRelatorio.csv'],
+        'Dim_TipoRelatorio': ['DP-02-A2/TipoRelatorio.csv'],
+        'Dim_Despacho': ['DP-02-A2/Despacho.csv'],
+        'Dim_MotivoConcessao': ['DP-02-A2/MotivoConcessao.csv'],
+        'Dim_NacionalidadeAIMA': ['DP-02-A2/NacionalidadeAIMA.csv'],
+        'Fact_ConcessoesPorNacionalidadeSexo': ['DP-02-A2/ConcessoesPorNacionalidadeSexo.csv'],
+        'Fact_ConcessoesPorDespacho': ['DP-02-A2/ConcessoesPorDespacho.csv'],
+        'Fact_ConcessoesPorMotivoNacionalidade': ['DP-02-A2/ConcessoesPorMotivoNacionalidade.csv'],
+        'Fact_PopulacaoEstrangeiraPorNacionalidadeSexo': ['DP-02-A2/PopulacaoEstrangeiraPorNacionalidadeSexo.csv'],
+        'Fact_DistribuicaoEtariaConcessoes': ['DP-02-A2/DistribuicaoEtariaConcessoes.csv'],
+        'Fact_PopulacaoResidenteEtaria': ['DP-02-A2/PopulacaoResidenteEtaria.csv'],
+        'Fact_EvolucaoPopulacaoEstrangeira': ['DP-02-A2/PopulacaoEstrangeiraPorNacionalidadeSexo.csv']
+    }
 
 
 class Logger:
     def __init__(self, nome="ETL"):
         self.nome = nome
+        self.instrumentacao = INSTRUMENTACAO  # metricas partilhadas por todos os Logger
     
     def info(self, msg):
         print(f"[INFO] {msg}")
@@ -119,18 +157,60 @@ class Logger:
     
     def separador(self):
         print("\n" + "="*70)
+    
+    def medir(self, etapa, linhas_entrada=None):
+        return self.instrumentacao.medir(etapa, self.nome, linhas_entrada)
+    
+    def anotar(self, **campos):
+        self.instrumentacao.anotar(**campos)
+    
+    def instrumentar(self, objeto):
+        return self.instrumentacao.instrumentar_objeto(objeto, getattr(objeto, "logger", self).nome)
+    
+    def gravar_metricas(self, caminho):
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Metricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        self.separador()
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
 
 
 class ExtratorAIMA:
     """Importa dados AIMA processados de DP-02-A2"""
     
+    ARQUIVOS_BASE = ['Nacionalidade.csv', 'Sexo.csv']
+    
     def __init__(self):
         self.logger = Logger("ExtratorAIMA")
         self.tabelas_aima = {}
         self.tabelas_base = {}
     
-    def carregar_tabelas_base(self):
-        """Carrega dimensoes base compartilhadas (Nacionalidade)"""
+    def mapear_entradas(self):
+        """Mapeia chave logica -> ficheiro de entrada existente (para o manifesto)"""
+        entradas = {}
+        pasta_base = ConfigAmbiente.get_pasta_dados_base()
+        for arquivo in self.ARQUIVOS_BASE:
+            filepath = localizar_tabela(pasta_base, arquivo)
+            if filepath:
+                entradas[f'DP-01-A/{arquivo}'] = filepath
+        
+        pasta_aima = ConfigAmbiente.get_pasta_dados_aima()
+        for arquivo in Config.ARQUIVOS_AIMA_NECESSARIOS.values():
+            filepath = localizar_tabela(pasta_aima, arquivo)
+            if filepath:
+                entradas[f'DP-02-A2/{arquivo}'] = filepath
+        return entradas
+    
+    def carregar_tabelas_base(self, apenas=None):
+        """
+        Carrega dimensoes base compartilhadas (Nacionalidade)
+        
+        Args:
+            apenas: Conjunto de chaves 'DP-01-A/<arquivo>' a carregar (None = todas)
+        """
         self.logger.info("Importando tabelas base (Nacionalidade, Sexo)...")
         pasta_base = ConfigAmbiente.get_pasta_dados_base()
         
@@ -139,28 +219,33 @@ class ExtratorAIMA:
             self.logger.info("Continuando sem dimensoes base...")
             return True  # Nao e critico para AIMA
         
-        arquivos_base = [
-            'Nacionalidade.csv',
-            'Sexo.csv'
-        ]
-        
-        for arquivo in arquivos_base:
-            filepath = pasta_base / arquivo
-            if filepath.exists():
+        # Prefere .parquet/.feather (tipos preservados) quando existirem ao lado do CSV;
+        # ARMAZEM_DIMENSOES partilha as tabelas ja lidas por outro pipeline (so relidas se mudarem)
+        for arquivo in self.ARQUIVOS_BASE:
+            if apenas is not None and f'DP-01-A/{arquivo}' not in apenas:
+                continue
+            filepath = localizar_tabela(pasta_base, arquivo)
+            if filepath:
                 try:
-                    df = pd.read_csv(filepath, encoding='utf-8')
+                    df = ARMAZEM_DIMENSOES.ler(filepath)
                     tabela_nome = arquivo.replace('.csv', '')
                     self.tabelas_base[tabela_nome] = df
-                    self.logger.sucesso(f"{arquivo} importado ({len(df)} registros)")
+                    self.logger.sucesso(f"{filepath.name} importado ({len(df)} registros)")
                 except Exception as e:
                     self.logger.erro(f"Erro ao importar {arquivo}: {e}")
             else:
                 self.logger.aviso(f"Arquivo {arquivo} nao encontrado (opcional)")
         
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.tabelas_base.values()))
         return True
     
-    def carregar_tabelas_aima(self):
-        """Carrega tabelas AIMA de DP-02-A2/data/"""
+    def carregar_tabelas_aima(self, apenas=None):
+        """
+        Carrega tabelas AIMA de DP-02-A2/data/
+        
+        Args:
+            apenas: Conjunto de chaves 'DP-02-A2/<arquivo>' a carregar (None = todas)
+        """
         self.logger.info("Importando tabelas AIMA de DP-02-A2...")
         pasta_aima = ConfigAmbiente.get_pasta_dados_aima()
         
@@ -170,11 +255,13 @@ class ExtratorAIMA:
         
         contador = 0
         for tabela_key, arquivo_nome in Config.ARQUIVOS_AIMA_NECESSARIOS.items():
-            filepath = pasta_aima / arquivo_nome
+            if apenas is not None and f'DP-02-A2/{arquivo_nome}' not in apenas:
+                continue
+            filepath = localizar_tabela(pasta_aima, arquivo_nome)
             
-            if filepath.exists():
+            if filepath:
                 try:
-                    df = pd.read_csv(filepath, encoding='utf-8')
+                    df = ler_tabela(filepath)
                     
                     # Determinar nome padronizado com prefixo
                     if tabela_key in ['AnoRelatorio', 'TipoRelatorio', 'Despacho', 
@@ -185,13 +272,14 @@ class ExtratorAIMA:
                     
                     self.tabelas_aima[tabela_nome] = df
                     contador += 1
-                    self.logger.sucesso(f"{arquivo_nome} importado como {tabela_nome} ({len(df)} registros)")
+                    self.logger.sucesso(f"{filepath.name} importado como {tabela_nome} ({len(df)} registros)")
                 except Exception as e:
                     self.logger.erro(f"Erro ao importar {arquivo_nome}: {e}")
             else:
                 self.logger.aviso(f"Opcional: {arquivo_nome} nao encontrado")
         
         self.logger.sucesso(f"Total de {contador} tabelas AIMA carregadas")
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.tabelas_aima.values()))
         return contador > 0
 
 
@@ -241,8 +329,8 @@ class ConsolidadorAIMA:
     
     def __init__(self):
         self.logger = Logger("ConsolidadorAIMA")
-        self.dimensoes = {}
-        self.fatos = {}
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
     
     def consolidar_dimensoes(self, tabelas_base, tabelas_aima):
         """Consolida dimensoes com prefixo Dim_"""
@@ -274,7 +362,17 @@ class ConsolidadorAIMA:
             if dim_nome in tabelas_aima:
                 self.dimensoes[dim_nome] = tabelas_aima[dim_nome].copy()
                 self.logger.sucesso(f"{dim_nome}: {len(self.dimensoes[dim_nome])} registros")
-        
+
+        # Paises sem entrada propria em Dim_Nacionalidade ficam com FK nula
+        dim_nac_aima = self.dimensoes.get('Dim_NacionalidadeAIMA')
+        if dim_nac_aima is not None and 'nacionalidade_id' in dim_nac_aima.columns:
+            sem_fk = int(dim_nac_aima['nacionalidade_id'].isna().sum())
+            if sem_fk:
+                self.logger.aviso(
+                    f"{sem_fk}/{len(dim_nac_aima)} nacionalidades AIMA sem correspondencia em "
+                    f"Dim_Nacionalidade (nacionalidade_id nulo)"
+                )
+
         return self.dimensoes
     
     def consolidar_fatos(self, tabelas_aima):
@@ -347,20 +445,22 @@ class ExportadorAIMA:
         
         todas_tabelas = {**dimensoes, **fatos}
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA, self.logger)
+        
+        # Cada tabela vai direto para o ZIP em disco (membros comprimidos em
+        # paralelo); o manifesto de checksums fecha o arquivo
+        with ExportadorZip(zip_path, escritor, logger=self.logger) as exportador:
             for nome_tabela, df in todas_tabelas.items():
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8')
-                zip_file.writestr(f'{nome_tabela}.csv', csv_buffer.getvalue())
+                exportador.adicionar_tabela(nome_tabela, df)
             
             # Adicionar README
-            readme = self._gerar_readme(dimensoes, fatos)
-            zip_file.writestr('README_AIMA.txt', readme)
+            readme = self._gerar_readme(dimensoes, fatos, escritor.extensao)
+            exportador.adicionar_texto('README_AIMA.txt', readme)
         
-        self.logger.sucesso(f"ZIP criado: {zip_path}")
+        self.logger.sucesso(f"ZIP criado: {zip_path} ({len(exportador.manifesto['membros'])} arquivos + checksums)")
         return zip_path
     
-    def _gerar_readme(self, dimensoes, fatos):
+    def _gerar_readme(self, dimensoes, fatos, extensao='.csv'):
         readme = f"""
 ========================================================================
 ETL AIMA CONSOLIDADO - DATASET AIMA/SEF 2020-2024
@@ -375,7 +475,7 @@ DIMENSOES ({len(dimensoes)} tabelas)
 ========================================================================
 """
         for nome, df in dimensoes.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += f"""
 
@@ -384,7 +484,7 @@ FATOS ({len(fatos)} tabelas)
 ========================================================================
 """
         for nome, df in fatos.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += """
 
@@ -452,21 +552,56 @@ class OrquestradorAIMA:
         self.consolidador = ConsolidadorAIMA()
         self.validador = ValidadorIntegridadeAIMA()
         self.exportador = ExportadorAIMA()
+        
+        self.resultado = None  # plano de build + tabelas consolidadas (para exportar_resultados)
+        self.zip_path = None
+        
+        # Tempo, CPU, linhas e memoria de cada carregar_*/consolidar_*/exportar_*
+        for componente in (self.extrator, self.consolidador, self.exportador):
+            self.logger.instrumentar(componente)
     
-    def executar_pipeline_completo(self):
+    def executar_pipeline_completo(self, exportar=True):
+        """
+        Executa o ETL AIMA
+        
+        Args:
+            exportar: Se False, para depois da validacao (tabelas em self.resultado);
+                      ZIP, manifesto e metricas ficam para exportar_resultados()
+        """
         self.logger.separador()
         print(f"{Config.PROJETO_NOME} - Versao {Config.VERSAO}")
         print(f"Ambiente: {AMBIENTE}")
         print(f"Fonte: {Config.FONTE_DADOS}")
         self.logger.separador()
         
-        # FASE 1: Carregar tabelas base (opcional)
-        self.logger.info("\n>>> FASE 1: Importacao de Tabelas Base (Opcional)")
-        self.extrator.carregar_tabelas_base()
-        
-        # FASE 2: Carregar tabelas AIMA
-        self.logger.info("\n>>> FASE 2: Importacao de Tabelas AIMA")
-        if not self.extrator.carregar_tabelas_aima():
+        # FASE 0: Manifesto de build (reconstroi apenas o que mudou)
+        self.logger.info("\n>>> FASE 0: Verificacao do Manifesto de Build")
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        plano = manifesto.planejar(
+            Config.ESTAGIO_BUILD,
+            self.extrator.mapear_entradas(),
+            Config.DEPENDENCIAS_TABELAS,
+            codigo=arquivos_codigo(sys.modules[__name__]),
+            forcar=Config.REBUILD_COMPLETO
+        )
+        if plano.estagio_inalterado:
+            self.logger.sucesso("Entradas inalteradas desde o ultimo build - ETL AIMA ignorado")
+            self.logger.info(f"Ultimo build: {manifesto.artefato(Config.ESTAGIO_BUILD)}")
+            return True
+        for linha in manifesto.resumo(plano):
+            self.logger.info(linha)
+        necessarias = plano.entradas_necessarias(Config.DEPENDENCIAS_TABELAS) or None
+        
+        # FASE 1 e 2: Carregar tabelas base (opcional) e AIMA em paralelo
+        self.logger.info("\n>>> FASE 1-2: Importacao de Tabelas Base (Opcional) e AIMA")
+        dag = AgendadorDAG(Config.DAG_WORKERS, logger=self.logger, nome="Importacao AIMA")
+        dag.adicionar('base', self.extrator.carregar_tabelas_base, necessarias)
+        if necessarias is None or any(c.startswith('DP-02-A2/') for c in necessarias):
+            dag.adicionar('aima', self.extrator.carregar_tabelas_aima, necessarias)
+        carregadas = dag.executar()
+        dag.relatorio_tempos()
+        
+        if not carregadas.get('aima', True):
             self.logger.erro("Falha ao carregar tabelas AIMA")
             return False
         
@@ -481,6 +616,9 @@ class OrquestradorAIMA:
             self.extrator.tabelas_aima
         )
         
+        # Tabelas com entradas inalteradas vem da cache do build anterior
+        manifesto.reutilizar_tabelas(plano, lambda t: dimensoes if t.startswith('Dim_') else fatos)
+        
         # Criar fatos derivados
         self.consolidador.criar_fato_evolucao_populacional(fatos)
         
@@ -489,10 +627,32 @@ class OrquestradorAIMA:
         self.validador.validar_anos(fatos)
         self.validador.validar_fontes(fatos)
         
+        self.resultado = {'plano': plano, 'dimensoes': dimensoes, 'fatos': fatos}
+        if not exportar:
+            self.logger.info("Exportacao adiada para o fim do build (exportar_resultados)")
+            return True
+        return self.exportar_resultados()
+    
+    def exportar_resultados(self):
+        """FASE 5: ZIP consolidado, manifesto de build, metricas e relatorio final"""
+        if self.resultado is None:
+            return True  # Estagio inalterado: nada a exportar
+        plano, dimensoes, fatos = self.resultado['plano'], self.resultado['dimensoes'], self.resultado['fatos']
+        
         # FASE 5: Exportacao
         self.logger.info("\n>>> FASE 5: Exportacao")
         zip_path = self.exportador.exportar_zip_consolidado(dimensoes, fatos)
         
+        # Manifesto relido: com a exportacao adiada, outros estagios podem te-lo gravado entretanto
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        manifesto.registrar(plano, {**dimensoes, **fatos}, Config.DEPENDENCIAS_TABELAS, zip_path)
+        manifesto.salvar()
+        self.zip_path = zip_path
+        
+        # Metricas por etapa (JSON-lines ao lado do ZIP)
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas(zip_path.with_name(f"{zip_path.stem}_metricas.jsonl"))
+        
         # Relatorio final
         self.logger.separador()
         print("CONSOLIDACAO AIMA CONCLUIDA COM SUCESSO!")
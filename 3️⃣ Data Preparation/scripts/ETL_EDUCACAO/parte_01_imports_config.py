@@ -9,11 +9,32 @@ Google Colab
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from google.colab import files
 import io
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Módulos compartilhados pelos três pipelines (scripts/*.py)
+try:
+    _PASTA_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    # Google Colab: célula sem __file__ (enviar os módulos compartilhados para /content)
+    _PASTA_SCRIPTS = os.getcwd()
+if _PASTA_SCRIPTS not in sys.path:
+    sys.path.append(_PASTA_SCRIPTS)
+
+from conversor_numerico import ConversorNumerico
+from formatos_tabela import BufferRegistros, EscritorTabelas, EsquemaTabelas, RegistroTabelas
+from agendador_dag import AgendadorDAG, Ref, workers_padrao
+from integridade_referencial import IndiceChaves, VerificadorIntegridade, preparar_chaves, orfaos_fk
+from instrumentacao import INSTRUMENTACAO, PREFIXOS_ETAPAS
+from resolvedor_nacionalidades import RESOLVEDOR_NACIONALIDADES, ResolvedorNacionalidades
+from fontes_dados import criar_fonte, carregar_em_paralelo, entregar_arquivo
+from exportacao_zip import ExportadorZip
+from cubo_agregados import ESPECIFICACOES_CUBOS, ConstrutorCubos
+from indices_desigualdade import AnalisadorDesigualdade, gini
+
 # ============================================================
 # CONFIGURAÇÕES GLOBAIS
 # ============================================================
@@ -92,6 +113,17 @@ class Config:
     OUTPUT_ENCODING = 'utf-8'
     OUTPUT_SEPARATOR = ','
     OUTPUT_INDEX = False
+    OUTPUT_FORMATO = 'csv'       # 'csv', 'parquet' ou 'feather' (binários exigem pyarrow)
+    OUTPUT_COMPRESSAO = None     # None = padrão do formato (snappy/zstd)
+    
+    # Execução paralela de criar_dim_*/criar_fact_* (agendador_dag.py)
+    DAG_WORKERS = workers_padrao()  # ETL_DAG_WORKERS ou min(4, núcleos); 1 = sequencial
+    DAG_MODO = 'thread'             # 'thread' ou 'processo'
+    
+    # Origem dos ficheiros de entrada (fontes_dados.py): pasta, ficheiro .zip
+    # ou 'colab'. None = ETL_FONTE_DADOS; sem ela, Colab se disponível, senão a pasta atual
+    ORIGEM_DADOS = None
+    PASTA_SAIDA = 'output'          # Ficheiros gerados (download no Colab)
     
     # Tabelas a serem geradas (17 tabelas)
     TABELAS_DIMENSOES = [
@@ -208,24 +240,18 @@ class Formatadores:
     def limpar_numero(valor):
         """
         Limpa e converte string numérica para número
-        Exemplos: '1.234,56' -> 1234.56, '3,7%' -> 3.7
+        Exemplos: '1.234,56' -> 1234.56, '3,7%' -> 3.7, '34,9 anos' -> 34.9, 'x' -> None
         """
-        if pd.isna(valor) or valor == '':
-            return None
-        
-        # Converter para string
-        valor_str = str(valor)
-        
-        # Remover símbolos
-        valor_str = valor_str.replace('%', '').replace(' ', '').strip()
-        
-        # Trocar separadores
-        valor_str = valor_str.replace('.', '').replace(',', '.')
-        
-        try:
-            return float(valor_str)
-        except:
-            return None
+        return ConversorNumerico.converter_valor(valor)
+    
+    @staticmethod
+    def limpar_coluna(serie, tipo='float', logger=None):
+        """
+        Versão vetorizada de limpar_numero para uma coluna inteira
+        Retorna float64 (tipo='float') ou Int64 (tipo='int'); células não
+        convertidas ficam nulas e são contadas no aviso do logger
+        """
+        return ConversorNumerico.converter_serie(serie, tipo=tipo, logger=logger)
     
     @staticmethod
     def extrair_ano(texto):
@@ -238,22 +264,8 @@ class Formatadores:
     
     @staticmethod
     def normalizar_nome_nacionalidade(nome):
-        """Normaliza nome de nacionalidade"""
-        if pd.isna(nome):
-            return None
-        
-        # Mapeamento de variações
-        mapeamento = {
-            'Romenia': 'Roménia',
-            'Romania': 'Roménia',
-            'Sao tome e Principe': 'São Tomé e Príncipe',
-            'Sao Tome e Principe': 'São Tomé e Príncipe',
-            'Republica da Moldavia': 'República da Moldávia',
-            'Republica Popular da China': 'República Popular da China'
-        }
-        
-        nome_limpo = str(nome).strip()
-        return mapeamento.get(nome_limpo, nome_limpo)
+        """Normaliza nome de nacionalidade (ver resolvedor_nacionalidades.py)"""
+        return RESOLVEDOR_NACIONALIDADES.normalizar(nome)
     
     @staticmethod
     def formatar_timestamp():
@@ -275,8 +287,9 @@ class Formatadores:
 class Logger:
     """Sistema de logging para o pipeline"""
     
-    def __init__(self, nome_modulo="ETL"):
+    def __init__(self, nome_modulo="ETL", instrumentacao=None):
         self.nome_modulo = nome_modulo
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO  # partilhada pelo processo
         self.contador_erros = 0
         self.contador_avisos = 0
     
@@ -318,6 +331,26 @@ class Logger:
         if atual == total:
             print()  # Nova linha no final
     
+    def medir(self, etapa, linhas_entrada=None):
+        """Context manager: tempo, CPU, linhas e pico de memória de um bloco"""
+        return self.instrumentacao.medir(etapa, self.nome_modulo, linhas_entrada)
+    
+    def instrumentar(self, objeto, prefixos=PREFIXOS_ETAPAS):
+        """Mede cada chamada criar_dim_*/criar_fact_*/carregar_*/exportar_* do objeto"""
+        return self.instrumentacao.instrumentar_objeto(objeto, self.nome_modulo, prefixos)
+    
+    def gravar_metricas(self, caminho):
+        """Grava as métricas das etapas em JSON-lines"""
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Métricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        """Imprime as etapas ordenadas por tempo (mais lentas primeiro)"""
+        self.subsecao("MÉTRICAS POR ETAPA")
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
+    
     def resumo_final(self):
         """Exibe resumo de erros e avisos"""
         print("\n" + "=" * 60)
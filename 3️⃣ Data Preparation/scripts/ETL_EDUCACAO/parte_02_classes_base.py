@@ -10,6 +10,8 @@ import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
 
+from parte_01_imports_config import BufferRegistros, EsquemaTabelas, VerificadorIntegridade, preparar_chaves, orfaos_fk
+
 
 # ============================================================
 # CLASSE BASE PARA TABELAS
@@ -25,6 +27,18 @@ class TabelaBase(ABC):
         self.metadados = {}
         self.estatisticas = {}
     
+    @property
+    def df(self):
+        """DataFrame da tabela (finaliza registros pendentes no buffer)"""
+        if len(self._buffer) > 0:
+            self.finalizar()
+        return self._df
+    
+    @df.setter
+    def df(self, valor):
+        self._df = valor
+        self._buffer = BufferRegistros()
+    
     @abstractmethod
     def criar_estrutura(self):
         """Define a estrutura (colunas e tipos) da tabela"""
@@ -36,13 +50,30 @@ class TabelaBase(ABC):
         pass
     
     def adicionar_registros(self, dados):
-        """Adiciona registros à tabela"""
+        """
+        Adiciona registros ao buffer da tabela (dict, lista de dicts ou DataFrame)
+    
+        O DataFrame é materializado uma única vez em finalizar(), chamado
+        automaticamente no primeiro acesso a self.df
+        """
         if isinstance(dados, dict):
-            self.df = pd.concat([self.df, pd.DataFrame([dados])], ignore_index=True)
+            self._buffer.adicionar(dados)
         elif isinstance(dados, list):
-            self.df = pd.concat([self.df, pd.DataFrame(dados)], ignore_index=True)
+            self._buffer.estender(dados)
         elif isinstance(dados, pd.DataFrame):
-            self.df = pd.concat([self.df, dados], ignore_index=True)
+            self._buffer.adicionar_dataframe(dados)
+    
+    def finalizar(self):
+        """Materializa os registros do buffer e aplica os tipos compactos do esquema"""
+        if len(self._buffer) > 0:
+            self._df = self._buffer.materializar(self._df)
+            self.aplicar_esquema()
+        return self._df
+    
+    def aplicar_esquema(self):
+        """Aplica os tipos compactos declarados em EsquemaTabelas"""
+        self.df = EsquemaTabelas.aplicar(self.df, self.nome_tabela)
+        return self.df
     
     def gerar_pk(self):
         """Gera valores para chave primária"""
@@ -54,16 +85,20 @@ class TabelaBase(ABC):
         return self.df
     
     def contar_registros(self):
-        """Retorna número de registros"""
-        return len(self.df)
+        """Retorna número de registros (inclui os pendentes no buffer)"""
+        return len(self._df) + len(self._buffer)
     
     def resumir(self):
-        """Retorna resumo da tabela"""
+        """Retorna resumo da tabela (inclui memória poupada pelos tipos compactos)"""
+        memoria = EsquemaTabelas.comparar_memoria(self.df)
         return {
             'nome': self.nome_tabela,
             'registros': self.contar_registros(),
             'colunas': list(self.df.columns),
-            'memoria_mb': self.df.memory_usage(deep=True).sum() / 1024 / 1024
+            'tipos': self.df.dtypes.astype(str).to_dict(),
+            'memoria_mb': memoria['memoria_mb'],
+            'memoria_sem_tipos_mb': memoria['memoria_sem_tipos_mb'],
+            'memoria_poupada_mb': memoria['memoria_poupada_mb']
         }
 
 
@@ -146,14 +181,14 @@ class FatoBase(TabelaBase):
             pk_dim = df_dim.columns[0]  # Assume primeira coluna é PK
             
             # Valores inválidos (não existem na dimensão)
-            valores_fk = self.df[coluna_fk].dropna().unique()
-            valores_pk = df_dim[pk_dim].unique()
-            valores_invalidos = set(valores_fk) - set(valores_pk)
+            orfaos = orfaos_fk(self.df[coluna_fk], preparar_chaves(df_dim[pk_dim]))
+            self.estatisticas[f'orfaos_{coluna_fk}'] = orfaos
             
-            if valores_invalidos:
+            if orfaos['valores_orfaos']:
                 erros.append(
-                    f"FK {coluna_fk} contém {len(valores_invalidos)} valores "
-                    f"que não existem em {tabela_dim}.{pk_dim}"
+                    f"FK {coluna_fk} contém {orfaos['valores_orfaos']} valores "
+                    f"que não existem em {tabela_dim}.{pk_dim} "
+                    f"({orfaos['linhas_orfas']} linhas, ex.: linhas {orfaos['amostra_linhas']})"
                 )
         
         return erros
@@ -280,10 +315,12 @@ class ValidadorDados:
 class GerenciadorIntegridade:
     """Gerencia validações de integridade referencial entre tabelas"""
     
-    def __init__(self):
+    def __init__(self, tamanho_amostra=5):
         self.tabelas = {}
         self.relacionamentos = []
         self.erros = []
+        self.resultados = []
+        self.verificador = VerificadorIntegridade(tamanho_amostra)
     
     def adicionar_tabela(self, nome, dataframe):
         """Adiciona tabela para validação"""
@@ -299,49 +336,27 @@ class GerenciadorIntegridade:
         })
     
     def validar_todos(self):
-        """Executa todas as validações de integridade"""
-        self.erros = []
-        
-        for rel in self.relacionamentos:
-            erros_rel = self._validar_relacionamento(rel)
-            self.erros.extend(erros_rel)
+        """
+        Executa todas as validações de integridade numa única passagem
+        (relacionamentos agrupados por dimensão partilhada)
         
+        Returns:
+            Lista de mensagens de erro; contagens e amostras de linhas
+            órfãs ficam em self.resultados
+        """
+        self.resultados = self.verificador.verificar(self.tabelas, self.relacionamentos)
+        self.erros = self.verificador.erros()
         return self.erros
     
     def _validar_relacionamento(self, rel):
         """Valida um relacionamento específico"""
-        erros = []
-        
-        # Verificar se tabelas existem
-        if rel['fato'] not in self.tabelas:
-            return [f"Tabela de fato {rel['fato']} não encontrada"]
-        
-        if rel['dimensao'] not in self.tabelas:
-            return [f"Tabela de dimensão {rel['dimensao']} não encontrada"]
-        
-        df_fato = self.tabelas[rel['fato']]
-        df_dim = self.tabelas[rel['dimensao']]
-        
-        # Verificar se colunas existem
-        if rel['fk'] not in df_fato.columns:
-            return [f"FK {rel['fk']} não existe em {rel['fato']}"]
-        
-        if rel['pk'] not in df_dim.columns:
-            return [f"PK {rel['pk']} não existe em {rel['dimensao']}"]
-        
-        # Validar integridade referencial
-        valores_fk = df_fato[rel['fk']].dropna().unique()
-        valores_pk = df_dim[rel['pk']].unique()
-        valores_orfaos = set(valores_fk) - set(valores_pk)
-        
-        if valores_orfaos:
-            erros.append(
-                f"ERRO DE INTEGRIDADE: {rel['fato']}.{rel['fk']} -> "
-                f"{rel['dimensao']}.{rel['pk']}: "
-                f"{len(valores_orfaos)} valores órfãos encontrados"
-            )
-        
-        return erros
+        verificador = VerificadorIntegridade(self.verificador.tamanho_amostra)
+        resultado = verificador.verificar(self.tabelas, [rel])[0]
+        return [] if resultado['status'] == 'ok' else [resultado['mensagem']]
+    
+    def resultados_dataframe(self):
+        """Resultados da última validação (um relacionamento por linha)"""
+        return self.verificador.resultados_dataframe()
     
     def gerar_relatorio(self):
         """Gera relatório de validação"""
@@ -357,6 +372,10 @@ class GerenciadorIntegridade:
             print("\nERROS DETALHADOS:")
             for i, erro in enumerate(self.erros, 1):
                 print(f"  {i}. {erro}")
+            for resultado in self.resultados:
+                if resultado['status'] == 'orfaos':
+                    print(f"     {resultado['fato']}.{resultado['fk']}: linhas órfãs (amostra) "
+                          f"{resultado['amostra_linhas']}")
         else:
             print("\n✓ Todas as validações de integridade passaram!")
         
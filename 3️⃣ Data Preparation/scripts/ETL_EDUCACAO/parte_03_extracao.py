@@ -1,14 +1,14 @@
 """
 ============================================================
-PARTE 3: MÓDULO DE EXTRAÇÃO (UPLOAD)
+PARTE 3: MÓDULO DE EXTRAÇÃO
 Pipeline ETL - Educação (DP-01-A)
-Google Colab
+Pasta local, arquivo ZIP ou upload no Google Colab
 ============================================================
 """
 
+import numpy as np
 import pandas as pd
-import io
-from google.colab import files
+from parte_01_imports_config import Config, ConversorNumerico, criar_fonte, carregar_em_paralelo
 
 
 # ============================================================
@@ -16,84 +16,85 @@ from google.colab import files
 # ============================================================
 
 class ExtratorDados:
-    """Gerencia o upload e carregamento de arquivos CSV"""
+    """Gerencia o carregamento de arquivos CSV a partir de uma fonte de dados"""
     
-    def __init__(self, logger):
+    # Formato dos CSVs do INE
+    OPCOES_CSV = {'encoding': 'utf-8', 'sep': ';', 'decimal': ',', 'thousands': '.'}
+    
+    def __init__(self, logger, fonte=None):
+        """
+        Parâmetros:
+          logger: Logger do pipeline
+          fonte: FonteDados, pasta, ficheiro .zip ou 'colab'
+                 (None = Config.ORIGEM_DADOS / ETL_FONTE_DADOS)
+        """
         self.logger = logger
+        self.fonte = criar_fonte(fonte or Config.ORIGEM_DADOS)
         self.arquivos_carregados = {}
         self.dataframes = {}
     
+    def _ler_csv(self, fonte, nome_real):
+        return fonte.ler_csv(nome_real, **self.OPCOES_CSV)
+    
+    def _registrar_carregado(self, nome_arquivo, nome_real, df):
+        self.arquivos_carregados[nome_arquivo] = nome_real
+        self.dataframes[nome_arquivo] = df
+        self.logger.sucesso(
+            f"Arquivo carregado: {nome_real} ({len(df)} linhas, "
+            f"{len(df.columns)} colunas)"
+        )
+    
     def solicitar_upload(self, nome_arquivo, descricao=""):
         """
-        Solicita upload de um arquivo específico
+        Carrega um arquivo específico da fonte (no Colab, pede o upload
+        se ainda não tiver sido enviado)
         Retorna: DataFrame carregado ou None se falhar
         """
-        self.logger.info(f"Solicitando upload: {nome_arquivo}")
+        self.logger.info(f"Carregando {nome_arquivo} de {self.fonte.descricao}")
         if descricao:
             print(f"📄 {descricao}")
         
-        print(f"\n👉 Por favor, faça upload do arquivo: {nome_arquivo}")
-        print("-" * 60)
-        
         try:
-            uploaded = files.upload()
+            nome_real = self.fonte.localizar(nome_arquivo)
             
-            if not uploaded:
-                self.logger.erro(f"Nenhum arquivo foi carregado")
+            if nome_real is None:
+                self.logger.erro(f"Arquivo {nome_arquivo} não encontrado em {self.fonte.descricao}")
                 return None
             
-            # Pega o primeiro arquivo enviado
-            arquivo_nome = list(uploaded.keys())[0]
-            conteudo = uploaded[arquivo_nome]
-            
-            # Carrega o CSV
-            df = pd.read_csv(
-                io.BytesIO(conteudo),
-                encoding='utf-8',
-                sep=';',
-                decimal=',',
-                thousands='.'
-            )
-            
-            self.arquivos_carregados[nome_arquivo] = arquivo_nome
-            self.dataframes[nome_arquivo] = df
-            
-            self.logger.sucesso(
-                f"Arquivo carregado: {arquivo_nome} ({len(df)} linhas, "
-                f"{len(df.columns)} colunas)"
-            )
-            
+            df = self._ler_csv(self.fonte, nome_real)
+            self._registrar_carregado(nome_arquivo, nome_real, df)
             return df
             
         except Exception as e:
             self.logger.erro(f"Erro ao carregar {nome_arquivo}: {str(e)}")
             return None
     
-    def solicitar_uploads_em_lote(self, lista_arquivos, descricao_categoria=""):
+    def solicitar_uploads_em_lote(self, lista_arquivos, descricao_categoria="", workers=None):
         """
-        Solicita upload de múltiplos arquivos sequencialmente
-        Retorna: dict {nome_arquivo: dataframe}
+        Carrega múltiplos arquivos em paralelo (pool de threads)
+        Retorna: dict {nome_arquivo: dataframe}, na ordem de lista_arquivos
         """
         if descricao_categoria:
             self.logger.subsecao(descricao_categoria)
         
-        resultados = {}
-        total = len(lista_arquivos)
+        lidos = carregar_em_paralelo(
+            self.fonte,
+            {nome: nome for nome in lista_arquivos},
+            leitor=self._ler_csv,
+            workers=workers or Config.DAG_WORKERS,
+            logger=self.logger
+        )
         
-        for i, nome_arquivo in enumerate(lista_arquivos, 1):
-            self.logger.progresso(i, total, f"Carregando arquivos ({i}/{total})")
-            
-            df = self.solicitar_upload(
-                nome_arquivo,
-                descricao=f"Arquivo {i} de {total}"
-            )
-            
-            if df is not None:
+        resultados = {}
+        for nome_arquivo in lista_arquivos:
+            if nome_arquivo in lidos:
+                nome_real, df = lidos[nome_arquivo]
+                self._registrar_carregado(nome_arquivo, nome_real, df)
                 resultados[nome_arquivo] = df
             else:
                 self.logger.aviso(f"Arquivo {nome_arquivo} não foi carregado")
         
-        print()  # Nova linha após progresso
+        self.logger.info(f"Arquivos carregados: {len(resultados)}/{len(lista_arquivos)}")
         return resultados
     
     def get_dataframe(self, nome_arquivo):
@@ -140,46 +141,192 @@ class ExtratorDados:
         return True
 
 
+# ============================================================
+# ÍNDICE DE UM ARQUIVO PAÍS DO INE 2011
+# ============================================================
+
+class IndiceINE2011:
+    """
+    Arquivo país do INE 2011 pivotado uma única vez por (Categoria, Subcategoria)
+    
+    As colunas de valores já ficam numéricas (ConversorNumerico, vetorizado)
+    e cada consulta é um acesso a dicionário, sem voltar a filtrar o DataFrame
+    """
+    
+    # Coluna do CSV -> coluna numérica do índice
+    COLUNAS_NUMERICAS = {
+        'Dados 2011': 'dados_2011',
+        'Dados 2001': 'dados_2001',
+        'Percentagem (2011)': 'percentagem_2011'
+    }
+    
+    def __init__(self, df, valores=None):
+        """
+        Parâmetros:
+          df: DataFrame do arquivo país
+          valores: dict coluna do CSV -> array numérico já convertido
+                   (modo em lote); None = converte aqui
+        """
+        self.df = df
+        if valores is None:
+            valores = self.converter_colunas(df)
+        self.valores = {self.COLUNAS_NUMERICAS[col]: valores[col] for col in self.COLUNAS_NUMERICAS}
+        
+        self.posicoes_categoria = {}     # categoria -> posições (ordem do arquivo)
+        self.posicoes_linha = {}         # (categoria, subcategoria) -> posições
+        self.linha_dobrada = {}          # (categoria, subcategoria sem maiúsculas/espaços) -> 1.ª posição
+        self.linha_total = {}            # categoria -> 1.ª linha cuja subcategoria contém 'total'
+        
+        if 'Categoria' not in df.columns:
+            return
+        
+        categorias = df['Categoria'].tolist()
+        subcategorias = (
+            df['Subcategoria'].tolist() if 'Subcategoria' in df.columns else [None] * len(df)
+        )
+        
+        for posicao, (categoria, subcategoria) in enumerate(zip(categorias, subcategorias)):
+            self.posicoes_categoria.setdefault(categoria, []).append(posicao)
+            self.posicoes_linha.setdefault((categoria, subcategoria), []).append(posicao)
+            if isinstance(subcategoria, str):
+                dobrada = subcategoria.strip().casefold()
+                self.linha_dobrada.setdefault((categoria, dobrada), posicao)
+                if 'total' in dobrada:
+                    self.linha_total.setdefault(categoria, posicao)
+    
+    @classmethod
+    def converter_colunas(cls, df):
+        """Colunas de valores convertidas de uma só vez (ausentes = NaN)"""
+        return {
+            col: (
+                ConversorNumerico.converter_serie(df[col]).to_numpy()
+                if col in df.columns else np.full(len(df), np.nan)
+            )
+            for col in cls.COLUNAS_NUMERICAS
+        }
+    
+    def posicoes(self, categorias):
+        """Posições das linhas de uma ou mais categorias, na ordem do arquivo"""
+        encontradas = [self.posicoes_categoria[c] for c in categorias if c in self.posicoes_categoria]
+        if not encontradas:
+            return np.array([], dtype=int)
+        return np.sort(np.concatenate(encontradas))
+    
+    def valor(self, posicao, coluna='dados_2011'):
+        """Valor numérico de uma linha (None se vazio ou não numérico)"""
+        if posicao is None:
+            return None
+        valor = self.valores[coluna][posicao]
+        return None if np.isnan(valor) else float(valor)
+    
+    def procurar(self, categorias, subcategoria):
+        """1.ª linha (posição) com a subcategoria, sem distinguir maiúsculas, nas categorias dadas"""
+        chave = subcategoria.strip().casefold()
+        for categoria in categorias:
+            posicao = self.linha_dobrada.get((categoria, chave))
+            if posicao is not None:
+                return posicao
+        return None
+
+
 # ============================================================
 # CLASSE DE PARSER DE DADOS INE 2011
 # ============================================================
 
 class ParserINE2011:
-    """Parser específico para arquivos CSV do INE 2011"""
+    """
+    Parser específico para arquivos CSV do INE 2011
+    
+    Cada arquivo país é indexado uma vez (IndiceINE2011); os extratores
+    aceitam o DataFrame ou o índice e fazem apenas consultas ao índice.
+    indexar_lote() prepara todos os arquivos país de uma só vez.
+    """
     
     def __init__(self, logger):
         self.logger = logger
+        # id(DataFrame) -> (DataFrame, IndiceINE2011); a referência ao DataFrame
+        # impede que o id seja reutilizado enquanto estiver em cache
+        self._indices = {}
+        self._ids_por_nome = {}   # nome do arquivo -> id(DataFrame) indexado
+        self._ultimo = None    # (DataFrame, IndiceINE2011) do último DataFrame avulso
+    
+    def indexar(self, df):
+        """
+        Índice (Categoria, Subcategoria) de um arquivo país: o de
+        indexar_lote() se o DataFrame já passou por lá, senão um novo
+        (só o último DataFrame avulso fica em cache)
+        """
+        if isinstance(df, IndiceINE2011):
+            return df
+        
+        em_cache = self._indices.get(id(df))
+        if em_cache is not None:
+            return em_cache[1]
+        
+        if self._ultimo is None or self._ultimo[0] is not df:
+            self._ultimo = (df, IndiceINE2011(df))
+        return self._ultimo[1]
+    
+    def indexar_lote(self, dataframes):
+        """
+        Indexa todos os arquivos país de uma só vez
+        dataframes: dict {nome: DataFrame} (ex.: ExtratorDados.solicitar_uploads_em_lote)
+        Retorna: dict {nome: IndiceINE2011}
+        
+        As colunas de valores de todos os arquivos são convertidas numa
+        única passagem vetorizada
+        """
+        nomes = [nome for nome, df in dataframes.items() if df is not None]
+        if not nomes:
+            return {}
+        
+        frames = [dataframes[nome] for nome in nomes]
+        colunas = list(IndiceINE2011.COLUNAS_NUMERICAS)
+        conjunto = pd.concat([df.reindex(columns=colunas) for df in frames], ignore_index=True)
+        convertidos = IndiceINE2011.converter_colunas(conjunto)
+        limites = np.cumsum([0] + [len(df) for df in frames])
+        
+        indices = {}
+        for nome, df, inicio, fim in zip(nomes, frames, limites[:-1], limites[1:]):
+            valores = {col: convertidos[col][inicio:fim] for col in colunas}
+            indice = IndiceINE2011(df, valores)
+            self._indices.pop(self._ids_por_nome.get(nome), None)
+            self._indices[id(df)] = (df, indice)
+            self._ids_por_nome[nome] = id(df)
+            indices[nome] = indice
+        
+        self.logger.info(f"{len(indices)} arquivo(s) país indexado(s) por (Categoria, Subcategoria)")
+        return indices
     
     def extrair_por_categoria(self, df, categorias):
         """
         Extrai linhas de uma ou mais categorias específicas
-        df: DataFrame do arquivo país
+        df: DataFrame do arquivo país (ou o seu IndiceINE2011)
         categorias: lista de categorias ou string única
         Retorna: DataFrame filtrado
         """
         if isinstance(categorias, str):
             categorias = [categorias]
         
-        if 'Categoria' not in df.columns:
+        indice = self.indexar(df)
+        
+        if 'Categoria' not in indice.df.columns:
             self.logger.aviso("Coluna 'Categoria' não encontrada no DataFrame")
             return pd.DataFrame()
         
-        df_filtrado = df[df['Categoria'].isin(categorias)].copy()
-        
-        return df_filtrado
+        return indice.df.iloc[indice.posicoes(categorias)]
     
     def extrair_subcategoria(self, df, categoria, subcategoria):
         """
         Extrai uma subcategoria específica de uma categoria
         """
-        df_cat = self.extrair_por_categoria(df, categoria)
+        indice = self.indexar(df)
         
-        if 'Subcategoria' not in df_cat.columns:
+        if 'Subcategoria' not in indice.df.columns:
             return pd.DataFrame()
         
-        df_sub = df_cat[df_cat['Subcategoria'] == subcategoria].copy()
-        
-        return df_sub
+        posicoes = indice.posicoes_linha.get((categoria, subcategoria), [])
+        return indice.df.iloc[posicoes]
     
     def extrair_dados_educacao(self, df_pais, nacionalidade):
         """
@@ -197,29 +344,32 @@ class ParserINE2011:
             'NÍVEL DE ENSINO (45-66 anos)'
         ]
         
-        df_educacao = self.extrair_por_categoria(df_pais, categorias_educacao)
+        indice = self.indexar(df_pais)
         
-        if df_educacao.empty:
+        # Categorias presentes, pela ordem em que aparecem no arquivo
+        categorias = sorted(
+            (c for c in categorias_educacao if c in indice.posicoes_categoria),
+            key=lambda c: indice.posicoes_categoria[c][0]
+        )
+        
+        if not categorias:
             self.logger.aviso(
                 f"Dados educacionais não encontrados para {nacionalidade}"
             )
             return resultado
         
-        # Extrair faixa etária usada
-        if 'Categoria' in df_educacao.columns:
-            faixa_etaria = df_educacao['Categoria'].iloc[0]
-            resultado['faixa_etaria'] = faixa_etaria
-        
-        # Extrair total da população na faixa
-        linha_total = df_educacao[
-            df_educacao['Subcategoria'].str.contains('Total', case=False, na=False)
-        ]
+        # Faixa etária usada
+        resultado['faixa_etaria'] = categorias[0]
         
-        if not linha_total.empty:
-            total = self._limpar_numero(linha_total['Dados 2011'].iloc[0])
-            resultado['total_populacao'] = total
+        # Total da população na faixa
+        posicao_total = next(
+            (indice.linha_total[c] for c in categorias if c in indice.linha_total), None
+        )
+        if posicao_total is not None:
+            resultado['total_populacao'] = indice.valor(posicao_total)
         
-        # Extrair dados por nível
+        # Dados por nível (subcategoria exata: 'Básico 3º ciclo' não é
+        # confundido com 'Inferior ao básico 3º ciclo')
         niveis_mapeamento = {
             'Inferior ao básico 3º ciclo': 'inferior_basico',
             'Básico 3º ciclo': 'basico',
@@ -228,101 +378,57 @@ class ParserINE2011:
         }
         
         for nivel_nome, nivel_chave in niveis_mapeamento.items():
-            linha_nivel = df_educacao[
-                df_educacao['Subcategoria'].str.contains(nivel_nome, case=False, na=False)
-            ]
+            posicao = indice.procurar(categorias, nivel_nome)
             
-            if not linha_nivel.empty:
-                quantidade = self._limpar_numero(linha_nivel['Dados 2011'].iloc[0])
-                percentual = self._limpar_numero(linha_nivel['Percentagem (2011)'].iloc[0])
-                
+            if posicao is not None:
                 resultado['niveis'].append({
                     'nivel': nivel_nome,
-                    'quantidade': quantidade,
-                    'percentual': percentual
+                    'quantidade': indice.valor(posicao),
+                    'percentual': indice.valor(posicao, 'percentagem_2011')
                 })
         
         return resultado
     
     def extrair_populacao_residente(self, df_pais, nacionalidade):
         """Extrai dados de população residente total"""
-        df_pop = self.extrair_por_categoria(df_pais, 'POPULAÇÃO RESIDENTE')
+        indice = self.indexar(df_pais)
+        categoria = 'POPULAÇÃO RESIDENTE'
         
-        if df_pop.empty:
+        if categoria not in indice.posicoes_categoria:
             return None
         
         resultado = {'nacionalidade': nacionalidade}
         
-        # Total
-        linha_total = df_pop[df_pop['Subcategoria'] == 'Total']
-        if not linha_total.empty:
-            resultado['total_2011'] = self._limpar_numero(linha_total['Dados 2011'].iloc[0])
-            resultado['total_2001'] = self._limpar_numero(linha_total['Dados 2001'].iloc[0])
-        
-        # Homens
-        linha_homens = df_pop[df_pop['Subcategoria'] == 'Homens']
-        if not linha_homens.empty:
-            resultado['homens_2011'] = self._limpar_numero(linha_homens['Dados 2011'].iloc[0])
-            resultado['homens_2001'] = self._limpar_numero(linha_homens['Dados 2001'].iloc[0])
-        
-        # Mulheres
-        linha_mulheres = df_pop[df_pop['Subcategoria'] == 'Mulheres']
-        if not linha_mulheres.empty:
-            resultado['mulheres_2011'] = self._limpar_numero(linha_mulheres['Dados 2011'].iloc[0])
-            resultado['mulheres_2001'] = self._limpar_numero(linha_mulheres['Dados 2001'].iloc[0])
-        
-        # Idade média
-        linha_idade = df_pop[df_pop['Subcategoria'].str.contains('Idade média', na=False)]
-        if not linha_idade.empty:
-            idade_texto = linha_idade['Dados 2011'].iloc[0]
-            resultado['idade_media'] = self._extrair_numero_de_texto(idade_texto)
+        # Total, Homens e Mulheres (2011 e 2001)
+        for subcategoria, prefixo in [('Total', 'total'), ('Homens', 'homens'), ('Mulheres', 'mulheres')]:
+            posicoes = indice.posicoes_linha.get((categoria, subcategoria))
+            if posicoes:
+                resultado[f'{prefixo}_2011'] = indice.valor(posicoes[0])
+                resultado[f'{prefixo}_2001'] = indice.valor(posicoes[0], 'dados_2001')
+        
+        # Idade média ('34,9 anos' já convertido no índice)
+        posicao_idade = indice.procurar([categoria], 'Idade média')
+        if posicao_idade is not None:
+            resultado['idade_media'] = indice.valor(posicao_idade)
         
         return resultado
     
     def extrair_municipios_top(self, df_pais, nacionalidade, top_n=5):
         """Extrai top N municípios por população"""
-        df_municipios = self.extrair_por_categoria(df_pais, 'MUNICÍPIOS (Top 5)')
-        
-        if df_municipios.empty:
-            return []
+        indice = self.indexar(df_pais)
+        posicoes = indice.posicoes_categoria.get('MUNICÍPIOS (Top 5)', [])[:top_n]
         
-        municipios = []
+        subcategorias = indice.df['Subcategoria'].to_numpy() if posicoes else []
         
-        for _, row in df_municipios.iterrows():
-            municipios.append({
+        return [
+            {
                 'nacionalidade': nacionalidade,
-                'municipio': row['Subcategoria'],
-                'populacao': self._limpar_numero(row['Dados 2011']),
-                'percentual': self._limpar_numero(row['Percentagem (2011)'])
-            })
-        
-        return municipios[:top_n]
-    
-    @staticmethod
-    def _limpar_numero(valor):
-        """Limpa e converte valor numérico"""
-        if pd.isna(valor) or valor == '':
-            return None
-        
-        valor_str = str(valor).replace('%', '').replace(' ', '').strip()
-        valor_str = valor_str.replace('.', '').replace(',', '.')
-        
-        try:
-            return float(valor_str)
-        except:
-            return None
-    
-    @staticmethod
-    def _extrair_numero_de_texto(texto):
-        """Extrai número de texto como '34,9 anos'"""
-        if pd.isna(texto):
-            return None
-        
-        import re
-        numeros = re.findall(r'[\d,]+', str(texto))
-        if numeros:
-            return ParserINE2011._limpar_numero(numeros[0])
-        return None
+                'municipio': subcategorias[posicao],
+                'populacao': indice.valor(posicao),
+                'percentual': indice.valor(posicao, 'percentagem_2011')
+            }
+            for posicao in posicoes
+        ]
 
 
 # ============================================================
@@ -351,6 +457,7 @@ if __name__ == "__main__":
     # Teste do parser
     class LoggerTeste:
         def aviso(self, msg): print(f"AVISO: {msg}")
+        def info(self, msg): print(f"INFO: {msg}")
     
     parser = ParserINE2011(LoggerTeste())
     resultado = parser.extrair_dados_educacao(df_teste, 'Brasil')
@@ -360,4 +467,9 @@ if __name__ == "__main__":
     print(f"  Total populaçã: {resultado.get('total_populacao')}")
     print(f"  Níveis: {len(resultado['niveis'])}")
     
+    # Modo em lote: todos os arquivos país indexados de uma só vez
+    indices = parser.indexar_lote({'Brasil': df_teste})
+    superior = indices['Brasil'].procurar(['NÍVEL DE ENSINO (15-64 anos)'], 'Superior')
+    print(f"  Superior (lote): {indices['Brasil'].valor(superior)}")
+    
     print("\n✓ Módulo parte_03_extracao.py carregado com sucesso!")
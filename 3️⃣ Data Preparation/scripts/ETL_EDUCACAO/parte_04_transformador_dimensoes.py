@@ -8,6 +8,8 @@ Google Colab
 
 import pandas as pd
 
+from parte_01_imports_config import RegistroTabelas, IndiceChaves, RESOLVEDOR_NACIONALIDADES, ResolvedorNacionalidades
+
 
 # ============================================================
 # CLASSE TRANSFORMADOR DE DIMENSÕES BASE
@@ -19,7 +21,7 @@ class TransformadorDimensoesBase:
     def __init__(self, logger, constantes):
         self.logger = logger
         self.constantes = constantes
-        self.dimensoes = {}
+        self.dimensoes = RegistroTabelas()
     
     def criar_dim_populacao_residente(self, anos=[2011, 2001]):
         """
@@ -312,22 +314,8 @@ class TransformadorDimensoesBase:
     
     @staticmethod
     def _normalizar_nome_pais(nome):
-        """Normaliza nome de país para padrão"""
-        mapeamento = {
-            'Romenia': 'Roménia',
-            'Romania': 'Roménia',
-            'Sao tome e Principe': 'São Tomé e Príncipe',
-            'Sao Tome e Principe': 'São Tomé e Príncipe',
-            'Republica da Moldavia': 'República da Moldávia',
-            'República da Moldávia': 'República da Moldávia',
-            'Republica Popular da China': 'República Popular da China',
-            'República Popular da China': 'República Popular da China',
-            'Guine-Bissau': 'Guiné-Bissau',
-            'Guiné-Bissau': 'Guiné-Bissau'
-        }
-        
-        nome_limpo = nome.strip()
-        return mapeamento.get(nome_limpo, nome_limpo)
+        """Normaliza nome de país para padrão (ver resolvedor_nacionalidades.py)"""
+        return RESOLVEDOR_NACIONALIDADES.normalizar(nome)
     
     @staticmethod
     def _gerar_codigo_regiao(nome_localidade):
@@ -356,9 +344,13 @@ class TransformadorDimensoesBase:
 class LookupDimensoes:
     """Fornece métodos rápidos para lookup de IDs nas dimensões"""
     
+    INDICES = ('nacionalidade', 'localidade', 'nivel_educacao', 'ano')
+    
     def __init__(self, dimensoes_dict):
         self.dimensoes = dimensoes_dict
         self._indices = {}
+        self._indices_lote = {}
+        self._resolvedor_nacionalidades = None
         self._criar_indices()
     
     def _criar_indices(self):
@@ -367,6 +359,7 @@ class LookupDimensoes:
         if 'Dim_Nacionalidade' in self.dimensoes:
             df = self.dimensoes['Dim_Nacionalidade']
             self._indices['nacionalidade'] = df.set_index('nome_nacionalidade')['nacionalidade_id'].to_dict()
+            self._resolvedor_nacionalidades = ResolvedorNacionalidades(df['nome_nacionalidade'].tolist())
         
         # Índice para Localidade
         if 'Dim_Localidade' in self.dimensoes:
@@ -377,10 +370,43 @@ class LookupDimensoes:
         if 'Dim_NivelEducacao' in self.dimensoes:
             df = self.dimensoes['Dim_NivelEducacao']
             self._indices['nivel_educacao'] = df.set_index('nome_nivel')['nivel_educacao_id'].to_dict()
+        
+        # Índice para Ano (primeiro populacao_id de cada ano_referencia)
+        if 'Dim_PopulacaoResidente' in self.dimensoes:
+            df = self.dimensoes['Dim_PopulacaoResidente'].drop_duplicates('ano_referencia')
+            self._indices['ano'] = df.set_index('ano_referencia')['populacao_id'].to_dict()
+        
+        # Índices para resolução em lote (mesmas chaves dos dicts)
+        self._indices_lote = {
+            nome: IndiceChaves.de_dict(mapa) for nome, mapa in self._indices.items()
+        }
+    
+    def resolver(self, nome_indice, valores):
+        """
+        Resolve uma coluna de chaves naturais numa só passagem
+        
+        Args:
+            nome_indice: 'nacionalidade', 'localidade', 'nivel_educacao' ou 'ano'
+            valores: Series/lista de nomes (ou anos)
+            
+        Returns:
+            (ids Int64, máscara das linhas não resolvidas)
+        """
+        if nome_indice not in self.INDICES:
+            raise ValueError(f"Índice desconhecido: {nome_indice}")
+        if nome_indice == 'nacionalidade' and self._resolvedor_nacionalidades is not None:
+            # Mesmas variantes e grafias de get_nacionalidade_id
+            valores = self._resolvedor_nacionalidades.resolver_serie(valores)
+        indice = self._indices_lote.get(nome_indice, IndiceChaves([], []))
+        return indice.resolver(valores)
     
     def get_nacionalidade_id(self, nome):
-        """Retorna ID da nacionalidade pelo nome"""
-        return self._indices.get('nacionalidade', {}).get(nome)
+        """Retorna ID da nacionalidade pelo nome (variantes e grafias via resolvedor)"""
+        indice = self._indices.get('nacionalidade', {})
+        nac_id = indice.get(nome)
+        if nac_id is None and self._resolvedor_nacionalidades is not None:
+            nac_id = indice.get(self._resolvedor_nacionalidades.resolver(nome))
+        return nac_id
     
     def get_localidade_id(self, nome):
         """Retorna ID da localidade pelo nome"""
@@ -396,12 +422,7 @@ class LookupDimensoes:
     
     def get_ano_id(self, ano):
         """Retorna ID do ano de população residente"""
-        if 'Dim_PopulacaoResidente' in self.dimensoes:
-            df = self.dimensoes['Dim_PopulacaoResidente']
-            resultado = df[df['ano_referencia'] == ano]
-            if not resultado.empty:
-                return resultado['populacao_id'].iloc[0]
-        return None
+        return self._indices.get('ano', {}).get(ano)
 
 
 # ============================================================
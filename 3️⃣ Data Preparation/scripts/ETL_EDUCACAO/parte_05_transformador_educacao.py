@@ -6,8 +6,13 @@ Google Colab
 ============================================================
 """
 
+import numpy as np
 import pandas as pd
 
+from parte_01_imports_config import (
+    RegistroTabelas, ESPECIFICACOES_CUBOS, ConstrutorCubos, AnalisadorDesigualdade, gini
+)
+
 
 # ============================================================
 # CLASSE TRANSFORMADOR DE DADOS EDUCACIONAIS
@@ -19,7 +24,7 @@ class TransformadorEducacao:
     def __init__(self, logger, lookup):
         self.logger = logger
         self.lookup = lookup
-        self.fatos = {}
+        self.fatos = RegistroTabelas()
     
     def criar_fact_populacao_educacao(self, dados_educacao_lista):
         """
@@ -377,9 +382,17 @@ class TransformadorEducacao:
 class AnalisadorEducacao:
     """Fornece análises estatísticas sobre dados educacionais"""
     
-    def __init__(self, fact_educacao, fact_estatisticas):
+    def __init__(self, fact_educacao, fact_estatisticas, dimensoes=None):
+        """
+        Args:
+            fact_educacao: Fact_PopulacaoEducacao
+            fact_estatisticas: Fact_EstatisticasEducacao
+            dimensoes: Dict com Dim_Nacionalidade e Dim_NivelEducacao
+                       (lookup.dimensoes) - necessário para calcular_indices_desigualdade
+        """
         self.fact_educacao = fact_educacao
         self.fact_estatisticas = fact_estatisticas
+        self.dimensoes = dimensoes or {}
     
     def calcular_coeficiente_gini_educacao(self):
         """
@@ -390,20 +403,29 @@ class AnalisadorEducacao:
             return None
         
         # Usar percentual de ensino superior como métrica
-        valores = sorted(self.fact_estatisticas['percentual_ensino_superior'].values)
-        n = len(valores)
+        valores = self.fact_estatisticas['percentual_ensino_superior'].to_numpy(dtype='float64')
+        resultado = gini(valores)
         
-        if n == 0:
-            return None
+        if np.isnan(resultado):
+            return 0 if len(valores) > 0 else None
         
-        # Cálculo do índice de Gini
-        cumsum = 0
-        for i, val in enumerate(valores, 1):
-            cumsum += (n - i + 0.5) * val
+        return round(float(resultado), 3)
+    
+    def calcular_indices_desigualdade(self):
+        """
+        Gini, Theil, dissimilaridade e quocientes de localização por nível
+        de educação, para todas as nacionalidades e anos de uma vez
+        (indices_desigualdade.py)
         
-        gini = (n + 1 - 2 * cumsum / sum(valores)) / n if sum(valores) > 0 else 0
+        Returns:
+            DataFrame longo: dimensao, ano, indice, nacionalidade, categoria, valor
+        """
+        if self.fact_educacao is None or len(self.fact_educacao) == 0:
+            return None
         
-        return round(gini, 3)
+        tabelas = dict(self.dimensoes, Fact_PopulacaoEducacao=self.fact_educacao)
+        cubo = ConstrutorCubos(tabelas).construir('educacao', ESPECIFICACOES_CUBOS['educacao'])
+        return AnalisadorDesigualdade({'educacao': cubo}).calcular('educacao')
     
     def obter_resumo_estatistico(self):
         """Retorna resumo estatístico dos dados educacionais"""
@@ -455,4 +477,9 @@ if __name__ == "__main__":
     print(f"Dados de teste: {len(dados_teste)} países")
     print("Níveis por país: 4")
     
+    analisador = AnalisadorEducacao(
+        None, pd.DataFrame({'percentual_ensino_superior': [10.16, 25.30, 40.10]})
+    )
+    print(f"Gini (% ensino superior): {analisador.calcular_coeficiente_gini_educacao()}")
+    
     print("\n✓ Módulo parte_05_transformador_educacao.py carregado com sucesso!")
@@ -16,6 +16,8 @@ Cria tabelas de fatos relacionadas à população base:
 import pandas as pd
 import numpy as np
 
+from parte_01_imports_config import RegistroTabelas
+
 
 # ============================================================
 # CLASSE TRANSFORMADOR DE FATOS BASE
@@ -27,7 +29,7 @@ class TransformadorFatosBase:
     def __init__(self, logger, lookup_dimensoes):
         self.logger = logger
         self.lookup = lookup_dimensoes
-        self.fatos = {}
+        self.fatos = RegistroTabelas()
     
     def criar_fact_populacao_por_nacionalidade_sexo(self, dados_agregados):
         """
@@ -5,8 +5,9 @@ Pipeline ETL - Educação (DP-01-A)
 Google Colab
 ============================================================
 Responsável pela fase de LOAD:
-- Exportação de DataFrames para CSV
-- Download via files.download() do Google Colab
+- Exportação de DataFrames para CSV (gravados diretamente em disco,
+  sem cópias serializadas em memória)
+- Download no Google Colab (ou ficheiros em Config.PASTA_SAIDA fora dele)
 - Geração de relatórios de qualidade
 - Criação de metadados
 - Validação final de integridade
@@ -14,10 +15,9 @@ Responsável pela fase de LOAD:
 
 import pandas as pd
 import numpy as np
-from google.colab import files
 from datetime import datetime
-import io
-import zipfile
+from pathlib import Path
+from parte_01_imports_config import EscritorTabelas, ExportadorZip, entregar_arquivo
 
 
 # ============================================================
@@ -30,12 +30,22 @@ class GerenciadorExportacao:
     def __init__(self, logger, config):
         self.logger = logger
         self.config = config
-        self.arquivos_gerados = {}
+        self.arquivos_gerados = {}      # nome_arquivo -> (nome_tabela, DataFrame)
         self.estatisticas_exportacao = {}
+        self.pasta_saida = Path(getattr(config, 'PASTA_SAIDA', '.'))
+        self.escritor = EscritorTabelas(
+            getattr(config, 'OUTPUT_FORMATO', 'csv'),
+            getattr(config, 'OUTPUT_COMPRESSAO', None),
+            logger
+        )
     
     def exportar_tabela(self, nome_tabela, dataframe, prefixo_arquivo=""):
         """
-        Exporta uma tabela para CSV em memória
+        Regista uma tabela para exportação no formato configurado
+        (Config.OUTPUT_FORMATO: CSV, Parquet ou Feather)
+        
+        A serialização só acontece na gravação (criar_pacote_zip ou
+        baixar_arquivo), diretamente para o ficheiro em disco.
         
         Parâmetros:
           nome_tabela: Nome da tabela
@@ -51,39 +61,43 @@ class GerenciadorExportacao:
         
         # Gerar nome do arquivo
         if prefixo_arquivo:
-            nome_arquivo = f"{prefixo_arquivo}_{nome_tabela}.csv"
+            nome_arquivo = self.escritor.nome_arquivo(f"{prefixo_arquivo}_{nome_tabela}")
         else:
-            nome_arquivo = f"{nome_tabela}.csv"
-        
-        # Converter DataFrame para CSV em memória
-        csv_buffer = io.StringIO()
-        dataframe.to_csv(
-            csv_buffer,
-            index=self.config.OUTPUT_INDEX,
-            encoding=self.config.OUTPUT_ENCODING,
-            sep=self.config.OUTPUT_SEPARATOR
-        )
+            nome_arquivo = self.escritor.nome_arquivo(nome_tabela)
         
-        # Armazenar conteúdo
-        self.arquivos_gerados[nome_arquivo] = csv_buffer.getvalue()
+        # Guardar referência (sem cópia serializada)
+        self.arquivos_gerados[nome_arquivo] = (nome_tabela, dataframe)
         
-        # Estatísticas
+        # Estatísticas (tamanho preenchido quando o arquivo é gravado)
         self.estatisticas_exportacao[nome_tabela] = {
             'arquivo': nome_arquivo,
+            'formato': self.escritor.formato,
             'linhas': len(dataframe),
             'colunas': len(dataframe.columns),
-            'tamanho_bytes': len(csv_buffer.getvalue()),
-            'tamanho_kb': len(csv_buffer.getvalue()) / 1024
+            'tamanho_bytes': None,
+            'tamanho_kb': None
         }
         
         self.logger.sucesso(
-            f"Exportada: {nome_arquivo} ({len(dataframe)} linhas, "
-            f"{len(dataframe.columns)} colunas, "
-            f"{self.estatisticas_exportacao[nome_tabela]['tamanho_kb']:.1f} KB)"
+            f"Registada para exportação: {nome_arquivo} ({len(dataframe)} linhas, "
+            f"{len(dataframe.columns)} colunas)"
         )
         
         return nome_arquivo
     
+    def _opcoes_csv(self):
+        """Opções de escrita CSV vindas da configuração"""
+        return {
+            'index': self.config.OUTPUT_INDEX,
+            'encoding': self.config.OUTPUT_ENCODING,
+            'sep': self.config.OUTPUT_SEPARATOR
+        }
+    
+    def _registrar_tamanho(self, nome_tabela, tamanho_bytes):
+        stats = self.estatisticas_exportacao[nome_tabela]
+        stats['tamanho_bytes'] = tamanho_bytes
+        stats['tamanho_kb'] = tamanho_bytes / 1024
+    
     def exportar_todas_tabelas(self, dimensoes_dict, fatos_dict, prefixo="DP-01-A"):
         """
         Exporta todas as dimensões e fatos
@@ -93,7 +107,7 @@ class GerenciadorExportacao:
           fatos_dict: Dicionário {nome: DataFrame} de fatos
           prefixo: Prefixo para os arquivos
         """
-        self.logger.secao("EXPORTANDO TABELAS PARA CSV")
+        self.logger.secao(f"EXPORTANDO TABELAS PARA {self.escritor.formato.upper()}")
         
         # Exportar dimensões
         self.logger.subsecao("Dimensões")
@@ -115,7 +129,7 @@ class GerenciadorExportacao:
     
     def baixar_arquivo(self, nome_arquivo):
         """
-        Baixa um arquivo individual via Google Colab files.download()
+        Grava um arquivo em PASTA_SAIDA e inicia o download no Google Colab
         
         Parâmetros:
           nome_arquivo: Nome do arquivo a baixar
@@ -125,13 +139,15 @@ class GerenciadorExportacao:
             return False
         
         try:
-            # Salvar temporariamente e baixar
-            conteudo = self.arquivos_gerados[nome_arquivo]
-            with open(nome_arquivo, 'w', encoding='utf-8') as f:
-                f.write(conteudo)
+            # Gravar direto em disco e baixar (fora do Colab o arquivo fica em PASTA_SAIDA)
+            nome_tabela, dataframe = self.arquivos_gerados[nome_arquivo]
+            caminho = self.pasta_saida / nome_arquivo
+            self.pasta_saida.mkdir(parents=True, exist_ok=True)
+            with open(caminho, 'wb') as destino:
+                self.escritor.gravar(dataframe, nome_tabela, destino, **self._opcoes_csv())
+            self._registrar_tamanho(nome_tabela, caminho.stat().st_size)
             
-            files.download(nome_arquivo)
-            self.logger.sucesso(f"Download iniciado: {nome_arquivo}")
+            entregar_arquivo(caminho, self.logger)
             return True
             
         except Exception as e:
@@ -165,27 +181,26 @@ class GerenciadorExportacao:
         self.logger.info(f"Criando pacote ZIP: {nome_pacote}")
         
         try:
-            # Criar ZIP em memória
-            zip_buffer = io.BytesIO()
+            # ZIP gravado direto em disco, membros comprimidos em paralelo
+            # e manifesto de checksums
+            caminho = self.pasta_saida / nome_pacote
+            with ExportadorZip(caminho, self.escritor, logger=self.logger) as exportador:
+                for nome_arquivo, (nome_tabela, dataframe) in self.arquivos_gerados.items():
+                    exportador.adicionar_tabela(nome_tabela, dataframe, nome_arquivo, **self._opcoes_csv())
             
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for nome_arquivo, conteudo in self.arquivos_gerados.items():
-                    zip_file.writestr(nome_arquivo, conteudo)
+            # Tamanho de cada arquivo (sem compressão) a partir do manifesto
+            tabela_do_arquivo = {arquivo: tabela for arquivo, (tabela, _) in self.arquivos_gerados.items()}
+            for membro in exportador.manifesto['membros']:
+                self._registrar_tamanho(tabela_do_arquivo[membro['arquivo']], membro['bytes'])
             
-            # Salvar ZIP e baixar
-            zip_data = zip_buffer.getvalue()
-            with open(nome_pacote, 'wb') as f:
-                f.write(zip_data)
-            
-            tamanho_mb = len(zip_data) / (1024 * 1024)
+            tamanho_mb = exportador.bytes_totais / (1024 * 1024)
             self.logger.sucesso(
                 f"Pacote ZIP criado: {nome_pacote} ({tamanho_mb:.2f} MB, "
                 f"{len(self.arquivos_gerados)} arquivos)"
             )
             
             # Download
-            files.download(nome_pacote)
-            self.logger.sucesso(f"Download do pacote ZIP iniciado")
+            entregar_arquivo(caminho, self.logger)
             
             return True
             
@@ -209,7 +224,7 @@ class GerenciadorExportacao:
                 'Arquivo': stats['arquivo'],
                 'Linhas': stats['linhas'],
                 'Colunas': stats['colunas'],
-                'Tamanho (KB)': round(stats['tamanho_kb'], 2)
+                'Tamanho (KB)': round(stats['tamanho_kb'], 2) if stats['tamanho_kb'] is not None else np.nan
             })
         
         df_stats = pd.DataFrame(stats_list)
@@ -355,6 +370,11 @@ class ValidadorFinal:
         
         # Validar dimensões
         for nome, df in dimensoes_dict.items():
+            if len(df.columns) == 0:
+                self.erros_criticos.append(f"CRÍTICO: {nome} está vazia (sem colunas)")
+                erros += 1
+                continue
+            
             pk_col = df.columns[0]  # Assume primeira coluna é PK
             
             if df[pk_col].isna().any():
@@ -365,6 +385,11 @@ class ValidadorFinal:
         
         # Validar fatos
         for nome, df in fatos_dict.items():
+            if len(df.columns) == 0:
+                self.erros_criticos.append(f"CRÍTICO: {nome} está vazia (sem colunas)")
+                erros += 1
+                continue
+            
             pk_col = df.columns[0]
             
             if df[pk_col].isna().any():
@@ -468,9 +493,12 @@ if __name__ == "__main__":
         'valor': [10, 20, 30]
     })
     
-    # Testar exportação
+    # Testar exportação (ZIP gravado numa pasta temporária)
+    import tempfile
+    ConfigTeste.PASTA_SAIDA = tempfile.mkdtemp()
     gerenciador = GerenciadorExportacao(LoggerTeste(), ConfigTeste())
     gerenciador.exportar_tabela('TesteTabela', df_teste, 'DP-01-A')
+    gerenciador.criar_pacote_zip('Teste.zip')
     
     # Testar relatório
     relatorio = gerenciador.gerar_relatorio_exportacao()
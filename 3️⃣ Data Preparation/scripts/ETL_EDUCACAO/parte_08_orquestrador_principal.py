@@ -2,7 +2,7 @@
 ============================================================
 PARTE 8: ORQUESTRADOR PRINCIPAL
 Pipeline ETL - Educação (DP-01-A)
-Google Colab
+Google Colab ou execução local (pasta / ZIP com os CSVs)
 ============================================================
 Script principal que orquestra todo o pipeline ETL:
 1. Extração: Leitura de arquivos CSV do INE 2011
@@ -23,7 +23,7 @@ INSTRUÇÕES DE USO NO GOOGLE COLAB:
 
 # Parte 1: Configurações
 from parte_01_imports_config import (
-    Config, Constantes, Formatadores, Logger
+    Config, Constantes, Formatadores, Logger, AgendadorDAG, Ref, RegistroTabelas
 )
 
 # Parte 2: Classes Base
@@ -32,8 +32,8 @@ from parte_02_classes_base import (
     ValidadorDados, GerenciadorIntegridade
 )
 
-# Parte 3: Extração (será criado)
-# from parte_03_extracao import ExtratorDados, ParserINE2011
+# Parte 3: Extração
+from parte_03_extracao import ExtratorDados, ParserINE2011
 
 # Parte 4: Transformador de Dimensões
 from parte_04_transformador_dimensoes import (
@@ -57,6 +57,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import traceback
+from pathlib import Path
 
 
 # ============================================================
@@ -66,8 +67,14 @@ import traceback
 class OrquestradorPipelineEducacao:
     """Orquestra execução completa do pipeline ETL de Educação"""
     
-    def __init__(self):
+    def __init__(self, fonte=None):
+        """
+        Parâmetros:
+          fonte: FonteDados, pasta, ficheiro .zip ou 'colab' com os CSVs país
+                 (None = Config.ORIGEM_DADOS / ETL_FONTE_DADOS)
+        """
         self.logger = Logger("PIPELINE-EDUCACAO")
+        self.fonte = fonte
         self.config = Config()
         self.constantes = Constantes()
         
@@ -80,8 +87,8 @@ class OrquestradorPipelineEducacao:
         self.lookup = None
         
         # Dados processados
-        self.dimensoes = {}
-        self.fatos = {}
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
         self.dados_brutos = {}
         
         # Status
@@ -145,60 +152,72 @@ class OrquestradorPipelineEducacao:
             self.logger.erro(f"ERRO FATAL NO PIPELINE: {str(e)}")
             self.logger.erro(traceback.format_exc())
             return False
+            
+        finally:
+            self._registrar_metricas()
+    
+    def _registrar_metricas(self):
+        """Grava as métricas por etapa (JSON-lines) junto das saídas e mostra o resumo"""
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas(Path(self.config.PASTA_SAIDA) / "metricas_DP-01-A.jsonl")
     
     def _executar_extracao(self):
-        """Executa fase de extração de dados"""
+        """Executa fase de extração de dados (arquivos país do INE 2011)"""
         self.logger.info("Iniciando extração de dados dos CSVs do INE 2011...")
         
-        # NOTA: Como parte_03_extracao não está disponível, vamos criar
-        # dados simulados para teste
-        self.logger.aviso("MODO SIMULAÇÃO: Usando dados de exemplo")
+        extrator = ExtratorDados(self.logger, self.fonte)
+        dataframes = extrator.solicitar_uploads_em_lote(
+            self.config.ARQUIVOS_PAISES, "Arquivos País (INE 2011)"
+        )
         
-        # Simular dados de países
-        self.dados_brutos['paises'] = {
-            'Brasil': {'população': 100000, 'ano': 2011},
-            'Angola': {'população': 80000, 'ano': 2011},
-            'Cabo Verde': {'população': 50000, 'ano': 2011}
-        }
+        if not dataframes:
+            self.logger.erro("Nenhum arquivo país carregado")
+            return False
         
-        # Simular dados de educação
-        self.dados_brutos['educacao'] = [
-            {
-                'nacionalidade': 'Brasil',
-                'nivel': 'Superior',
-                'populacao': 30000,
-                'faixa_etaria': '15-64 anos',
-                'ano': 2011
-            },
-            {
-                'nacionalidade': 'Angola',
-                'nivel': 'Secundário e pós-secundário',
-                'populacao': 20000,
-                'faixa_etaria': '15-64 anos',
-                'ano': 2011
-            }
-        ]
-        
-        # Simular dados populacionais
-        self.dados_brutos['populacional'] = [
-            {
-                'nacionalidade': 'Brasil',
-                'populacao_masculino': 55000,
-                'populacao_feminino': 45000,
-                'ano': 2011
-            },
-            {
-                'nacionalidade': 'Angola',
-                'populacao_masculino': 40000,
-                'populacao_feminino': 40000,
-                'ano': 2011
-            }
-        ]
+        parser = ParserINE2011(self.logger)
+        indices = parser.indexar_lote(dataframes)
         
-        # Simular dados de municípios
+        self.dados_brutos['paises'] = {}
+        self.dados_brutos['educacao'] = []
+        self.dados_brutos['populacao'] = []
+        self.dados_brutos['populacional'] = []
         self.dados_brutos['municipios'] = []
         
-        self.logger.sucesso(f"Extração concluída: {len(self.dados_brutos)} conjuntos de dados")
+        for nome_arquivo, indice in indices.items():
+            # Nome da coluna 'Nacionalidade' ('Roménia'), senão o do arquivo
+            nomes = indice.df['Nacionalidade'].dropna() if 'Nacionalidade' in indice.df.columns else []
+            nacionalidade = str(nomes.iloc[0]).strip() if len(nomes) else nome_arquivo[:-len('.csv')]
+            
+            populacao = parser.extrair_populacao_residente(indice, nacionalidade)
+            self.dados_brutos['paises'][nacionalidade] = {
+                'população': (populacao or {}).get('total_2011'),
+                'ano': self.config.ANO_REFERENCIA
+            }
+            educacao = parser.extrair_dados_educacao(indice, nacionalidade)
+            if 'faixa_etaria' in educacao:
+                # 'NÍVEL DE ENSINO (15-64 anos)' -> '15-64 anos'
+                educacao['faixa_etaria'] = educacao['faixa_etaria'].split('(')[-1].rstrip(')')
+            self.dados_brutos['educacao'].append(educacao)
+            self.dados_brutos['municipios'].extend(parser.extrair_municipios_top(indice, nacionalidade))
+            
+            if populacao is None:
+                self.logger.aviso(f"População residente não encontrada para {nacionalidade}")
+                continue
+            
+            self.dados_brutos['populacao'].append(populacao)
+            for ano in (2011, 2001):
+                if populacao.get(f'total_{ano}'):
+                    self.dados_brutos['populacional'].append({
+                        'nacionalidade': nacionalidade,
+                        'populacao_masculino': populacao.get(f'homens_{ano}') or 0,
+                        'populacao_feminino': populacao.get(f'mulheres_{ano}') or 0,
+                        'ano': ano
+                    })
+        
+        self.logger.sucesso(
+            f"Extração concluída: {len(self.dados_brutos['paises'])} países, "
+            f"{len(self.dados_brutos['municipios'])} registros de municípios"
+        )
         return True
     
     def _executar_transformacao(self):
@@ -209,95 +228,67 @@ class OrquestradorPipelineEducacao:
             self.logger,
             self.constantes
         )
+        self.logger.instrumentar(self.transformador_dim)
         
-        # PASSO 1: Criar Dimensões Base
+        # PASSO 1: Criar Dimensões Base (independentes, exceto o mapeamento)
         self.logger.subsecao("Criando Dimensões Base")
         
-        # Dim_PopulacaoResidente
-        dim_pop = self.transformador_dim.criar_dim_populacao_residente([2011, 2001])
-        self.dimensoes['Dim_PopulacaoResidente'] = dim_pop
-        
-        # Dim_Nacionalidade
-        dim_nac = self.transformador_dim.criar_dim_nacionalidade(
-            self.dados_brutos['paises']
-        )
-        self.dimensoes['Dim_Nacionalidade'] = dim_nac
-        
-        # Dim_Sexo
-        dim_sexo = self.transformador_dim.criar_dim_sexo()
-        self.dimensoes['Dim_Sexo'] = dim_sexo
-        
-        # Dim_GrupoEtario
-        dim_grupo = self.transformador_dim.criar_dim_grupo_etario()
-        self.dimensoes['Dim_GrupoEtario'] = dim_grupo
-        
-        # Dim_NivelEducacao
-        dim_nivel = self.transformador_dim.criar_dim_nivel_educacao(
-            self.config.NIVEIS_EDUCACAO
-        )
-        self.dimensoes['Dim_NivelEducacao'] = dim_nivel
+        dag_dim = AgendadorDAG(self.config.DAG_WORKERS, self.config.DAG_MODO, self.logger, "Dimensões Educação")
+        dag_dim.adicionar('Dim_PopulacaoResidente',
+                          self.transformador_dim.criar_dim_populacao_residente, [2011, 2001])
+        dag_dim.adicionar('Dim_Nacionalidade',
+                          self.transformador_dim.criar_dim_nacionalidade, self.dados_brutos['paises'])
+        dag_dim.adicionar('Dim_Sexo', self.transformador_dim.criar_dim_sexo)
+        dag_dim.adicionar('Dim_GrupoEtario', self.transformador_dim.criar_dim_grupo_etario)
+        dag_dim.adicionar('Dim_NivelEducacao',
+                          self.transformador_dim.criar_dim_nivel_educacao, self.config.NIVEIS_EDUCACAO)
         
         # Dim_Localidade (se houver dados de municípios)
         if self.dados_brutos['municipios']:
-            dim_local = self.transformador_dim.criar_dim_localidade(
-                self.dados_brutos['municipios']
-            )
-            self.dimensoes['Dim_Localidade'] = dim_local
+            dag_dim.adicionar('Dim_Localidade',
+                              self.transformador_dim.criar_dim_localidade, self.dados_brutos['municipios'])
+        
+        # Dim_MapeamentoNacionalidades depende de Dim_Nacionalidade
+        dag_dim.adicionar('Dim_MapeamentoNacionalidades',
+                          self.transformador_dim.criar_dim_mapeamento_nacionalidades, Ref('Dim_Nacionalidade'))
         
-        # Dim_MapeamentoNacionalidades
-        dim_map = self.transformador_dim.criar_dim_mapeamento_nacionalidades(dim_nac)
-        self.dimensoes['Dim_MapeamentoNacionalidades'] = dim_map
+        self.dimensoes.update(dag_dim.executar())
+        dag_dim.relatorio_tempos()
         
         # PASSO 2: Criar Lookup de IDs
         self.logger.subsecao("Criando Sistema de Lookup")
         self.lookup = LookupDimensoes(self.dimensoes)
         
-        # PASSO 3: Criar Fatos Educacionais
-        self.logger.subsecao("Criando Fatos Educacionais")
+        # PASSO 3: Criar Fatos Educacionais e Populacionais Base
+        # (dependem apenas do lookup: executados em paralelo)
+        self.logger.subsecao("Criando Fatos Educacionais e Populacionais Base")
         
         self.transformador_edu = TransformadorEducacao(self.logger, self.lookup)
-        
-        # Fact_PopulacaoEducacao
-        fact_pop_edu = self.transformador_edu.criar_fact_populacao_educacao(
-            self.dados_brutos['educacao']
-        )
-        self.fatos['Fact_PopulacaoEducacao'] = fact_pop_edu
-        
-        # Fact_EstatisticasEducacao
-        fact_stats_edu = self.transformador_edu.criar_fact_estatisticas_educacao(
-            self.dados_brutos['educacao']
-        )
-        self.fatos['Fact_EstatisticasEducacao'] = fact_stats_edu
-        
-        # Fact_PopulacaoPorNacionalidade
-        fact_pop_nac = self.transformador_edu.criar_fact_populacao_por_nacionalidade(
-            self.dados_brutos['educacao']
-        )
-        self.fatos['Fact_PopulacaoPorNacionalidade'] = fact_pop_nac
-        
-        # Fact_EvolucaoTemporal
-        fact_evolucao = self.transformador_edu.criar_fact_evolucao_temporal(
-            self.dados_brutos['educacao']
-        )
-        self.fatos['Fact_EvolucaoTemporal'] = fact_evolucao
-        
-        # PASSO 4: Criar Fatos Base
-        self.logger.subsecao("Criando Fatos Populacionais Base")
-        
         self.transformador_fatos = TransformadorFatosBase(self.logger, self.lookup)
-        
-        # Fact_PopulacaoPorNacionalidadeSexo
-        fact_nac_sexo = self.transformador_fatos.criar_fact_populacao_por_nacionalidade_sexo(
-            self.dados_brutos['populacional']
-        )
-        self.fatos['Fact_PopulacaoPorNacionalidadeSexo'] = fact_nac_sexo
+        self.logger.instrumentar(self.transformador_edu)
+        self.logger.instrumentar(self.transformador_fatos)
+        
+        dag_fatos = AgendadorDAG(self.config.DAG_WORKERS, self.config.DAG_MODO, self.logger, "Fatos Educação")
+        dag_fatos.adicionar('Fact_PopulacaoEducacao',
+                            self.transformador_edu.criar_fact_populacao_educacao, self.dados_brutos['educacao'])
+        dag_fatos.adicionar('Fact_EstatisticasEducacao',
+                            self.transformador_edu.criar_fact_estatisticas_educacao, self.dados_brutos['educacao'])
+        dag_fatos.adicionar('Fact_PopulacaoPorNacionalidade',
+                            self.transformador_edu.criar_fact_populacao_por_nacionalidade, self.dados_brutos['populacao'])
+        dag_fatos.adicionar('Fact_EvolucaoTemporal',
+                            self.transformador_edu.criar_fact_evolucao_temporal, self.dados_brutos['populacao'])
+        dag_fatos.adicionar('Fact_PopulacaoPorNacionalidadeSexo',
+                            self.transformador_fatos.criar_fact_populacao_por_nacionalidade_sexo,
+                            self.dados_brutos['populacional'])
         
         # Fact_PopulacaoPorGrupoEtario (se houver dados)
         if 'grupos_etarios' in self.dados_brutos:
-            fact_grupo = self.transformador_fatos.criar_fact_populacao_por_grupo_etario(
-                self.dados_brutos['grupos_etarios']
-            )
-            self.fatos['Fact_PopulacaoPorGrupoEtario'] = fact_grupo
+            dag_fatos.adicionar('Fact_PopulacaoPorGrupoEtario',
+                                self.transformador_fatos.criar_fact_populacao_por_grupo_etario,
+                                self.dados_brutos['grupos_etarios'])
+        
+        self.fatos.update(dag_fatos.executar())
+        dag_fatos.relatorio_tempos()
         
         self.logger.sucesso(
             f"Transformação concluída: {len(self.dimensoes)} dimensões + "
@@ -338,6 +329,7 @@ class OrquestradorPipelineEducacao:
             self.logger,
             self.config
         )
+        self.logger.instrumentar(self.gerenciador_export)
         
         # Exportar todas as tabelas
         total_exportado = self.gerenciador_export.exportar_todas_tabelas(
@@ -346,10 +338,7 @@ class OrquestradorPipelineEducacao:
             prefixo="DP-01-A"
         )
         
-        # Gerar relatório
-        self.gerenciador_export.gerar_relatorio_exportacao()
-        
-        # Download
+        # Download (as tabelas são gravadas aqui, direto em disco)
         if modo_download == 'zip':
             self.logger.info("Criando pacote ZIP para download...")
             self.gerenciador_export.criar_pacote_zip("ETL_Educacao_DP-01-A.zip")
@@ -357,6 +346,9 @@ class OrquestradorPipelineEducacao:
             self.logger.info("Iniciando downloads individuais...")
             self.gerenciador_export.baixar_todos_arquivos()
         
+        # Gerar relatório (com os tamanhos gravados)
+        self.gerenciador_export.gerar_relatorio_exportacao()
+        
         self.logger.sucesso(f"Exportação concluída: {total_exportado} arquivos")
         
         return True
@@ -424,18 +416,22 @@ class OrquestradorPipelineEducacao:
 # FUNÇÃO PRINCIPAL DE EXECUÇÃO
 # ============================================================
 
-def executar_pipeline_educacao(modo_download='zip'):
+def executar_pipeline_educacao(modo_download='zip', fonte=None):
     """
-    Função principal para executar o pipeline no Google Colab
+    Função principal para executar o pipeline (Google Colab ou local)
     
     Parâmetros:
       modo_download: 'zip' para baixar tudo em um pacote, 'individual' para arquivos separados
+      fonte: Pasta, ficheiro .zip ou 'colab' com os CSVs país (None = ETL_FONTE_DADOS / Colab)
     
     Uso no Colab:
       >>> from parte_08_orquestrador_principal import executar_pipeline_educacao
       >>> executar_pipeline_educacao(modo_download='zip')
+    
+    Uso local:
+      >>> executar_pipeline_educacao(fonte='scripts/input')
     """
-    orquestrador = OrquestradorPipelineEducacao()
+    orquestrador = OrquestradorPipelineEducacao(fonte)
     sucesso = orquestrador.executar_pipeline_completo(modo_download)
     
     if sucesso:
@@ -11,14 +11,23 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-import io
+import os
 import sys
 import warnings
-import zipfile
 warnings.filterwarnings('ignore')
 
-# Configurar output UTF-8 para Windows
-if sys.platform == 'win32':
+from conversor_numerico import ConversorNumerico
+from formatos_tabela import EscritorTabelas, RegistroTabelas, localizar_tabela
+from dimensoes_conformes import ARMAZEM_DIMENSOES
+from manifesto_build import ManifestoBuild, arquivos_codigo
+from agendador_dag import AgendadorDAG, workers_padrao
+from instrumentacao import INSTRUMENTACAO
+from exportacao_zip import ExportadorZip
+from resolvedor_nacionalidades import RESOLVEDOR_NACIONALIDADES, ResolvedorNacionalidades
+from decodificacao_entradas import DECODIFICADOR_ENTRADAS
+
+# Configurar output UTF-8 para Windows (uma vez por processo: executar_tudo.py importa os tres ETL)
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
@@ -65,10 +74,9 @@ class ConfigAmbiente:
     @staticmethod
     def salvar_arquivo(filename, dataframe):
         pasta_output = ConfigAmbiente.get_pasta_output()
-        pasta_output.mkdir(parents=True, exist_ok=True)
-        filepath = pasta_output / filename
-        dataframe.to_csv(filepath, index=False, encoding='utf-8')
-        print(f"[SALVO] {filename} -> {filepath}")
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA)
+        filepath = escritor.salvar(dataframe, pasta_output, filename)
+        print(f"[SALVO] {filepath.name} -> {filepath}")
         return filepath
 
 
@@ -78,21 +86,8 @@ class Config:
     ANOS_REFERENCIA = [2011, 2021]
     FONTE_DADOS = "INE Censos 2011 + 2021"
     
-    # Mapeamento de nacionalidades 2011 -> 2021
-    MAPEAMENTO_NACIONALIDADES = {
-        'Angola': 'Angola',
-        'Brasil': 'Brasil',
-        'Cabo Verde': 'Cabo Verde',
-        'Espanha': 'Espanha',
-        'Franca': 'França',
-        'Guine-Bissau': 'Guiné-Bissau',
-        'Reino Unido': 'Reino Unido',
-        'Republica da Moldavia': 'República da Moldávia',
-        'Republica Popular da China': 'China',
-        'Romenia': 'Roménia',
-        'Sao tome e Principe': 'São Tomé e Príncipe',
-        'Ucrania': 'Ucrânia'
-    }
+    # Nacionalidades 2011 -> 2021: nomes dos ficheiros resolvidos contra
+    # Dim_Nacionalidade por resolvedor_nacionalidades.py (variantes e acentos)
     
     # Mapeamento de niveis educacionais
     NIVEIS_EDUCACAO_2011 = {
@@ -101,11 +96,69 @@ class Config:
         3: 'Secundario e pos-secundario',
         4: 'Superior'
     }
+    
+    # Formato de saida das tabelas: 'csv', 'parquet' ou 'feather'
+    # (parquet/feather exigem pyarrow; sem ele o export volta para CSV)
+    FORMATO_SAIDA = os.environ.get('ETL_FORMATO_SAIDA', 'csv')
+    COMPRESSAO_SAIDA = os.environ.get('ETL_COMPRESSAO_SAIDA') or None
+    
+    # Etapas independentes correm em paralelo (agendador_dag.py)
+    # ETL_DAG_WORKERS=1 executa tudo em sequencia
+    DAG_WORKERS = workers_padrao()
+    
+    # Tabelas processadas de 2021 (DP-01-A)
+    ARQUIVOS_2021_NECESSARIOS = [
+        # Dimensoes Base
+        'Nacionalidade.csv',
+        'Sexo.csv',
+        'Localidade.csv',
+        'GrupoEtario.csv',
+        'PopulacaoResidente.csv',
+        # Dimensoes Educacao
+        'NivelEducacao.csv',
+        'MapeamentoNacionalidades.csv',
+        # Fatos Base
+        'PopulacaoPorNacionalidade.csv',
+        'PopulacaoPorLocalidade.csv',
+        'PopulacaoPorGrupoEtario.csv',
+        'EvolucaoTemporal.csv',
+        'NacionalidadePrincipal.csv',
+        'DistribuicaoGeografica.csv',
+        # Fatos Educacao
+        'PopulacaoEducacao.csv',
+        'EstatisticasEducacao.csv'
+    ]
+    
+    # Build incremental (output/manifesto_build.json)
+    # ETL_REBUILD_COMPLETO=1 ignora o manifesto e reconstroi tudo
+    ESTAGIO_BUILD = 'EDUCACAO'
+    REBUILD_COMPLETO = os.environ.get('ETL_REBUILD_COMPLETO', '') == '1'
+    
+    # Entradas de que depende cada tabela de saida
+    # (input/ = CSVs brutos 2011, DP-01-A/ = tabelas processadas 2021)
+    DEPENDENCIAS_TABELAS = {
+        'Dim_Nacionalidade': ['DP-01-A/Nacionalidade.csv'],
+        'Dim_Sexo': ['DP-01-A/Sexo.csv'],
+        'Dim_Localidade': ['DP-01-A/Localidade.csv'],
+        'Dim_GrupoEtario': ['DP-01-A/GrupoEtario.csv'],
+        'Dim_PopulacaoResidente': ['DP-01-A/PopulacaoResidente.csv'],
+        'Dim_NivelEducacao': ['DP-01-A/NivelEducacao.csv'],
+        'Dim_MapeamentoNacionalidades': ['DP-01-A/MapeamentoNacionalidades.csv'],
+        'Fact_PopulacaoPorNacionalidade': ['DP-01-A/PopulacaoPorNacionalidade.csv'],
+        'Fact_PopulacaoPorLocalidade': ['DP-01-A/PopulacaoPorLocalidade.csv'],
+        'Fact_PopulacaoPorGrupoEtario': ['DP-01-A/PopulacaoPorGrupoEtario.csv'],
+        'Fact_EvolucaoTemporal': ['DP-01-A/EvolucaoTemporal.csv'],
+        'Fact_NacionalidadePrincipal': ['DP-01-A/NacionalidadePrincipal.csv'],
+        'Fact_DistribuicaoGeografica': ['DP-01-A/DistribuicaoGeografica.csv'],
+        'Fact_PopulacaoEducacao': ['input/*.csv', 'DP-01-A/PopulacaoEducacao.csv', 'DP-01-A/Nacionalidade.csv'],
+        'Fact_EstatisticasEducacao': ['input/*.csv', 'DP-01-A/EstatisticasEducacao.csv', 'DP-01-A/Nacionalidade.csv']
+    }
 
 
 class Logger:
     def __init__(self, nome="ETL"):
         self.nome = nome
+        self.instrumentacao = INSTRUMENTACAO  # metricas partilhadas por todos os Logger
     
     def info(self, msg):
         print(f"[INFO] {msg}")
@@ -118,6 +171,25 @@ class Logger:
     
     def separador(self):
         print("\n" + "="*70)
+    
+    def medir(self, etapa, linhas_entrada=None):
+        return self.instrumentacao.medir(etapa, self.nome, linhas_entrada)
+    
+    def anotar(self, **campos):
+        self.instrumentacao.anotar(**campos)
+    
+    def instrumentar(self, objeto):
+        return self.instrumentacao.instrumentar_objeto(objeto, getattr(objeto, "logger", self).nome)
+    
+    def gravar_metricas(self, caminho):
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Metricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        self.separador()
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
 
 
 class Extrator2011:
@@ -127,7 +199,13 @@ class Extrator2011:
         self.logger = Logger("Extrator2011")
         self.dados_brutos = {}
     
-    def carregar_dados_2011(self):
+    def carregar_dados_2011(self, apenas=None):
+        """
+        Carrega os CSVs brutos de 2011
+        
+        Args:
+            apenas: Conjunto de chaves 'input/<arquivo>' a carregar (None = todas)
+        """
         self.logger.info("Carregando dados brutos 2011 da pasta input/")
         pasta_input = ConfigAmbiente.get_pasta_input()
         
@@ -137,8 +215,11 @@ class Extrator2011:
         
         contador = 0
         for arquivo in pasta_input.glob('*.csv'):
+            if apenas is not None and f'input/{arquivo.name}' not in apenas:
+                continue
             try:
-                df = pd.read_csv(arquivo, encoding='utf-8', sep=';', decimal=',')
+                # Encoding detetado uma vez por ficheiro; mojibake reparado por coluna
+                df = DECODIFICADOR_ENTRADAS.ler_csv(arquivo, colunas_reparar=None, sep=';', decimal=',')
                 nome_pais = arquivo.stem
                 self.dados_brutos[nome_pais] = df
                 contador += 1
@@ -147,92 +228,92 @@ class Extrator2011:
                 self.logger.erro(f"Erro ao carregar {arquivo.name}: {e}")
         
         self.logger.sucesso(f"Total de {contador} arquivos carregados (2011)")
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.dados_brutos.values()))
         return contador > 0
     
     def processar_educacao_2011(self):
-        """Processa dados educacionais de 2011"""
-        self.logger.info("Processando dados educacionais de 2011...")
+        """
+        Processa dados educacionais de 2011
         
-        registros_educacao = []
-        arquivos_processados = []
-        arquivos_sem_dados = []
+        Todos os paises de uma vez: os DataFrames carregados sao concatenados
+        com a chave do arquivo e o filtro de ensino, o mapeamento de niveis e a
+        conversao numerica correm por coluna (sem iterrows)
+        """
+        self.logger.info("Processando dados educacionais de 2011...")
         
-        # Mapeamento de subcategorias para nivel_educacao_id
+        # Mapeamento de subcategorias para nivel_educacao_id (os acentos ja
+        # chegam corretos do estagio de descodificacao em carregar_dados_2011)
         mapa_niveis = {
             'Inferior ao básico 3º ciclo': 1,
-            'Inferior ao b�sico 3� ciclo': 1,
             'Básico 3º ciclo': 2,
-            'B�sico 3� ciclo': 2,
             'Secundário e pós-secundário': 3,
-            'Secund�rio e p�s-secund�rio': 3,
             'Superior': 4
         }
-        
-        for nome_arquivo, df in self.dados_brutos.items():
-            # Mapear nome do arquivo para nacionalidade padronizada
-            nome_padronizado = Config.MAPEAMENTO_NACIONALIDADES.get(nome_arquivo, nome_arquivo)
-            
-            # Filtrar linhas de nivel de ensino (CORRIGIDO: aceita NÍVEL com ou sem acento)
-            df_ensino = df[df['Categoria'].str.contains(
-                r'N[ÍI]VEL\s+DE\s+ENSINO',
-                case=False,
-                na=False,
-                regex=True
-            )]
-            
-            if df_ensino.empty:
-                arquivos_sem_dados.append(nome_arquivo)
-                self.logger.info(f"⚠️  {nome_arquivo}: Sem dados de educação")
-                continue
-            
-            registros_antes = len(registros_educacao)
-            
-            for idx, row in df_ensino.iterrows():
-                try:
-                    subcategoria = str(row.get('Subcategoria', '')).strip()
-                    
-                    # Pular linha de total
-                    if 'Total' in subcategoria or 'Popula' in subcategoria:
-                        continue
-                    
-                    # Mapear subcategoria para nivel_id
-                    nivel_id = mapa_niveis.get(subcategoria)
-                    if nivel_id is None:
-                        continue
-                    
-                    # Extrair valor
-                    valor = self._limpar_numero(row.get('Dados 2011', 0))
-                    
-                    if valor and valor > 0:
-                        registros_educacao.append({
-                            'nacionalidade': nome_padronizado,
-                            'nivel_educacao_id': nivel_id,
-                            'populacao_total': int(valor),
-                            'ano_referencia': 2011
-                        })
-                except Exception as e:
-                    self.logger.erro(f"Erro ao processar linha {idx} de {nome_arquivo}: {e}")
-                    continue
-            
-            registros_adicionados = len(registros_educacao) - registros_antes
-            if registros_adicionados > 0:
-                arquivos_processados.append(f"{nome_arquivo} ({registros_adicionados} registros)")
-        
+        mapa_niveis = {subcategoria.casefold(): nivel_id for subcategoria, nivel_id in mapa_niveis.items()}
+        
+        colunas = ['Categoria', 'Subcategoria', 'Dados 2011']
+        frames = {nome: df.reindex(columns=colunas) for nome, df in self.dados_brutos.items()}
+        if not frames:
+            self.logger.sucesso("Total: 0 registros educacionais de 2011")
+            return pd.DataFrame()
+        
+        # Uma tabela com todos os paises (coluna 'arquivo' = chave do pais)
+        conjunto = pd.concat(frames, names=['arquivo', None]).reset_index(level='arquivo')
+        
+        # Filtrar linhas de nivel de ensino (aceita NÍVEL com ou sem acento)
+        ensino = conjunto['Categoria'].astype(str).str.contains(
+            r'N[ÍI]VEL\s+DE\s+ENSINO', case=False, na=False, regex=True
+        ).to_numpy()
+        conjunto = conjunto[ensino]
+        
+        arquivos_sem_dados = [nome for nome in frames if nome not in set(conjunto['arquivo'])]
+        
+        # Subcategoria normalizada -> nivel; linhas de total ignoradas
+        subcategoria = conjunto['Subcategoria'].astype(str).str.strip()
+        linha_total = subcategoria.str.contains('Total|Popula', regex=True).to_numpy()
+        nivel_id = subcategoria.str.casefold().map(mapa_niveis)
+        valor = ConversorNumerico.converter_serie(conjunto['Dados 2011'])
+        
+        sem_nivel = ~linha_total & nivel_id.isna().to_numpy()
+        sem_valor = ~linha_total & ~sem_nivel & ~(valor > 0).to_numpy()
+        validas = ~(linha_total | sem_nivel | sem_valor)
+        
+        # Nome do arquivo -> nacionalidade padronizada (uma vez por pais)
+        nacionalidades = {nome: RESOLVEDOR_NACIONALIDADES.normalizar(nome) for nome in frames}
+        arquivo = conjunto['arquivo'].to_numpy()
+        
+        df_educacao = pd.DataFrame({
+            'nacionalidade': conjunto['arquivo'][validas].map(nacionalidades).to_numpy(),
+            'nivel_educacao_id': nivel_id[validas].astype('int64').to_numpy(),
+            'populacao_total': valor[validas].astype('int64').to_numpy(),
+            'ano_referencia': 2011
+        })
+        
+        # Resumo por pais (em vez de uma mensagem por linha)
+        registros = pd.Series(arquivo[validas]).value_counts()
+        arquivos_processados = [
+            f"{nome} ({registros[nome]} registros)" for nome in frames if nome in registros.index
+        ]
         self.logger.sucesso(f"Arquivos processados ({len(arquivos_processados)}): {', '.join(arquivos_processados)}")
         if arquivos_sem_dados:
             self.logger.info(f"Arquivos sem dados ({len(arquivos_sem_dados)}): {', '.join(arquivos_sem_dados)}")
-        self.logger.sucesso(f"Total: {len(registros_educacao)} registros educacionais de 2011")
-        return pd.DataFrame(registros_educacao) if registros_educacao else pd.DataFrame()
-    
-    def _limpar_numero(self, valor):
-        if pd.isna(valor) or valor == '':
-            return None
-        valor_str = str(valor).replace('%', '').replace(' ', '').strip()
-        valor_str = valor_str.replace('.', '').replace(',', '.')
-        try:
-            return float(valor_str)
-        except:
-            return None
+        
+        ignoradas = pd.DataFrame({
+            'arquivo': arquivo, 'total': linha_total, 'sem_nivel': sem_nivel, 'sem_valor': sem_valor
+        }).groupby('arquivo', sort=False)[['total', 'sem_nivel', 'sem_valor']].sum()
+        self.logger.info(
+            f"Linhas de ensino ignoradas: {int(ignoradas['total'].sum())} de total, "
+            f"{int(ignoradas['sem_nivel'].sum())} sem nivel mapeado, "
+            f"{int(ignoradas['sem_valor'].sum())} sem valor"
+        )
+        problemas = ignoradas[(ignoradas['sem_nivel'] > 0) | (ignoradas['sem_valor'] > 0)]
+        for nome, linha in problemas.iterrows():
+            self.logger.info(
+                f"  {nome}: {linha['sem_nivel']} sem nivel mapeado, {linha['sem_valor']} sem valor"
+            )
+        
+        self.logger.sucesso(f"Total: {len(df_educacao)} registros educacionais de 2011")
+        return df_educacao if len(df_educacao) else pd.DataFrame()
 
 
 class Extrator2021:
@@ -242,7 +323,13 @@ class Extrator2021:
         self.logger = Logger("Extrator2021")
         self.tabelas_2021 = {}
     
-    def carregar_tabelas_2021(self):
+    def carregar_tabelas_2021(self, apenas=None):
+        """
+        Importa as tabelas processadas de 2021
+        
+        Args:
+            apenas: Conjunto de chaves 'DP-01-A/<arquivo>' a carregar (None = todas)
+        """
         self.logger.info("Importando TODAS as tabelas processadas de 2021...")
         pasta_dp01a = ConfigAmbiente.get_pasta_dados_2021()
         
@@ -251,41 +338,24 @@ class Extrator2021:
             return False
         
         # CARREGAR TODAS AS TABELAS do DP-01-A
-        arquivos_necessarios = [
-            # Dimensoes Base
-            'Nacionalidade.csv',
-            'Sexo.csv',
-            'Localidade.csv',
-            'GrupoEtario.csv',
-            'PopulacaoResidente.csv',
-            # Dimensoes Educacao
-            'NivelEducacao.csv',
-            'MapeamentoNacionalidades.csv',
-            # Fatos Base
-            'PopulacaoPorNacionalidade.csv',
-            'PopulacaoPorLocalidade.csv',
-            'PopulacaoPorGrupoEtario.csv',
-            'EvolucaoTemporal.csv',
-            'NacionalidadePrincipal.csv',
-            'DistribuicaoGeografica.csv',
-            # Fatos Educacao
-            'PopulacaoEducacao.csv',
-            'EstatisticasEducacao.csv'
-        ]
-        
-        for arquivo in arquivos_necessarios:
-            filepath = pasta_dp01a / arquivo
-            if filepath.exists():
+        # Prefere .parquet/.feather (tipos preservados) quando existirem ao lado do CSV;
+        # ARMAZEM_DIMENSOES partilha as tabelas ja lidas por outro pipeline (so relidas se mudarem)
+        for arquivo in Config.ARQUIVOS_2021_NECESSARIOS:
+            if apenas is not None and f'DP-01-A/{arquivo}' not in apenas:
+                continue
+            filepath = localizar_tabela(pasta_dp01a, arquivo)
+            if filepath:
                 try:
-                    df = pd.read_csv(filepath, encoding='utf-8')
+                    df = ARMAZEM_DIMENSOES.ler(filepath)
                     tabela_nome = arquivo.replace('.csv', '')
                     self.tabelas_2021[tabela_nome] = df
-                    self.logger.sucesso(f"{arquivo} importado ({len(df)} registros)")
+                    self.logger.sucesso(f"{filepath.name} importado ({len(df)} registros)")
                 except Exception as e:
                     self.logger.erro(f"Erro ao importar {arquivo}: {e}")
             else:
                 self.logger.info(f"Arquivo {arquivo} nao encontrado (opcional)")
         
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.tabelas_2021.values()))
         return len(self.tabelas_2021) > 0
 
 
@@ -294,8 +364,9 @@ class ConsolidadorTemporal:
     
     def __init__(self):
         self.logger = Logger("Consolidador")
-        self.dimensoes = {}
-        self.fatos = {}
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
+        self._resolvedor_nacs = (None, None)
     
     def consolidar_dimensoes_base(self, tabelas_2021):
         """Consolida TODAS as dimensoes base"""
@@ -360,8 +431,8 @@ class ConsolidadorTemporal:
         # Processar dados 2011
         if not dados_2011_df.empty:
             # Mapear nacionalidades para IDs
-            dados_2011_df['nacionalidade_id'] = dados_2011_df['nacionalidade'].map(
-                lambda x: self._obter_nacionalidade_id(x, mapa_nacs)
+            dados_2011_df['nacionalidade_id'] = self._resolvedor_nacionalidades(mapa_nacs).resolver_ids(
+                dados_2011_df['nacionalidade']
             )
             
             # Remover registros sem nacionalidade_id
@@ -471,15 +542,21 @@ class ConsolidadorTemporal:
         
         return pd.DataFrame(stats_list)
     
+    def _resolvedor_nacionalidades(self, mapa_nacs):
+        """Resolvedor de nomes contra Dim_Nacionalidade (um por tabela de nacionalidades)"""
+        if self._resolvedor_nacs[0] is not mapa_nacs:
+            self._resolvedor_nacs = (mapa_nacs, ResolvedorNacionalidades.de_dimensao(
+                mapa_nacs, 'nome_nacionalidade', 'nacionalidade_id'
+            ))
+        return self._resolvedor_nacs[1]
+    
     def _obter_nacionalidade_id(self, nome_nac, mapa_nacs):
         """Mapeia nome de nacionalidade para ID"""
         try:
-            nac_row = mapa_nacs[mapa_nacs['nome_nacionalidade'] == nome_nac]
-            if not nac_row.empty:
-                return nac_row.iloc[0]['nacionalidade_id']
-        except:
-            pass
-        return None
+            resolvedor = self._resolvedor_nacionalidades(mapa_nacs)
+            return resolvedor.ids.get(resolvedor.resolver(nome_nac))
+        except KeyError:
+            return None
 
 
 class Exportador:
@@ -500,20 +577,22 @@ class Exportador:
         
         todas_tabelas = {**dimensoes, **fatos}
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA, self.logger)
+        
+        # Cada tabela vai direto para o ZIP em disco (membros comprimidos em
+        # paralelo); o manifesto de checksums fecha o arquivo
+        with ExportadorZip(zip_path, escritor, logger=self.logger) as exportador:
             for nome_tabela, df in todas_tabelas.items():
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8')
-                zip_file.writestr(f'{nome_tabela}.csv', csv_buffer.getvalue())
+                exportador.adicionar_tabela(nome_tabela, df)
             
             # Adicionar README
-            readme = self._gerar_readme(dimensoes, fatos)
-            zip_file.writestr('README_CONSOLIDACAO.txt', readme)
+            readme = self._gerar_readme(dimensoes, fatos, escritor.extensao)
+            exportador.adicionar_texto('README_CONSOLIDACAO.txt', readme)
         
-        self.logger.sucesso(f"ZIP criado: {zip_path}")
+        self.logger.sucesso(f"ZIP criado: {zip_path} ({len(exportador.manifesto['membros'])} arquivos + checksums)")
         return zip_path
     
-    def _gerar_readme(self, dimensoes, fatos):
+    def _gerar_readme(self, dimensoes, fatos, extensao='.csv'):
         readme = f"""
 ========================================================================
 ETL EDUCACAO CONSOLIDADO - DATASET TEMPORAL 2011 + 2021
@@ -528,7 +607,7 @@ DIMENSOES ({len(dimensoes)} tabelas)
 ========================================================================
 """
         for nome, df in dimensoes.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += f"""
 
@@ -537,7 +616,7 @@ FATOS ({len(fatos)} tabelas)
 ========================================================================
 """
         for nome, df in fatos.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += """
 
@@ -576,25 +655,84 @@ class OrquestradorConsolidacao:
         self.extrator_2021 = Extrator2021()
         self.consolidador = ConsolidadorTemporal()
         self.exportador = Exportador()
+        self.resultado = None  # plano de build + tabelas consolidadas (para exportar_resultados)
+        self.zip_path = None
+        
+        # Tempo, CPU, linhas e memoria de cada carregar_*/consolidar_*/exportar_*
+        for componente in (self.extrator_2011, self.extrator_2021, self.consolidador, self.exportador):
+            self.logger.instrumentar(componente)
+    
+    def mapear_entradas(self):
+        """Mapeia chave logica -> ficheiro de entrada existente (para o manifesto)"""
+        entradas = {}
+        pasta_input = ConfigAmbiente.get_pasta_input()
+        if pasta_input.exists():
+            for arquivo in sorted(pasta_input.glob('*.csv')):
+                entradas[f'input/{arquivo.name}'] = arquivo
+        
+        pasta_dp01a = ConfigAmbiente.get_pasta_dados_2021()
+        for arquivo in Config.ARQUIVOS_2021_NECESSARIOS:
+            filepath = localizar_tabela(pasta_dp01a, arquivo)
+            if filepath:
+                entradas[f'DP-01-A/{arquivo}'] = filepath
+        return entradas
+    
+    def _extrair_2011(self, necessarias):
+        """Carrega e processa os CSVs de 2011 (None em caso de falha)"""
+        if not self.extrator_2011.carregar_dados_2011(necessarias):
+            return None
+        return self.extrator_2011.processar_educacao_2011()
     
-    def executar_pipeline_completo(self):
+    def executar_pipeline_completo(self, exportar=True):
+        """
+        Executa o ETL Educacao
+        
+        Args:
+            exportar: Se False, para depois da consolidacao (tabelas em self.resultado);
+                      ZIP, manifesto e metricas ficam para exportar_resultados()
+        """
         self.logger.separador()
         print(f"{Config.PROJETO_NOME} - Versao {Config.VERSAO}")
         print(f"Ambiente: {AMBIENTE}")
         print(f"Fonte: {Config.FONTE_DADOS}")
         self.logger.separador()
         
-        # FASE 1: Extrair dados 2011
-        self.logger.info("\n>>> FASE 1: Extracao de Dados 2011")
-        if not self.extrator_2011.carregar_dados_2011():
+        # FASE 0: Manifesto de build (reconstroi apenas o que mudou)
+        self.logger.info("\n>>> FASE 0: Verificacao do Manifesto de Build")
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        plano = manifesto.planejar(
+            Config.ESTAGIO_BUILD,
+            self.mapear_entradas(),
+            Config.DEPENDENCIAS_TABELAS,
+            codigo=arquivos_codigo(sys.modules[__name__]),
+            forcar=Config.REBUILD_COMPLETO
+        )
+        if plano.estagio_inalterado:
+            self.logger.sucesso("Entradas inalteradas desde o ultimo build - ETL Educacao ignorado")
+            self.logger.info(f"Ultimo build: {manifesto.artefato(Config.ESTAGIO_BUILD)}")
+            return True
+        for linha in manifesto.resumo(plano):
+            self.logger.info(linha)
+        necessarias = plano.entradas_necessarias(Config.DEPENDENCIAS_TABELAS) or None
+        
+        # FASE 1 e 2: Extrair dados 2011 (apenas se algum fato educacional mudou)
+        # e importar tabelas 2021 - fontes independentes, executadas em paralelo
+        self.logger.info("\n>>> FASE 1-2: Extracao de Dados 2011 e Importacao de Tabelas 2021")
+        dag = AgendadorDAG(Config.DAG_WORKERS, logger=self.logger, nome="Extracao Educacao")
+        if necessarias is None or any(c.startswith('input/') for c in necessarias):
+            dag.adicionar('dados_2011', self._extrair_2011, necessarias)
+        else:
+            self.logger.info("Dados 2011 inalterados - fatos educacionais reutilizados")
+        if necessarias is None or any(c.startswith('DP-01-A/') for c in necessarias):
+            dag.adicionar('tabelas_2021', self.extrator_2021.carregar_tabelas_2021, necessarias)
+        extraidos = dag.executar()
+        dag.relatorio_tempos()
+        
+        dados_edu_2011 = extraidos.get('dados_2011', pd.DataFrame())
+        if dados_edu_2011 is None:
             self.logger.erro("Falha ao carregar dados 2011")
             return False
-        
-        dados_edu_2011 = self.extrator_2011.processar_educacao_2011()
-        
-        # FASE 2: Importar tabelas 2021
-        self.logger.info("\n>>> FASE 2: Importacao de Tabelas 2021")
-        if not self.extrator_2021.carregar_tabelas_2021():
+        if not extraidos.get('tabelas_2021', True):
             self.logger.erro("Falha ao importar dados 2021")
             return False
         
@@ -613,17 +751,42 @@ class OrquestradorConsolidacao:
         
         # Consolidar fatos educacionais (com dados 2011)
         if not dados_edu_2011.empty and 'Nacionalidade' in self.extrator_2021.tabelas_2021:
-            fact_pop_edu = self.consolidador.consolidar_populacao_educacao(
-                dados_edu_2011,
+            dag_edu = AgendadorDAG(Config.DAG_WORKERS, logger=self.logger, nome="Fatos Educacao")
+            dag_edu.adicionar(
+                'Fact_PopulacaoEducacao',
+                self.consolidador.consolidar_populacao_educacao,
+                dados_edu_2011.copy(),  # este passo acrescenta colunas ao DataFrame
                 self.extrator_2021.tabelas_2021['PopulacaoEducacao'],
                 self.extrator_2021.tabelas_2021['Nacionalidade']
             )
-            
-            fact_stats = self.consolidador.consolidar_estatisticas_educacao(
+            dag_edu.adicionar(
+                'Fact_EstatisticasEducacao',
+                self.consolidador.consolidar_estatisticas_educacao,
                 dados_edu_2011,
                 self.extrator_2021.tabelas_2021['EstatisticasEducacao'],
                 self.extrator_2021.tabelas_2021['Nacionalidade']
             )
+            dag_edu.executar()
+            dag_edu.sincronizar(self.consolidador.fatos)
+            dag_edu.relatorio_tempos()
+        
+        # Tabelas com entradas inalteradas vem da cache do build anterior
+        manifesto.reutilizar_tabelas(
+            plano,
+            lambda t: self.consolidador.dimensoes if t.startswith('Dim_') else self.consolidador.fatos
+        )
+        
+        self.resultado = {'plano': plano, 'dimensoes': self.consolidador.dimensoes, 'fatos': self.consolidador.fatos}
+        if not exportar:
+            self.logger.info("Exportacao adiada para o fim do build (exportar_resultados)")
+            return True
+        return self.exportar_resultados()
+    
+    def exportar_resultados(self):
+        """FASE 4: ZIP consolidado, manifesto de build, metricas e relatorio final"""
+        if self.resultado is None:
+            return True  # Estagio inalterado: nada a exportar
+        plano = self.resultado['plano']
         
         # FASE 4: Exportacao
         self.logger.info("\n>>> FASE 4: Exportacao")
@@ -632,6 +795,21 @@ class OrquestradorConsolidacao:
             self.consolidador.fatos
         )
         
+        # Manifesto relido: com a exportacao adiada, outros estagios podem te-lo gravado entretanto
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        manifesto.registrar(
+            plano,
+            {**self.consolidador.dimensoes, **self.consolidador.fatos},
+            Config.DEPENDENCIAS_TABELAS,
+            zip_path
+        )
+        manifesto.salvar()
+        self.zip_path = zip_path
+        
+        # Metricas por etapa (JSON-lines ao lado do ZIP)
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas(zip_path.with_name(f"{zip_path.stem}_metricas.jsonl"))
+        
         # Relatorio final
         self.logger.separador()
         print("CONSOLIDACAO CONCLUIDA COM SUCESSO!")
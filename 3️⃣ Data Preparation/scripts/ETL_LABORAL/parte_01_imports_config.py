@@ -9,11 +9,27 @@ Google Colab
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from google.colab import files
 import io
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Módulos compartilhados pelos três pipelines (scripts/*.py)
+try:
+    _PASTA_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    # Google Colab: célula sem __file__ (enviar os módulos compartilhados para /content)
+    _PASTA_SCRIPTS = os.getcwd()
+if _PASTA_SCRIPTS not in sys.path:
+    sys.path.append(_PASTA_SCRIPTS)
+
+from conversor_numerico import ConversorNumerico
+from formatos_tabela import BufferRegistros, EscritorTabelas, EsquemaTabelas, RegistroTabelas
+from agendador_dag import AgendadorDAG, workers_padrao
+from integridade_referencial import IndiceChaves, VerificadorIntegridade
+from instrumentacao import INSTRUMENTACAO, PREFIXOS_ETAPAS
+
 # ============================================================
 # CONFIGURAÇÕES GLOBAIS
 # ============================================================
@@ -145,6 +161,12 @@ class Config:
     OUTPUT_ENCODING = 'utf-8'
     OUTPUT_SEPARATOR = ','
     OUTPUT_INDEX = False
+    OUTPUT_FORMATO = 'csv'       # 'csv', 'parquet' ou 'feather' (binários exigem pyarrow)
+    OUTPUT_COMPRESSAO = None     # None = padrão do formato (snappy/zstd)
+    
+    # Execução paralela de criar_dim_*/criar_fact_* (agendador_dag.py)
+    DAG_WORKERS = workers_padrao()  # ETL_DAG_WORKERS ou min(4, núcleos); 1 = sequencial
+    DAG_MODO = 'thread'             # 'thread' ou 'processo'
     
     # Tabelas a serem geradas (15 tabelas laborais)
     TABELAS_DIMENSOES = [
@@ -292,18 +314,20 @@ class Formatadores:
     
     @staticmethod
     def limpar_numero(valor):
-        """Limpa e converte string numérica para número"""
-        if pd.isna(valor) or valor == '':
-            return None
-        
-        valor_str = str(valor)
-        valor_str = valor_str.replace('%', '').replace(' ', '').strip()
-        valor_str = valor_str.replace('.', '').replace(',', '.')
-        
-        try:
-            return float(valor_str)
-        except:
-            return None
+        """
+        Limpa e converte string numérica para número
+        Exemplos: '1.234,56' -> 1234.56, '3,7%' -> 3.7, '34,9 anos' -> 34.9, 'x' -> None
+        """
+        return ConversorNumerico.converter_valor(valor)
+    
+    @staticmethod
+    def limpar_coluna(serie, tipo='float', logger=None):
+        """
+        Versão vetorizada de limpar_numero para uma coluna inteira
+        Retorna float64 (tipo='float') ou Int64 (tipo='int'); células não
+        convertidas ficam nulas e são contadas no aviso do logger
+        """
+        return ConversorNumerico.converter_serie(serie, tipo=tipo, logger=logger)
     
     @staticmethod
     def extrair_percentual(texto):
@@ -353,8 +377,9 @@ class Formatadores:
 class Logger:
     """Sistema de logging para o pipeline"""
     
-    def __init__(self, nome_modulo="ETL-LABORAL"):
+    def __init__(self, nome_modulo="ETL-LABORAL", instrumentacao=None):
         self.nome_modulo = nome_modulo
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO  # partilhada pelo processo
         self.contador_erros = 0
         self.contador_avisos = 0
     
@@ -396,6 +421,26 @@ class Logger:
         if atual == total:
             print()
     
+    def medir(self, etapa, linhas_entrada=None):
+        """Context manager: tempo, CPU, linhas e pico de memória de um bloco"""
+        return self.instrumentacao.medir(etapa, self.nome_modulo, linhas_entrada)
+    
+    def instrumentar(self, objeto, prefixos=PREFIXOS_ETAPAS):
+        """Mede cada chamada criar_dim_*/criar_fact_*/carregar_*/exportar_* do objeto"""
+        return self.instrumentacao.instrumentar_objeto(objeto, self.nome_modulo, prefixos)
+    
+    def gravar_metricas(self, caminho):
+        """Grava as métricas das etapas em JSON-lines"""
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Métricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        """Imprime as etapas ordenadas por tempo (mais lentas primeiro)"""
+        self.subsecao("MÉTRICAS POR ETAPA")
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
+    
     def resumo_final(self):
         """Exibe resumo de erros e avisos"""
         print("\n" + "=" * 60)
@@ -33,6 +33,7 @@ except ImportError:
     # Fallback: Redefinir classes base localmente
     import pandas as pd
     from abc import ABC, abstractmethod
+    from parte_01_imports_config import BufferRegistros, EsquemaTabelas, VerificadorIntegridade
     
     class TabelaBase(ABC):
         """Classe abstrata base para todas as tabelas do modelo"""
@@ -44,6 +45,18 @@ except ImportError:
             self.metadados = {}
             self.estatisticas = {}
         
+        @property
+        def df(self):
+            """DataFrame da tabela (finaliza registros pendentes no buffer)"""
+            if len(self._buffer) > 0:
+                self.finalizar()
+            return self._df
+        
+        @df.setter
+        def df(self, valor):
+            self._df = valor
+            self._buffer = BufferRegistros()
+        
         @abstractmethod
         def criar_estrutura(self):
             """Define a estrutura (colunas e tipos) da tabela"""
@@ -55,13 +68,30 @@ except ImportError:
             pass
         
         def adicionar_registros(self, dados):
-            """Adiciona registros à tabela"""
+            """
+            Adiciona registros ao buffer da tabela (dict, lista de dicts ou DataFrame)
+        
+            O DataFrame é materializado uma única vez em finalizar(), chamado
+            automaticamente no primeiro acesso a self.df
+            """
             if isinstance(dados, dict):
-                self.df = pd.concat([self.df, pd.DataFrame([dados])], ignore_index=True)
+                self._buffer.adicionar(dados)
             elif isinstance(dados, list):
-                self.df = pd.concat([self.df, pd.DataFrame(dados)], ignore_index=True)
+                self._buffer.estender(dados)
             elif isinstance(dados, pd.DataFrame):
-                self.df = pd.concat([self.df, dados], ignore_index=True)
+                self._buffer.adicionar_dataframe(dados)
+        
+        def finalizar(self):
+            """Materializa os registros do buffer e aplica os tipos compactos do esquema"""
+            if len(self._buffer) > 0:
+                self._df = self._buffer.materializar(self._df)
+                self.aplicar_esquema()
+            return self._df
+        
+        def aplicar_esquema(self):
+            """Aplica os tipos compactos declarados em EsquemaTabelas"""
+            self.df = EsquemaTabelas.aplicar(self.df, self.nome_tabela)
+            return self.df
         
         def gerar_pk(self):
             """Gera valores para chave primária"""
@@ -73,16 +103,20 @@ except ImportError:
             return self.df
         
         def contar_registros(self):
-            """Retorna número de registros"""
-            return len(self.df)
+            """Retorna número de registros (inclui os pendentes no buffer)"""
+            return len(self._df) + len(self._buffer)
         
         def resumir(self):
-            """Retorna resumo da tabela"""
+            """Retorna resumo da tabela (inclui memória poupada pelos tipos compactos)"""
+            memoria = EsquemaTabelas.comparar_memoria(self.df)
             return {
                 'nome': self.nome_tabela,
                 'registros': self.contar_registros(),
                 'colunas': list(self.df.columns),
-                'memoria_mb': self.df.memory_usage(deep=True).sum() / 1024 / 1024
+                'tipos': self.df.dtypes.astype(str).to_dict(),
+                'memoria_mb': memoria['memoria_mb'],
+                'memoria_sem_tipos_mb': memoria['memoria_sem_tipos_mb'],
+                'memoria_poupada_mb': memoria['memoria_poupada_mb']
             }
     
     
@@ -193,10 +227,12 @@ except ImportError:
     class GerenciadorIntegridade:
         """Gerencia validações de integridade referencial entre tabelas"""
         
-        def __init__(self):
+        def __init__(self, tamanho_amostra=5):
             self.tabelas = {}
             self.relacionamentos = []
             self.erros = []
+            self.resultados = []
+            self.verificador = VerificadorIntegridade(tamanho_amostra)
         
         def adicionar_tabela(self, nome, dataframe):
             """Adiciona tabela para validação"""
@@ -212,46 +248,16 @@ except ImportError:
             })
         
         def validar_todos(self):
-            """Executa todas as validações de integridade"""
-            self.erros = []
-            
-            for rel in self.relacionamentos:
-                erros_rel = self._validar_relacionamento(rel)
-                self.erros.extend(erros_rel)
-            
+            """Executa todas as validações de integridade (numa passagem, por dimensão)"""
+            self.resultados = self.verificador.verificar(self.tabelas, self.relacionamentos)
+            self.erros = self.verificador.erros()
             return self.erros
         
         def _validar_relacionamento(self, rel):
             """Valida um relacionamento específico"""
-            erros = []
-            
-            if rel['fato'] not in self.tabelas:
-                return [f"Tabela de fato {rel['fato']} não encontrada"]
-            
-            if rel['dimensao'] not in self.tabelas:
-                return [f"Tabela de dimensão {rel['dimensao']} não encontrada"]
-            
-            df_fato = self.tabelas[rel['fato']]
-            df_dim = self.tabelas[rel['dimensao']]
-            
-            if rel['fk'] not in df_fato.columns:
-                return [f"FK {rel['fk']} não existe em {rel['fato']}"]
-            
-            if rel['pk'] not in df_dim.columns:
-                return [f"PK {rel['pk']} não existe em {rel['dimensao']}"]
-            
-            valores_fk = df_fato[rel['fk']].dropna().unique()
-            valores_pk = df_dim[rel['pk']].unique()
-            valores_orfaos = set(valores_fk) - set(valores_pk)
-            
-            if valores_orfaos:
-                erros.append(
-                    f"ERRO DE INTEGRIDADE: {rel['fato']}.{rel['fk']} -> "
-                    f"{rel['dimensao']}.{rel['pk']}: "
-                    f"{len(valores_orfaos)} valores órfãos encontrados"
-                )
-            
-            return erros
+            verificador = VerificadorIntegridade(self.verificador.tamanho_amostra)
+            resultado = verificador.verificar(self.tabelas, [rel])[0]
+            return [] if resultado['status'] == 'ok' else [resultado['mensagem']]
 
 
 # ============================================================
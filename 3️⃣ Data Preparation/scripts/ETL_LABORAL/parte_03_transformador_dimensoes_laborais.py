@@ -16,6 +16,7 @@ Cria 7 dimensões laborais:
 
 import pandas as pd
 import numpy as np
+from parte_01_imports_config import AgendadorDAG, IndiceChaves, RegistroTabelas
 
 
 # ============================================================
@@ -29,7 +30,7 @@ class TransformadorDimensoesLaborais:
         self.logger = logger
         self.config = config
         self.constantes = constantes
-        self.dimensoes = {}
+        self.dimensoes = RegistroTabelas()
     
     def criar_dim_condicao_economica(self):
         """
@@ -253,13 +254,19 @@ class TransformadorDimensoesLaborais:
         """Cria todas as 7 dimensões laborais"""
         self.logger.secao("CRIANDO DIMENSÕES LABORAIS")
         
-        self.criar_dim_condicao_economica()
-        self.criar_dim_grupo_profissional()
-        self.criar_dim_profissao_digito1()
-        self.criar_dim_setor_economico()
-        self.criar_dim_situacao_profissional()
-        self.criar_dim_fonte_rendimento()
-        self.criar_dim_regiao_nuts()
+        # Dimensões independentes entre si: executadas em paralelo
+        dag = AgendadorDAG(self.config.DAG_WORKERS, self.config.DAG_MODO, self.logger, "Dimensões Laborais")
+        dag.adicionar('Dim_CondicaoEconomica', self.criar_dim_condicao_economica)
+        dag.adicionar('Dim_GrupoProfissional', self.criar_dim_grupo_profissional)
+        dag.adicionar('Dim_ProfissaoDigito1', self.criar_dim_profissao_digito1)
+        dag.adicionar('Dim_SetorEconomico', self.criar_dim_setor_economico)
+        dag.adicionar('Dim_SituacaoProfissional', self.criar_dim_situacao_profissional)
+        dag.adicionar('Dim_FonteRendimento', self.criar_dim_fonte_rendimento)
+        dag.adicionar('Dim_RegiaoNUTS', self.criar_dim_regiao_nuts)
+        
+        dag.executar()
+        dag.sincronizar(self.dimensoes)
+        dag.relatorio_tempos()
         
         self.logger.sucesso(f"Total: {len(self.dimensoes)} dimensões laborais criadas")
         
@@ -281,9 +288,12 @@ class TransformadorDimensoesLaborais:
 class LookupDimensoesLaborais:
     """Fornece métodos rápidos para lookup de IDs nas dimensões laborais"""
     
+    INDICES = ('condicao', 'grupo_prof', 'setor', 'situacao', 'fonte', 'nuts')
+    
     def __init__(self, dimensoes_dict):
         self.dimensoes = dimensoes_dict
         self._indices = {}
+        self._indices_lote = {}
         self._criar_indices()
     
     def _criar_indices(self):
@@ -317,6 +327,30 @@ class LookupDimensoesLaborais:
         if 'Dim_RegiaoNUTS' in self.dimensoes:
             df = self.dimensoes['Dim_RegiaoNUTS']
             self._indices['nuts'] = df.set_index('codigo_nuts')['nuts_id'].to_dict()
+        
+        # Índices para resolução em lote (mesmas chaves dos dicts)
+        self._indices_lote = {
+            nome: IndiceChaves.de_dict(mapa) for nome, mapa in self._indices.items()
+        }
+    
+    def resolver(self, nome_indice, valores):
+        """
+        Resolve uma coluna de chaves naturais numa só passagem
+        
+        Args:
+            nome_indice: 'condicao', 'grupo_prof', 'setor', 'situacao', 'fonte' ou 'nuts'
+            valores: Series/lista de nomes ou códigos
+            
+        Returns:
+            (ids Int64, máscara das linhas não resolvidas)
+        """
+        if nome_indice not in self.INDICES:
+            raise ValueError(f"Índice desconhecido: {nome_indice}")
+        if nome_indice == 'grupo_prof':
+            # Mesma normalização de get_grupo_prof_id
+            valores = pd.Series(valores).map(str)
+        indice = self._indices_lote.get(nome_indice, IndiceChaves([], []))
+        return indice.resolver(valores)
     
     def get_condicao_id(self, nome_condicao):
         """Retorna ID da condição econômica pelo nome"""
@@ -18,6 +18,8 @@ Cria 8 tabelas de fatos laborais:
 import pandas as pd
 import numpy as np
 
+from parte_01_imports_config import RegistroTabelas
+
 
 # ============================================================
 # CLASSE TRANSFORMADOR DE FATOS LABORAIS
@@ -30,7 +32,7 @@ class TransformadorFatosLaborais:
         self.logger = logger
         self.lookup = lookup_laborais
         self.lookup_base = lookup_base  # Lookup do ETL_EDUCACAO (Nacionalidade, Sexo, etc.)
-        self.fatos = {}
+        self.fatos = RegistroTabelas()
     
     def criar_fact_populacao_por_condicao(self, dados_condicao):
         """
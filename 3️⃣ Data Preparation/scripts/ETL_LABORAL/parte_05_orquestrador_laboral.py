@@ -22,7 +22,7 @@ INSTRUÇÕES DE USO NO GOOGLE COLAB:
 # ============================================================
 
 # Parte 1: Configurações
-from parte_01_imports_config import Config, Constantes, Logger
+from parte_01_imports_config import Config, Constantes, Logger, EscritorTabelas, AgendadorDAG, RegistroTabelas
 
 # Parte 2: Classes Base (referência)
 from parte_02_classes_base_ref import (
@@ -41,7 +41,6 @@ from parte_04_transformador_fatos_laborais import TransformadorFatosLaborais
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from google.colab import files
 import traceback
 
 
@@ -64,8 +63,8 @@ class OrquestradorPipelineLaboral:
         self.lookup_base = None  # Do ETL_EDUCACAO
         
         # Dados processados
-        self.dimensoes = {}
-        self.fatos = {}
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
         self.dimensoes_base = {}  # Do ETL_EDUCACAO
         self.dados_brutos = {}
         
@@ -139,6 +138,14 @@ class OrquestradorPipelineLaboral:
             self.logger.erro(f"ERRO FATAL NO PIPELINE: {str(e)}")
             self.logger.erro(traceback.format_exc())
             return False
+            
+        finally:
+            self._registrar_metricas()
+    
+    def _registrar_metricas(self):
+        """Grava as métricas por etapa (JSON-lines) junto das saídas e mostra o resumo"""
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas("DP-01-B_metricas.jsonl")
     
     def _integrar_dimensoes_base(self, dimensoes_base_etl):
         """
@@ -195,6 +202,7 @@ class OrquestradorPipelineLaboral:
             self.config,
             self.constantes
         )
+        self.logger.instrumentar(self.transformador_dim)
         
         # Criar todas as dimensões
         self.dimensoes = self.transformador_dim.criar_todas_dimensoes()
@@ -250,23 +258,29 @@ class OrquestradorPipelineLaboral:
             self.lookup_laborais,
             self.lookup_base
         )
+        self.logger.instrumentar(self.transformador_fatos)
+        
+        # Criar fatos (dependem apenas das dimensões: executados em paralelo)
+        dag = AgendadorDAG(self.config.DAG_WORKERS, self.config.DAG_MODO, self.logger, "Fatos Laborais")
         
-        # Criar fatos
         if self.dados_brutos.get('condicao'):
-            self.fatos['Fact_PopulacaoPorCondicao'] = \
-                self.transformador_fatos.criar_fact_populacao_por_condicao(self.dados_brutos['condicao'])
+            dag.adicionar('Fact_PopulacaoPorCondicao',
+                          self.transformador_fatos.criar_fact_populacao_por_condicao, self.dados_brutos['condicao'])
         
         if self.dados_brutos.get('profissao'):
-            self.fatos['Fact_EmpregadosPorProfissao'] = \
-                self.transformador_fatos.criar_fact_empregados_por_profissao(self.dados_brutos['profissao'])
+            dag.adicionar('Fact_EmpregadosPorProfissao',
+                          self.transformador_fatos.criar_fact_empregados_por_profissao, self.dados_brutos['profissao'])
         
         if self.dados_brutos.get('setor'):
-            self.fatos['Fact_EmpregadosPorSetor'] = \
-                self.transformador_fatos.criar_fact_empregados_por_setor(self.dados_brutos['setor'])
+            dag.adicionar('Fact_EmpregadosPorSetor',
+                          self.transformador_fatos.criar_fact_empregados_por_setor, self.dados_brutos['setor'])
         
         if self.dados_brutos.get('situacao'):
-            self.fatos['Fact_EmpregadosPorSituacao'] = \
-                self.transformador_fatos.criar_fact_empregados_por_situacao(self.dados_brutos['situacao'])
+            dag.adicionar('Fact_EmpregadosPorSituacao',
+                          self.transformador_fatos.criar_fact_empregados_por_situacao, self.dados_brutos['situacao'])
+        
+        self.fatos.update(dag.executar())
+        dag.relatorio_tempos()
         
         self.logger.sucesso(f"Fatos laborais criados: {len(self.fatos)}")
         
@@ -287,25 +301,27 @@ class OrquestradorPipelineLaboral:
         return True
     
     def _executar_exportacao(self):
-        """Exporta dados para CSV"""
+        """Exporta dados no formato configurado (Config.OUTPUT_FORMATO)"""
         self.logger.info("Exportando tabelas...")
         
+        escritor = EscritorTabelas(Config.OUTPUT_FORMATO, Config.OUTPUT_COMPRESSAO, self.logger)
+        
         # Exportar dimensões
         for nome, df in self.dimensoes.items():
             if not df.empty:
-                arquivo = f"DP-01-B_{nome}.csv"
-                df.to_csv(arquivo, index=False, encoding='utf-8')
-                self.logger.sucesso(f"✓ {arquivo}: {len(df)} registros")
+                with self.logger.medir(f"exportar_{nome}", len(df)):
+                    arquivo = escritor.salvar(df, '.', f"DP-01-B_{nome}")
+                self.logger.sucesso(f"✓ {arquivo.name}: {len(df)} registros")
         
         # Exportar fatos
         for nome, df in self.fatos.items():
             if not df.empty:
-                arquivo = f"DP-01-B_{nome}.csv"
-                df.to_csv(arquivo, index=False, encoding='utf-8')
-                self.logger.sucesso(f"✓ {arquivo}: {len(df)} registros")
+                with self.logger.medir(f"exportar_{nome}", len(df)):
+                    arquivo = escritor.salvar(df, '.', f"DP-01-B_{nome}")
+                self.logger.sucesso(f"✓ {arquivo.name}: {len(df)} registros")
         
         total = len(self.dimensoes) + len(self.fatos)
-        self.logger.sucesso(f"Exportação concluída: {total} arquivos CSV")
+        self.logger.sucesso(f"Exportação concluída: {total} arquivos {escritor.formato.upper()}")
         
         return True
     
@@ -7,18 +7,24 @@ Versao Hibrida e Portavel - Windows Compatible
 Autor: Germano Silva | Data: Dezembro 2025
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-import io
+import os
 import sys
 import warnings
-import zipfile
 warnings.filterwarnings('ignore')
 
-# Configurar output UTF-8 para Windows
-if sys.platform == 'win32':
+from formatos_tabela import EscritorTabelas, RegistroTabelas, localizar_tabela, ler_tabela
+from dimensoes_conformes import ARMAZEM_DIMENSOES
+from manifesto_build import ManifestoBuild, arquivos_codigo
+from agendador_dag import AgendadorDAG, workers_padrao
+from instrumentacao import INSTRUMENTACAO
+from exportacao_zip import ExportadorZip
+from integridade_referencial import VerificadorIntegridade
+
+# Configurar output UTF-8 para Windows (uma vez por processo: executar_tudo.py importa os tres ETL)
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
@@ -67,10 +73,9 @@ class ConfigAmbiente:
     @staticmethod
     def salvar_arquivo(filename, dataframe):
         pasta_output = ConfigAmbiente.get_pasta_output()
-        pasta_output.mkdir(parents=True, exist_ok=True)
-        filepath = pasta_output / filename
-        dataframe.to_csv(filepath, index=False, encoding='utf-8')
-        print(f"[SALVO] {filename} -> {filepath}")
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA)
+        filepath = escritor.salvar(dataframe, pasta_output, filename)
+        print(f"[SALVO] {filepath.name} -> {filepath}")
         return filepath
 
 
@@ -91,11 +96,42 @@ class Config:
         'EmpregadosPorSetor': ['Fact_EmpregadosPorSetor.csv', 'EmpregadosPorSetor.csv'],
         'EmpregadosPorSituacao': ['Fact_EmpregadosPorSituacao.csv', 'EmpregadosPorSituacao.csv']
     }
+    
+    # Formato de saida das tabelas: 'csv', 'parquet' ou 'feather'
+    # (parquet/feather exigem pyarrow; sem ele o export volta para CSV)
+    FORMATO_SAIDA = os.environ.get('ETL_FORMATO_SAIDA', 'csv')
+    COMPRESSAO_SAIDA = os.environ.get('ETL_COMPRESSAO_SAIDA') or None
+    
+    # Etapas independentes correm em paralelo (agendador_dag.py)
+    # ETL_DAG_WORKERS=1 executa tudo em sequencia
+    DAG_WORKERS = workers_padrao()
+    
+    # Build incremental (output/manifesto_build.json)
+    # ETL_REBUILD_COMPLETO=1 ignora o manifesto e reconstroi tudo
+    ESTAGIO_BUILD = 'LABORAL'
+    REBUILD_COMPLETO = os.environ.get('ETL_REBUILD_COMPLETO', '') == '1'
+    
+    # Entradas de que depende cada tabela de saida
+    # (DP-01-A/ = tabelas base, DP-01-B1/ = tabelas laborais processadas)
+    DEPENDENCIAS_TABELAS = {
+        'Dim_Nacionalidade': ['DP-01-A/Nacionalidade.csv'],
+        'Dim_Sexo': ['DP-01-A/Sexo.csv'],
+        'Dim_PopulacaoResidente': ['DP-01-A/PopulacaoResidente.csv'],
+        'Dim_CondicaoEconomica': ['DP-01-B1/CondicaoEconomica'],
+        'Dim_GrupoProfissional': ['DP-01-B1/GrupoProfissional'],
+        'Dim_SetorEconomico': ['DP-01-B1/SetorEconomico'],
+        'Dim_SituacaoProfissional': ['DP-01-B1/SituacaoProfissional'],
+        'Fact_PopulacaoPorCondicao': ['DP-01-B1/PopulacaoPorCondicao'],
+        'Fact_EmpregadosPorProfissao': ['DP-01-B1/EmpregadosPorProfissao'],
+        'Fact_EmpregadosPorSetor': ['DP-01-B1/EmpregadosPorSetor'],
+        'Fact_EmpregadosPorSituacao': ['DP-01-B1/EmpregadosPorSituacao']
+    }
 
 
 class Logger:
     def __init__(self, nome="ETL"):
         self.nome = nome
+        self.instrumentacao = INSTRUMENTACAO  # metricas partilhadas por todos os Logger
     
     def info(self, msg):
         print(f"[INFO] {msg}")
@@ -108,18 +144,82 @@ class Logger:
     
     def separador(self):
         print("\n" + "="*70)
+    
+    def medir(self, etapa, linhas_entrada=None):
+        return self.instrumentacao.medir(etapa, self.nome, linhas_entrada)
+    
+    def anotar(self, **campos):
+        self.instrumentacao.anotar(**campos)
+    
+    def instrumentar(self, objeto):
+        return self.instrumentacao.instrumentar_objeto(objeto, getattr(objeto, "logger", self).nome)
+    
+    def gravar_metricas(self, caminho):
+        caminho = self.instrumentacao.gravar_jsonl(caminho)
+        self.sucesso(f"Metricas por etapa: {caminho}")
+        return caminho
+    
+    def resumo_metricas(self, limite=None):
+        self.separador()
+        for linha in self.instrumentacao.tabela_resumo(limite):
+            print(linha)
 
 
 class ExtratorLaboral:
     """Importa dados laborais processados de DP-01-B1"""
     
+    ARQUIVOS_BASE = ['Nacionalidade.csv', 'Sexo.csv', 'PopulacaoResidente.csv']
+    
     def __init__(self):
         self.logger = Logger("ExtratorLaboral")
         self.tabelas_laborais = {}
         self.tabelas_base = {}
     
-    def carregar_tabelas_base(self):
-        """Carrega dimensoes base compartilhadas (Nacionalidade, Sexo)"""
+    def mapear_entradas(self):
+        """Mapeia chave logica -> ficheiro de entrada existente (para o manifesto)"""
+        entradas = {}
+        pasta_base = ConfigAmbiente.get_pasta_dados_base()
+        for arquivo in self.ARQUIVOS_BASE:
+            filepath = localizar_tabela(pasta_base, arquivo)
+            if filepath:
+                entradas[f'DP-01-A/{arquivo}'] = filepath
+        
+        pasta_dados = self._localizar_pasta_dados()
+        if pasta_dados:
+            for tabela_key, opcoes_arquivo in Config.ARQUIVOS_LABORAIS_NECESSARIOS.items():
+                filepath = self._localizar_arquivo(pasta_dados, opcoes_arquivo)
+                if filepath:
+                    entradas[f'DP-01-B1/{tabela_key}'] = filepath
+        return entradas
+    
+    def _localizar_pasta_dados(self):
+        """Localiza subpasta 'resultados_etl_laboral' ou 'Resultados_DP-01-B'"""
+        pasta_laboral = ConfigAmbiente.get_pasta_dados_laborais()
+        possiveis_pastas = [
+            pasta_laboral / 'resultados_etl_laboral',
+            pasta_laboral / 'Resultados_DP-01-B',
+            pasta_laboral  # Tentar na raiz tambem
+        ]
+        for pasta in possiveis_pastas:
+            if pasta.exists():
+                return pasta
+        return None
+    
+    def _localizar_arquivo(self, pasta_dados, opcoes_arquivo):
+        """Primeira opcao de nome de arquivo encontrada (com ou sem prefixo)"""
+        for opcao in opcoes_arquivo:
+            filepath = localizar_tabela(pasta_dados, opcao)
+            if filepath:
+                return filepath
+        return None
+    
+    def carregar_tabelas_base(self, apenas=None):
+        """
+        Carrega dimensoes base compartilhadas (Nacionalidade, Sexo)
+        
+        Args:
+            apenas: Conjunto de chaves 'DP-01-A/<arquivo>' a carregar (None = todas)
+        """
         self.logger.info("Importando tabelas base (Nacionalidade, Sexo, PopulacaoResidente)...")
         pasta_base = ConfigAmbiente.get_pasta_dados_base()
         
@@ -127,29 +227,33 @@ class ExtratorLaboral:
             self.logger.erro(f"Pasta {pasta_base} nao encontrada!")
             return False
         
-        arquivos_base = [
-            'Nacionalidade.csv',
-            'Sexo.csv',
-            'PopulacaoResidente.csv'
-        ]
-        
-        for arquivo in arquivos_base:
-            filepath = pasta_base / arquivo
-            if filepath.exists():
+        # Prefere .parquet/.feather (tipos preservados) quando existirem ao lado do CSV;
+        # ARMAZEM_DIMENSOES partilha as tabelas ja lidas por outro pipeline (so relidas se mudarem)
+        for arquivo in self.ARQUIVOS_BASE:
+            if apenas is not None and f'DP-01-A/{arquivo}' not in apenas:
+                continue
+            filepath = localizar_tabela(pasta_base, arquivo)
+            if filepath:
                 try:
-                    df = pd.read_csv(filepath, encoding='utf-8')
+                    df = ARMAZEM_DIMENSOES.ler(filepath)
                     tabela_nome = arquivo.replace('.csv', '')
                     self.tabelas_base[tabela_nome] = df
-                    self.logger.sucesso(f"{arquivo} importado ({len(df)} registros)")
+                    self.logger.sucesso(f"{filepath.name} importado ({len(df)} registros)")
                 except Exception as e:
                     self.logger.erro(f"Erro ao importar {arquivo}: {e}")
             else:
                 self.logger.erro(f"Arquivo {arquivo} nao encontrado!")
         
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.tabelas_base.values()))
         return len(self.tabelas_base) > 0
     
-    def carregar_tabelas_laborais(self):
-        """Carrega tabelas laborais de DP-01-B1"""
+    def carregar_tabelas_laborais(self, apenas=None):
+        """
+        Carrega tabelas laborais de DP-01-B1
+        
+        Args:
+            apenas: Conjunto de chaves 'DP-01-B1/<tabela>' a carregar (None = todas)
+        """
         self.logger.info("Importando tabelas laborais de DP-01-B1...")
         pasta_laboral = ConfigAmbiente.get_pasta_dados_laborais()
         
@@ -158,37 +262,23 @@ class ExtratorLaboral:
             return False
         
         # Tentar localizar subpasta 'resultados_etl_laboral' ou 'Resultados_DP-01-B'
-        possiveis_pastas = [
-            pasta_laboral / 'resultados_etl_laboral',
-            pasta_laboral / 'Resultados_DP-01-B',
-            pasta_laboral  # Tentar na raiz tambem
-        ]
-        
-        pasta_dados = None
-        for pasta in possiveis_pastas:
-            if pasta.exists():
-                pasta_dados = pasta
-                self.logger.info(f"Encontrada pasta de dados: {pasta}")
-                break
-        
+        pasta_dados = self._localizar_pasta_dados()
         if not pasta_dados:
             self.logger.erro("Nenhuma pasta de resultados encontrada!")
             return False
+        self.logger.info(f"Encontrada pasta de dados: {pasta_dados}")
         
         contador = 0
         for tabela_key, opcoes_arquivo in Config.ARQUIVOS_LABORAIS_NECESSARIOS.items():
-            arquivo_encontrado = None
+            if apenas is not None and f'DP-01-B1/{tabela_key}' not in apenas:
+                continue
             
             # Tentar cada opção de nome de arquivo
-            for opcao in opcoes_arquivo:
-                filepath = pasta_dados / opcao
-                if filepath.exists():
-                    arquivo_encontrado = filepath
-                    break
+            arquivo_encontrado = self._localizar_arquivo(pasta_dados, opcoes_arquivo)
             
             if arquivo_encontrado:
                 try:
-                    df = pd.read_csv(arquivo_encontrado, encoding='utf-8')
+                    df = ler_tabela(arquivo_encontrado)
                     
                     # Determinar nome padronizado com prefixo
                     if tabela_key in ['CondicaoEconomica', 'GrupoProfissional', 'SetorEconomico', 'SituacaoProfissional']:
@@ -205,6 +295,7 @@ class ExtratorLaboral:
                 self.logger.info(f"Opcional: {tabela_key} nao encontrado (tentativas: {', '.join(opcoes_arquivo)})")
         
         self.logger.sucesso(f"Total de {contador} tabelas laborais carregadas")
+        self.logger.anotar(linhas_saida=sum(len(df) for df in self.tabelas_laborais.values()))
         return contador > 0
 
 
@@ -218,8 +309,6 @@ class ValidadorIntegridade:
         """Valida FKs de nacionalidade_id"""
         self.logger.info("Validando integridade referencial de nacionalidade_id...")
         
-        nac_ids_validos = set(dim_nacionalidade['nacionalidade_id'].values)
-        
         tabelas_com_nac_id = [
             'Fact_PopulacaoPorCondicao',
             'Fact_EmpregadosPorProfissao',
@@ -227,15 +316,25 @@ class ValidadorIntegridade:
             'Fact_EmpregadosPorSituacao'
         ]
         
+        tabelas = {'Dim_Nacionalidade': dim_nacionalidade}
+        relacionamentos = []
         for tabela_nome in tabelas_com_nac_id:
-            if tabela_nome in fatos:
-                df = fatos[tabela_nome]
-                if 'nacionalidade_id' in df.columns:
-                    invalidos = df[~df['nacionalidade_id'].isin(nac_ids_validos)]
-                    if len(invalidos) > 0:
-                        self.logger.erro(f"{tabela_nome}: {len(invalidos)} FKs invalidas de nacionalidade_id")
-                    else:
-                        self.logger.sucesso(f"{tabela_nome}: Todas FKs de nacionalidade_id validas")
+            if tabela_nome in fatos and 'nacionalidade_id' in fatos[tabela_nome].columns:
+                tabelas[tabela_nome] = fatos[tabela_nome]
+                relacionamentos.append({'fato': tabela_nome, 'fk': 'nacionalidade_id',
+                                        'dimensao': 'Dim_Nacionalidade', 'pk': 'nacionalidade_id'})
+        
+        # Nulos contam como FK invalida (mesmo criterio do isin anterior)
+        verificador = VerificadorIntegridade(nulos_sao_orfaos=True)
+        for resultado in verificador.verificar(tabelas, relacionamentos):
+            tabela_nome = resultado['fato']
+            if resultado['linhas_orfas'] > 0:
+                self.logger.erro(f"{tabela_nome}: {resultado['linhas_orfas']} FKs invalidas de nacionalidade_id "
+                                 f"(valores {resultado['amostra_valores']}, linhas {resultado['amostra_linhas']})")
+            else:
+                self.logger.sucesso(f"{tabela_nome}: Todas FKs de nacionalidade_id validas")
+        
+        return verificador.resultados
 
 
 class ConsolidadorLaboral:
@@ -243,8 +342,8 @@ class ConsolidadorLaboral:
     
     def __init__(self):
         self.logger = Logger("Consolidador")
-        self.dimensoes = {}
-        self.fatos = {}
+        self.dimensoes = RegistroTabelas()
+        self.fatos = RegistroTabelas()
     
     def consolidar_dimensoes(self, tabelas_base, tabelas_laborais):
         """Consolida dimensoes com prefixo Dim_"""
@@ -322,20 +421,22 @@ class Exportador:
         
         todas_tabelas = {**dimensoes, **fatos}
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        escritor = EscritorTabelas(Config.FORMATO_SAIDA, Config.COMPRESSAO_SAIDA, self.logger)
+        
+        # Cada tabela vai direto para o ZIP em disco (membros comprimidos em
+        # paralelo); o manifesto de checksums fecha o arquivo
+        with ExportadorZip(zip_path, escritor, logger=self.logger) as exportador:
             for nome_tabela, df in todas_tabelas.items():
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, encoding='utf-8')
-                zip_file.writestr(f'{nome_tabela}.csv', csv_buffer.getvalue())
+                exportador.adicionar_tabela(nome_tabela, df)
             
             # Adicionar README
-            readme = self._gerar_readme(dimensoes, fatos)
-            zip_file.writestr('README_LABORAL.txt', readme)
+            readme = self._gerar_readme(dimensoes, fatos, escritor.extensao)
+            exportador.adicionar_texto('README_LABORAL.txt', readme)
         
-        self.logger.sucesso(f"ZIP criado: {zip_path}")
+        self.logger.sucesso(f"ZIP criado: {zip_path} ({len(exportador.manifesto['membros'])} arquivos + checksums)")
         return zip_path
     
-    def _gerar_readme(self, dimensoes, fatos):
+    def _gerar_readme(self, dimensoes, fatos, extensao='.csv'):
         readme = f"""
 ========================================================================
 ETL LABORAL CONSOLIDADO - DATASET CENSOS 2021
@@ -350,7 +451,7 @@ DIMENSOES ({len(dimensoes)} tabelas)
 ========================================================================
 """
         for nome, df in dimensoes.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += f"""
 
@@ -359,7 +460,7 @@ FATOS ({len(fatos)} tabelas)
 ========================================================================
 """
         for nome, df in fatos.items():
-            readme += f"\n{nome}.csv - {len(df)} registros"
+            readme += f"\n{nome}{extensao} - {len(df)} registros"
         
         readme += """
 
@@ -406,23 +507,60 @@ class OrquestradorLaboral:
         self.consolidador = ConsolidadorLaboral()
         self.validador = ValidadorIntegridade()
         self.exportador = Exportador()
+        
+        self.resultado = None  # plano de build + tabelas consolidadas (para exportar_resultados)
+        self.zip_path = None
+        
+        # Tempo, CPU, linhas e memoria de cada carregar_*/consolidar_*/exportar_*
+        for componente in (self.extrator, self.consolidador, self.exportador):
+            self.logger.instrumentar(componente)
     
-    def executar_pipeline_completo(self):
+    def executar_pipeline_completo(self, exportar=True):
+        """
+        Executa o ETL Laboral
+        
+        Args:
+            exportar: Se False, para depois da validacao (tabelas em self.resultado);
+                      ZIP, manifesto e metricas ficam para exportar_resultados()
+        """
         self.logger.separador()
         print(f"{Config.PROJETO_NOME} - Versao {Config.VERSAO}")
         print(f"Ambiente: {AMBIENTE}")
         print(f"Fonte: {Config.FONTE_DADOS}")
         self.logger.separador()
         
-        # FASE 1: Carregar tabelas base
-        self.logger.info("\n>>> FASE 1: Importacao de Tabelas Base")
-        if not self.extrator.carregar_tabelas_base():
+        # FASE 0: Manifesto de build (reconstroi apenas o que mudou)
+        self.logger.info("\n>>> FASE 0: Verificacao do Manifesto de Build")
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        plano = manifesto.planejar(
+            Config.ESTAGIO_BUILD,
+            self.extrator.mapear_entradas(),
+            Config.DEPENDENCIAS_TABELAS,
+            codigo=arquivos_codigo(sys.modules[__name__]),
+            forcar=Config.REBUILD_COMPLETO
+        )
+        if plano.estagio_inalterado:
+            self.logger.sucesso("Entradas inalteradas desde o ultimo build - ETL Laboral ignorado")
+            self.logger.info(f"Ultimo build: {manifesto.artefato(Config.ESTAGIO_BUILD)}")
+            return True
+        for linha in manifesto.resumo(plano):
+            self.logger.info(linha)
+        necessarias = plano.entradas_necessarias(Config.DEPENDENCIAS_TABELAS) or None
+        
+        # FASE 1 e 2: Carregar tabelas base e laborais (fontes independentes, em paralelo)
+        self.logger.info("\n>>> FASE 1-2: Importacao de Tabelas Base e Laborais")
+        dag = AgendadorDAG(Config.DAG_WORKERS, logger=self.logger, nome="Importacao Laboral")
+        if necessarias is None or any(c.startswith('DP-01-A/') for c in necessarias):
+            dag.adicionar('base', self.extrator.carregar_tabelas_base, necessarias)
+        if necessarias is None or any(c.startswith('DP-01-B1/') for c in necessarias):
+            dag.adicionar('laborais', self.extrator.carregar_tabelas_laborais, necessarias)
+        carregadas = dag.executar()
+        dag.relatorio_tempos()
+        
+        if not carregadas.get('base', True):
             self.logger.erro("Falha ao carregar tabelas base")
             return False
-        
-        # FASE 2: Carregar tabelas laborais
-        self.logger.info("\n>>> FASE 2: Importacao de Tabelas Laborais")
-        if not self.extrator.carregar_tabelas_laborais():
+        if not carregadas.get('laborais', True):
             self.logger.erro("Falha ao carregar tabelas laborais")
             return False
         
@@ -437,15 +575,40 @@ class OrquestradorLaboral:
             self.extrator.tabelas_laborais
         )
         
+        # Tabelas com entradas inalteradas vem da cache do build anterior
+        manifesto.reutilizar_tabelas(plano, lambda t: dimensoes if t.startswith('Dim_') else fatos)
+        
         # FASE 4: Validacao
         self.logger.info("\n>>> FASE 4: Validacao de Integridade")
         if 'Dim_Nacionalidade' in dimensoes:
             self.validador.validar_fks_nacionalidade(fatos, dimensoes['Dim_Nacionalidade'])
         
+        self.resultado = {'plano': plano, 'dimensoes': dimensoes, 'fatos': fatos}
+        if not exportar:
+            self.logger.info("Exportacao adiada para o fim do build (exportar_resultados)")
+            return True
+        return self.exportar_resultados()
+    
+    def exportar_resultados(self):
+        """FASE 5: ZIP consolidado, manifesto de build, metricas e relatorio final"""
+        if self.resultado is None:
+            return True  # Estagio inalterado: nada a exportar
+        plano, dimensoes, fatos = self.resultado['plano'], self.resultado['dimensoes'], self.resultado['fatos']
+        
         # FASE 5: Exportacao
         self.logger.info("\n>>> FASE 5: Exportacao")
         zip_path = self.exportador.exportar_zip_consolidado(dimensoes, fatos)
         
+        # Manifesto relido: com a exportacao adiada, outros estagios podem te-lo gravado entretanto
+        manifesto = ManifestoBuild(ConfigAmbiente.get_pasta_output(), self.logger)
+        manifesto.registrar(plano, {**dimensoes, **fatos}, Config.DEPENDENCIAS_TABELAS, zip_path)
+        manifesto.salvar()
+        self.zip_path = zip_path
+        
+        # Metricas por etapa (JSON-lines ao lado do ZIP)
+        self.logger.resumo_metricas()
+        self.logger.gravar_metricas(zip_path.with_name(f"{zip_path.stem}_metricas.jsonl"))
+        
         # Relatorio final
         self.logger.separador()
         print("CONSOLIDACAO LABORAL CONCLUIDA COM SUCESSO!")
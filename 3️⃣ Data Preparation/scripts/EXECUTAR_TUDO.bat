@@ -10,12 +10,19 @@ echo   - Instala dependencias (pandas, numpy)
 echo   - ETL Educacao (15 tabelas)
 echo   - ETL Laboral (11 tabelas)
 echo   - ETL AIMA (14 tabelas)
-echo   - Validacao automatica
+echo   - Warehouse SQLite com as 3 bases (output\warehouse_star_schema.sqlite)
+echo.
+echo [INFO] Re-execucoes sao incrementais: etapas cujas entradas nao mudaram
+echo        sao ignoradas (output\manifesto_build.json).
+echo        Para reconstruir tudo: EXECUTAR_TUDO.bat --completo
 echo.
 echo [TEMPO ESTIMADO] 5-10 minutos
 echo.
 pause
 
+REM Opcoes passadas ao executar_tudo.py (ex.: --completo, --gravar-no-fim,
+REM --pipelines educacao aima) - ver: python executar_tudo.py --help
+
 REM Ir para a pasta do script
 cd /d "%~dp0"
 
@@ -52,65 +59,21 @@ if errorlevel 1 (
 echo [OK] Dependencias instaladas
 
 REM ========================================================================
-REM FASE 2: ETL EDUCACAO
-REM ========================================================================
-echo.
-echo ========================================================================
-echo   FASE 2: ETL EDUCACAO (15 tabelas)
-echo ========================================================================
-echo.
-python ETL_EDUCACAO_CONSOLIDADO_v3.py
-if errorlevel 1 (
-    echo [ERRO] Falha no ETL Educacao!
-    pause
-    exit /b 1
-)
-echo.
-echo [OK] ETL Educacao concluido!
-
-REM ========================================================================
-REM FASE 3: ETL LABORAL
+REM FASE 2: ETL EDUCACAO + LABORAL + AIMA, WAREHOUSE, CUBOS E INDICES
+REM Um unico processo Python (executar_tudo.py, tambem em Linux/macOS):
+REM dimensoes partilhadas e tabelas consolidadas passam em memoria
 REM ========================================================================
 echo.
 echo ========================================================================
-echo   FASE 3: ETL LABORAL (11 tabelas)
+echo   FASE 2: ETL COMPLETO NUM UNICO PROCESSO (executar_tudo.py)
 echo ========================================================================
 echo.
-python ETL_LABORAL_CONSOLIDADO.py
+python executar_tudo.py %*
 if errorlevel 1 (
-    echo [ERRO] Falha no ETL Laboral!
+    echo [ERRO] Falha no ETL Educacao ou Laboral!
     pause
     exit /b 1
 )
-echo.
-echo [OK] ETL Laboral concluido!
-
-REM ========================================================================
-REM FASE 4: ETL AIMA
-REM ========================================================================
-echo.
-echo ========================================================================
-echo   FASE 4: ETL AIMA (14 tabelas)
-echo ========================================================================
-echo.
-python ETL_AIMA_CONSOLIDADO.py
-if errorlevel 1 (
-    echo [AVISO] Falha no ETL AIMA (opcional)
-    goto validacao
-)
-echo.
-echo [OK] ETL AIMA concluido!
-
-REM ========================================================================
-REM FASE 5: VALIDACAO AUTOMATICA
-REM ========================================================================
-:validacao
-echo.
-echo ========================================================================
-echo   FASE 5: VALIDACAO AUTOMATICA
-echo ========================================================================
-echo.
-python validar_tabelas.py
 
 REM ========================================================================
 REM RESUMO FINAL
@@ -143,7 +106,7 @@ echo   PROXIMOS PASSOS
 echo ========================================================================
 echo.
 echo 1. Extraia os 3 arquivos ZIP
-echo 2. Importe CSVs para banco de dados
+echo 2. Consulte output\warehouse_star_schema.sqlite (ou importe os CSVs)
 echo 3. Crie dashboards e analises
 echo.
 echo Obrigado por usar o Pipeline ETL!
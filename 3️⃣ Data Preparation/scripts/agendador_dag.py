@@ -0,0 +1,297 @@
+"""
+============================================================
+AGENDADOR DE ETAPAS EM GRAFO (DAG)
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Executa etapas (criar_dim_*, criar_fact_*, cargas de ficheiros)
+declaradas com as suas dependências. Etapas independentes correm
+em paralelo num pool de threads ou de processos.
+
+- Resultados determinísticos: devolvidos na ordem de declaração,
+  independentemente da ordem de conclusão
+- Tempo de cada nó (início relativo, duração, worker)
+- workers=1 executa em série, na ordem topológica estável
+
+Exemplo:
+    dag = AgendadorDAG(workers=4, logger=logger)
+    dag.adicionar('Dim_Nacionalidade', transf.criar_dim_nacionalidade, dados)
+    dag.adicionar('Dim_Mapeamento', transf.criar_dim_mapeamento, Ref('Dim_Nacionalidade'))
+    resultados = dag.executar()
+    dag.relatorio_tempos()
+============================================================
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+
+
+MODOS_SUPORTADOS = ('thread', 'processo')
+
+
+def workers_padrao():
+    """Workers por omissão: ETL_DAG_WORKERS ou min(4, núcleos)"""
+    try:
+        valor = int(os.environ.get('ETL_DAG_WORKERS', '0'))
+    except ValueError:
+        valor = 0
+    return valor if valor > 0 else min(4, os.cpu_count() or 1)
+
+
+# ============================================================
+# REFERÊNCIA AO RESULTADO DE OUTRO NÓ
+# ============================================================
+
+class Ref:
+    """Marca um argumento a substituir pelo resultado de outro nó"""
+
+    __slots__ = ('nome',)
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __repr__(self):
+        return f"Ref({self.nome!r})"
+
+
+def _refs_em(valor):
+    """Nomes referenciados num argumento (inclui listas, tuplos e dicts)"""
+    if isinstance(valor, Ref):
+        return [valor.nome]
+    if isinstance(valor, (list, tuple)):
+        return [n for item in valor for n in _refs_em(item)]
+    if isinstance(valor, dict):
+        return [n for item in valor.values() for n in _refs_em(item)]
+    return []
+
+
+def _resolver(valor, resultados):
+    if isinstance(valor, Ref):
+        return resultados[valor.nome]
+    if isinstance(valor, list):
+        return [_resolver(item, resultados) for item in valor]
+    if isinstance(valor, tuple):
+        return tuple(_resolver(item, resultados) for item in valor)
+    if isinstance(valor, dict):
+        return {chave: _resolver(item, resultados) for chave, item in valor.items()}
+    return valor
+
+
+def _executar_no(funcao, args, kwargs):
+    """Executa um nó e mede o tempo (função de módulo: serializável para processos)"""
+    inicio = time.time()
+    resultado = funcao(*args, **kwargs)
+    fim = time.time()
+    worker = f"pid-{os.getpid()}" if threading.current_thread() is threading.main_thread() \
+        else threading.current_thread().name
+    return resultado, inicio, fim, worker
+
+
+# ============================================================
+# AGENDADOR
+# ============================================================
+
+class AgendadorDAG:
+    """Executa nós de um grafo acíclico respeitando dependências"""
+
+    def __init__(self, workers=None, modo='thread', logger=None, nome='DAG'):
+        """
+        Args:
+            workers: Número máximo de nós em paralelo (None = workers_padrao())
+            modo: 'thread' (partilha memória) ou 'processo' (funções e
+                  argumentos têm de ser serializáveis; efeitos colaterais
+                  nos objetos não voltam ao processo principal)
+            logger: Logger opcional para o relatório de tempos
+            nome: Nome do grafo no relatório
+        """
+        if modo not in MODOS_SUPORTADOS:
+            raise ValueError(f"Modo não suportado: {modo} (use {', '.join(MODOS_SUPORTADOS)})")
+        self.workers = max(1, int(workers or workers_padrao()))
+        self.modo = modo
+        self.logger = logger
+        self.nome = nome
+        self.nos = {}
+        self.resultados = {}
+        self.tempos = []
+        self.tempo_total = 0.0
+
+    def adicionar(self, nome, funcao, *args, depende_de=(), **kwargs):
+        """
+        Declara um nó
+
+        Args:
+            nome: Nome único do nó (ex: 'Dim_Sexo')
+            funcao: Callable a executar
+            *args, **kwargs: Argumentos; Ref('no') é substituído pelo resultado
+            depende_de: Dependências extra sem passagem de resultado
+        """
+        if nome in self.nos:
+            raise ValueError(f"Nó duplicado no DAG: {nome}")
+        dependencias = list(dict.fromkeys(list(depende_de) + _refs_em(list(args)) + _refs_em(kwargs)))
+        self.nos[nome] = {'funcao': funcao, 'args': args, 'kwargs': kwargs, 'dependencias': dependencias}
+        return self
+
+    def _ordem_topologica(self):
+        """Ordem topológica estável (desempata pela ordem de declaração)"""
+        for nome, no in self.nos.items():
+            for dep in no['dependencias']:
+                if dep not in self.nos:
+                    raise ValueError(f"Nó '{nome}' depende de '{dep}', que não foi declarado")
+
+        pendentes = {nome: len(no['dependencias']) for nome, no in self.nos.items()}
+        ordem = []
+        while len(ordem) < len(self.nos):
+            prontos = [n for n, faltam in pendentes.items() if faltam == 0 and n not in ordem]
+            if not prontos:
+                ciclo = [n for n in self.nos if n not in ordem]
+                raise ValueError(f"Dependência circular no DAG: {', '.join(ciclo)}")
+            for nome in prontos:
+                ordem.append(nome)
+                for outro, no in self.nos.items():
+                    if nome in no['dependencias']:
+                        pendentes[outro] -= 1
+        return ordem
+
+    def executar(self):
+        """
+        Executa todos os nós
+
+        Returns:
+            dict nome -> resultado, na ordem de declaração
+
+        Raises:
+            A primeira exceção levantada por um nó (os nós já em execução
+            terminam; os restantes não são iniciados)
+        """
+        ordem = self._ordem_topologica()
+        self.resultados = {}
+        self.tempos = []
+        inicio_dag = time.time()
+
+        def registrar(nome, retorno):
+            resultado, inicio, fim, worker = retorno
+            self.resultados[nome] = resultado
+            self.tempos.append({
+                'no': nome,
+                'inicio_s': round(inicio - inicio_dag, 4),
+                'duracao_s': round(fim - inicio, 4),
+                'worker': worker
+            })
+
+        def preparar(nome):
+            no = self.nos[nome]
+            return (no['funcao'],
+                    _resolver(no['args'], self.resultados),
+                    _resolver(no['kwargs'], self.resultados))
+
+        if self.workers == 1 or len(self.nos) <= 1:
+            for nome in ordem:
+                registrar(nome, _executar_no(*preparar(nome)))
+        else:
+            self._executar_pool(ordem, preparar, registrar)
+
+        self.tempo_total = time.time() - inicio_dag
+        self.resultados = {nome: self.resultados[nome] for nome in self.nos}
+        self.tempos.sort(key=lambda t: list(self.nos).index(t['no']))
+        return self.resultados
+
+    def _executar_pool(self, ordem, preparar, registrar):
+        Executor = ThreadPoolExecutor if self.modo == 'thread' else ProcessPoolExecutor
+        opcoes = {'thread_name_prefix': f"{self.nome}-worker"} if self.modo == 'thread' else {}
+        concluidos = set()
+        em_execucao = {}
+        erro = None
+
+        with Executor(max_workers=self.workers, **opcoes) as pool:
+            while len(concluidos) < len(ordem):
+                if erro is None:
+                    for nome in ordem:
+                        if nome in concluidos or nome in em_execucao.values():
+                            continue
+                        if all(dep in concluidos for dep in self.nos[nome]['dependencias']):
+                            em_execucao[pool.submit(_executar_no, *preparar(nome))] = nome
+
+                if not em_execucao:
+                    break
+
+                prontos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                # Processa por ordem de declaração para manter os registos estáveis
+                for futuro in sorted(prontos, key=lambda f: ordem.index(em_execucao[f])):
+                    nome = em_execucao.pop(futuro)
+                    try:
+                        registrar(nome, futuro.result())
+                        concluidos.add(nome)
+                    except Exception as e:
+                        if erro is None:
+                            erro = e
+
+        if erro is not None:
+            raise erro
+
+    # ------------------------------------------------------------
+    # RESULTADOS E TEMPOS
+    # ------------------------------------------------------------
+
+    def sincronizar(self, destino):
+        """
+        Atualiza um dict de tabelas (ex: transformador.fatos) com os
+        resultados, na ordem de declaração dos nós
+
+        Em modo 'thread' o dict já foi preenchido pelos próprios métodos e
+        apenas é reordenado; em modo 'processo' recebe os DataFrames não
+        vazios devolvidos pelos nós.
+        """
+        if self.modo == 'processo':
+            for nome, resultado in self.resultados.items():
+                if isinstance(resultado, pd.DataFrame) and not resultado.empty:
+                    destino[nome] = resultado
+        ordenado = {n: destino[n] for n in destino if n not in self.nos}
+        ordenado.update({n: destino[n] for n in self.nos if n in destino})
+        destino.clear()
+        destino.update(ordenado)
+        return destino
+
+    def tempos_dataframe(self):
+        """Tempos por nó como DataFrame (no, inicio_s, duracao_s, worker)"""
+        return pd.DataFrame(self.tempos, columns=['no', 'inicio_s', 'duracao_s', 'worker'])
+
+    def relatorio_tempos(self):
+        """Imprime (ou envia ao logger) o tempo de cada nó"""
+        soma = sum(t['duracao_s'] for t in self.tempos)
+        linhas = [f"{self.nome}: {len(self.tempos)} nós em {self.tempo_total:.3f}s "
+                  f"(soma {soma:.3f}s, {self.workers} worker(s), modo {self.modo})"]
+        for t in self.tempos:
+            linhas.append(f"  {t['no']:<50} +{t['inicio_s']:>7.3f}s  {t['duracao_s']:>7.3f}s  [{t['worker']}]")
+
+        for linha in linhas:
+            if self.logger is not None:
+                self.logger.info(linha)
+            else:
+                print(linha)
+        return linhas
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+def _tarefa_teste(nome, espera, *dependencias):
+    time.sleep(espera)
+    return f"{nome}({', '.join(dependencias)})"
+
+
+if __name__ == "__main__":
+    for modo in MODOS_SUPORTADOS:
+        dag = AgendadorDAG(workers=4, modo=modo, nome=f"Teste-{modo}")
+        dag.adicionar('Dim_A', _tarefa_teste, 'A', 0.2)
+        dag.adicionar('Dim_B', _tarefa_teste, 'B', 0.2)
+        dag.adicionar('Dim_C', _tarefa_teste, 'C', 0.1, Ref('Dim_A'))
+        dag.adicionar('Fact_X', _tarefa_teste, 'X', 0.2, Ref('Dim_A'), Ref('Dim_B'))
+        dag.adicionar('Fact_Y', _tarefa_teste, 'Y', 0.2, Ref('Dim_B'))
+        resultados = dag.executar()
+        print(f"Resultados ({modo}): {list(resultados.values())}")
+        dag.relatorio_tempos()
+
+    print("\n✓ Módulo agendador_dag.py carregado com sucesso!")
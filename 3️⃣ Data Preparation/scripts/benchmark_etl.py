@@ -0,0 +1,329 @@
+"""
+============================================================
+BENCHMARK DOS PIPELINES ETL (EDUCAÇÃO, LABORAL E AIMA)
+============================================================
+Gera entradas sintéticas (dados_sinteticos.py) numa pasta de
+trabalho com a mesma estrutura do repositório e executa, sem
+interação, cada etapa num processo próprio:
+
+  laboral_censos        ETLLaboralProcessor sobre os quadros Q*.csv
+  aima_relatorios       etl_aima_colab_v2.main() sobre os CSVs RIFA/RMA
+  educacao_consolidado  ETL_EDUCACAO_CONSOLIDADO_v3.py
+  laboral_consolidado   ETL_LABORAL_CONSOLIDADO.py
+  aima_consolidado      ETL_AIMA_CONSOLIDADO.py
+
+Por etapa regista tempo de relógio, pico de memória (RSS) e
+linhas de entrada por segundo. Nas etapas consolidadas, as linhas
+de entrada são as das tabelas que o script carregou (etapas
+carregar_* das suas métricas), não as geradas para outras etapas.
+Com um baseline gravado, termina com código 1 se alguma etapa
+regredir além da tolerância.
+
+O pico de RSS usa os.wait4 (Linux/macOS); no Windows fica vazio.
+
+Uso:
+    python benchmark_etl.py                          # escala 12x5
+    python benchmark_etl.py --escala 12x1 --escala 250x20
+    python benchmark_etl.py --escala 50x10 --gravar-baseline
+    python benchmark_etl.py --tolerancia-tempo 1.0 --resultados bench.json
+============================================================
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dados_sinteticos import GeradorDadosSinteticos, LIMITES_ANOS, LIMITES_NACIONALIDADES
+
+
+PASTA_SCRIPTS = Path(__file__).resolve().parent
+PASTA_PROCESSADOS = PASTA_SCRIPTS.parent / 'data' / 'processed'
+SCRIPT_LABORAL_CENSOS = PASTA_PROCESSADOS / 'DP-01-B' / 'DP-01-B1' / 'script' / 'ETL_Laboral_Final.py'
+SCRIPT_AIMA_RELATORIOS = PASTA_PROCESSADOS / 'DP-02-A' / 'DP-02-A2' / 'etl_aima_colab_v2.py'
+
+BASELINE_PADRAO = PASTA_SCRIPTS / 'benchmark_baseline.json'
+ESCALA_PADRAO = '12x5'
+
+# Regressão: acima de baseline * (1 + tolerância) E acima da folga absoluta
+# (a folga evita falsos alarmes em etapas de décimas de segundo)
+TOLERANCIA_TEMPO = 0.5
+TOLERANCIA_MEMORIA = 0.25
+FOLGA_TEMPO_S = 0.5
+FOLGA_MEMORIA_MB = 20.0
+
+# Etapa -> grupos de linhas de entrada (GeradorDadosSinteticos.gerar());
+# None = etapa consolidada, contada pelas métricas do próprio script
+ETAPAS = {
+    'laboral_censos': ['censos_2021'],
+    'aima_relatorios': ['aima'],
+    'educacao_consolidado': None,
+    'laboral_consolidado': None,
+    'aima_consolidado': None,
+}
+
+# Etapa consolidada -> (script, métricas JSON-lines gravadas em output/)
+SCRIPTS_CONSOLIDADOS = {
+    'educacao_consolidado': ('ETL_EDUCACAO_CONSOLIDADO_v3.py', 'ETL_EDUCACAO_CONSOLIDADO_*_metricas.jsonl'),
+    'laboral_consolidado': ('ETL_LABORAL_CONSOLIDADO.py', 'ETL_LABORAL_CONSOLIDADO_*_metricas.jsonl'),
+    'aima_consolidado': ('ETL_AIMA_CONSOLIDADO.py', 'ETL_AIMA_CONSOLIDADO_*_metricas.jsonl'),
+}
+
+# Etapas das métricas que leem as tabelas de entrada
+PREFIXO_CARGA = 'carregar_'
+
+
+def interpretar_escala(texto):
+    """'250x20' -> (250, 20)"""
+    try:
+        nacionalidades, anos = (int(parte) for parte in texto.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Escala inválida: {texto} (use NACIONALIDADESxANOS, ex: 250x20)")
+    if not (LIMITES_NACIONALIDADES[0] <= nacionalidades <= LIMITES_NACIONALIDADES[1]
+            and LIMITES_ANOS[0] <= anos <= LIMITES_ANOS[1]):
+        raise argparse.ArgumentTypeError(
+            f"Escala fora dos limites: {texto} (nacionalidades {LIMITES_NACIONALIDADES[0]}-"
+            f"{LIMITES_NACIONALIDADES[1]}, anos {LIMITES_ANOS[0]}-{LIMITES_ANOS[1]})")
+    return nacionalidades, anos
+
+
+def _carregar_script(caminho, nome):
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# ============================================================
+# ETAPAS (EXECUTADAS NO PROCESSO FILHO)
+# ============================================================
+
+def executar_etapa(etapa, pasta, n_anos):
+    """Executa uma etapa não consolidada dentro do processo atual"""
+    gerador = GeradorDadosSinteticos(pasta, n_anos=n_anos, pasta_scripts=PASTA_SCRIPTS)
+    sys.path.insert(0, str(gerador.destino / 'scripts'))
+
+    if etapa == 'laboral_censos':
+        os.chdir(gerador.pasta_laboral)
+        modulo = _carregar_script(SCRIPT_LABORAL_CENSOS, 'ETL_Laboral_Final')
+        modulo.ETLLaboralProcessor().run_etl()
+
+    elif etapa == 'aima_relatorios':
+        modulo = _carregar_script(SCRIPT_AIMA_RELATORIOS, 'etl_aima_colab_v2')
+        # Anos descobertos nos nomes '<RIFA|RMA><ano> - <tabela>.csv' gerados
+        modulo.main(fonte_dados=str(gerador.pasta_aima_raw), output_dir=str(gerador.pasta_aima_processada))
+
+    else:
+        raise ValueError(f"Etapa desconhecida: {etapa}")
+
+
+# ============================================================
+# MEDIÇÃO
+# ============================================================
+
+def linhas_carregadas(pasta_output, padrao):
+    """Linhas lidas pela última execução de um script consolidado (0 sem métricas)"""
+    arquivos = sorted(Path(pasta_output).glob(padrao), key=lambda caminho: caminho.stat().st_mtime)
+    if not arquivos:
+        return 0
+    registos = [json.loads(linha) for linha in arquivos[-1].read_text(encoding='utf-8').splitlines() if linha.strip()]
+    return sum(r.get('linhas_saida') or 0 for r in registos if r['etapa'].startswith(PREFIXO_CARGA))
+
+
+def _medir_processo(comando, cwd, log, env):
+    """Executa um processo e devolve (código de saída, tempo em s, pico RSS em MB ou None)"""
+    inicio = time.perf_counter()
+    with open(log, 'w', encoding='utf-8') as saida:
+        processo = subprocess.Popen(comando, cwd=cwd, env=env, stdout=saida, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            _, estado, uso = os.wait4(processo.pid, 0)
+            processo.returncode = os.waitstatus_to_exitcode(estado)
+            # ru_maxrss: KB no Linux, bytes no macOS
+            pico_mb = uso.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            processo.wait()
+            pico_mb = None
+    return processo.returncode, time.perf_counter() - inicio, pico_mb
+
+
+class BenchmarkETL:
+    """Gera os dados, executa as etapas e compara com o baseline"""
+
+    def __init__(self, pasta_trabalho, semente=0):
+        self.pasta_trabalho = Path(pasta_trabalho)
+        self.semente = semente
+        self.resultados = []
+
+    def preparar(self, n_nacionalidades, n_anos):
+        """Gera as entradas e copia os scripts consolidados e módulos partilhados"""
+        pasta = self.pasta_trabalho / f"{n_nacionalidades}x{n_anos}"
+        if pasta.exists():
+            shutil.rmtree(pasta)
+        gerador = GeradorDadosSinteticos(pasta, n_nacionalidades, n_anos, self.semente, PASTA_SCRIPTS)
+        linhas = gerador.gerar()
+
+        for script in PASTA_SCRIPTS.glob('*.py'):
+            shutil.copyfile(script, pasta / 'scripts' / script.name)
+        (pasta / 'scripts' / 'output').mkdir(exist_ok=True)
+        return gerador, linhas
+
+    def executar_escala(self, n_nacionalidades, n_anos):
+        """Executa todas as etapas de uma escala; devolve a lista de resultados"""
+        escala = f"{n_nacionalidades}x{n_anos}"
+        print(f"\n{'=' * 70}\nESCALA {escala} ({n_nacionalidades} nacionalidades, {n_anos} ano(s))\n{'=' * 70}")
+        gerador, linhas = self.preparar(n_nacionalidades, n_anos)
+        print(f"Entradas geradas: {linhas}")
+
+        env = dict(os.environ, ETL_REBUILD_COMPLETO='1', PYTHONIOENCODING='utf-8')
+        env.pop('ETL_FONTE_DADOS', None)
+        pasta_scripts = gerador.destino / 'scripts'
+
+        resultados = []
+        for etapa, grupos in ETAPAS.items():
+            log = gerador.destino / f"{etapa}.log"
+            if etapa in SCRIPTS_CONSOLIDADOS:
+                comando = [sys.executable, SCRIPTS_CONSOLIDADOS[etapa][0]]
+            else:
+                comando = [sys.executable, str(Path(__file__).resolve()), '--etapa', etapa,
+                           '--pasta', str(gerador.destino), '--anos', str(n_anos)]
+
+            codigo, tempo, pico_mb = _medir_processo(comando, pasta_scripts, log, env)
+            if grupos is None:
+                linhas_entrada = linhas_carregadas(pasta_scripts / 'output', SCRIPTS_CONSOLIDADOS[etapa][1])
+            else:
+                linhas_entrada = sum(linhas.get(grupo, 0) for grupo in grupos)
+            resultado = {
+                'escala': escala,
+                'etapa': etapa,
+                'codigo_saida': codigo,
+                'tempo_s': round(tempo, 3),
+                'pico_rss_mb': round(pico_mb, 1) if pico_mb is not None else None,
+                'linhas_entrada': linhas_entrada,
+                'linhas_por_s': round(linhas_entrada / tempo, 1) if tempo > 0 else None,
+                'log': str(log),
+            }
+            resultados.append(resultado)
+            estado = 'OK' if codigo == 0 else f"FALHOU (código {codigo}, ver {log.name})"
+            print(f"  {etapa:<22} {tempo:>8.2f}s  {resultado['pico_rss_mb'] or '-':>8} MB  "
+                  f"{resultado['linhas_por_s'] or 0:>10.0f} linhas/s  {estado}")
+
+        self.resultados.extend(resultados)
+        return resultados
+
+    # ------------------------------------------------------------
+    # BASELINE
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def carregar_baseline(caminho):
+        caminho = Path(caminho)
+        if not caminho.exists():
+            return {}
+        return json.loads(caminho.read_text(encoding='utf-8')).get('escalas', {})
+
+    def gravar_baseline(self, caminho):
+        """Grava (ou atualiza) o baseline com as escalas medidas"""
+        escalas = self.carregar_baseline(caminho)
+        for r in self.resultados:
+            escalas.setdefault(r['escala'], {})[r['etapa']] = {
+                'tempo_s': r['tempo_s'], 'pico_rss_mb': r['pico_rss_mb'], 'linhas_entrada': r['linhas_entrada']
+            }
+        conteudo = {'versao': 1, 'python': sys.version.split()[0], 'escalas': escalas}
+        Path(caminho).write_text(json.dumps(conteudo, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        print(f"\nBaseline gravado em {caminho}")
+
+    def comparar_baseline(self, caminho, tolerancia_tempo=TOLERANCIA_TEMPO, tolerancia_memoria=TOLERANCIA_MEMORIA):
+        """
+        Lista de regressões face ao baseline (vazia se não houver)
+
+        Etapas que falharam contam sempre como regressão.
+        """
+        baseline = self.carregar_baseline(caminho)
+        regressoes = []
+        for r in self.resultados:
+            if r['codigo_saida'] != 0:
+                regressoes.append(f"{r['escala']} {r['etapa']}: terminou com código {r['codigo_saida']}")
+                continue
+            base = baseline.get(r['escala'], {}).get(r['etapa'])
+            if not base:
+                continue
+
+            limite = base['tempo_s'] * (1 + tolerancia_tempo)
+            if r['tempo_s'] > limite and r['tempo_s'] - base['tempo_s'] > FOLGA_TEMPO_S:
+                regressoes.append(f"{r['escala']} {r['etapa']}: tempo {r['tempo_s']:.2f}s > "
+                                  f"{limite:.2f}s (baseline {base['tempo_s']:.2f}s)")
+
+            if r['pico_rss_mb'] is not None and base.get('pico_rss_mb') is not None:
+                limite = base['pico_rss_mb'] * (1 + tolerancia_memoria)
+                if r['pico_rss_mb'] > limite and r['pico_rss_mb'] - base['pico_rss_mb'] > FOLGA_MEMORIA_MB:
+                    regressoes.append(f"{r['escala']} {r['etapa']}: memória {r['pico_rss_mb']:.0f} MB > "
+                                      f"{limite:.0f} MB (baseline {base['pico_rss_mb']:.0f} MB)")
+        return regressoes
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos pipelines ETL com dados sintéticos')
+    parser.add_argument('--escala', action='append', type=interpretar_escala,
+                        help=f"NACIONALIDADESxANOS (12-250 x 1-20); repetível. Padrão: {ESCALA_PADRAO}")
+    parser.add_argument('--pasta', help='Pasta de trabalho (padrão: pasta temporária)')
+    parser.add_argument('--manter-pasta', action='store_true', help='Não apagar a pasta temporária')
+    parser.add_argument('--resultados', help='Ficheiro JSON com os resultados (padrão: na pasta de trabalho)')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--baseline', default=str(BASELINE_PADRAO))
+    parser.add_argument('--gravar-baseline', action='store_true', help='Grava os tempos medidos como baseline')
+    parser.add_argument('--tolerancia-tempo', type=float, default=TOLERANCIA_TEMPO)
+    parser.add_argument('--tolerancia-memoria', type=float, default=TOLERANCIA_MEMORIA)
+    # Uso interno: execução de uma etapa no processo filho
+    parser.add_argument('--etapa', help=argparse.SUPPRESS)
+    parser.add_argument('--anos', type=int, default=5, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.etapa:
+        executar_etapa(args.etapa, args.pasta, args.anos)
+        return 0
+
+    escalas = args.escala or [interpretar_escala(ESCALA_PADRAO)]
+    temporaria = args.pasta is None
+    pasta = Path(args.pasta or tempfile.mkdtemp(prefix='benchmark_etl_'))
+
+    try:
+        benchmark = BenchmarkETL(pasta, args.semente)
+        for n_nacionalidades, n_anos in escalas:
+            benchmark.executar_escala(n_nacionalidades, n_anos)
+
+        relatorio = Path(args.resultados or pasta / 'benchmark_resultados.json')
+        relatorio.write_text(json.dumps(benchmark.resultados, indent=2, ensure_ascii=False), encoding='utf-8')
+        if args.resultados:
+            print(f"\nResultados gravados em {relatorio}")
+
+        if args.gravar_baseline:
+            benchmark.gravar_baseline(args.baseline)
+            return 0
+
+        regressoes = benchmark.comparar_baseline(args.baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+        if regressoes:
+            print(f"\n[ERRO] {len(regressoes)} regressão(ões):")
+            for regressao in regressoes:
+                print(f"  - {regressao}")
+            return 1
+        print("\n[OK] Sem regressões face ao baseline")
+        return 0
+    finally:
+        if temporaria and not args.manter_pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+        else:
+            print(f"Pasta de trabalho: {pasta}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
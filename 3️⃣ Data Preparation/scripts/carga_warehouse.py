@@ -0,0 +1,538 @@
+"""
+============================================================
+CARGA DO STAR SCHEMA UNIFICADO EM SQLITE
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Junta as dimensões e os fatos dos três pipelines *_CONSOLIDADO
+numa única base SQLite (apenas sqlite3 da biblioteca padrão):
+
+- Esquema declarado em MODELO_WAREHOUSE: PK de cada tabela, FKs
+  para as dimensões e um índice em cada coluna FK
+- Dimensões partilhadas (Dim_Nacionalidade, Dim_Sexo, ...) entram
+  uma única vez (a primeira ocorrência; diferenças são avisadas)
+- FKs verificadas antes da carga (VerificadorIntegridade) e de
+  novo pelo SQLite no COMMIT
+- Inserção em massa com executemany, em blocos, numa única
+  transação: ou entra tudo ou nada
+- Modo 'substituir' (recria as tabelas) ou 'upsert' (INSERT ...
+  ON CONFLICT DO UPDATE, para re-execuções)
+- Meta_Carga regista origem, linhas e data de cada tabela
+
+Por omissão lê o último ZIP de cada estágio registado em
+output/manifesto_build.json e grava output/warehouse_star_schema.sqlite.
+
+Uso:
+    python carga_warehouse.py                    # recria a base
+    python carga_warehouse.py --upsert           # atualiza a base existente
+    python carga_warehouse.py --consulta ensino_superior_2011_2021
+============================================================
+"""
+
+import argparse
+import io
+import sqlite3
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from formatos_tabela import FORMATOS_SAIDA, nome_sem_extensao
+from integridade_referencial import VerificadorIntegridade
+from manifesto_build import ManifestoBuild
+from registro_log import registrar_log
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+NOME_BASE_PADRAO = 'warehouse_star_schema.sqlite'
+
+MODOS_CARGA = ('substituir', 'upsert')
+
+# Estágio do manifesto de build -> padrão do ZIP (fallback sem manifesto)
+ESTAGIOS_ORIGEM = {
+    'EDUCACAO': 'ETL_EDUCACAO_CONSOLIDADO_*.zip',
+    'LABORAL': 'ETL_LABORAL_CONSOLIDADO_*.zip',
+    'AIMA': 'ETL_AIMA_CONSOLIDADO_*.zip',
+}
+
+LINHAS_POR_BLOCO = 50_000
+
+
+def _fk(coluna, dimensao, pk=None):
+    """(coluna FK, dimensão, coluna referenciada)"""
+    return (coluna, dimensao, pk or coluna)
+
+
+NAC = _fk('nacionalidade_id', 'Dim_Nacionalidade')
+POP = _fk('populacao_id', 'Dim_PopulacaoResidente')
+LOC = _fk('localidade_id', 'Dim_Localidade')
+ANO_AIMA = _fk('ano', 'Dim_AnoRelatorio')
+TIPO_AIMA = _fk('tipo_relatorio', 'Dim_TipoRelatorio', 'tipo_id')
+NAC_AIMA = _fk('nacionalidade_aima_raw', 'Dim_NacionalidadeAIMA', 'nome_nacionalidade_aima')
+
+# Tabela -> PK, FKs e colunas únicas (chaves naturais referenciadas).
+# As dimensões vêm primeiro: a ordem é a ordem de criação e de carga.
+MODELO_WAREHOUSE = {
+    # Dimensões partilhadas e de Educação
+    'Dim_Nacionalidade': {'pk': ['nacionalidade_id']},
+    'Dim_Sexo': {'pk': ['sexo_id']},
+    'Dim_PopulacaoResidente': {'pk': ['populacao_id']},
+    'Dim_Localidade': {'pk': ['localidade_id']},
+    'Dim_GrupoEtario': {'pk': ['grupoetario_id']},
+    'Dim_NivelEducacao': {'pk': ['nivel_educacao_id']},
+    'Dim_MapeamentoNacionalidades': {
+        'pk': ['nacionalidade_educacao_id'],
+        'fks': [_fk('nacionalidade_id_existente', 'Dim_Nacionalidade', 'nacionalidade_id')]
+    },
+    # Dimensões laborais
+    'Dim_CondicaoEconomica': {'pk': ['condicao_id']},
+    'Dim_GrupoProfissional': {'pk': ['grupo_prof_id']},
+    'Dim_SetorEconomico': {'pk': ['setor_id']},
+    'Dim_SituacaoProfissional': {'pk': ['situacao_id']},
+    # Dimensões AIMA
+    'Dim_AnoRelatorio': {'pk': ['ano']},
+    'Dim_TipoRelatorio': {'pk': ['tipo_id']},
+    'Dim_Despacho': {'pk': ['codigo_despacho']},
+    'Dim_MotivoConcessao': {'pk': ['motivo_raw']},
+    'Dim_NacionalidadeAIMA': {
+        'pk': ['nacionalidade_aima_id'],
+        'unicas': ['nome_nacionalidade_aima'],
+        'fks': [NAC]
+    },
+
+    # Fatos de Educação
+    'Fact_PopulacaoPorNacionalidade': {'pk': ['populacao_nacional_id'], 'fks': [NAC, POP]},
+    'Fact_PopulacaoPorLocalidade': {'pk': ['populacao_local_id'], 'fks': [LOC, POP]},
+    'Fact_PopulacaoPorGrupoEtario': {
+        'pk': ['populacao_grupoetario_id'],
+        'fks': [POP, _fk('grupoetario_id', 'Dim_GrupoEtario'), NAC]
+    },
+    'Fact_EvolucaoTemporal': {'pk': ['evolucao_id'], 'fks': [NAC, POP]},
+    'Fact_NacionalidadePrincipal': {'pk': ['nacionalidade_principal_id'], 'fks': [NAC]},
+    'Fact_DistribuicaoGeografica': {'pk': ['distribuicao_geo_id'], 'fks': [LOC, NAC]},
+    'Fact_PopulacaoEducacao': {
+        'pk': ['populacao_educacao_id'],
+        'fks': [NAC, _fk('nivel_educacao_id', 'Dim_NivelEducacao')]
+    },
+    'Fact_EstatisticasEducacao': {'pk': ['estatistica_id'], 'fks': [NAC]},
+
+    # Fatos laborais
+    'Fact_PopulacaoPorCondicao': {
+        'pk': ['populacao_cond_id'],
+        'fks': [POP, NAC, _fk('condicao_id', 'Dim_CondicaoEconomica')]
+    },
+    'Fact_EmpregadosPorProfissao': {'pk': ['emp_prof_id'], 'fks': [NAC, _fk('grupo_prof_id', 'Dim_GrupoProfissional')]},
+    'Fact_EmpregadosPorSetor': {'pk': ['emp_setor_id'], 'fks': [NAC, _fk('setor_id', 'Dim_SetorEconomico')]},
+    'Fact_EmpregadosPorSituacao': {'pk': ['emp_situacao_id'], 'fks': [NAC, _fk('situacao_id', 'Dim_SituacaoProfissional')]},
+
+    # Fatos AIMA (chave natural composta)
+    'Fact_ConcessoesPorNacionalidadeSexo': {
+        'pk': ['ano', 'fonte', 'tipo_relatorio', 'nacionalidade_aima_raw', 'sexo_raw'],
+        'fks': [ANO_AIMA, TIPO_AIMA, NAC_AIMA]
+    },
+    'Fact_ConcessoesPorDespacho': {
+        'pk': ['ano', 'fonte', 'tipo_relatorio', 'codigo_despacho'],
+        'fks': [ANO_AIMA, TIPO_AIMA, _fk('codigo_despacho', 'Dim_Despacho')]
+    },
+    'Fact_ConcessoesPorMotivoNacionalidade': {
+        'pk': ['ano', 'fonte', 'motivo_raw', 'nacionalidade_aima_raw'],
+        'fks': [ANO_AIMA, _fk('motivo_raw', 'Dim_MotivoConcessao'), NAC_AIMA]
+    },
+    'Fact_PopulacaoEstrangeiraPorNacionalidadeSexo': {
+        'pk': ['ano', 'fonte', 'tipo_relatorio', 'nacionalidade_aima_raw', 'sexo_raw'],
+        'fks': [ANO_AIMA, TIPO_AIMA, NAC_AIMA]
+    },
+    'Fact_DistribuicaoEtariaConcessoes': {
+        'pk': ['ano', 'fonte', 'tipo_relatorio', 'grupo_etario_raw', 'sexo_raw'],
+        'fks': [ANO_AIMA, TIPO_AIMA]
+    },
+    'Fact_PopulacaoResidenteEtaria': {
+        'pk': ['ano', 'fonte', 'tipo_relatorio', 'grupo_etario_raw'],
+        'fks': [ANO_AIMA, TIPO_AIMA]
+    },
+    'Fact_EvolucaoPopulacaoEstrangeira': {'pk': ['evolucao_id'], 'fks': [ANO_AIMA]},
+}
+
+# Consultas prontas (python carga_warehouse.py --consulta <nome>)
+CONSULTAS = {
+    'ensino_superior_2011_2021': """
+        SELECT n.nome_nacionalidade,
+               MAX(CASE WHEN e.ano_referencia = 2011 THEN e.percentual_ensino_superior END) AS superior_2011,
+               MAX(CASE WHEN e.ano_referencia = 2021 THEN e.percentual_ensino_superior END) AS superior_2021
+        FROM Fact_EstatisticasEducacao AS e
+        JOIN Dim_Nacionalidade AS n ON n.nacionalidade_id = e.nacionalidade_id
+        GROUP BY n.nacionalidade_id, n.nome_nacionalidade
+        ORDER BY superior_2021 DESC
+    """,
+    'empregados_por_setor': """
+        SELECT n.nome_nacionalidade, s.descricao AS setor, SUM(f.quantidade) AS empregados
+        FROM Fact_EmpregadosPorSetor AS f
+        JOIN Dim_Nacionalidade AS n ON n.nacionalidade_id = f.nacionalidade_id
+        JOIN Dim_SetorEconomico AS s ON s.setor_id = f.setor_id
+        GROUP BY n.nome_nacionalidade, s.descricao
+        ORDER BY empregados DESC
+    """,
+    'concessoes_por_nacionalidade': """
+        SELECT f.ano, COALESCE(n.nome_nacionalidade, a.nome_nacionalidade_aima) AS nacionalidade,
+               SUM(f.quantidade) AS concessoes
+        FROM Fact_ConcessoesPorNacionalidadeSexo AS f
+        JOIN Dim_NacionalidadeAIMA AS a ON a.nome_nacionalidade_aima = f.nacionalidade_aima_raw
+        LEFT JOIN Dim_Nacionalidade AS n ON n.nacionalidade_id = a.nacionalidade_id
+        GROUP BY f.ano, nacionalidade
+        ORDER BY f.ano, concessoes DESC
+    """,
+}
+
+
+def relacionamentos_warehouse(tabelas=None):
+    """FKs do modelo no formato de VerificadorIntegridade (opcionalmente só das tabelas dadas)"""
+    relacionamentos = []
+    for tabela, definicao in MODELO_WAREHOUSE.items():
+        if tabelas is not None and tabela not in tabelas:
+            continue
+        for coluna, dimensao, pk in definicao.get('fks', []):
+            relacionamentos.append({'fato': tabela, 'fk': coluna, 'dimensao': dimensao, 'pk': pk})
+    return relacionamentos
+
+
+def _q(nome):
+    """Identificador SQL entre aspas"""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+# ============================================================
+# LEITURA DOS ZIPs CONSOLIDADOS
+# ============================================================
+
+def ler_tabelas_zip(caminho_zip):
+    """Tabelas (CSV/Parquet/Feather) de um ZIP consolidado: dict nome -> DataFrame"""
+    extensoes = {info['extensao']: formato for formato, info in FORMATOS_SAIDA.items()}
+    tabelas = {}
+    with zipfile.ZipFile(caminho_zip) as zip_file:
+        for nome_arquivo in zip_file.namelist():
+            formato = extensoes.get(Path(nome_arquivo).suffix.lower())
+            if formato is None:
+                continue   # README, manifesto de checksums
+            with zip_file.open(nome_arquivo) as origem:
+                if formato == 'csv':
+                    df = pd.read_csv(origem)
+                elif formato == 'parquet':
+                    df = pd.read_parquet(io.BytesIO(origem.read()))
+                else:
+                    df = pd.read_feather(io.BytesIO(origem.read()))
+            tabelas[nome_sem_extensao(nome_arquivo)] = df
+    return tabelas
+
+
+def localizar_zips_consolidados(pasta_output):
+    """Último ZIP de cada estágio: do manifesto de build ou, sem ele, o mais recente da pasta"""
+    pasta_output = Path(pasta_output)
+    manifesto = ManifestoBuild(pasta_output)
+    zips = {}
+    for estagio, padrao in ESTAGIOS_ORIGEM.items():
+        artefato = manifesto.artefato(estagio)
+        if artefato and Path(artefato).exists():
+            zips[estagio] = Path(artefato)
+            continue
+        candidatos = sorted(pasta_output.glob(padrao))
+        if candidatos:
+            zips[estagio] = candidatos[-1]
+    return zips
+
+
+# ============================================================
+# CARREGADOR
+# ============================================================
+
+class CarregadorWarehouse:
+    """Carrega tabelas do Star Schema numa base SQLite com PK/FK e índices"""
+
+    def __init__(self, caminho_base, modo='substituir', logger=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+        """
+        Args:
+            caminho_base: Ficheiro SQLite (criado se não existir)
+            modo: 'substituir' (recria as tabelas) ou 'upsert'
+            logger: Logger opcional (info/sucesso/aviso/erro); sem logger usa print
+            linhas_por_bloco: Linhas convertidas por bloco do executemany
+        """
+        if modo not in MODOS_CARGA:
+            raise ValueError(f"Modo de carga não suportado: {modo} (use {', '.join(MODOS_CARGA)})")
+        self.caminho_base = Path(caminho_base)
+        self.modo = modo
+        self.logger = logger
+        self.linhas_por_bloco = linhas_por_bloco
+        self.tabelas = {}
+        self.origens = {}
+
+    # --------------------------------------------------------
+    # Tabelas a carregar
+    # --------------------------------------------------------
+
+    def adicionar(self, tabelas, origem=''):
+        """
+        Junta tabelas de um pipeline; dimensões já presentes são mantidas
+        (a primeira ocorrência vence) e diferenças são avisadas
+        """
+        for nome, df in tabelas.items():
+            if nome in self.tabelas:
+                if not self.tabelas[nome].reset_index(drop=True).equals(df.reset_index(drop=True)):
+                    registrar_log(self.logger, 'aviso',
+                                  f"{nome} de {origem} difere da versão de {self.origens[nome]} - mantida a primeira",
+                                  imprimir=True)
+                continue
+            self.tabelas[nome] = self._fks_inteiras(nome, df)
+            self.origens[nome] = origem
+        return self
+
+    @staticmethod
+    def _fks_inteiras(nome, df):
+        """
+        FKs nulas lidas de CSV chegam como float (15.0): o SQLite não as
+        aceita contra uma PK INTEGER, por isso passam a Int64 (NA -> NULL)
+        """
+        for coluna, _, _ in MODELO_WAREHOUSE.get(nome, {}).get('fks', []):
+            if coluna not in df.columns or not pd.api.types.is_float_dtype(df[coluna]):
+                continue
+            valores = df[coluna].dropna()
+            if (valores == valores.round()).all():
+                df = df.assign(**{coluna: df[coluna].astype('Int64')})
+        return df
+
+    def adicionar_zip(self, caminho_zip):
+        """Junta as tabelas de um ZIP consolidado"""
+        caminho_zip = Path(caminho_zip)
+        return self.adicionar(ler_tabelas_zip(caminho_zip), caminho_zip.name)
+
+    def _ordem(self):
+        """Tabelas pela ordem do modelo (dimensões primeiro); as desconhecidas no fim"""
+        conhecidas = [nome for nome in MODELO_WAREHOUSE if nome in self.tabelas]
+        return conhecidas + sorted(nome for nome in self.tabelas if nome not in MODELO_WAREHOUSE)
+
+    # --------------------------------------------------------
+    # Esquema
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _tipo_sql(serie):
+        tipo = serie.dtype
+        if isinstance(tipo, pd.CategoricalDtype):
+            tipo = tipo.categories.dtype
+        if pd.api.types.is_bool_dtype(tipo) or pd.api.types.is_integer_dtype(tipo):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(tipo):
+            return 'REAL'
+        return 'TEXT'
+
+    def _ddl_tabela(self, nome, df):
+        definicao = MODELO_WAREHOUSE.get(nome, {})
+        pk = definicao.get('pk', [])
+        linhas = [
+            f"{_q(coluna)} {self._tipo_sql(df[coluna])}{' NOT NULL' if coluna in pk else ''}"
+            for coluna in df.columns
+        ]
+        if pk:
+            linhas.append(f"PRIMARY KEY ({', '.join(map(_q, pk))})")
+        for coluna in definicao.get('unicas', []):
+            linhas.append(f"UNIQUE ({_q(coluna)})")
+        for coluna, dimensao, coluna_ref in definicao.get('fks', []):
+            if dimensao in self.tabelas:
+                linhas.append(f"FOREIGN KEY ({_q(coluna)}) REFERENCES {_q(dimensao)} ({_q(coluna_ref)})")
+        corpo = ',\n    '.join(linhas)
+        return f"CREATE TABLE IF NOT EXISTS {_q(nome)} (\n    {corpo}\n)"
+
+    @staticmethod
+    def _ddl_indices(nome):
+        for coluna, _, _ in MODELO_WAREHOUSE.get(nome, {}).get('fks', []):
+            yield f"CREATE INDEX IF NOT EXISTS {_q(f'idx_{nome}_{coluna}')} ON {_q(nome)} ({_q(coluna)})"
+
+    @staticmethod
+    def _colunas_existentes(conexao, nome):
+        return [linha[1] for linha in conexao.execute(f"PRAGMA table_info({_q(nome)})")]
+
+    # --------------------------------------------------------
+    # Inserção
+    # --------------------------------------------------------
+
+    def _linhas(self, df):
+        """Tuplos de valores Python (NaN -> NULL), convertidos bloco a bloco"""
+        for inicio in range(0, len(df), self.linhas_por_bloco):
+            bloco = df.iloc[inicio:inicio + self.linhas_por_bloco].astype(object)
+            bloco = bloco.where(bloco.notna(), None)
+            yield from bloco.itertuples(index=False, name=None)
+
+    def _sql_insercao(self, nome, colunas):
+        lista = ', '.join(map(_q, colunas))
+        marcadores = ', '.join('?' * len(colunas))
+        sql = f"INSERT INTO {_q(nome)} ({lista}) VALUES ({marcadores})"
+
+        pk = MODELO_WAREHOUSE.get(nome, {}).get('pk', [])
+        if self.modo == 'upsert' and pk:
+            atualizar = [c for c in colunas if c not in pk]
+            if atualizar:
+                atribuicoes = ', '.join(f"{_q(c)} = excluded.{_q(c)}" for c in atualizar)
+                sql += f" ON CONFLICT ({', '.join(map(_q, pk))}) DO UPDATE SET {atribuicoes}"
+            else:
+                sql += f" ON CONFLICT ({', '.join(map(_q, pk))}) DO NOTHING"
+        return sql
+
+    # --------------------------------------------------------
+    # Carga
+    # --------------------------------------------------------
+
+    def verificar_fks(self):
+        """Órfãos por FK do modelo (lista de resultados de VerificadorIntegridade com órfãos)"""
+        relacionamentos = [
+            rel for rel in relacionamentos_warehouse(self.tabelas) if rel['dimensao'] in self.tabelas
+        ]
+        resultados = VerificadorIntegridade().verificar(self.tabelas, relacionamentos)
+        return [r for r in resultados if r['linhas_orfas'] > 0]
+
+    def carregar(self):
+        """
+        Cria o esquema e carrega todas as tabelas numa única transação
+
+        Returns:
+            dict tabela -> linhas carregadas
+        """
+        if not self.tabelas:
+            raise ValueError("Nenhuma tabela para carregar")
+
+        orfaos = self.verificar_fks()
+        if orfaos:
+            for r in orfaos:
+                registrar_log(self.logger, 'erro',
+                              f"{r['fato']}.{r['fk']}: {r['linhas_orfas']} linhas sem {r['dimensao']} "
+                              f"(valores {r['amostra_valores']})", imprimir=True)
+            raise ValueError(f"{len(orfaos)} FK(s) com órfãos - carga cancelada")
+
+        ordem = self._ordem()
+        self.caminho_base.parent.mkdir(parents=True, exist_ok=True)
+        carregadas = {}
+
+        # isolation_level=None: a transação é controlada aqui (BEGIN/COMMIT)
+        conexao = sqlite3.connect(self.caminho_base, isolation_level=None)
+        try:
+            conexao.execute("PRAGMA foreign_keys = ON")
+            conexao.execute("BEGIN")
+            # FKs verificadas no COMMIT: a ordem das inserções não importa
+            conexao.execute("PRAGMA defer_foreign_keys = ON")
+
+            if self.modo == 'substituir':
+                for nome in reversed(ordem):
+                    conexao.execute(f"DROP TABLE IF EXISTS {_q(nome)}")
+
+            for nome in ordem:
+                df = self.tabelas[nome]
+                conexao.execute(self._ddl_tabela(nome, df))
+                existentes = self._colunas_existentes(conexao, nome)
+                for coluna in df.columns:
+                    if coluna not in existentes:
+                        conexao.execute(
+                            f"ALTER TABLE {_q(nome)} ADD COLUMN {_q(coluna)} {self._tipo_sql(df[coluna])}"
+                        )
+                if nome not in MODELO_WAREHOUSE and self.modo == 'upsert':
+                    # Sem PK declarada não há conflito possível: substitui o conteúdo
+                    conexao.execute(f"DELETE FROM {_q(nome)}")
+
+                conexao.executemany(self._sql_insercao(nome, list(df.columns)), self._linhas(df))
+                carregadas[nome] = len(df)
+
+            # Índices depois dos dados (mais rápido do que manter durante a carga)
+            for nome in ordem:
+                for ddl in self._ddl_indices(nome):
+                    conexao.execute(ddl)
+
+            self._registrar_meta(conexao, carregadas)
+            conexao.execute("COMMIT")
+        except BaseException:
+            if conexao.in_transaction:
+                conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+        total = sum(carregadas.values())
+        registrar_log(self.logger, 'sucesso',
+                      f"Warehouse SQLite ({self.modo}): {len(carregadas)} tabelas, {total:,} linhas -> {self.caminho_base}",
+                      imprimir=True)
+        return carregadas
+
+    def _registrar_meta(self, conexao, carregadas):
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS Meta_Carga ("
+            "tabela TEXT PRIMARY KEY, origem TEXT, linhas INTEGER, modo TEXT, carregado_em TEXT)"
+        )
+        agora = datetime.now().isoformat(timespec='seconds')
+        conexao.executemany(
+            "INSERT INTO Meta_Carga (tabela, origem, linhas, modo, carregado_em) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (tabela) DO UPDATE SET origem = excluded.origem, linhas = excluded.linhas, "
+            "modo = excluded.modo, carregado_em = excluded.carregado_em",
+            [(nome, self.origens.get(nome, ''), linhas, self.modo, agora) for nome, linhas in carregadas.items()]
+        )
+
+
+# ============================================================
+# CONSULTAS
+# ============================================================
+
+def consultar(caminho_base, sql, parametros=()):
+    """Executa uma consulta na base e devolve um DataFrame"""
+    sql = CONSULTAS.get(sql, sql)
+    with sqlite3.connect(caminho_base) as conexao:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+
+
+def carregar_consolidados(pasta_output, caminho_base=None, modo='substituir', logger=None):
+    """Carrega os últimos ZIPs dos três pipelines numa base SQLite"""
+    pasta_output = Path(pasta_output)
+    zips = localizar_zips_consolidados(pasta_output)
+    if not zips:
+        raise FileNotFoundError(f"Nenhum ZIP consolidado em {pasta_output}")
+
+    carregador = CarregadorWarehouse(caminho_base or pasta_output / NOME_BASE_PADRAO, modo, logger)
+    for estagio in ESTAGIOS_ORIGEM:
+        if estagio in zips:
+            registrar_log(logger, 'info', f"{estagio}: {zips[estagio].name}", imprimir=True)
+            carregador.adicionar_zip(zips[estagio])
+        else:
+            registrar_log(logger, 'aviso', f"{estagio}: nenhum ZIP encontrado - estágio ignorado", imprimir=True)
+    carregador.carregar()
+    return carregador
+
+
+# ============================================================
+# LINHA DE COMANDO
+# ============================================================
+
+def main(argv=None):
+    pasta_padrao = Path(__file__).resolve().parent / 'output'
+
+    parser = argparse.ArgumentParser(description='Carrega o Star Schema unificado numa base SQLite')
+    parser.add_argument('--output', default=str(pasta_padrao), help='Pasta com os ZIPs consolidados')
+    parser.add_argument('--base', help=f'Ficheiro SQLite (padrão: <output>/{NOME_BASE_PADRAO})')
+    parser.add_argument('--upsert', action='store_true', help='Atualiza a base existente em vez de a recriar')
+    parser.add_argument('--consulta', help=f"Executa uma consulta depois da carga ({', '.join(CONSULTAS)} ou SQL)")
+    parser.add_argument('--sem-carga', action='store_true', help='Apenas consulta a base existente')
+    args = parser.parse_args(argv)
+
+    caminho_base = Path(args.base or Path(args.output) / NOME_BASE_PADRAO)
+
+    if not args.sem_carga:
+        try:
+            carregar_consolidados(args.output, caminho_base, 'upsert' if args.upsert else 'substituir')
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[ERRO] {e}")
+            return 1
+
+    if args.consulta:
+        with pd.option_context('display.width', 160, 'display.max_rows', 100):
+            print(consultar(caminho_base, args.consulta).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
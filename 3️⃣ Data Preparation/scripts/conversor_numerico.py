@@ -0,0 +1,208 @@
+"""
+============================================================
+CONVERSOR NUMÉRICO COMPARTILHADO
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Conversão vetorizada de colunas numéricas no formato INE/AIMA:
+- Separadores portugueses (1.234,56) ou anglo-saxónicos (1,234.56)
+- Sufixo de percentagem (12,5%)
+- Texto com unidade (34,9 anos)
+- Sinais convencionais do INE ("-", "x", "…", "//", "§")
+
+Usado por:
+- Formatadores.limpar_numero / limpar_coluna (ETL_EDUCACAO, ETL_LABORAL, ETL_AIMA)
+- ParserINE2011 (ETL_EDUCACAO/parte_03_extracao.py)
+- Extrator2011 (ETL_EDUCACAO_CONSOLIDADO_v3.py)
+- ProcessadorDadosINE (data/processed/DP-01-A/script)
+============================================================
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+from registro_log import registrar_log
+
+
+# ============================================================
+# CONVERSOR NUMÉRICO
+# ============================================================
+
+class ConversorNumerico:
+    """Converte valores e colunas inteiras de texto numérico em números"""
+
+    # Sinais convencionais do INE: resultado nulo, valor confidencial,
+    # não disponível, não aplicável, etc. Convertidos para nulo sem contar como falha
+    MARCADORES_INE = frozenset({
+        '-', '–', '—', 'x', 'X', '…', '...', '..', '//', '§', 'ND', 'n.d.', 'n/d', 'N/D'
+    })
+
+    # Número no início do texto, seguido opcionalmente de '%' ou de uma
+    # unidade sem dígitos ("anos", "pessoas"). Os grupos de milhares podem
+    # ser separados por ponto/vírgula ou espaço (\s inclui o espaço não separável)
+    _PADROES = {
+        ',': re.compile(r'^(?P<numero>[-+]?\d[\d.\s]*(?:,\d+)?)\s*(?:%|[^\W\d_][^\d]*)?$'),
+        '.': re.compile(r'^(?P<numero>[-+]?\d[\d,\s]*(?:\.\d+)?)\s*(?:%|[^\W\d_][^\d]*)?$'),
+    }
+
+    _SEPARADORES_MILHAR = {
+        ',': r'[.\s]',
+        '.': r'[,\s]',
+    }
+
+    # ------------------------------------------------------------
+    # CONVERSÃO ESCALAR
+    # ------------------------------------------------------------
+
+    @classmethod
+    def converter_valor(cls, valor, separador_decimal=',', padrao=None):
+        """
+        Converte um único valor (mesmas regras de converter_serie)
+
+        Args:
+            valor: Valor bruto (str, int, float ou nulo)
+            separador_decimal: ',' (padrão INE) ou '.'
+            padrao: Valor devolvido para nulos, marcadores e falhas
+
+        Returns:
+            float ou padrao
+        """
+        if valor is None or isinstance(valor, bool):
+            return padrao
+
+        if isinstance(valor, (int, float, np.number)):
+            return padrao if pd.isna(valor) else float(valor)
+
+        texto = str(valor).strip()
+        if texto == '' or texto in cls.MARCADORES_INE:
+            return padrao
+
+        correspondencia = cls._PADROES[separador_decimal].match(texto)
+        if not correspondencia:
+            return padrao
+
+        numero = re.sub(cls._SEPARADORES_MILHAR[separador_decimal], '', correspondencia.group('numero'))
+        try:
+            return float(numero.replace(',', '.'))
+        except ValueError:
+            return padrao
+
+    # ------------------------------------------------------------
+    # CONVERSÃO VETORIZADA
+    # ------------------------------------------------------------
+
+    @classmethod
+    def converter_serie(cls, serie, tipo='float', separador_decimal=',',
+                        logger=None, nome=None, retornar_relatorio=False):
+        """
+        Converte uma coluna inteira de uma só vez
+
+        Args:
+            serie: pd.Series com valores brutos
+            tipo: 'float' (float64, nulos = NaN) ou 'int' (Int64, nulos = <NA>)
+            separador_decimal: ',' (padrão INE) ou '.'
+            logger: Logger opcional para avisar sobre células não convertidas
+            nome: Nome da coluna usado na mensagem do logger
+            retornar_relatorio: Se True, retorna também o dict de contagens
+
+        Returns:
+            pd.Series convertida (mesmo índice), ou (pd.Series, dict) se
+            retornar_relatorio=True. O relatório contém: total, convertidos,
+            vazios, marcadores e falhas
+        """
+        if not isinstance(serie, pd.Series):
+            serie = pd.Series(serie)
+
+        vazios = serie.isna()
+        marcadores = pd.Series(False, index=serie.index)
+
+        if pd.api.types.is_bool_dtype(serie.dtype):
+            valores = pd.Series(np.nan, index=serie.index, dtype='float64')
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            valores = serie.astype('float64')
+        else:
+            inferido = pd.api.types.infer_dtype(serie, skipna=True)
+            if inferido in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+                valores = pd.to_numeric(serie, errors='coerce').astype('float64')
+            else:
+                eh_texto = serie.map(lambda v: isinstance(v, str)) if inferido != 'string' else ~vazios
+                valores = pd.Series(np.nan, index=serie.index, dtype='float64')
+
+                # Valores já numéricos em colunas mistas (object)
+                numericos = ~eh_texto & ~vazios
+                if numericos.any():
+                    valores[numericos] = pd.to_numeric(serie[numericos], errors='coerce')
+
+                if eh_texto.any():
+                    texto = serie[eh_texto].astype(str).str.strip()
+                    vazio_texto = texto == ''
+                    marcador_texto = texto.isin(cls.MARCADORES_INE)
+                    vazios = vazios | vazio_texto.reindex(serie.index, fill_value=False)
+                    marcadores = marcador_texto.reindex(serie.index, fill_value=False)
+
+                    numero = texto.str.extract(cls._PADROES[separador_decimal], expand=False)
+                    numero = numero.str.replace(cls._SEPARADORES_MILHAR[separador_decimal], '', regex=True)
+                    numero = numero.str.replace(',', '.', regex=False)
+                    valores[eh_texto] = pd.to_numeric(numero, errors='coerce').astype('float64')
+
+        valores = valores.mask(vazios | marcadores)
+
+        if tipo == 'int':
+            fracionarios = valores.notna() & (valores != np.floor(valores))
+            valores = valores.mask(fracionarios).astype('Int64')
+        elif tipo != 'float':
+            raise ValueError(f"Tipo numérico não suportado: {tipo}")
+
+        falhas = int((valores.isna() & ~vazios & ~marcadores).sum())
+        relatorio = {
+            'total': len(serie),
+            'convertidos': int(valores.notna().sum()),
+            'vazios': int(vazios.sum()),
+            'marcadores': int(marcadores.sum()),
+            'falhas': falhas
+        }
+
+        if logger is not None and falhas > 0:
+            rotulo = nome or serie.name or 'coluna'
+            registrar_log(logger, 'aviso',
+                          f"{rotulo}: {falhas} de {len(serie)} célula(s) não numérica(s) convertida(s) para nulo")
+
+        if retornar_relatorio:
+            return valores, relatorio
+        return valores
+
+    @classmethod
+    def converter_dataframe(cls, df, colunas, tipo='float', separador_decimal=',', logger=None):
+        """
+        Converte várias colunas de um DataFrame (retorna uma cópia)
+
+        Returns:
+            Tupla (DataFrame convertido, dict coluna -> relatório)
+        """
+        df = df.copy()
+        relatorios = {}
+        for coluna in colunas:
+            if coluna in df.columns:
+                df[coluna], relatorios[coluna] = cls.converter_serie(
+                    df[coluna], tipo=tipo, separador_decimal=separador_decimal,
+                    logger=logger, nome=coluna, retornar_relatorio=True
+                )
+        return df, relatorios
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    amostra = pd.Series(['1.234', '12,5%', '34,9 anos', '-', 'x', '…', '', None, 'abc', '2011 e 2021', 7, 3.5])
+    convertida, relatorio = ConversorNumerico.converter_serie(amostra, retornar_relatorio=True)
+
+    print("Teste de Conversor Numérico:")
+    for bruto, valor in zip(amostra, convertida):
+        print(f"  {bruto!r:>15} -> {valor}")
+    print(f"Relatório: {relatorio}")
+    print(f"Inteiros: {ConversorNumerico.converter_serie(pd.Series(['1.000', '2,5', '3']), tipo='int').tolist()}")
+    print(f"Escalar: {ConversorNumerico.converter_valor('1.234,56')}")
+
+    print("\n✓ Módulo conversor_numerico.py carregado com sucesso!")
@@ -0,0 +1,464 @@
+"""
+============================================================
+CUBO DE AGREGADOS MATERIALIZADO
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+As perguntas de investigação (DP-01-C) e os capítulos do relatório
+agregam sempre os mesmos fatos por nacionalidade, ano, sexo e uma
+dimensão (nível de educação, setor, condição...). Este módulo
+pré-calcula esses agregados uma vez:
+
+- Um array numpy denso por cubo (um eixo por dimensão) com todas
+  as combinações de totais já somadas (membro '(Total)' em cada eixo)
+- Grupos de nacionalidades como membros extra do eixo nacionalidade:
+  GRUPOS_NACIONALIDADE (PALOP, CPLP, UE...) e os continentes de
+  Dim_Nacionalidade, com os nomes comparados pelo resolvedor partilhado
+- Membros que já são agregados na origem ('População residente',
+  'Total', 'Ativa', setores com agregado=True...) ficam no cubo mas
+  não entram nos totais nem nos grupos (sem dupla contagem)
+- Acesso O(1) a cada célula: dicionário rótulo -> posição por eixo
+- Persistido em output/cubo_agregados.npz, ao lado do warehouse SQLite
+
+Células sem registo na origem valem 0. As medidas são contagens:
+'20.556' (milhares com ponto, como nos relatórios AIMA) vale 20556 e
+um valor não inteiro interrompe a construção do cubo.
+
+Uso:
+    python cubo_agregados.py
+    python cubo_agregados.py --mostrar concessoes
+
+    cubos = carregar_cubos('output/cubo_agregados.npz')
+    cubos['concessoes'].valor(nacionalidade='PALOP', ano=2023)
+    cubos['concessoes'].serie('ano', nacionalidade='Brasil', sexo='F')
+============================================================
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from carga_warehouse import ESTAGIOS_ORIGEM, ler_tabelas_zip, localizar_zips_consolidados
+from conversor_numerico import ConversorNumerico
+from registro_log import registrar_log
+from resolvedor_nacionalidades import RESOLVEDOR_NACIONALIDADES, dobrar_texto
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+NOME_ARQUIVO_CUBOS = 'cubo_agregados.npz'
+
+TOTAL = '(Total)'
+
+# Grupos de nacionalidades usados nas análises (também Constantes.CONTINENTES do ETL_AIMA)
+GRUPOS_NACIONALIDADE = {
+    'PALOP': ['Angola', 'Cabo Verde', 'Guiné-Bissau', 'Moçambique', 'São Tomé e Príncipe'],
+    'CPLP': ['Angola', 'Brasil', 'Cabo Verde', 'Guiné-Bissau', 'Moçambique',
+             'São Tomé e Príncipe', 'Timor-Leste', 'Guiné Equatorial'],
+    'UE': ['Alemanha', 'Espanha', 'França', 'Itália', 'Roménia', 'Portugal'],
+    'LESTE_EUROPEU': ['Ucrânia', 'República da Moldávia', 'Rússia', 'Bulgária'],
+    'ASIA': ['República Popular da China', 'Índia', 'Paquistão', 'Bangladesh', 'Nepal'],
+    'AMERICA': ['Brasil', 'Venezuela', 'EUA', 'Canadá']
+}
+
+# Linhas de Dim_Nacionalidade que já somam outras nacionalidades
+NACIONALIDADES_AGREGADAS = ['População residente', 'Nacionalidade estrangeira', 'Nacionalidade portuguesa']
+
+# Continente de Dim_Nacionalidade que não forma grupo
+CONTINENTE_SEM_GRUPO = 'Outros'
+
+# Contagem com milhares separados por ponto ('20.556', '1.234.567')
+PADRAO_MILHARES_PONTO = re.compile(r'^\d{1,3}(?:\.\d{3})+$')
+
+EIXO_NACIONALIDADE = {
+    'coluna': 'nacionalidade_id', 'dimensao': 'Dim_Nacionalidade', 'rotulo': 'nome_nacionalidade',
+    'agregados': NACIONALIDADES_AGREGADAS
+}
+EIXO_NACIONALIDADE_AIMA = {'coluna': 'nacionalidade_aima_raw'}
+EIXO_ANO_POPULACAO = {'coluna': 'populacao_id', 'dimensao': 'Dim_PopulacaoResidente', 'rotulo': 'ano_referencia'}
+
+# Cubo -> fato, medida e eixos (coluna do fato ou rótulo de uma dimensão via FK).
+# 'agregados': membros da origem que não entram nos totais (lista de rótulos
+# ou coluna booleana da dimensão); 'Total' nunca entra.
+ESPECIFICACOES_CUBOS = {
+    'educacao': {
+        'fato': 'Fact_PopulacaoEducacao', 'medida': 'populacao_total',
+        'eixos': {
+            'nacionalidade': EIXO_NACIONALIDADE,
+            'ano': {'coluna': 'ano_referencia'},
+            'nivel_educacao': {'coluna': 'nivel_educacao_id', 'dimensao': 'Dim_NivelEducacao', 'rotulo': 'nome_nivel',
+                               'agregados': ['Ensino Básico - Total']},
+        }
+    },
+    'condicao_economica': {
+        'fato': 'Fact_PopulacaoPorCondicao', 'medida': 'quantidade',
+        'eixos': {
+            'nacionalidade': EIXO_NACIONALIDADE,
+            'ano': EIXO_ANO_POPULACAO,
+            'condicao': {'coluna': 'condicao_id', 'dimensao': 'Dim_CondicaoEconomica', 'rotulo': 'nome_condicao',
+                         'agregados': ['Ativa', 'Inativa']},
+        }
+    },
+    'emprego_setor': {
+        'fato': 'Fact_EmpregadosPorSetor', 'medida': 'quantidade',
+        'eixos': {
+            'nacionalidade': EIXO_NACIONALIDADE,
+            'setor': {'coluna': 'setor_id', 'dimensao': 'Dim_SetorEconomico', 'rotulo': 'descricao',
+                      'agregados': 'agregado'},
+        }
+    },
+    'emprego_profissao': {
+        'fato': 'Fact_EmpregadosPorProfissao', 'medida': 'quantidade',
+        'eixos': {
+            'nacionalidade': EIXO_NACIONALIDADE,
+            'profissao': {'coluna': 'grupo_prof_id', 'dimensao': 'Dim_GrupoProfissional', 'rotulo': 'descricao'},
+        }
+    },
+    'concessoes': {
+        'fato': 'Fact_ConcessoesPorNacionalidadeSexo', 'medida': 'quantidade',
+        'eixos': {'nacionalidade': EIXO_NACIONALIDADE_AIMA, 'ano': {'coluna': 'ano'}, 'sexo': {'coluna': 'sexo_raw'}}
+    },
+    'populacao_estrangeira': {
+        'fato': 'Fact_PopulacaoEstrangeiraPorNacionalidadeSexo', 'medida': 'quantidade',
+        'eixos': {'nacionalidade': EIXO_NACIONALIDADE_AIMA, 'ano': {'coluna': 'ano'}, 'sexo': {'coluna': 'sexo_raw'}}
+    },
+    'concessoes_motivo': {
+        'fato': 'Fact_ConcessoesPorMotivoNacionalidade', 'medida': 'total_motivo',
+        'eixos': {'nacionalidade': EIXO_NACIONALIDADE_AIMA, 'ano': {'coluna': 'ano'}, 'motivo': {'coluna': 'motivo_raw'}}
+    },
+}
+
+
+def _chave_nacionalidade(nome):
+    """Chave comum a grafias diferentes da mesma nacionalidade ('China' / 'República Popular da China')"""
+    return dobrar_texto(RESOLVEDOR_NACIONALIDADES.normalizar(nome))
+
+
+def _python(valor):
+    """Rótulo numpy -> tipo Python (chaves de dicionário e JSON)"""
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _converter_contagens(serie, cubo, medida):
+    """
+    Medida de contagem -> float64 (nulos e marcadores INE = NaN)
+
+    Raises:
+        ValueError: Se sobrarem valores não inteiros (ex: 18.9 lido de '18.900')
+    """
+    if not pd.api.types.is_numeric_dtype(serie.dtype):
+        texto = serie.astype('string').str.strip()
+        milhares = texto.str.fullmatch(PADRAO_MILHARES_PONTO).fillna(False).astype(bool)
+        serie = texto.mask(milhares, texto.str.replace('.', '', regex=False))
+    valores = ConversorNumerico.converter_serie(serie, separador_decimal='.')
+
+    fracionarios = valores.notna() & (valores != valores.round())
+    if fracionarios.any():
+        exemplos = ', '.join(str(v) for v in serie[fracionarios].head(3))
+        raise ValueError(
+            f"Cubo {cubo}: {int(fracionarios.sum())} contagens não inteiras em {medida} (ex: {exemplos})"
+        )
+    return valores
+
+
+# ============================================================
+# CUBO
+# ============================================================
+
+class CuboAgregado:
+    """Array denso de agregados com acesso por rótulo em O(1)"""
+
+    def __init__(self, nome, eixos, membros, valores, medida='', grupos=None, agregados=None):
+        """
+        Args:
+            nome: Nome do cubo
+            eixos: Nomes dos eixos, pela ordem das dimensões de `valores`
+            membros: Rótulos de cada eixo (inclui TOTAL e os grupos)
+            valores: np.ndarray com uma dimensão por eixo
+            medida: Coluna do fato agregada
+            grupos: Dict eixo -> rótulos que são grupos (membros calculados)
+            agregados: Dict eixo -> membros que já eram agregados na origem
+        """
+        self.nome = nome
+        self.eixos = list(eixos)
+        self.membros = [[_python(m) for m in lista] for lista in membros]
+        self.valores = valores
+        self.medida = medida
+        self.grupos = grupos or {}
+        self.agregados = agregados or {}
+        self._posicoes = {
+            eixo: {membro: i for i, membro in enumerate(lista)}
+            for eixo, lista in zip(self.eixos, self.membros)
+        }
+
+    def __repr__(self):
+        forma = ' x '.join(f"{eixo}[{len(lista)}]" for eixo, lista in zip(self.eixos, self.membros))
+        return f"CuboAgregado({self.nome}: {forma})"
+
+    def _posicao(self, eixo, membro):
+        try:
+            return self._posicoes[eixo][membro]
+        except KeyError:
+            if eixo not in self._posicoes:
+                raise KeyError(f"Cubo {self.nome} não tem o eixo '{eixo}' (eixos: {', '.join(self.eixos)})") from None
+            raise KeyError(f"'{membro}' não é membro do eixo {eixo} do cubo {self.nome}") from None
+
+    def membros_eixo(self, eixo, base=False):
+        """Rótulos de um eixo (base=True: só os que entram nos totais - sem TOTAL, grupos nem agregados da origem)"""
+        membros = self.membros[self.eixos.index(eixo)]
+        if base:
+            excluidos = set(self.grupos.get(eixo, [])) | set(self.agregados.get(eixo, [])) | {TOTAL}
+            return [m for m in membros if m not in excluidos]
+        return list(membros)
+
+    def posicoes(self, eixo, membros):
+        """Posições de vários membros de um eixo (para indexar `valores`)"""
+        return np.array([self._posicao(eixo, m) for m in membros], dtype=np.intp)
+
+    def valor(self, **coordenadas):
+        """
+        Uma célula; os eixos omitidos valem TOTAL
+        Ex.: cubo.valor(nacionalidade='PALOP', ano=2023)
+        """
+        indice = tuple(
+            self._posicao(eixo, coordenadas.pop(eixo, TOTAL)) for eixo in self.eixos
+        )
+        if coordenadas:
+            raise KeyError(f"Eixos inexistentes no cubo {self.nome}: {', '.join(coordenadas)}")
+        return float(self.valores[indice])
+
+    def fatia(self, **coordenadas):
+        """Sub-cubo (vista, sem cópia) com os eixos indicados fixos"""
+        indice, eixos, membros = [], [], []
+        for eixo, lista in zip(self.eixos, self.membros):
+            if eixo in coordenadas:
+                indice.append(self._posicao(eixo, coordenadas.pop(eixo)))
+            else:
+                indice.append(slice(None))
+                eixos.append(eixo)
+                membros.append(lista)
+        if coordenadas:
+            raise KeyError(f"Eixos inexistentes no cubo {self.nome}: {', '.join(coordenadas)}")
+        grupos = {eixo: g for eixo, g in self.grupos.items() if eixo in eixos}
+        agregados = {eixo: a for eixo, a in self.agregados.items() if eixo in eixos}
+        return CuboAgregado(self.nome, eixos, membros, self.valores[tuple(indice)], self.medida, grupos, agregados)
+
+    def serie(self, eixo, **coordenadas):
+        """Valores ao longo de um eixo; os restantes eixos omitidos valem TOTAL"""
+        fixos = {e: coordenadas.pop(e, TOTAL) for e in self.eixos if e != eixo}
+        if coordenadas:
+            raise KeyError(f"Eixos inexistentes no cubo {self.nome}: {', '.join(coordenadas)}")
+        fatia = self.fatia(**fixos)
+        return pd.Series(fatia.valores, index=pd.Index(fatia.membros[0], name=eixo), name=self.medida)
+
+    def para_dataframe(self, sem_zeros=True):
+        """Formato longo: uma linha por célula (eixos + medida)"""
+        indice = pd.MultiIndex.from_product(self.membros, names=self.eixos)
+        df = pd.DataFrame({self.medida or 'valor': self.valores.ravel()}, index=indice).reset_index()
+        if sem_zeros:
+            df = df[df.iloc[:, -1] != 0].reset_index(drop=True)
+        return df
+
+
+# ============================================================
+# CONSTRUÇÃO
+# ============================================================
+
+class ConstrutorCubos:
+    """Constrói os cubos de ESPECIFICACOES_CUBOS a partir das tabelas do Star Schema"""
+
+    def __init__(self, tabelas, logger=None, grupos_nacionalidade=None):
+        """
+        Args:
+            tabelas: Dict nome -> DataFrame (dimensões e fatos dos três pipelines)
+            logger: Logger opcional (info/sucesso/aviso/erro); sem logger usa print
+            grupos_nacionalidade: Dict grupo -> nomes (None = GRUPOS_NACIONALIDADE)
+        """
+        self.tabelas = tabelas
+        self.logger = logger
+        self.grupos_nacionalidade = self._grupos_por_chave(
+            GRUPOS_NACIONALIDADE if grupos_nacionalidade is None else grupos_nacionalidade
+        )
+
+    def _grupos_por_chave(self, grupos):
+        """Grupos (PALOP, CPLP...) e continentes de Dim_Nacionalidade como conjuntos de chaves"""
+        por_chave = {grupo: {_chave_nacionalidade(n) for n in nomes} for grupo, nomes in grupos.items()}
+
+        dimensao = self.tabelas.get('Dim_Nacionalidade')
+        if dimensao is not None and 'continente' in dimensao.columns:
+            agregadas = {_chave_nacionalidade(n) for n in NACIONALIDADES_AGREGADAS}
+            for nome, continente in zip(dimensao['nome_nacionalidade'], dimensao['continente']):
+                chave = _chave_nacionalidade(nome)
+                if pd.isna(continente) or continente == CONTINENTE_SEM_GRUPO or chave in agregadas:
+                    continue
+                por_chave.setdefault(continente, set()).add(chave)
+        return por_chave
+
+    def _rotulos_eixo(self, fato, eixo):
+        """Rótulos do eixo para cada linha do fato e os membros que já são agregados"""
+        rotulos = fato[eixo['coluna']]
+        agregados = eixo.get('agregados', [])
+
+        if 'dimensao' in eixo:
+            dimensao = self.tabelas[eixo['dimensao']]
+            chave = dimensao[eixo['coluna']]
+            rotulos = rotulos.map(pd.Series(dimensao[eixo['rotulo']].values, index=chave.values))
+            if isinstance(agregados, str):
+                agregados = dimensao.loc[dimensao[agregados].astype(bool), eixo['rotulo']].tolist()
+
+        return rotulos, set(agregados) | {'Total'}
+
+    @staticmethod
+    def _somar_eixo(valores, eixo, destino, origem):
+        """valores[destino ao longo de eixo] = soma das posições origem ao longo do mesmo eixo"""
+        alvo = [slice(None)] * valores.ndim
+        alvo[eixo] = destino
+        valores[tuple(alvo)] = valores.take(origem, axis=eixo).sum(axis=eixo)
+
+    def construir(self, nome, especificacao):
+        """Um cubo a partir da sua especificação (None se o fato não existir)"""
+        fato = self.tabelas.get(especificacao['fato'])
+        if fato is None:
+            registrar_log(self.logger, 'aviso', f"Cubo {nome}: {especificacao['fato']} não encontrado - ignorado",
+                          imprimir=True)
+            return None
+
+        medida = _converter_contagens(fato[especificacao['medida']], nome, especificacao['medida'])
+        codigos, membros, incluidos, grupos, agregados_origem = [], [], [], {}, {}
+        validas = medida.notna().to_numpy().copy()
+
+        for nome_eixo, eixo in especificacao['eixos'].items():
+            rotulos, agregados = self._rotulos_eixo(fato, eixo)
+            codigo, base = pd.factorize(rotulos, sort=True)
+            base = [_python(m) for m in base]
+            validas &= codigo >= 0
+            agregados_origem[nome_eixo] = [m for m in base if m in agregados]
+
+            extras = [TOTAL]
+            posicoes_grupo = {}
+            if nome_eixo == 'nacionalidade':
+                chaves = [_chave_nacionalidade(m) for m in base]
+                for grupo, membros_grupo in self.grupos_nacionalidade.items():
+                    posicoes = [i for i, c in enumerate(chaves) if c in membros_grupo and base[i] not in agregados]
+                    if posicoes:
+                        posicoes_grupo[grupo] = posicoes
+                extras += list(posicoes_grupo)
+                grupos[nome_eixo] = list(posicoes_grupo)
+
+            codigos.append(codigo)
+            membros.append(base + extras)
+            incluidos.append((
+                len(base),
+                [i for i, m in enumerate(base) if m not in agregados],
+                posicoes_grupo
+            ))
+
+        valores = np.zeros([len(m) for m in membros], dtype='float64')
+        np.add.at(valores, tuple(c[validas] for c in codigos), medida.to_numpy(dtype='float64')[validas])
+
+        # Eixo a eixo: cada soma usa também os totais/grupos já calculados nos eixos anteriores,
+        # por isso no fim existem todas as combinações (ex.: PALOP x (Total) x F)
+        for posicao_eixo, (n_base, base_incluida, posicoes_grupo) in enumerate(incluidos):
+            self._somar_eixo(valores, posicao_eixo, n_base, base_incluida)
+            for deslocamento, posicoes in enumerate(posicoes_grupo.values(), start=1):
+                self._somar_eixo(valores, posicao_eixo, n_base + deslocamento, posicoes)
+
+        return CuboAgregado(
+            nome, list(especificacao['eixos']), membros, valores, especificacao['medida'], grupos, agregados_origem
+        )
+
+    def construir_todos(self, especificacoes=None):
+        """Dict nome -> CuboAgregado para todas as especificações com fato disponível"""
+        cubos = {}
+        for nome, especificacao in (especificacoes or ESPECIFICACOES_CUBOS).items():
+            cubo = self.construir(nome, especificacao)
+            if cubo is not None:
+                cubos[nome] = cubo
+                registrar_log(self.logger, 'info', f"{cubo!r}: {cubo.valores.size:,} células", imprimir=True)
+        return cubos
+
+
+# ============================================================
+# PERSISTÊNCIA
+# ============================================================
+
+def guardar_cubos(cubos, caminho):
+    """Grava os cubos num único .npz (arrays + rótulos dos eixos em JSON)"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    metadados = {
+        nome: {
+            'eixos': cubo.eixos, 'membros': cubo.membros, 'medida': cubo.medida,
+            'grupos': cubo.grupos, 'agregados': cubo.agregados
+        }
+        for nome, cubo in cubos.items()
+    }
+    arrays = {f"valores__{nome}": cubo.valores for nome, cubo in cubos.items()}
+    np.savez_compressed(caminho, metadados=np.array(json.dumps(metadados, ensure_ascii=False)), **arrays)
+    return caminho
+
+
+def carregar_cubos(caminho):
+    """Dict nome -> CuboAgregado a partir de um .npz gravado por guardar_cubos"""
+    with np.load(caminho, allow_pickle=False) as arquivo:
+        metadados = json.loads(str(arquivo['metadados']))
+        return {
+            nome: CuboAgregado(nome, meta['eixos'], meta['membros'], arquivo[f"valores__{nome}"],
+                               meta['medida'], meta['grupos'], meta.get('agregados'))
+            for nome, meta in metadados.items()
+        }
+
+
+def tabelas_consolidadas(pasta_output):
+    """Dimensões e fatos dos últimos ZIPs consolidados (dimensões partilhadas: primeira ocorrência)"""
+    tabelas = {}
+    zips = localizar_zips_consolidados(pasta_output)
+    for estagio in ESTAGIOS_ORIGEM:
+        if estagio in zips:
+            for nome, df in ler_tabelas_zip(zips[estagio]).items():
+                tabelas.setdefault(nome, df)
+    return tabelas
+
+
+# ============================================================
+# LINHA DE COMANDO
+# ============================================================
+
+def main(argv=None):
+    pasta_padrao = Path(__file__).resolve().parent / 'output'
+
+    parser = argparse.ArgumentParser(description='Materializa os cubos de agregados do Star Schema')
+    parser.add_argument('--output', default=str(pasta_padrao), help='Pasta com os ZIPs consolidados')
+    parser.add_argument('--arquivo', help=f'Ficheiro dos cubos (padrão: <output>/{NOME_ARQUIVO_CUBOS})')
+    parser.add_argument('--mostrar', help='Mostra os agregados de um cubo depois de gravar')
+    args = parser.parse_args(argv)
+
+    tabelas = tabelas_consolidadas(args.output)
+    if not tabelas:
+        print(f"[ERRO] Nenhum ZIP consolidado em {args.output}")
+        return 1
+
+    cubos = ConstrutorCubos(tabelas).construir_todos()
+    caminho = guardar_cubos(cubos, args.arquivo or Path(args.output) / NOME_ARQUIVO_CUBOS)
+    print(f"[OK] {len(cubos)} cubos gravados em {caminho}")
+
+    if args.mostrar:
+        cubo = cubos.get(args.mostrar)
+        if cubo is None:
+            print(f"[ERRO] Cubo inexistente: {args.mostrar} (cubos: {', '.join(cubos)})")
+            return 1
+        eixo = cubo.eixos[0]
+        print(cubo.fatia(**{e: TOTAL for e in cubo.eixos[2:]}).para_dataframe(sem_zeros=False)
+              .pivot(index=eixo, columns=cubo.eixos[1]).to_string()
+              if len(cubo.eixos) > 1 else cubo.serie(eixo).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+"""
+============================================================
+GERADOR DE DADOS SINTÉTICOS (BENCHMARK)
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Gera entradas em escala configurável nos formatos reais, usando
+os ficheiros do repositório como modelo:
+
+- INE 2011 por país (scripts/input/<País>.csv, ';' e decimal ',')
+- Quadros Censos 2021 Q3.1-Q3.4, Q20, Q21, Q23, Q24 (latin1, "1 234")
+  para ETLLaboralProcessor
+- CSVs RIFA/RMA por ano para etl_aima_colab_v2.py
+- Tabelas base DP-01-A alargadas às nacionalidades sintéticas
+
+As primeiras linhas de cada ficheiro são as nacionalidades reais
+do modelo; as restantes chamam-se 'Pais Sintetico NNN' e são as
+mesmas em todas as fontes e na tabela Nacionalidade, para que os
+joins entre pipelines continuem a encontrar correspondência.
+
+Escalas: 12 a 250 nacionalidades e 1 a 20 anos (os anos só
+afetam os relatórios AIMA; os Censos têm um único ano).
+
+Estrutura gerada (igual à do repositório):
+    <destino>/scripts/input/
+    <destino>/data/processed/DP-01-A/
+    <destino>/data/processed/DP-01-B/DP-01-B1/resultados_etl_laboral/
+    <destino>/data/raw/aima/
+
+Exemplo:
+    gerador = GeradorDadosSinteticos('/tmp/bench', n_nacionalidades=50, n_anos=10)
+    linhas = gerador.gerar()
+============================================================
+"""
+
+import csv
+import io
+import shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+LIMITES_NACIONALIDADES = (12, 250)
+LIMITES_ANOS = (1, 20)
+
+# Último ano dos relatórios AIMA; RMA a partir de 2023, RIFA antes
+ANO_FINAL_AIMA = 2024
+PRIMEIRO_ANO_RMA = 2023
+
+# Nacionalidade usada como modelo das linhas sintéticas em DP-01-A (Brasil)
+NACIONALIDADE_MODELO_ID = 4
+
+QUADROS_NACIONALIDADE = ['Q3.1.csv', 'Q3.2.csv', 'Q3.3.csv', 'Q3.4.csv']
+QUADROS_FIXOS = ['Q20.csv', 'Q21.csv', 'Q23.csv', 'Q24.csv']
+
+# Ficheiros AIMA modelo (RIFA2022) -> True se tiverem uma linha por nacionalidade
+ARQUIVOS_AIMA = {
+    'concessao-titulos-residencia': True,
+    'populacao-estrangeira-residente': True,
+    'concessao-titulos_motivo': True,
+    'concessao-titulos_despachos': False,
+    'despachos-descricao': False,
+    'concessao-titulos_distribuicao-etaria': False,
+    'populacao-residente-distribuicao-etaria': False,
+}
+
+
+def nome_sintetico(indice):
+    """Nome da nacionalidade sintética n.º indice (1, 2, ...)"""
+    return f"Pais Sintetico {indice:03d}"
+
+
+def fonte_aima(ano):
+    """'RMA' a partir de 2023, 'RIFA' antes"""
+    return 'RMA' if ano >= PRIMEIRO_ANO_RMA else 'RIFA'
+
+
+def anos_aima(n_anos):
+    """Os n_anos anos de relatórios AIMA que terminam em ANO_FINAL_AIMA"""
+    return list(range(ANO_FINAL_AIMA - n_anos + 1, ANO_FINAL_AIMA + 1))
+
+
+def _validar_escala(valor, limites, nome):
+    if not limites[0] <= valor <= limites[1]:
+        raise ValueError(f"{nome} fora da escala suportada ({limites[0]}-{limites[1]}): {valor}")
+    return valor
+
+
+def pastas_modelo(pasta_scripts=None):
+    """
+    Pastas com os ficheiros reais usados como modelo
+
+    Returns:
+        dict com 'input', 'dp01a', 'censos_estrangeira', 'censos_csv' e 'aima'
+    """
+    pasta_scripts = Path(pasta_scripts or Path(__file__).resolve().parent)
+    raiz = pasta_scripts.parent.parent
+    raw = next(raiz.glob('2*Data Understanding')) / 'data' / 'raw'
+    return {
+        'input': pasta_scripts / 'input',
+        'dp01a': pasta_scripts.parent / 'data' / 'processed' / 'DP-01-A',
+        'censos_estrangeira': next((raw / 'ine').glob('Censos2021_Popula*estrangeira')),
+        'censos_csv': raw / 'ine' / 'Censos2021_csv',
+        'aima': raw / 'aima' / 'extraidas' / 'RIFA2022_csv',
+    }
+
+
+# ============================================================
+# GERADOR
+# ============================================================
+
+class GeradorDadosSinteticos:
+    """Gera as entradas dos três pipelines numa pasta de trabalho"""
+
+    def __init__(self, destino, n_nacionalidades=12, n_anos=5, semente=0, pasta_scripts=None):
+        """
+        Args:
+            destino: Pasta raiz da árvore gerada
+            n_nacionalidades: Linhas por nacionalidade em cada fonte (12-250)
+            n_anos: Anos de relatórios AIMA (1-20)
+            semente: Semente dos fatores aleatórios (resultados reprodutíveis)
+            pasta_scripts: Pasta scripts/ do repositório (modelos)
+        """
+        self.destino = Path(destino)
+        self.n_nacionalidades = _validar_escala(int(n_nacionalidades), LIMITES_NACIONALIDADES, 'Nacionalidades')
+        self.n_anos = _validar_escala(int(n_anos), LIMITES_ANOS, 'Anos')
+        self.rng = np.random.default_rng(semente)
+        self.modelos = pastas_modelo(pasta_scripts)
+        self.linhas = {}
+
+    # ------------------------------------------------------------
+    # PASTAS DE DESTINO
+    # ------------------------------------------------------------
+
+    @property
+    def pasta_input(self):
+        return self.destino / 'scripts' / 'input'
+
+    @property
+    def pasta_dp01a(self):
+        return self.destino / 'data' / 'processed' / 'DP-01-A'
+
+    @property
+    def pasta_laboral(self):
+        return self.destino / 'data' / 'processed' / 'DP-01-B' / 'DP-01-B1' / 'resultados_etl_laboral'
+
+    @property
+    def pasta_aima_raw(self):
+        return self.destino / 'data' / 'raw' / 'aima'
+
+    @property
+    def pasta_aima_processada(self):
+        return self.destino / 'data' / 'processed' / 'DP-02-A' / 'DP-02-A2' / 'data'
+
+    # ------------------------------------------------------------
+    # NACIONALIDADES E VALORES
+    # ------------------------------------------------------------
+
+    def _distribuir(self, modelos):
+        """
+        Lista (nome ou None, índice do modelo, fator) com n_nacionalidades
+        entradas: primeiro os modelos reais, depois as sintéticas
+
+        nome None mantém o nome real do modelo.
+        """
+        reais = min(self.n_nacionalidades, len(modelos))
+        linhas = [(None, i, 1.0) for i in range(reais)]
+        for indice in range(1, self.n_nacionalidades - reais + 1):
+            linhas.append((nome_sintetico(indice), (indice - 1) % len(modelos),
+                           float(self.rng.uniform(0.2, 1.5))))
+        return linhas
+
+    def _escalar_texto(self, valor, fator, separador_milhar=''):
+        """Escala um número inteiro em texto ('12345', ' 12 345'); mantém o resto"""
+        limpo = valor.replace(' ', '').replace('\xa0', '')
+        if fator == 1.0 or not limpo.isdigit():
+            return valor
+        novo = int(round(int(limpo) * fator))
+        if separador_milhar:
+            return ' ' + f"{novo:,}".replace(',', separador_milhar)
+        return str(novo)
+
+    def _contar(self, grupo, linhas):
+        self.linhas[grupo] = self.linhas.get(grupo, 0) + linhas
+
+    # ------------------------------------------------------------
+    # INE 2011 (Educação)
+    # ------------------------------------------------------------
+
+    def gerar_ine_2011(self):
+        """Um CSV por país em scripts/input/ (reais primeiro, depois sintéticos)"""
+        self.pasta_input.mkdir(parents=True, exist_ok=True)
+        modelos = sorted(self.modelos['input'].glob('*.csv'))
+
+        for nome, indice, fator in self._distribuir(modelos):
+            modelo = modelos[indice]
+            if nome is None:
+                shutil.copyfile(modelo, self.pasta_input / modelo.name)
+                self._contar('ine_2011', len(modelo.read_text(encoding='utf-8').splitlines()) - 1)
+                continue
+
+            leitor = csv.reader(io.StringIO(modelo.read_text(encoding='utf-8')), delimiter=';')
+            cabecalho = next(leitor)
+            colunas_valor = [i for i, c in enumerate(cabecalho) if c.startswith('Dados')]
+            linhas = [cabecalho]
+            for linha in leitor:
+                if linha:
+                    linha[0] = nome
+                    for i in colunas_valor:
+                        if i < len(linha):
+                            linha[i] = self._escalar_texto(linha[i], fator)
+                linhas.append(linha)
+
+            with open(self.pasta_input / f"{nome}.csv", 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f, delimiter=';', lineterminator='\n').writerows(linhas)
+            self._contar('ine_2011', len(linhas) - 1)
+
+    # ------------------------------------------------------------
+    # CENSOS 2021 (Laboral)
+    # ------------------------------------------------------------
+
+    def _gerar_quadro_nacionalidades(self, origem, destino):
+        """Replica as linhas após 'Principais nacionalidades' até à nota da fonte"""
+        linhas = origem.read_text(encoding='latin1').splitlines()
+        inicio = next(i for i, l in enumerate(linhas) if l.startswith('Principais nacionalidades')) + 1
+        fim = next((i for i in range(len(linhas) - 1, inicio - 1, -1) if linhas[i].startswith('"Fonte')),
+                   len(linhas))
+        modelos = [l for l in linhas[inicio:fim] if l.strip(', ')]
+
+        corpo = io.StringIO()
+        escritor = csv.writer(corpo, lineterminator='\n')
+        for nome, indice, fator in self._distribuir(modelos):
+            if nome is None:
+                corpo.write(modelos[indice] + '\n')
+                continue
+            celulas = next(csv.reader([modelos[indice]]))
+            celulas[0] = nome
+            escritor.writerow([celulas[0]] + [self._escalar_texto(c, fator, ' ') for c in celulas[1:]])
+
+        texto = '\n'.join(linhas[:inicio]) + '\n' + corpo.getvalue() + '\n'.join(linhas[fim:]) + '\n'
+        destino.write_text(texto, encoding='latin1')
+        self._contar('censos_2021', texto.count('\n'))
+
+    def gerar_censos_2021(self):
+        """Quadros Q*.csv na pasta de trabalho do ETLLaboralProcessor"""
+        self.pasta_laboral.mkdir(parents=True, exist_ok=True)
+        for quadro in QUADROS_NACIONALIDADE:
+            self._gerar_quadro_nacionalidades(self.modelos['censos_estrangeira'] / quadro,
+                                              self.pasta_laboral / quadro)
+        for quadro in QUADROS_FIXOS:
+            origem = self.modelos['censos_csv'] / quadro
+            shutil.copyfile(origem, self.pasta_laboral / quadro)
+            self._contar('censos_2021', len(origem.read_bytes().splitlines()))
+
+        # Tabelas de referência lidas da pasta atual pelo ETLLaboralProcessor
+        for tabela in ['Nacionalidade.csv', 'Sexo.csv', 'PopulacaoResidente.csv', 'NivelEducacao.csv']:
+            shutil.copyfile(self.pasta_dp01a / tabela, self.pasta_laboral / tabela)
+
+    # ------------------------------------------------------------
+    # RELATÓRIOS AIMA (RIFA / RMA)
+    # ------------------------------------------------------------
+
+    def _escalar_dataframe(self, df, fator):
+        """Escala as colunas numéricas inteiras (exceto a primeira); fator único ou por linha"""
+        df = df.copy()
+        for coluna in df.columns[1:]:
+            valores = pd.to_numeric(df[coluna], errors='coerce')
+            if valores.notna().all():
+                df[coluna] = np.round(valores.to_numpy(dtype='float64') * fator).astype('int64')
+        return df
+
+    def _gerar_tabela_nacionalidades(self, modelo, fator_ano):
+        distribuicao = self._distribuir(list(range(len(modelo))))
+        df = modelo.iloc[[indice for _, indice, _ in distribuicao]].reset_index(drop=True)
+        sinteticas = [(i, nome) for i, (nome, _, _) in enumerate(distribuicao) if nome is not None]
+        if sinteticas:
+            df[df.columns[0]] = df[df.columns[0]].astype(object)
+            df.iloc[[i for i, _ in sinteticas], 0] = [nome for _, nome in sinteticas]
+        fatores = np.array([fator for _, _, fator in distribuicao]) * fator_ano
+        return self._escalar_dataframe(df, fatores)
+
+    def gerar_aima(self):
+        """CSVs '<RIFA|RMA><ano> - <tabela>.csv' para cada ano, mais Nacionalidade.csv"""
+        self.pasta_aima_raw.mkdir(parents=True, exist_ok=True)
+        modelos = {
+            chave: pd.read_csv(next(self.modelos['aima'].glob(f"RIFA2022 - {chave}.csv")))
+            for chave in ARQUIVOS_AIMA
+        }
+
+        for ano in anos_aima(self.n_anos):
+            fator_ano = 1.06 ** (ano - 2022)
+            for chave, por_nacionalidade in ARQUIVOS_AIMA.items():
+                if por_nacionalidade:
+                    df = self._gerar_tabela_nacionalidades(modelos[chave], fator_ano)
+                else:
+                    df = self._escalar_dataframe(modelos[chave], fator_ano)
+                df.to_csv(self.pasta_aima_raw / f"{fonte_aima(ano)}{ano} - {chave}.csv", index=False)
+                self._contar('aima', len(df))
+
+        shutil.copyfile(self.pasta_dp01a / 'Nacionalidade.csv', self.pasta_aima_raw / 'Nacionalidade.csv')
+
+    # ------------------------------------------------------------
+    # TABELAS BASE DP-01-A
+    # ------------------------------------------------------------
+
+    def _replicar_por_nacionalidade(self, df, novos_ids):
+        """Acrescenta, para cada novo ID, as linhas da nacionalidade modelo"""
+        modelo = df[df['nacionalidade_id'] == NACIONALIDADE_MODELO_ID]
+        if modelo.empty or not novos_ids:
+            return df
+
+        pk = df.columns[0]
+        colunas_escala = [
+            c for c in df.columns
+            if pd.api.types.is_integer_dtype(df[c]) and not c.endswith('_id')
+            and not c.startswith('ano') and c not in ('posicao_ranking',)
+        ]
+        linhas_modelo = len(modelo)
+        bloco = pd.concat([modelo] * len(novos_ids), ignore_index=True)
+        bloco['nacionalidade_id'] = np.repeat(novos_ids, linhas_modelo)
+        fatores = np.repeat(self.rng.uniform(0.2, 1.5, len(novos_ids)), linhas_modelo)
+        for coluna in colunas_escala:
+            bloco[coluna] = np.round(bloco[coluna].to_numpy(dtype='float64') * fatores).astype('int64')
+
+        resultado = pd.concat([df, bloco], ignore_index=True)
+        if pk != 'nacionalidade_id':
+            resultado[pk] = range(1, len(resultado) + 1)
+        return resultado
+
+    def gerar_base_dp01a(self):
+        """Copia DP-01-A e acrescenta as nacionalidades sintéticas às tabelas"""
+        self.pasta_dp01a.mkdir(parents=True, exist_ok=True)
+        tabelas = {arquivo.name: pd.read_csv(arquivo) for arquivo in sorted(self.modelos['dp01a'].glob('*.csv'))}
+
+        n_sinteticas = max(0, self.n_nacionalidades - LIMITES_NACIONALIDADES[0])
+        nacionalidade = tabelas['Nacionalidade.csv']
+        primeiro_id = int(nacionalidade['nacionalidade_id'].max()) + 1
+        novos_ids = list(range(primeiro_id, primeiro_id + n_sinteticas))
+
+        tabelas['Nacionalidade.csv'] = pd.concat([nacionalidade, pd.DataFrame({
+            'nacionalidade_id': novos_ids,
+            'nome_nacionalidade': [nome_sintetico(i) for i in range(1, n_sinteticas + 1)],
+            'codigo_pais': [f"S{i:03d}" for i in range(1, n_sinteticas + 1)],
+            'continente': 'Sintético',
+        })], ignore_index=True)
+
+        mapeamento = tabelas.get('MapeamentoNacionalidades.csv')
+        if mapeamento is not None and n_sinteticas:
+            inicio = int(mapeamento['nacionalidade_educacao_id'].max()) + 1
+            tabelas['MapeamentoNacionalidades.csv'] = pd.concat([mapeamento, pd.DataFrame({
+                'nacionalidade_educacao_id': range(inicio, inicio + n_sinteticas),
+                'nome_nacionalidade_educacao': [nome_sintetico(i) for i in range(1, n_sinteticas + 1)],
+                'nacionalidade_id_existente': novos_ids,
+                'compatibilidade': 'Sim',
+            })], ignore_index=True)
+
+        for arquivo, df in tabelas.items():
+            if arquivo not in ('Nacionalidade.csv', 'MapeamentoNacionalidades.csv') \
+                    and 'nacionalidade_id' in df.columns:
+                df = self._replicar_por_nacionalidade(df, novos_ids)
+            df.to_csv(self.pasta_dp01a / arquivo, index=False)
+            self._contar('dp01a', len(df))
+
+    # ------------------------------------------------------------
+    # GERAÇÃO COMPLETA
+    # ------------------------------------------------------------
+
+    def gerar(self):
+        """
+        Gera todas as entradas
+
+        Returns:
+            dict grupo -> nº de linhas de dados geradas
+            ('dp01a', 'ine_2011', 'censos_2021', 'aima')
+        """
+        self.linhas = {}
+        self.gerar_base_dp01a()
+        self.gerar_ine_2011()
+        self.gerar_censos_2021()
+        self.gerar_aima()
+        return dict(self.linhas)
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_nacs, n_anos in [(12, 1), (250, 20)]:
+            gerador = GeradorDadosSinteticos(Path(pasta) / f"{n_nacs}x{n_anos}", n_nacs, n_anos)
+            print(f"{n_nacs} nacionalidades x {n_anos} anos: {gerador.gerar()}")
+
+    print("\n✓ Módulo dados_sinteticos.py carregado com sucesso!")
@@ -0,0 +1,309 @@
+"""
+============================================================
+ESTÁGIO DE DESCODIFICAÇÃO DAS ENTRADAS
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Os CSVs do INE e da AIMA chegam em UTF-8, cp1252 ou latin-1 e,
+por vezes, com mojibake (UTF-8 lido como cp1252 ou os caracteres
+cirílicos dos quadros laborais exportados em cp866). Este módulo
+trata disso antes de qualquer transformação:
+
+- Deteção da codificação uma única vez, a partir de uma amostra
+  de bytes (BOM ou primeira candidata que descodifica a amostra);
+  se o resto do ficheiro falhar na leitura, passa-se à candidata
+  seguinte e a decisão guardada é corrigida
+- Decisão guardada por impressão digital do ficheiro (tamanho +
+  SHA-256 do início e do fim), em memória e, opcionalmente, num
+  JSON - o mesmo ficheiro não volta a ser sondado
+- Uma única leitura/parse por ficheiro com a codificação decidida
+- Reparação de mojibake por colunas inteiras: um filtro vetorizado
+  seleciona as células suspeitas e a tabela compilada de
+  substituições corre uma vez por valor distinto
+
+Usado por:
+- ETLLaboralProcessor (DP-01-B1/script/ETL_Laboral_Final.py)
+- Extrator2011 (ETL_EDUCACAO_CONSOLIDADO_v3.py)
+- layout_aima.py (processar_motivos.py, DP-02-A)
+- resolvedor_nacionalidades.reparar_mojibake
+
+Exemplo:
+    decodificador = DecodificadorEntradas(caminho_cache='output/codificacoes.json')
+    df = decodificador.ler_csv('Q3.1.csv', header=None, dtype=str)
+    df[0] = reparar_serie(df[0], aparar=True)
+    decodificador.guardar_cache()
+============================================================
+"""
+
+import codecs
+import hashlib
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+# Ordem importa: latin-1 descodifica qualquer sequência de bytes
+CODIFICACOES_CANDIDATAS = ('utf-8', 'cp1252', 'latin-1')
+
+TAMANHO_AMOSTRA = 1024 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Caracteres cirílicos que aparecem quando os CSVs laborais (cp866)
+# são lidos como cp1251
+SUBSTITUICOES_CIRILICO = {
+    'гo': 'ção', 'уo': 'ão', 'гг': 'çã', 'у': 'ã', 'й': 'é',
+    'ь': 'í', 'з': 'ç', 'р': 'á', 'ш': 'õ', 'ж': 'ê',
+    'щ': 'ú', 'ъ': 'ó', 'ю': 'û', 'я': 'ü'
+}
+
+# Tabela compilada: uma alternativa por chave, as mais longas primeiro
+_RE_SUBSTITUICOES = re.compile('|'.join(
+    re.escape(chave) for chave in sorted(SUBSTITUICOES_CIRILICO, key=len, reverse=True)
+))
+_RE_DUPLA_CODIFICACAO = re.compile('Ã|Â|â€')
+_RE_SUSPEITO = re.compile('Ã|Â|â€|[Ѐ-ӿ]')
+
+
+# ============================================================
+# REPARAÇÃO DE MOJIBAKE
+# ============================================================
+
+def reparar_texto(texto):
+    """
+    Desfaz dupla codificação e os cirílicos conhecidos num valor
+    Ex.: 'RomÃ©nia' -> 'Roménia', 'Ucrуnia' -> 'Ucrãnia'
+    """
+    if _RE_DUPLA_CODIFICACAO.search(texto):
+        for codificacao in ('cp1252', 'latin-1'):
+            try:
+                texto = texto.encode(codificacao).decode('utf-8')
+                break
+            except UnicodeError:
+                continue
+
+    return _RE_SUBSTITUICOES.sub(lambda m: SUBSTITUICOES_CIRILICO[m.group()], texto)
+
+
+def reparar_serie(serie, aparar=False):
+    """
+    Repara uma coluna inteira (valores que não são texto ficam iguais)
+
+    Só as células com marcadores de mojibake passam pela tabela de
+    substituições, e cada valor distinto é reparado uma única vez.
+
+    Args:
+        serie: Coluna a reparar
+        aparar: Remove também os espaços nas pontas do texto
+    """
+    if not (pd.api.types.is_object_dtype(serie.dtype) or pd.api.types.is_string_dtype(serie.dtype)):
+        return serie
+
+    suspeitos = serie.str.contains(_RE_SUSPEITO, na=False).astype(bool)
+    if suspeitos.any():
+        reparados = {valor: reparar_texto(valor) for valor in pd.unique(serie[suspeitos])}
+        serie = serie.mask(suspeitos, serie.map(reparados))
+
+    if aparar:
+        aparada = serie.str.strip()
+        serie = aparada.where(aparada.notna(), serie)
+
+    return serie
+
+
+def reparar_colunas(df, colunas=None, aparar=False):
+    """Repara as colunas de texto indicadas (None = todas) de um DataFrame"""
+    if colunas is None:
+        colunas = df.columns
+    for coluna in colunas:
+        df[coluna] = reparar_serie(df[coluna], aparar=aparar)
+    return df
+
+
+# ============================================================
+# DETEÇÃO DA CODIFICAÇÃO
+# ============================================================
+
+def detetar_codificacao(amostra, candidatas=CODIFICACOES_CANDIDATAS):
+    """
+    Codificação de uma amostra de bytes: BOM ou primeira candidata
+    que a descodifica (None se nenhuma servir)
+    """
+    for bom, codificacao in BOMS:
+        if amostra.startswith(bom):
+            return codificacao
+
+    for codificacao in candidatas:
+        try:
+            # final=False: um carácter multibyte cortado no fim da amostra não é erro
+            codecs.getincrementaldecoder(codificacao)().decode(amostra, final=False)
+            return codificacao
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+
+def impressao_digital(caminho, tamanho_amostra=TAMANHO_AMOSTRA):
+    """
+    Identifica o conteúdo de um ficheiro sem o ler inteiro
+
+    Returns:
+        (impressão digital, amostra inicial): tamanho + SHA-256 do
+        início e do fim; a amostra é reutilizada na deteção
+    """
+    caminho = Path(caminho)
+    tamanho = caminho.stat().st_size
+    sha = hashlib.sha256()
+
+    with open(caminho, 'rb') as f:
+        amostra = f.read(tamanho_amostra)
+        sha.update(amostra)
+        if tamanho > tamanho_amostra:
+            f.seek(max(tamanho - tamanho_amostra, tamanho_amostra))
+            sha.update(f.read())
+
+    return f"{tamanho}:{sha.hexdigest()}", amostra
+
+
+def impressao_digital_bytes(conteudo, tamanho_amostra=TAMANHO_AMOSTRA):
+    """Mesma impressão digital de impressao_digital, para um conteúdo já em memória"""
+    sha = hashlib.sha256(conteudo[:tamanho_amostra])
+    if len(conteudo) > tamanho_amostra:
+        sha.update(conteudo[max(len(conteudo) - tamanho_amostra, tamanho_amostra):])
+    return f"{len(conteudo)}:{sha.hexdigest()}"
+
+
+# ============================================================
+# DECODIFICADOR
+# ============================================================
+
+class DecodificadorEntradas:
+    """Deteta a codificação de cada ficheiro uma vez e lê-o uma única vez"""
+
+    def __init__(self, candidatas=CODIFICACOES_CANDIDATAS, tamanho_amostra=TAMANHO_AMOSTRA,
+                 caminho_cache=None):
+        """
+        Args:
+            candidatas: Codificações a experimentar, por ordem
+            tamanho_amostra: Bytes lidos para a deteção e a impressão digital
+            caminho_cache: JSON com as decisões anteriores (None = só em memória)
+        """
+        self.candidatas = tuple(candidatas)
+        self.tamanho_amostra = tamanho_amostra
+        self.caminho_cache = Path(caminho_cache) if caminho_cache else None
+        self.decisoes = self._carregar_cache()
+        self.contagens = Counter()
+
+    def _carregar_cache(self):
+        """Decisões guardadas numa execução anterior"""
+        if self.caminho_cache is None or not self.caminho_cache.exists():
+            return {}
+        try:
+            with open(self.caminho_cache, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def guardar_cache(self):
+        """Grava as decisões no JSON (se houver caminho_cache)"""
+        if self.caminho_cache is None:
+            return
+        self.caminho_cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.caminho_cache, 'w', encoding='utf-8') as f:
+            json.dump(self.decisoes, f, indent=2, sort_keys=True)
+
+    def _chave(self, caminho):
+        digital, amostra = impressao_digital(caminho, self.tamanho_amostra)
+        # A chave inclui as candidatas: outra ordem pode dar outra decisão
+        return f"{digital}:{','.join(self.candidatas)}", amostra
+
+    def codificacao(self, caminho):
+        """Codificação do ficheiro (sondada só na primeira vez que o conteúdo aparece)"""
+        chave, amostra = self._chave(caminho)
+
+        if chave in self.decisoes:
+            self.contagens['em_cache'] += 1
+            return self.decisoes[chave]
+
+        codificacao = detetar_codificacao(amostra, self.candidatas)
+        if codificacao is None:
+            raise ValueError(f"Nenhuma codificação de {self.candidatas} descodifica {caminho}")
+
+        self.contagens['detetadas'] += 1
+        self.decisoes[chave] = codificacao
+        return codificacao
+
+    def corrigir(self, caminho, falhada):
+        """
+        Codificação seguinte depois de `falhada` não descodificar o ficheiro
+        (ex.: um 'é' latin-1 depois do primeiro MB, só ASCII). A nova decisão
+        substitui a guardada.
+
+        Returns:
+            Próxima candidata, ou None se já não houver nenhuma
+        """
+        chave, _ = self._chave(caminho)
+        seguintes = self.candidatas[self.candidatas.index(falhada) + 1:] if falhada in self.candidatas \
+            else tuple(c for c in self.candidatas if c != falhada)
+        if not seguintes:
+            return None
+
+        self.contagens['corrigidas'] += 1
+        self.decisoes[chave] = seguintes[0]
+        return seguintes[0]
+
+    def _com_recurso(self, caminho, leitura):
+        """leitura(codificacao), experimentando as candidatas seguintes se falhar a descodificação"""
+        codificacao = self.codificacao(caminho)
+        while True:
+            try:
+                return leitura(codificacao)
+            except UnicodeDecodeError:
+                codificacao = self.corrigir(caminho, codificacao)
+                if codificacao is None:
+                    raise
+
+    def ler_csv(self, caminho, colunas_reparar=(), **opcoes_csv):
+        """
+        Lê um CSV com a codificação decidida (e a seguinte, se esta falhar)
+
+        Args:
+            caminho: Ficheiro CSV
+            colunas_reparar: Colunas a passar por reparar_serie (None = todas)
+            **opcoes_csv: Opções de pd.read_csv (sem encoding)
+        """
+        df = self._com_recurso(caminho, lambda codificacao: pd.read_csv(caminho, encoding=codificacao, **opcoes_csv))
+        if colunas_reparar is None or len(colunas_reparar) > 0:
+            reparar_colunas(df, colunas_reparar)
+        return df
+
+    def ler_texto(self, caminho):
+        """Conteúdo de um ficheiro de texto com a codificação decidida"""
+        def ler(codificacao):
+            with open(caminho, 'r', encoding=codificacao) as f:
+                return f.read()
+        return self._com_recurso(caminho, ler)
+
+
+# Instância partilhada pelos scripts do mesmo processo
+DECODIFICADOR_ENTRADAS = DecodificadorEntradas()
+
+
+if __name__ == "__main__":
+    serie = pd.Series(['RomÃ©nia', ' Ucrуnia ', 'Populaгo', 'Brasil', None, 3])
+    print(reparar_serie(serie, aparar=True).tolist())
+
+    print(detetar_codificacao('Nível'.encode('utf-8')))
+    print(detetar_codificacao('Nível'.encode('latin-1')))
+    print(detetar_codificacao(codecs.BOM_UTF8 + b'Quadro'))
@@ -0,0 +1,323 @@
+"""
+============================================================
+ARMAZÉM DE DIMENSÕES CONFORMES (DP-01-A)
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Nacionalidade.csv, Sexo.csv, PopulacaoResidente.csv e as restantes
+tabelas de data/processed/DP-01-A são lidas pelos três pipelines
+(Extrator2021, ExtratorLaboral, ExtratorAIMA). Em vez de cada um
+reler e revalidar os mesmos ficheiros:
+
+- em memória: um único DataFrame por ficheiro e por processo,
+  partilhado por todos os pipelines desse processo
+- em disco: cópia tipada (parquet, tipos preservados tal como
+  lidos) em output/.cache_dimensoes/ + índice JSON com a versão
+- versão: SHA-256 do ficheiro de origem (hash_arquivo); tal como no
+  manifesto de build, só é recalculada quando tamanho ou data de
+  modificação mudam. O ficheiro só é relido quando a versão muda
+- validação (não vazia, chave *_id única e sem nulos) feita uma vez
+  por versão e registada no índice
+
+Os DataFrames devolvidos são cópias rasas do DataFrame do armazém:
+com copy-on-write (pandas >= 3) partilham os dados sem os copiar e
+uma alteração feita por um pipeline nunca chega ao armazém nem aos
+outros pipelines. Sem copy-on-write é devolvida uma cópia completa.
+
+Sem pyarrow não há cópia em disco (só a cache em memória).
+
+Uso:
+    from dimensoes_conformes import ARMAZEM_DIMENSOES
+
+    df = ARMAZEM_DIMENSOES.ler(localizar_tabela(pasta_dp01a, 'Nacionalidade.csv'))
+    dims = ARMAZEM_DIMENSOES.dimensoes_base()   # {'Dim_Nacionalidade': df, ...}
+============================================================
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from formatos_tabela import PYARROW_DISPONIVEL, localizar_tabela, ler_tabela
+from manifesto_build import hash_arquivo
+from registro_log import registrar_log
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+VERSAO_ARMAZEM = 1
+
+PASTA_DIMENSOES_PADRAO = Path(__file__).resolve().parent.parent / 'data' / 'processed' / 'DP-01-A'
+PASTA_CACHE_DIMENSOES = Path(__file__).resolve().parent / 'output' / '.cache_dimensoes'
+NOME_INDICE = 'dimensoes_conformes.json'
+
+# Dimensões partilhadas pelos três pipelines (nome da tabela no Star Schema -> ficheiro)
+DIMENSOES_PARTILHADAS = {
+    'Dim_Nacionalidade': 'Nacionalidade.csv',
+    'Dim_Sexo': 'Sexo.csv',
+    'Dim_GrupoEtario': 'GrupoEtario.csv',
+    'Dim_PopulacaoResidente': 'PopulacaoResidente.csv',
+    'Dim_Localidade': 'Localidade.csv',
+}
+
+try:
+    COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or bool(pd.get_option('mode.copy_on_write'))
+except (ValueError, KeyError, pd.errors.OptionError):
+    COPY_ON_WRITE = False
+
+
+def validar_dimensao(df):
+    """
+    Problemas estruturais de uma tabela de dimensão
+
+    Returns:
+        Lista de mensagens (vazia se a tabela é válida)
+    """
+    if df.empty:
+        return ["tabela vazia"]
+    chave = df.columns[0]
+    if not str(chave).endswith('_id'):
+        return []
+    problemas = []
+    if df[chave].isna().any():
+        problemas.append(f"{chave} com {int(df[chave].isna().sum())} nulos")
+    if df[chave].duplicated().any():
+        problemas.append(f"{chave} com {int(df[chave].duplicated().sum())} duplicados")
+    return problemas
+
+
+# ============================================================
+# ARMAZÉM
+# ============================================================
+
+class ArmazemDimensoes:
+    """Cache versionada (memória + disco) das tabelas partilhadas de DP-01-A"""
+
+    def __init__(self, pasta_cache=PASTA_CACHE_DIMENSOES, logger=None):
+        """
+        Args:
+            pasta_cache: Pasta da cópia em disco (None = só memória)
+            logger: Logger opcional (info/sucesso/aviso/erro)
+        """
+        self.pasta_cache = Path(pasta_cache) if pasta_cache is not None else None
+        self.logger = logger
+        self._memoria = {}
+        self._bloqueio = threading.Lock()
+        self._indice = self._carregar_indice()
+        # 'memoria' (já lida neste processo), 'disco' (cópia tipada), 'origem' (ficheiro relido)
+        self.contagens = Counter()
+
+    # ------------------------------------------------------------
+    # ÍNDICE EM DISCO
+    # ------------------------------------------------------------
+
+    @property
+    def _caminho_indice(self):
+        return self.pasta_cache / NOME_INDICE
+
+    def _carregar_indice(self):
+        if self.pasta_cache is None or not self._caminho_indice.exists():
+            return {}
+        try:
+            with open(self._caminho_indice, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if dados.get('versao') != VERSAO_ARMAZEM:
+            return {}
+        return dados.get('tabelas', {})
+
+    def _salvar_indice(self):
+        """Grava o índice de forma atómica (ficheiro temporário + rename)"""
+        self.pasta_cache.mkdir(parents=True, exist_ok=True)
+        temporario = self._caminho_indice.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_ARMAZEM, 'tabelas': self._indice},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temporario, self._caminho_indice)
+
+    def _caminho_copia(self, registo):
+        return self.pasta_cache / f"{registo['versao'][:16]}_{Path(registo['origem']).stem}.parquet"
+
+    # ------------------------------------------------------------
+    # VERSÃO
+    # ------------------------------------------------------------
+
+    def _versao(self, caminho, info):
+        """SHA-256 do ficheiro, reaproveitado do índice se tamanho e mtime não mudaram"""
+        anterior = self._indice.get(str(caminho), {})
+        if anterior.get('tamanho') == info.st_size and anterior.get('mtime_ns') == info.st_mtime_ns:
+            return anterior['versao']
+        return hash_arquivo(caminho)
+
+    def versao(self, caminho):
+        """Versão (SHA-256) da tabela atualmente em cache para o ficheiro (ou None)"""
+        registo = self._memoria.get(str(Path(caminho).resolve()))
+        return registo[0] if registo else None
+
+    # ------------------------------------------------------------
+    # LEITURA
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _entregar(df):
+        return df.copy(deep=not COPY_ON_WRITE)
+
+    def _ler_copia(self, registo):
+        if self.pasta_cache is None or not PYARROW_DISPONIVEL:
+            return None
+        copia = self._caminho_copia(registo)
+        if not copia.exists():
+            return None
+        try:
+            return pd.read_parquet(copia)
+        except Exception:
+            return None
+
+    def _gravar_copia(self, registo, df, anterior=None):
+        if self.pasta_cache is None or not PYARROW_DISPONIVEL:
+            return
+        try:
+            self.pasta_cache.mkdir(parents=True, exist_ok=True)
+            if anterior and anterior.get('versao') and anterior['versao'] != registo['versao']:
+                self._caminho_copia(anterior).unlink(missing_ok=True)
+            df.to_parquet(self._caminho_copia(registo), index=False)
+        except Exception as e:
+            registrar_log(self.logger, 'aviso', f"Cópia em disco de {Path(registo['origem']).name} não gravada: {e}")
+
+    def ler(self, caminho):
+        """
+        Tabela de DP-01-A, lida do disco só quando a versão muda
+
+        Args:
+            caminho: Ficheiro da tabela (.csv/.parquet/.feather - ver localizar_tabela)
+
+        Returns:
+            DataFrame partilhado (cópia rasa copy-on-write - ver docstring do módulo)
+        """
+        caminho = Path(caminho).resolve()
+        chave = str(caminho)
+        info = caminho.stat()
+
+        with self._bloqueio:
+            em_memoria = self._memoria.get(chave)
+            if em_memoria is not None and em_memoria[1] == (info.st_size, info.st_mtime_ns):
+                self.contagens['memoria'] += 1
+                return self._entregar(em_memoria[2])
+
+            versao = self._versao(caminho, info)
+            if em_memoria is not None and em_memoria[0] == versao:
+                self._memoria[chave] = (versao, (info.st_size, info.st_mtime_ns), em_memoria[2])
+                self.contagens['memoria'] += 1
+                return self._entregar(em_memoria[2])
+
+            anterior = registo = self._indice.get(chave, {})
+            df = self._ler_copia(registo) if registo.get('versao') == versao else None
+            if df is not None:
+                self.contagens['disco'] += 1
+            else:
+                df = ler_tabela(caminho)
+                self.contagens['origem'] += 1
+                registo = {
+                    'origem': chave,
+                    'versao': versao,
+                    'linhas': len(df),
+                    'tipos': df.dtypes.astype(str).to_dict(),
+                    'problemas': validar_dimensao(df),
+                }
+                for problema in registo['problemas']:
+                    registrar_log(self.logger, 'aviso', f"{caminho.name}: {problema}")
+                self._gravar_copia(registo, df, anterior)
+
+            registo.update(tamanho=info.st_size, mtime_ns=info.st_mtime_ns)
+            self._indice[chave] = registo
+            if self.pasta_cache is not None:
+                try:
+                    self._salvar_indice()
+                except OSError as e:
+                    registrar_log(self.logger, 'aviso', f"Índice de dimensões não gravado: {e}")
+
+            self._memoria[chave] = (versao, (info.st_size, info.st_mtime_ns), df)
+            return self._entregar(df)
+
+    def carregar(self, pasta, arquivos):
+        """
+        Várias tabelas de uma pasta
+
+        Args:
+            pasta: Pasta (ex.: ConfigAmbiente.get_pasta_dados_base())
+            arquivos: Nomes dos ficheiros (ex.: ['Nacionalidade.csv', 'Sexo.csv'])
+
+        Returns:
+            dict nome sem extensão -> DataFrame (ficheiros não encontrados são omitidos)
+        """
+        tabelas = {}
+        for arquivo in arquivos:
+            caminho = localizar_tabela(pasta, arquivo)
+            if caminho is not None:
+                tabelas[Path(caminho).stem] = self.ler(caminho)
+        return tabelas
+
+    def dimensoes_base(self, pasta=None):
+        """
+        Dimensões partilhadas (DIMENSOES_PARTILHADAS) com os nomes do Star Schema
+
+        Returns:
+            dict 'Dim_Nacionalidade' -> DataFrame, ... (vazio se a pasta não existe)
+        """
+        pasta = Path(pasta) if pasta is not None else PASTA_DIMENSOES_PADRAO
+        if not pasta.exists():
+            return {}
+        tabelas = self.carregar(pasta, DIMENSOES_PARTILHADAS.values())
+        return {
+            dimensao: tabelas[Path(arquivo).stem]
+            for dimensao, arquivo in DIMENSOES_PARTILHADAS.items()
+            if Path(arquivo).stem in tabelas
+        }
+
+    def problemas(self, caminho):
+        """Problemas de validação registados para a versão atual do ficheiro"""
+        return self._indice.get(str(Path(caminho).resolve()), {}).get('problemas', [])
+
+    def limpar_memoria(self):
+        """Esquece as tabelas em memória (a cópia em disco é mantida)"""
+        with self._bloqueio:
+            self._memoria.clear()
+
+
+# Armazém partilhado por todos os pipelines do processo
+ARMAZEM_DIMENSOES = ArmazemDimensoes()
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    pasta = Path(sys.argv[1]) if len(sys.argv) > 1 else PASTA_DIMENSOES_PADRAO
+    print(f"pyarrow disponível: {PYARROW_DISPONIVEL} | copy-on-write: {COPY_ON_WRITE}")
+
+    for tentativa in ('primeira leitura', 'segunda leitura'):
+        inicio = time.perf_counter()
+        dims = ARMAZEM_DIMENSOES.dimensoes_base(pasta)
+        print(f"{tentativa}: {len(dims)} dimensões em {time.perf_counter() - inicio:.4f}s")
+
+    for nome, df in dims.items():
+        caminho = localizar_tabela(pasta, DIMENSOES_PARTILHADAS[nome])
+        problemas = ARMAZEM_DIMENSOES.problemas(caminho) or ['ok']
+        print(f"  {nome}: {len(df)} registros, versão {ARMAZEM_DIMENSOES.versao(caminho)[:12]} ({'; '.join(problemas)})")
+
+    if 'Dim_Sexo' in dims:
+        alterada = ARMAZEM_DIMENSOES.dimensoes_base(pasta)['Dim_Sexo']
+        alterada.iloc[0, 0] = -1
+        intacta = ARMAZEM_DIMENSOES.dimensoes_base(pasta)['Dim_Sexo']
+        print(f"Alteração local não chega ao armazém: {intacta.iloc[0, 0] != -1}")
+    print(f"Leituras: {dict(ARMAZEM_DIMENSOES.contagens)}")
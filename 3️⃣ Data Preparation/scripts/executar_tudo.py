@@ -0,0 +1,258 @@
+"""
+============================================================
+EXECUÇÃO COMPLETA NUM ÚNICO PROCESSO
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Substitui o EXECUTAR_TUDO.bat (só Windows, um interpretador
+Python por etapa e dados passados entre etapas por ficheiros):
+
+- Os três pipelines *_CONSOLIDADO correm no mesmo processo
+  (Windows, Linux ou macOS): pandas importado uma vez e as
+  dimensões de DP-01-A lidas uma vez (ARMAZEM_DIMENSOES,
+  dimensoes_conformes.py) e partilhadas em memória
+- Warehouse SQLite, cubos de agregados e índices de desigualdade
+  recebem as tabelas consolidadas em memória, em vez de relerem
+  os ZIPs; só os estágios não executados (não selecionados ou
+  inalterados segundo o manifesto de build) vêm do último ZIP
+- --gravar-no-fim: os pipelines calculam tudo primeiro e os ZIPs,
+  o manifesto de build e as métricas só são gravados no fim
+
+Como no .bat, uma falha em Educação ou Laboral interrompe o
+build; uma falha no AIMA é apenas avisada.
+
+Uso:
+    python executar_tudo.py
+    python executar_tudo.py --completo                     # ignora o manifesto de build
+    python executar_tudo.py --pipelines educacao aima --gravar-no-fim
+    python executar_tudo.py --sem-warehouse
+============================================================
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+PASTA_SCRIPTS = Path(__file__).resolve().parent
+if str(PASTA_SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(PASTA_SCRIPTS))
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+# Nome -> (módulo, orquestrador, estágio do manifesto, obrigatório)
+PIPELINES = {
+    'educacao': ('ETL_EDUCACAO_CONSOLIDADO_v3', 'OrquestradorConsolidacao', 'EDUCACAO', True),
+    'laboral': ('ETL_LABORAL_CONSOLIDADO', 'OrquestradorLaboral', 'LABORAL', True),
+    'aima': ('ETL_AIMA_CONSOLIDADO', 'OrquestradorAIMA', 'AIMA', False),
+}
+
+
+def _titulo(texto):
+    print("\n" + "=" * 72)
+    print(f"  {texto}")
+    print("=" * 72)
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+class ExecutorBuild:
+    """Executa os pipelines selecionados e as etapas finais num único processo"""
+
+    def __init__(self, pipelines=None, gravar_no_fim=False):
+        """
+        Args:
+            pipelines: Nomes de PIPELINES a executar (None = todos, pela ordem de PIPELINES)
+            gravar_no_fim: Adiar ZIPs, manifesto e métricas até todos os pipelines terminarem
+        """
+        pipelines = set(pipelines or PIPELINES)
+        self.pipelines = [nome for nome in PIPELINES if nome in pipelines]
+        self.gravar_no_fim = gravar_no_fim
+        self.orquestradores = {}
+        self.tempos = {}
+        self.falhas = []
+
+    @staticmethod
+    def _modulo(nome):
+        return importlib.import_module(PIPELINES[nome][0])
+
+    def pasta_output(self):
+        """Pasta de saída dos ETL (ConfigAmbiente: scripts/output ou /content/output no Colab)"""
+        return self._modulo(self.pipelines[0]).ConfigAmbiente.get_pasta_output()
+
+    def _executar_pipeline(self, nome):
+        from instrumentacao import INSTRUMENTACAO
+
+        modulo, classe, _, obrigatorio = PIPELINES[nome]
+        _titulo(f"ETL {nome.upper()}")
+        inicio = time.perf_counter()
+        INSTRUMENTACAO.limpar()  # métricas de cada ZIP só com as etapas do seu pipeline
+        try:
+            orquestrador = getattr(self._modulo(nome), classe)()
+            self.orquestradores[nome] = orquestrador
+            sucesso = orquestrador.executar_pipeline_completo(exportar=not self.gravar_no_fim)
+        except Exception as e:
+            print(f"[ERRO] ETL {nome}: {type(e).__name__}: {e}")
+            sucesso = False
+        orquestrador = self.orquestradores.get(nome)
+        if orquestrador is not None:
+            orquestrador.registos_metricas = list(INSTRUMENTACAO.registos)
+        self.tempos[nome] = time.perf_counter() - inicio
+
+        if not sucesso:
+            self.falhas.append(nome)
+            if obrigatorio:
+                print(f"[ERRO] Falha no ETL {nome} - build interrompido")
+                return False
+            print(f"[AVISO] Falha no ETL {nome} (opcional) - build continua")
+        return True
+
+    def _exportar_adiados(self):
+        from instrumentacao import INSTRUMENTACAO
+
+        _titulo("GRAVAÇÃO DOS RESULTADOS")
+        for nome, orquestrador in self.orquestradores.items():
+            if nome in self.falhas:
+                continue
+            INSTRUMENTACAO.limpar()
+            INSTRUMENTACAO.registos.extend(getattr(orquestrador, 'registos_metricas', []))
+            inicio = time.perf_counter()
+            orquestrador.exportar_resultados()
+            self.tempos[nome] += time.perf_counter() - inicio
+
+    def executar(self):
+        """Executa os pipelines; devolve False se um pipeline obrigatório falhou"""
+        for nome in self.pipelines:
+            if not self._executar_pipeline(nome):
+                return False
+        if self.gravar_no_fim:
+            self._exportar_adiados()
+        return True
+
+    # --------------------------------------------------------
+    # Tabelas para as etapas finais
+    # --------------------------------------------------------
+
+    def tabelas_por_estagio(self, pasta_output):
+        """
+        Estágio do manifesto -> (origem, dict tabela -> DataFrame)
+
+        Tabelas dos pipelines executados vêm da memória, com os tipos que teriam
+        se fossem relidas do ZIP; os outros estágios vêm do último ZIP.
+        """
+        from carga_warehouse import ESTAGIOS_ORIGEM, ler_tabelas_zip, localizar_zips_consolidados
+        from formatos_tabela import EsquemaTabelas
+
+        zips = localizar_zips_consolidados(pasta_output)
+        por_estagio = {}
+        for nome, (_, _, estagio, _) in PIPELINES.items():
+            orquestrador = self.orquestradores.get(nome)
+            resultado = getattr(orquestrador, 'resultado', None)
+            if nome not in self.falhas and resultado is not None and orquestrador.zip_path is not None:
+                config = self._modulo(nome).Config
+                tabelas = {**resultado['dimensoes'], **resultado['fatos']}
+                if config.FORMATO_SAIDA == 'csv':
+                    tabelas = {tabela: EsquemaTabelas.como_csv(df) for tabela, df in tabelas.items()}
+                por_estagio[estagio] = (Path(orquestrador.zip_path).name, tabelas)
+            elif estagio in zips:
+                por_estagio[estagio] = (zips[estagio].name, ler_tabelas_zip(zips[estagio]))
+        return {estagio: por_estagio[estagio] for estagio in ESTAGIOS_ORIGEM if estagio in por_estagio}
+
+
+# ============================================================
+# ETAPAS FINAIS (WAREHOUSE, CUBOS, ÍNDICES)
+# ============================================================
+
+def executar_etapas_finais(por_estagio, pasta_output):
+    """Warehouse SQLite, cubos de agregados e índices de desigualdade a partir das tabelas dadas"""
+    from carga_warehouse import NOME_BASE_PADRAO, CarregadorWarehouse
+    from cubo_agregados import NOME_ARQUIVO_CUBOS, ConstrutorCubos, guardar_cubos
+    from indices_desigualdade import NOME_ARQUIVO_INDICES, AnalisadorDesigualdade
+
+    if not por_estagio:
+        print("[AVISO] Nenhuma tabela consolidada - warehouse, cubos e índices ignorados")
+        return False
+
+    _titulo("WAREHOUSE SQLITE (STAR SCHEMA UNIFICADO)")
+    try:
+        carregador = CarregadorWarehouse(Path(pasta_output) / NOME_BASE_PADRAO)
+        for estagio, (origem, tabelas) in por_estagio.items():
+            print(f"{estagio}: {origem}")
+            carregador.adicionar(tabelas, origem)
+        carregador.carregar()
+        print(f"[OK] Warehouse: {carregador.caminho_base}")
+    except Exception as e:
+        print(f"[AVISO] Falha na carga do warehouse SQLite: {e}")
+
+    # Dimensões partilhadas: primeira ocorrência (como tabelas_consolidadas)
+    tabelas = {}
+    for _, tabelas_estagio in por_estagio.values():
+        for nome, df in tabelas_estagio.items():
+            tabelas.setdefault(nome, df)
+
+    try:
+        cubos = ConstrutorCubos(tabelas).construir_todos()
+        caminho = guardar_cubos(cubos, Path(pasta_output) / NOME_ARQUIVO_CUBOS)
+        print(f"[OK] {len(cubos)} cubos gravados em {caminho}")
+    except Exception as e:
+        print(f"[AVISO] Falha na materialização dos cubos de agregados: {e}")
+        return False
+
+    try:
+        indices = AnalisadorDesigualdade(cubos).calcular_todos()
+        destino = Path(pasta_output) / NOME_ARQUIVO_INDICES
+        indices.to_csv(destino, index=False, encoding='utf-8-sig')
+        print(f"[OK] {len(indices):,} índices gravados em {destino}")
+    except Exception as e:
+        print(f"[AVISO] Falha no cálculo dos índices de desigualdade: {e}")
+    return True
+
+
+# ============================================================
+# LINHA DE COMANDO
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build completo (Educação + Laboral + AIMA) num único processo')
+    parser.add_argument('--pipelines', nargs='+', choices=list(PIPELINES), default=list(PIPELINES),
+                        help='Pipelines a executar (padrão: todos)')
+    parser.add_argument('--gravar-no-fim', action='store_true',
+                        help='Grava ZIPs, manifesto e métricas só depois de todos os pipelines')
+    parser.add_argument('--completo', action='store_true',
+                        help='Reconstrói tudo, ignorando o manifesto de build (ETL_REBUILD_COMPLETO=1)')
+    parser.add_argument('--sem-warehouse', action='store_true',
+                        help='Não gera warehouse SQLite, cubos nem índices')
+    args = parser.parse_args(argv)
+
+    # Lido por Config.REBUILD_COMPLETO quando cada ETL é importado
+    if args.completo:
+        os.environ['ETL_REBUILD_COMPLETO'] = '1'
+
+    _titulo(f"PIPELINE ETL COMPLETO - {' + '.join(p.upper() for p in args.pipelines)}")
+    inicio = time.perf_counter()
+
+    executor = ExecutorBuild(args.pipelines, args.gravar_no_fim)
+    if not executor.executar():
+        return 1
+
+    pasta_output = executor.pasta_output()
+    if not args.sem_warehouse:
+        executar_etapas_finais(executor.tabelas_por_estagio(pasta_output), pasta_output)
+
+    _titulo("PIPELINE COMPLETO FINALIZADO")
+    for nome, segundos in executor.tempos.items():
+        estado = 'FALHOU' if nome in executor.falhas else 'OK'
+        print(f"  {nome:<10} {estado:<7} {segundos:8.1f}s")
+    print(f"  {'total':<10} {'':<7} {time.perf_counter() - inicio:8.1f}s")
+    print(f"\n[OK] Resultados em: {pasta_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
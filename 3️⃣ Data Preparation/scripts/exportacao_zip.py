@@ -0,0 +1,408 @@
+"""
+============================================================
+EXPORTAÇÃO EM ZIP POR STREAMING
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Grava o Star Schema num ZIP diretamente em disco:
+
+- Cada tabela é serializada (CSV, Parquet ou Feather, via
+  EscritorTabelas.gravar) e comprimida (deflate bruto, zlib) para
+  um ficheiro temporário: nenhuma tabela serializada nem o ZIP
+  inteiro ficam em memória
+- Os membros são comprimidos em paralelo num pool de threads (o
+  zlib liberta o GIL) e copiados por blocos para o ZIP, já
+  comprimidos, pela ordem em que foram adicionados
+- Cabeçalhos, diretório central e ZIP64 (membros acima de
+  zipfile.ZIP64_LIMIT) são escritos por _EscritorZip com struct:
+  o zipfile não aceita membros já comprimidos
+- MANIFESTO_CHECKSUMS.json no próprio ZIP: linhas, bytes, CRC-32
+  e SHA-256 de cada membro (verificável com verificar_zip)
+
+A memória fica limitada aos blocos em trânsito, qualquer que
+seja o tamanho do Star Schema.
+
+Exemplo:
+    with ExportadorZip(caminho_zip, EscritorTabelas('csv'), logger=logger) as exportador:
+        for nome_tabela, df in tabelas.items():
+            exportador.adicionar_tabela(nome_tabela, df)
+        exportador.adicionar_texto('README.txt', readme)
+    print(exportador.manifesto['membros'])
+============================================================
+"""
+
+import hashlib
+import io
+import json
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from agendador_dag import workers_padrao
+from formatos_tabela import EscritorTabelas
+
+
+NOME_MANIFESTO = 'MANIFESTO_CHECKSUMS.json'
+
+TAMANHO_BLOCO_COPIA = 1024 * 1024
+
+LIMITE_ZIP64 = zipfile.ZIP64_LIMIT
+
+
+# ============================================================
+# FLUXO COMPRIMIDO COM CHECKSUM
+# ============================================================
+
+class _FluxoDeflate(io.RawIOBase):
+    """
+    Ficheiro binário só de escrita que comprime os dados (deflate bruto,
+    como nos membros ZIP) para um destino, calculando SHA-256, CRC-32 e
+    tamanho do conteúdo original
+    """
+
+    def __init__(self, destino, nivel_compressao):
+        super().__init__()
+        self.destino = destino
+        self._compressor = zlib.compressobj(nivel_compressao, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._sha = hashlib.sha256()
+        self.crc32 = 0
+        self.tamanho = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._sha.update(dados)
+        self.crc32 = zlib.crc32(dados, self.crc32)
+        tamanho = memoryview(dados).nbytes
+        self.tamanho += tamanho
+        self.destino.write(self._compressor.compress(dados))
+        return tamanho
+
+    def tell(self):
+        return self.tamanho
+
+    def terminar(self):
+        """Esvazia o compressor e devolve o SHA-256 do conteúdo escrito"""
+        self.destino.write(self._compressor.flush())
+        return self._sha.hexdigest()
+
+
+# ============================================================
+# ESCRITA DO FORMATO ZIP
+# ============================================================
+
+class _EscritorZip:
+    """
+    Escreve membros já comprimidos (deflate) num ficheiro ZIP: cabeçalho
+    local, dados, diretório central e fim de diretório, com campos ZIP64
+    quando um tamanho, offset ou o número de membros o exigem
+    """
+
+    VERSAO = 20
+    VERSAO_ZIP64 = 45
+    SISTEMA_UNIX = 3
+    FLAG_UTF8 = 0x800
+    MAXIMO_32 = 0xFFFFFFFF
+    MAXIMO_16 = 0xFFFF
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self._centrais = []
+        agora = time.localtime()
+        self._hora_dos = (agora.tm_hour << 11) | (agora.tm_min << 5) | (agora.tm_sec // 2)
+        self._data_dos = ((agora.tm_year - 1980) << 9) | (agora.tm_mon << 5) | agora.tm_mday
+
+    @classmethod
+    def _nome(cls, nome_arquivo):
+        try:
+            return nome_arquivo.encode('ascii'), 0
+        except UnicodeEncodeError:
+            return nome_arquivo.encode('utf-8'), cls.FLAG_UTF8
+
+    def anexar(self, nome_arquivo, crc32, tamanho, tamanho_comprimido, origem):
+        """Escreve um membro, copiando por blocos os dados comprimidos de origem"""
+        nome, flags = self._nome(nome_arquivo)
+        offset = self.arquivo.tell()
+
+        zip64_local = tamanho > LIMITE_ZIP64 or tamanho_comprimido > LIMITE_ZIP64
+        if zip64_local:
+            extra = struct.pack('<HHQQ', 0x0001, 16, tamanho, tamanho_comprimido)
+            tamanhos = (self.MAXIMO_32, self.MAXIMO_32)
+        else:
+            extra = b''
+            tamanhos = (tamanho_comprimido, tamanho)
+        self.arquivo.write(struct.pack(
+            '<4s5H3L2H', b'PK\x03\x04',
+            self.VERSAO_ZIP64 if zip64_local else self.VERSAO, flags, zipfile.ZIP_DEFLATED,
+            self._hora_dos, self._data_dos, crc32, *tamanhos, len(nome), len(extra)
+        ))
+        self.arquivo.write(nome)
+        self.arquivo.write(extra)
+        shutil.copyfileobj(origem, self.arquivo, TAMANHO_BLOCO_COPIA)
+
+        self._centrais.append((nome, flags, crc32, tamanho, tamanho_comprimido, offset))
+
+    def _cabecalho_central(self, nome, flags, crc32, tamanho, tamanho_comprimido, offset):
+        # na ZIP64 os campos de 32 bits que não cabem vão para o extra, por esta ordem
+        valores = (tamanho, tamanho_comprimido, offset)
+        grandes = [valor for valor in valores if valor > LIMITE_ZIP64]
+        extra = struct.pack(f'<HH{len(grandes)}Q', 0x0001, 8 * len(grandes), *grandes) if grandes else b''
+        tamanho, tamanho_comprimido, offset = (
+            self.MAXIMO_32 if valor > LIMITE_ZIP64 else valor for valor in valores
+        )
+        versao = self.VERSAO_ZIP64 if grandes else self.VERSAO
+        return struct.pack(
+            '<4s6H3L5H2L', b'PK\x01\x02',
+            (self.SISTEMA_UNIX << 8) | versao, versao, flags, zipfile.ZIP_DEFLATED,
+            self._hora_dos, self._data_dos, crc32, tamanho_comprimido, tamanho,
+            len(nome), len(extra), 0, 0, 0, 0o600 << 16, offset
+        ) + nome + extra
+
+    def terminar(self):
+        """Escreve o diretório central e o registo de fim (ZIP64 se preciso)"""
+        inicio_central = self.arquivo.tell()
+        for entrada in self._centrais:
+            self.arquivo.write(self._cabecalho_central(*entrada))
+        tamanho_central = self.arquivo.tell() - inicio_central
+        total = len(self._centrais)
+
+        if total >= self.MAXIMO_16 or inicio_central > LIMITE_ZIP64 or tamanho_central > LIMITE_ZIP64:
+            inicio_zip64 = self.arquivo.tell()
+            self.arquivo.write(struct.pack(
+                '<4sQ2H2L4Q', b'PK\x06\x06', 44, (self.SISTEMA_UNIX << 8) | self.VERSAO_ZIP64,
+                self.VERSAO_ZIP64, 0, 0, total, total, tamanho_central, inicio_central
+            ))
+            self.arquivo.write(struct.pack('<4sLQL', b'PK\x06\x07', 0, inicio_zip64, 1))
+        self.arquivo.write(struct.pack(
+            '<4s4H2LH', b'PK\x05\x06', 0, 0,
+            min(total, self.MAXIMO_16), min(total, self.MAXIMO_16),
+            min(tamanho_central, self.MAXIMO_32), min(inicio_central, self.MAXIMO_32), 0
+        ))
+
+
+# ============================================================
+# EXPORTADOR
+# ============================================================
+
+class ExportadorZip:
+    """Escreve tabelas num ZIP em disco, comprimindo os membros em paralelo"""
+
+    def __init__(self, caminho_zip, escritor=None, workers=None, logger=None,
+                 nivel_compressao=zlib.Z_DEFAULT_COMPRESSION):
+        """
+        Args:
+            caminho_zip: Ficheiro ZIP a criar (a pasta é criada se preciso)
+            escritor: EscritorTabelas do formato das tabelas (padrão: CSV)
+            workers: Threads de serialização e compressão (padrão: workers_padrao())
+            logger: Logger opcional; com medir() cada tabela vira a etapa exportar_<tabela>
+            nivel_compressao: Nível zlib dos membros (padrão igual ao de zipfile.ZIP_DEFLATED)
+        """
+        self.caminho_zip = Path(caminho_zip)
+        self.escritor = escritor or EscritorTabelas('csv')
+        self.workers = workers or workers_padrao()
+        self.logger = logger
+        self.nivel_compressao = nivel_compressao
+        self.manifesto = None
+
+        self.caminho_zip.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='zip')
+        self._pendentes = []   # (nome_arquivo, futuro) pela ordem de adição
+        self._nomes = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        if tipo is None:
+            self.fechar()
+        else:
+            self.cancelar()
+        return False
+
+    # --------------------------------------------------------
+    # Adição de membros
+    # --------------------------------------------------------
+
+    def _submeter(self, nome_arquivo, escrever, linhas=None, colunas=None, etapa=None):
+        if nome_arquivo in self._nomes:
+            raise ValueError(f"Membro duplicado no ZIP: {nome_arquivo}")
+        self._nomes.add(nome_arquivo)
+        futuro = self._pool.submit(self._serializar, nome_arquivo, escrever, linhas, colunas, etapa)
+        self._pendentes.append((nome_arquivo, futuro))
+        return nome_arquivo
+
+    def adicionar_tabela(self, nome_tabela, df, nome_arquivo=None, **opcoes_csv):
+        """
+        Agenda a serialização de uma tabela
+
+        Returns:
+            Nome do membro no ZIP (ex: Dim_Sexo.csv)
+        """
+        nome_arquivo = nome_arquivo or self.escritor.nome_arquivo(nome_tabela)
+        return self._submeter(
+            nome_arquivo,
+            lambda destino: self.escritor.gravar(df, nome_tabela, destino, **opcoes_csv),
+            linhas=len(df), colunas=len(df.columns), etapa=f'exportar_{nome_tabela}'
+        )
+
+    def adicionar_texto(self, nome_arquivo, texto, encoding='utf-8'):
+        """Agenda um membro de texto (README, metadados)"""
+        return self.adicionar_bytes(nome_arquivo, texto.encode(encoding))
+
+    def adicionar_bytes(self, nome_arquivo, dados):
+        """Agenda um membro com conteúdo já em bytes"""
+        return self._submeter(nome_arquivo, lambda destino: destino.write(dados))
+
+    def _serializar(self, nome_arquivo, escrever, linhas=None, colunas=None, etapa=None):
+        """Worker: serializa e comprime para um temporário (corre no pool)"""
+        medir = getattr(self.logger, 'medir', None) if etapa else None
+        temporario = tempfile.TemporaryFile(dir=self.caminho_zip.parent)
+        try:
+            fluxo = _FluxoDeflate(temporario, self.nivel_compressao)
+            if medir is not None:
+                with medir(etapa, linhas):
+                    escrever(fluxo)
+            else:
+                escrever(fluxo)
+            sha256 = fluxo.terminar()
+        except BaseException:
+            temporario.close()
+            raise
+
+        registro = {
+            'arquivo': nome_arquivo,
+            'linhas': linhas,
+            'colunas': colunas,
+            'bytes': fluxo.tamanho,
+            'bytes_comprimidos': temporario.tell(),
+            'crc32': f'{fluxo.crc32:08x}',
+            'sha256': sha256,
+        }
+        temporario.seek(0)
+        return registro, temporario
+
+    # --------------------------------------------------------
+    # Escrita do ZIP
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _anexar_membro(escritor_zip, registro, origem):
+        """Copia um membro já comprimido para o ZIP"""
+        escritor_zip.anexar(registro['arquivo'], int(registro['crc32'], 16), registro['bytes'],
+                            registro['bytes_comprimidos'], origem)
+
+    def fechar(self):
+        """
+        Espera pelos membros, escreve-os pela ordem de adição e grava
+        o manifesto de checksums
+
+        Returns:
+            dict do manifesto (também em self.manifesto)
+        """
+        membros = []
+        try:
+            with open(self.caminho_zip, 'wb') as arquivo:
+                escritor_zip = _EscritorZip(arquivo)
+                for _, futuro in self._pendentes:
+                    registro, temporario = futuro.result()
+                    with temporario:
+                        self._anexar_membro(escritor_zip, registro, temporario)
+                    membros.append(registro)
+
+                self.manifesto = {
+                    'arquivo_zip': self.caminho_zip.name,
+                    'gerado_em': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'algoritmo': 'sha256',
+                    'formato_tabelas': self.escritor.formato,
+                    'membros': membros,
+                }
+                conteudo = json.dumps(self.manifesto, indent=2, ensure_ascii=False).encode('utf-8')
+                registro, temporario = self._serializar(NOME_MANIFESTO, lambda destino: destino.write(conteudo))
+                with temporario:
+                    self._anexar_membro(escritor_zip, registro, temporario)
+                escritor_zip.terminar()
+        except BaseException:
+            self.cancelar()
+            raise
+        finally:
+            self._pool.shutdown(wait=True)
+
+        return self.manifesto
+
+    def cancelar(self):
+        """Descarta os membros pendentes e o ZIP parcial"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for _, futuro in self._pendentes:
+            if not futuro.cancelled() and futuro.exception() is None:
+                futuro.result()[1].close()
+        self._pendentes = []
+        if self.caminho_zip.exists():
+            self.caminho_zip.unlink()
+
+    @property
+    def bytes_totais(self):
+        """Tamanho do ZIP gravado (0 antes de fechar)"""
+        return self.caminho_zip.stat().st_size if self.manifesto is not None else 0
+
+
+# ============================================================
+# VERIFICAÇÃO
+# ============================================================
+
+def verificar_zip(caminho_zip):
+    """
+    Confere cada membro do ZIP com o manifesto (SHA-256 e tamanho)
+
+    Returns:
+        Lista de membros com problemas (vazia se tudo confere)
+    """
+    problemas = []
+    with zipfile.ZipFile(caminho_zip) as zip_file:
+        manifesto = json.loads(zip_file.read(NOME_MANIFESTO))
+        for membro in manifesto['membros']:
+            sha = hashlib.sha256()
+            tamanho = 0
+            with zip_file.open(membro['arquivo']) as origem:
+                for bloco in iter(lambda: origem.read(TAMANHO_BLOCO_COPIA), b''):
+                    sha.update(bloco)
+                    tamanho += len(bloco)
+            if sha.hexdigest() != membro['sha256'] or tamanho != membro['bytes']:
+                problemas.append(membro['arquivo'])
+    return problemas
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import numpy as np
+    import pandas as pd
+
+    n = 200_000
+    tabelas = {
+        'Dim_Nacionalidade': pd.DataFrame({'nacionalidade_id': [1, 2], 'nome_nacionalidade': ['Brasil', 'Ucrânia']}),
+        'Fact_Teste': pd.DataFrame({'id': np.arange(n), 'valor': np.arange(n) % 97, 'nacionalidade_id': np.arange(n) % 2 + 1}),
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = Path(pasta) / 'teste.zip'
+        with ExportadorZip(caminho) as exportador:
+            for nome, df in tabelas.items():
+                exportador.adicionar_tabela(nome, df)
+            exportador.adicionar_texto('README.txt', 'Teste de exportação\n')
+
+        for membro in exportador.manifesto['membros']:
+            print(f"{membro['arquivo']:<24} {membro['bytes']:>10} -> {membro['bytes_comprimidos']:>9} bytes")
+        print(f"ZIP: {exportador.bytes_totais} bytes, problemas: {verificar_zip(caminho)}")
+
+        with zipfile.ZipFile(caminho) as zip_file:
+            print(f"testzip: {zip_file.testzip()}")
+            relido = pd.read_csv(zip_file.open('Fact_Teste.csv'))
+            print(f"Fact_Teste relido: {relido.equals(tabelas['Fact_Teste'])}")
@@ -0,0 +1,379 @@
+"""
+============================================================
+FONTES DE DADOS DE ENTRADA (PASTA / ZIP / GOOGLE COLAB)
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Abstração única para obter os ficheiros de entrada, em vez de
+chamar google.colab.files.upload() ficheiro a ficheiro:
+- FonteDiretorio: pasta local (com filtro glob, recursiva)
+- FonteZip: arquivo .zip com os CSVs
+- FonteColab: upload interativo (apenas no Google Colab)
+- FonteMemoria: dict nome -> bytes (testes, uploads já feitos)
+
+Os ficheiros são lidos em paralelo num pool de threads
+(carregar_em_paralelo). Sem google.colab os módulos continuam
+importáveis e a execução é headless.
+
+Seleção da fonte (criar_fonte):
+    ETL_FONTE_DADOS=/caminho/pasta | /caminho/dados.zip | colab
+    Sem valor: Colab se disponível, senão a pasta atual
+============================================================
+"""
+
+import fnmatch
+import io
+import os
+import re
+import threading
+import unicodedata
+import zipfile
+from pathlib import Path
+import pandas as pd
+
+from agendador_dag import AgendadorDAG
+from registro_log import registrar_log
+
+try:
+    from google.colab import files as _colab_files
+    COLAB_DISPONIVEL = True
+except ImportError:
+    _colab_files = None
+    COLAB_DISPONIVEL = False
+
+
+# Sufixo que o Colab acrescenta a ficheiros repetidos: 'Q3.1 (1).csv'
+_SUFIXO_COLAB = re.compile(r'\s\(\d+\)(?=\.[^.]+$)')
+
+
+def _normalizar_nome(nome):
+    """Nome base, em minúsculas, em NFC (nomes NFD do macOS) e sem o sufixo ' (n)' do Colab"""
+    return _SUFIXO_COLAB.sub('', unicodedata.normalize('NFC', Path(str(nome)).name)).lower()
+
+
+# ============================================================
+# FONTE BASE
+# ============================================================
+
+class FonteDados:
+    """Interface comum: listar nomes e ler bytes de cada ficheiro"""
+
+    descricao = "fonte"
+
+    def listar(self):
+        """Nomes (relativos) de todos os ficheiros disponíveis"""
+        raise NotImplementedError
+
+    def ler_bytes(self, nome):
+        """Conteúdo de um ficheiro listado"""
+        raise NotImplementedError
+
+    def filtrar(self, padrao):
+        """Nomes cujo nome base corresponde ao padrão glob (sem distinguir maiúsculas)"""
+        padrao = padrao.lower()
+        return [nome for nome in self.listar()
+                if fnmatch.fnmatch(Path(nome).name.lower(), padrao)
+                or fnmatch.fnmatch(_normalizar_nome(nome), padrao)]
+
+    def localizar(self, nome):
+        """
+        Procura um ficheiro pelo nome esperado
+
+        Aceita o caminho relativo exato, o nome base, a variante do Colab
+        ('Q3.1 (1).csv'), o nome sem extensão ou um padrão glob.
+
+        Returns:
+            Nome listado ou None
+        """
+        nomes = self.listar()
+        if nome in nomes:
+            return nome
+
+        alvo = _normalizar_nome(nome)
+        for candidato in nomes:
+            if _normalizar_nome(candidato) == alvo:
+                return candidato
+
+        for candidato in nomes:
+            if Path(_normalizar_nome(candidato)).stem == alvo:
+                return candidato
+
+        if any(c in nome for c in '*?['):
+            encontrados = self.filtrar(nome)
+            if encontrados:
+                return encontrados[0]
+        return None
+
+    def ler_texto(self, nome, encoding='utf-8'):
+        return self.ler_bytes(nome).decode(encoding)
+
+    def ler_csv(self, nome, **opcoes_csv):
+        """Lê um ficheiro da fonte com pandas.read_csv"""
+        return pd.read_csv(io.BytesIO(self.ler_bytes(nome)), **opcoes_csv)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.descricao})"
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class FonteDiretorio(FonteDados):
+    """Ficheiros de uma pasta local"""
+
+    def __init__(self, pasta='.', padrao='*', recursivo=True):
+        """
+        Args:
+            pasta: Pasta com os ficheiros de entrada
+            padrao: Filtro glob aplicado ao nome (ex: '*.csv')
+            recursivo: Inclui subpastas (nomes relativos com '/')
+        """
+        self.pasta = Path(pasta)
+        self.padrao = padrao
+        self.recursivo = recursivo
+        self.descricao = str(self.pasta)
+        if not self.pasta.is_dir():
+            raise FileNotFoundError(f"Pasta de dados não encontrada: {self.pasta}")
+
+    def listar(self):
+        caminhos = self.pasta.rglob(self.padrao) if self.recursivo else self.pasta.glob(self.padrao)
+        return sorted(c.relative_to(self.pasta).as_posix() for c in caminhos if c.is_file())
+
+    def ler_bytes(self, nome):
+        return (self.pasta / nome).read_bytes()
+
+    def caminho(self, nome):
+        """Caminho em disco (útil para leitores que aceitam ficheiros)"""
+        return self.pasta / nome
+
+
+class FonteZip(FonteDados):
+    """Ficheiros dentro de um arquivo .zip"""
+
+    def __init__(self, caminho_zip, padrao='*'):
+        self.caminho_zip = Path(caminho_zip)
+        self.padrao = padrao
+        self.descricao = str(self.caminho_zip)
+        if not zipfile.is_zipfile(self.caminho_zip):
+            raise FileNotFoundError(f"Arquivo ZIP inválido ou inexistente: {self.caminho_zip}")
+        with zipfile.ZipFile(self.caminho_zip) as arquivo:
+            # Nome legível -> nome do membro no ZIP
+            self._membros = dict(sorted(
+                (self._nome_legivel(info), info.filename) for info in arquivo.infolist()
+                if not info.is_dir() and fnmatch.fnmatch(Path(self._nome_legivel(info)).name, padrao)
+            ))
+
+    @staticmethod
+    def _nome_legivel(info):
+        """
+        Nome em UTF-8 mesmo sem a flag UTF-8 no ZIP (o zipfile lê-o como
+        cp437: 'França.csv' zipado no Linux/macOS aparece como 'Franç├º...')
+        """
+        if info.flag_bits & 0x800:
+            return info.filename
+        try:
+            return info.filename.encode('cp437').decode('utf-8')
+        except UnicodeError:
+            return info.filename
+
+    def listar(self):
+        return list(self._membros)
+
+    def ler_bytes(self, nome):
+        # Um ZipFile por leitura: seguro para leituras em threads diferentes
+        with zipfile.ZipFile(self.caminho_zip) as arquivo:
+            return arquivo.read(self._membros.get(nome, nome))
+
+
+class FonteMemoria(FonteDados):
+    """Ficheiros já em memória (dict nome -> bytes)"""
+
+    def __init__(self, arquivos=None, descricao="memória"):
+        self.arquivos = dict(arquivos or {})
+        self.descricao = descricao
+        self._lock = threading.Lock()
+
+    def adicionar(self, arquivos):
+        with self._lock:
+            self.arquivos.update(arquivos)
+
+    def listar(self):
+        with self._lock:
+            return list(self.arquivos)
+
+    def ler_bytes(self, nome):
+        conteudo = self.arquivos[nome]
+        return conteudo.encode('utf-8') if isinstance(conteudo, str) else conteudo
+
+
+class FonteColab(FonteMemoria):
+    """
+    Upload interativo do Google Colab
+
+    O primeiro pedido abre um único diálogo de upload (podem ser
+    selecionados vários ficheiros); só volta a pedir se um ficheiro
+    esperado não tiver sido enviado.
+    """
+
+    def __init__(self, mensagem=None):
+        if not COLAB_DISPONIVEL:
+            raise RuntimeError("google.colab não disponível: use FonteDiretorio ou FonteZip")
+        super().__init__(descricao="upload Google Colab")
+        self.mensagem = mensagem
+        self._solicitado = False
+
+    def solicitar(self, mensagem=None):
+        """Abre o diálogo de upload e acrescenta os ficheiros enviados"""
+        mensagem = mensagem or self.mensagem
+        if mensagem:
+            print(f"\n👉 {mensagem}")
+            print("-" * 60)
+        self._solicitado = True
+        enviados = _colab_files.upload() or {}
+        self.adicionar(enviados)
+        return list(enviados)
+
+    def listar(self):
+        if not self._solicitado:
+            self.solicitar()
+        return super().listar()
+
+    def localizar(self, nome):
+        encontrado = super().localizar(nome)
+        if encontrado is None:
+            self.solicitar(f"Por favor, faça upload do arquivo: {nome}")
+            encontrado = super().localizar(nome)
+        return encontrado
+
+    def filtrar(self, padrao):
+        encontrados = super().filtrar(padrao)
+        if not encontrados:
+            self.solicitar(f"Por favor, faça upload dos arquivos: {padrao}")
+            encontrados = super().filtrar(padrao)
+        return encontrados
+
+
+def criar_fonte(origem=None, padrao='*'):
+    """
+    Cria a fonte de dados a partir de um caminho ou do ambiente
+
+    Args:
+        origem: FonteDados, pasta, ficheiro .zip, 'colab' ou None
+                (None = ETL_FONTE_DADOS; sem ela, Colab se disponível,
+                senão a pasta atual)
+        padrao: Filtro glob para pastas e ZIPs
+
+    Returns:
+        FonteDados
+    """
+    if isinstance(origem, FonteDados):
+        return origem
+
+    origem = origem or os.environ.get('ETL_FONTE_DADOS')
+    if origem is None:
+        return FonteColab() if COLAB_DISPONIVEL else FonteDiretorio('.', padrao)
+
+    if str(origem).lower() == 'colab':
+        return FonteColab()
+
+    caminho = Path(origem)
+    if caminho.suffix.lower() == '.zip':
+        return FonteZip(caminho, padrao)
+    return FonteDiretorio(caminho, padrao)
+
+
+# ============================================================
+# CARREGAMENTO EM PARALELO
+# ============================================================
+
+def carregar_em_paralelo(fonte, pedidos, leitor=None, workers=None, logger=None):
+    """
+    Lê vários ficheiros da fonte em paralelo (pool de threads)
+
+    Os nomes são resolvidos primeiro, em série (no Colab isto pode abrir
+    o diálogo de upload); a leitura e o parsing correm depois em paralelo.
+
+    Args:
+        fonte: FonteDados
+        pedidos: dict chave -> nome esperado (ou padrão glob), ou lista de nomes
+        leitor: callable(fonte, nome) -> objeto (padrão: fonte.ler_csv(nome))
+        workers: Threads em paralelo (None = workers_padrao())
+        logger: Logger opcional
+
+    Returns:
+        dict chave -> (nome encontrado, objeto lido), na ordem dos pedidos.
+        Ficheiros em falta ou com erro de leitura são omitidos (e registados
+        no logger)
+    """
+    if not isinstance(pedidos, dict):
+        pedidos = {nome: nome for nome in pedidos}
+    leitor = leitor or (lambda f, nome: f.ler_csv(nome))
+
+    encontrados = {}
+    for chave, nome in pedidos.items():
+        nome_real = fonte.localizar(nome)
+        if nome_real is None:
+            registrar_log(logger, 'aviso', f"Arquivo não encontrado em {fonte.descricao}: {nome}")
+        else:
+            encontrados[chave] = nome_real
+
+    def ler(nome_real):
+        try:
+            return leitor(fonte, nome_real)
+        except Exception as e:
+            registrar_log(logger, 'erro', f"Erro ao ler {nome_real}: {e}")
+            return None
+
+    dag = AgendadorDAG(workers, logger=logger, nome="Leitura de ficheiros")
+    for chave, nome_real in encontrados.items():
+        dag.adicionar(chave, ler, nome_real)
+    lidos = dag.executar() if encontrados else {}
+    if len(encontrados) > 1:
+        dag.relatorio_tempos()
+
+    return {chave: (encontrados[chave], objeto) for chave, objeto in lidos.items() if objeto is not None}
+
+
+# ============================================================
+# ENTREGA DOS FICHEIROS GERADOS
+# ============================================================
+
+def entregar_arquivo(caminho, logger=None):
+    """
+    Disponibiliza um ficheiro gerado: download no Colab, caminho local
+    fora dele (execução headless)
+    """
+    caminho = Path(caminho)
+    if COLAB_DISPONIVEL:
+        _colab_files.download(str(caminho))
+        registrar_log(logger, 'sucesso', f"Download iniciado: {caminho.name}")
+    else:
+        registrar_log(logger, 'info', f"Arquivo disponível em: {caminho.resolve()}")
+    return caminho
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for ano in (2020, 2021, 2022):
+            pd.DataFrame({'ano': [ano], 'total': [ano * 10]}).to_csv(
+                Path(pasta) / f"RIFA{ano} - concessao-titulos-residencia.csv", index=False
+            )
+        with zipfile.ZipFile(Path(pasta) / 'dados.zip', 'w') as arquivo:
+            for csv in sorted(Path(pasta).glob('*.csv')):
+                arquivo.write(csv, f"aima/{csv.name}")
+
+        for fonte in (criar_fonte(pasta, '*.csv'), criar_fonte(Path(pasta) / 'dados.zip')):
+            print(f"{fonte}: {fonte.listar()}")
+            lidos = carregar_em_paralelo(fonte, fonte.filtrar('RIFA*'), workers=3)
+            print(f"  Lidos: {[(nome, len(df)) for nome, df in lidos.values()]}")
+            print(f"  Localizar 'RIFA2021 - concessao-titulos-residencia (1).csv': "
+                  f"{fonte.localizar('RIFA2021 - concessao-titulos-residencia (1).csv')}")
+
+    print(f"\nColab disponível: {COLAB_DISPONIVEL}")
+    print("\n✓ Módulo fontes_dados.py carregado com sucesso!")
@@ -0,0 +1,749 @@
+"""
+============================================================
+FORMATOS DE SAÍDA DAS TABELAS (CSV / PARQUET / FEATHER)
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Escrita e leitura das tabelas do Star Schema em:
+- CSV (padrão, sem dependências extra)
+- Parquet (compressão snappy ou zstd)
+- Arrow IPC / Feather (compressão zstd ou lz4)
+
+Os formatos binários preservam os tipos das colunas (FKs int32,
+nomes categóricos), evitando re-inferir tipos a cada leitura entre
+os pipelines Educação -> Laboral -> AIMA.
+
+O mesmo esquema (EsquemaTabelas) é aplicado em memória quando cada
+tabela é criada, via RegistroTabelas (dict de tabelas tipado).
+BufferRegistros acumula registros e materializa cada tabela uma
+única vez (TabelaBase.adicionar_registros / finalizar).
+
+Dependência opcional: pyarrow. Sem pyarrow, a escrita volta para
+CSV e a leitura ignora os ficheiros binários.
+============================================================
+"""
+
+import io
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from registro_log import registrar_log
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+
+# ============================================================
+# FORMATOS SUPORTADOS
+# ============================================================
+
+FORMATOS_SAIDA = {
+    'csv': {'extensao': '.csv', 'binario': False, 'compressao_padrao': None},
+    'parquet': {'extensao': '.parquet', 'binario': True, 'compressao_padrao': 'snappy'},
+    'feather': {'extensao': '.feather', 'binario': True, 'compressao_padrao': 'zstd'},
+}
+
+COMPRESSOES_SUPORTADAS = {
+    'parquet': ('snappy', 'zstd', 'gzip', 'none'),
+    'feather': ('zstd', 'lz4', 'uncompressed'),
+}
+
+# Ordem de preferência na leitura: binários primeiro, CSV por último
+ORDEM_LEITURA = ['parquet', 'feather', 'csv']
+
+
+def nome_sem_extensao(nome):
+    """'Dim_Sexo.csv' -> 'Dim_Sexo' (mantém nomes sem extensão conhecida)"""
+    nome = str(nome)
+    for info in FORMATOS_SAIDA.values():
+        if nome.lower().endswith(info['extensao']):
+            return nome[:-len(info['extensao'])]
+    return nome
+
+
+# ============================================================
+# ESQUEMA DE TIPOS POR TABELA
+# ============================================================
+
+class EsquemaTabelas:
+    """Tipos compactos das colunas, declarados por tabela"""
+
+    # Tipos por nome de coluna, partilhados por todas as tabelas
+    # (IDs e FKs, contagens, anos, nomes repetidos)
+    TIPOS_COLUNAS = {
+        # Chaves partilhadas
+        'nacionalidade_id': 'int32',
+        'nacionalidade_aima_id': 'int32',
+        'localidade_id': 'int32',
+        'populacao_id': 'int16',
+        'sexo_id': 'int8',
+        'grupoetario_id': 'int16',
+        'nivel_educacao_id': 'int16',
+        'condicao_id': 'int8',
+        'grupo_prof_id': 'int8',
+        'prof_digito1_id': 'int8',
+        'setor_id': 'int16',
+        'situacao_id': 'int8',
+        'fonte_id': 'int8',
+        'nuts_id': 'int16',
+        'ano_id': 'int16',
+        'tipo_id': 'int8',
+        'despacho_id': 'int16',
+        'motivo_id': 'int16',
+        # Tempo e tipo de relatório
+        'ano': 'int16',
+        'ano_referencia': 'int16',
+        'ano_inicio': 'int16',
+        'tipo_relatorio': 'int8',
+        'fonte': 'category',
+        # Contagens
+        'quantidade': 'int32',
+        'quantidade_homens': 'int32',
+        'quantidade_mulheres': 'int32',
+        'quantidade_hm': 'int32',
+        'quantidade_h': 'int32',
+        'quantidade_m': 'int32',
+        'homens': 'int32',
+        'mulheres': 'int32',
+        'total': 'int32',
+        'total_homens_mulheres': 'int32',
+        'populacao_total': 'int32',
+        # Percentagens e taxas
+        'percentual': 'float32',
+        'variacao_percentual': 'float32',
+        'variacao_percent': 'float32',
+        'taxa_crescimento': 'float32',
+        # Texto repetido (nomes, categorias, valores brutos)
+        'descricao': 'category',
+        'categoria': 'category',
+        'faixa_etaria': 'category',
+        'nacionalidade_aima_raw': 'category',
+        'sexo_raw': 'category',
+        'grupo_etario_raw': 'category',
+        'motivo_raw': 'category',
+        'codigo_despacho': 'category',
+    }
+
+    # Declarações por tabela (nome sem prefixo Dim_/Fact_/DP-01-B_);
+    # prevalecem sobre TIPOS_COLUNAS
+    TIPOS_POR_TABELA = {
+        # --- Educação: dimensões ---
+        'PopulacaoResidente': {'total_populacao': 'int32'},
+        'Nacionalidade': {
+            'nome_nacionalidade': 'category',
+            'codigo_pais': 'category',
+            'continente': 'category',
+        },
+        'Sexo': {'tipo_sexo': 'category'},
+        'GrupoEtario': {},
+        'Localidade': {
+            'nome_localidade': 'category',
+            'nivel_administrativo': 'category',
+            'codigo_regiao': 'category',
+        },
+        'NivelEducacao': {'nome_nivel': 'category', 'ordem_hierarquica': 'int8'},
+        'MapeamentoNacionalidades': {
+            'nacionalidade_educacao_id': 'int32',
+            'nome_nacionalidade_educacao': 'category',
+            'nacionalidade_id_existente': 'int32',
+            'compatibilidade': 'category',
+        },
+        # --- Educação: fatos ---
+        'PopulacaoPorNacionalidade': {
+            'populacao_nacional_id': 'int32',
+            'masculino': 'int32',
+            'feminino': 'int32',
+            'percentagem_total': 'float32',
+        },
+        'PopulacaoPorNacionalidadeSexo': {
+            'populacao_nacional_sexo_id': 'int32',
+            'populacao_masculino': 'int32',
+            'populacao_feminino': 'int32',
+            'percentagem_masculino': 'float32',
+            'percentagem_feminino': 'float32',
+        },
+        'PopulacaoPorLocalidade': {
+            'populacao_local_id': 'int32',
+            'populacao_portuguesa': 'int32',
+            'populacao_estrangeira': 'int32',
+            'apatridas': 'int32',
+        },
+        'PopulacaoPorLocalidadeNacionalidade': {
+            'populacao_local_nacional_id': 'int32',
+            'populacao_local_id': 'int32',
+            'populacao_nacional': 'int32',
+        },
+        'PopulacaoPorGrupoEtario': {
+            'populacao_grupoetario_id': 'int32',
+            'populacao_grupo': 'int32',
+            'percentagem_grupo': 'float32',
+            'idade_media': 'float64',
+        },
+        'EvolucaoTemporal': {
+            'evolucao_id': 'int32',
+            'populacao_inicio': 'int32',
+            'variacao_absoluta': 'int32',
+        },
+        'NacionalidadePrincipal': {
+            'nacionalidade_principal_id': 'int32',
+            'posicao_ranking': 'int16',
+            'populacao_2021': 'int32',
+            'populacao_2011': 'int32',
+            'percentagem_variacao': 'float32',
+        },
+        'DistribuicaoGeografica': {
+            'distribuicao_geo_id': 'int32',
+            'populacao_nacional_local': 'int32',
+            'concentracao_relativa': 'float64',
+            'dominio_regional': 'category',
+        },
+        'PopulacaoEducacao': {
+            'populacao_educacao_id': 'int32',
+            'percentual_nivel': 'float32',
+        },
+        'EstatisticasEducacao': {
+            'estatistica_id': 'int32',
+            'populacao_total_educacao': 'int32',
+            'sem_educacao': 'int32',
+            'ensino_basico': 'int32',
+            'ensino_secundario': 'int32',
+            'ensino_superior': 'int32',
+            'percentual_sem_educacao': 'float32',
+            'percentual_ensino_basico': 'float32',
+            'percentual_ensino_secundario': 'float32',
+            'percentual_ensino_superior': 'float32',
+            'indice_educacional': 'float32',
+        },
+        # --- Laboral: dimensões ---
+        'CondicaoEconomica': {'nome_condicao': 'category'},
+        'GrupoProfissional': {'codigo_grande_grupo': 'category'},
+        'ProfissaoDigito1': {'codigo_digito1': 'category'},
+        'SetorEconomico': {'codigo_cae': 'category', 'agregado': 'bool'},
+        'SituacaoProfissional': {'nome_situacao': 'category'},
+        'FonteRendimento': {'nome_fonte': 'category'},
+        'RegiaoNUTS': {'codigo_nuts': 'category', 'nome_regiao': 'category'},
+        # --- Laboral: fatos ---
+        'PopulacaoPorCondicao': {'populacao_cond_id': 'int32'},
+        'EmpregadosPorProfissao': {'emp_prof_id': 'int32'},
+        'EmpregadosPorSetor': {'emp_setor_id': 'int32'},
+        'EmpregadosPorSituacao': {'emp_situacao_id': 'int32'},
+        'EmpregadosProfSexo': {'emp_prof_sexo_id': 'int32'},
+        'EmpregadosRegiaoSetor': {'emp_regiao_setor_id': 'int32'},
+        'PopulacaoTrabalhoEscolaridade': {'pop_trab_esc_id': 'int32', 'condicao_trabalho': 'category'},
+        'PopulacaoRendimentoRegiao': {'pop_rend_reg_id': 'int32'},
+        # --- AIMA: dimensões ---
+        'AnoRelatorio': {},
+        'TipoRelatorio': {'tipo': 'category'},
+        'Despacho': {},
+        'MotivoConcessao': {'nome_motivo': 'category'},
+        'NacionalidadeAIMA': {'nome_nacionalidade_aima': 'category'},
+        # --- AIMA: fatos ---
+        'ConcessoesPorNacionalidadeSexo': {},
+        'ConcessoesPorDespacho': {'concessoes': 'int32'},
+        'ConcessoesPorMotivoNacionalidade': {'total_motivo': 'int32'},
+        'PopulacaoEstrangeiraPorNacionalidadeSexo': {},
+        'DistribuicaoEtariaConcessoes': {},
+        'EvolucaoPopulacaoEstrangeira': {
+            'evolucao_id': 'int32',
+            'titulos_residencia': 'int32',
+            'concessao_ap': 'int32',
+            'prorrogacao_vld': 'int32',
+            'total_populacao': 'int32',
+        },
+        'PopulacaoResidenteEtaria': {},
+    }
+
+    PREFIXOS_TABELA = ('Dim_', 'Fact_', 'DP-01-B_', 'DP-01-A_')
+
+    # Colunas não declaradas com estes prefixos são percentagens (float32)
+    PREFIXOS_PERCENTAGEM = ('percentual', 'percentagem', 'taxa_')
+
+    # Colunas de texto com poucos valores distintos viram 'category'
+    LIMIAR_CATEGORIA = 0.5
+
+    @classmethod
+    def _nome_base(cls, nome_tabela):
+        """Remove prefixos e extensão do nome da tabela"""
+        nome = nome_sem_extensao(nome_tabela)
+        for prefixo in cls.PREFIXOS_TABELA:
+            if nome.startswith(prefixo):
+                nome = nome[len(prefixo):]
+        return nome
+
+    @classmethod
+    def declarados(cls, nome_tabela, colunas):
+        """Tipos declarados (por coluna e por tabela) para as colunas dadas"""
+        por_tabela = cls.TIPOS_POR_TABELA.get(cls._nome_base(nome_tabela), {})
+        return {
+            coluna: por_tabela.get(coluna, cls.TIPOS_COLUNAS.get(coluna))
+            for coluna in colunas
+            if coluna in por_tabela or coluna in cls.TIPOS_COLUNAS
+        }
+
+    @classmethod
+    def colunas_sem_declaracao(cls, nome_tabela, df):
+        """Colunas da tabela que não têm tipo declarado"""
+        declarados = cls.declarados(nome_tabela, df.columns)
+        return [coluna for coluna in df.columns if coluna not in declarados]
+
+    @classmethod
+    def tipos_para(cls, nome_tabela, df):
+        """
+        Retorna dict coluna -> dtype para uma tabela
+
+        Regras para colunas não declaradas:
+          - *_id inteiras: int32 (Int32 se houver nulos)
+          - percentual*/percentagem*/taxa_* numéricas: float32
+          - texto com poucos valores distintos: category
+        """
+        declarados = cls.declarados(nome_tabela, df.columns)
+        tipos = {}
+
+        for coluna in df.columns:
+            serie = df[coluna]
+            if coluna in declarados:
+                tipo = declarados[coluna]
+                if tipo.startswith('int') and serie.isna().any():
+                    tipo = tipo.replace('int', 'Int', 1)
+                tipos[coluna] = tipo
+            elif str(coluna).endswith('_id') and pd.api.types.is_numeric_dtype(serie.dtype):
+                valores = serie.dropna()
+                if (valores == valores.round()).all():
+                    tipos[coluna] = 'Int32' if serie.isna().any() else 'int32'
+            elif str(coluna).startswith(cls.PREFIXOS_PERCENTAGEM) and pd.api.types.is_float_dtype(serie.dtype):
+                tipos[coluna] = 'float32'
+            elif (pd.api.types.is_object_dtype(serie.dtype) or pd.api.types.is_string_dtype(serie.dtype)) \
+                    and len(serie) > 0 and serie.nunique(dropna=True) / len(serie) <= cls.LIMIAR_CATEGORIA:
+                tipos[coluna] = 'category'
+
+        return tipos
+
+    @staticmethod
+    def _conversao_segura(serie, tipo):
+        """
+        Indica se a conversão preserva os valores
+
+        Inteiros e floats só a partir de colunas numéricas (sem truncar
+        decimais nem exceder o intervalo); category só a partir de texto
+        """
+        atual = serie.dtype
+        if str(atual) == tipo:
+            return False
+        if pd.api.types.is_object_dtype(atual) and tipo != 'category':
+            # Ex.: concat sobre um DataFrame vazio deixa os inteiros em object
+            serie = serie.infer_objects()
+            atual = serie.dtype
+        if tipo == 'category':
+            return pd.api.types.is_object_dtype(atual) or pd.api.types.is_string_dtype(atual)
+        if tipo == 'bool':
+            return pd.api.types.is_bool_dtype(atual)
+        if not pd.api.types.is_numeric_dtype(atual) or pd.api.types.is_bool_dtype(atual):
+            return False
+        if tipo.lower().startswith('int'):
+            valores = serie.dropna()
+            if len(valores) == 0:
+                return True
+            if pd.api.types.is_float_dtype(atual) and not (valores == valores.round()).all():
+                return False
+            limites = np.iinfo(tipo.lower())
+            return bool(valores.min() >= limites.min and valores.max() <= limites.max)
+        return True
+
+    @classmethod
+    def conversoes(cls, df, nome_tabela):
+        """Conversões de tipo a aplicar (apenas as que preservam os valores)"""
+        return {
+            coluna: tipo for coluna, tipo in cls.tipos_para(nome_tabela, df).items()
+            if cls._conversao_segura(df[coluna], tipo)
+        }
+
+    @classmethod
+    def aplicar(cls, df, nome_tabela):
+        """
+        Retorna cópia do DataFrame com os tipos compactos aplicados
+        (o próprio DataFrame se já estiver tipado)
+        """
+        conversoes = cls.conversoes(df, nome_tabela)
+        if not conversoes:
+            return df
+        df = df.copy()
+        for coluna, tipo in conversoes.items():
+            try:
+                df[coluna] = df[coluna].astype(tipo)
+            except (TypeError, ValueError, OverflowError):
+                # Mantém o tipo original se a conversão falhar
+                pass
+        return df
+
+    @staticmethod
+    def sem_tipos(df):
+        """Versão não tipada (int64/float64/texto), como sai de pd.DataFrame(registros)"""
+        df = df.copy()
+        for coluna in df.columns:
+            dtype = df[coluna].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                df[coluna] = df[coluna].astype(dtype.categories.dtype)
+            elif pd.api.types.is_integer_dtype(dtype):
+                df[coluna] = df[coluna].astype('float64' if df[coluna].isna().any() else 'int64')
+            elif pd.api.types.is_float_dtype(dtype):
+                df[coluna] = df[coluna].astype('float64')
+        return df
+
+    @staticmethod
+    def como_csv(df):
+        """
+        Tipos que a tabela tem depois de gravada em CSV e relida (int64/float64/texto)
+
+        Os float32 passam pelo texto, como no CSV: 12.3 (float32) -> 12.3 e não
+        12.300000190734863. Usado para dar a tabela em memória a quem leria o ZIP.
+        """
+        df = df.copy()
+        for coluna in df.columns:
+            if pd.api.types.is_float_dtype(df[coluna].dtype) and df[coluna].dtype != 'float64':
+                df[coluna] = df[coluna].astype(str).astype('float64')
+        return EsquemaTabelas.sem_tipos(df)
+
+    @staticmethod
+    def memoria_mb(df):
+        """Memória ocupada pelo DataFrame (MB, inclui texto)"""
+        return float(df.memory_usage(deep=True).sum()) / 1024 / 1024
+
+    @classmethod
+    def comparar_memoria(cls, df):
+        """Memória do DataFrame tipado vs. a versão sem tipos compactos"""
+        memoria = float(cls.memoria_mb(df))
+        memoria_sem_tipos = float(cls.memoria_mb(cls.sem_tipos(df)))
+        return {
+            'memoria_mb': memoria,
+            'memoria_sem_tipos_mb': memoria_sem_tipos,
+            'memoria_poupada_mb': memoria_sem_tipos - memoria,
+        }
+
+
+# ============================================================
+# REGISTO DE TABELAS TIPADO
+# ============================================================
+
+class RegistroTabelas(dict):
+    """
+    dict nome -> DataFrame que aplica o EsquemaTabelas ao registar
+
+    Substitui os dicts self.dimensoes / self.fatos dos transformadores:
+    self.dimensoes['Dim_Sexo'] = df guarda já a versão tipada.
+    """
+
+    def __init__(self, *args, aplicar_esquema=True, **kwargs):
+        super().__init__()
+        self.aplicar_esquema = aplicar_esquema
+        self.memoria = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, nome, df):
+        if self.aplicar_esquema and isinstance(df, pd.DataFrame) and not df.empty \
+                and self.memoria.get(nome, {}).get('id') != id(df):
+            antes = EsquemaTabelas.memoria_mb(df)
+            df = EsquemaTabelas.aplicar(df, nome)
+            self.memoria[nome] = {
+                'id': id(df),
+                'memoria_sem_tipos_mb': antes,
+                'memoria_mb': EsquemaTabelas.memoria_mb(df),
+            }
+        super().__setitem__(nome, df)
+
+    def update(self, *args, **kwargs):
+        for nome, df in dict(*args, **kwargs).items():
+            self[nome] = df
+
+    def setdefault(self, nome, df=None):
+        if nome not in self:
+            self[nome] = df
+        return self[nome]
+
+    def relatorio_memoria(self):
+        """Memória por tabela antes/depois da tipagem (DataFrame)"""
+        linhas = [
+            {'tabela': nome, 'memoria_sem_tipos_mb': info['memoria_sem_tipos_mb'],
+             'memoria_mb': info['memoria_mb'],
+             'memoria_poupada_mb': info['memoria_sem_tipos_mb'] - info['memoria_mb']}
+            for nome, info in self.memoria.items() if nome in self
+        ]
+        return pd.DataFrame(linhas, columns=['tabela', 'memoria_sem_tipos_mb', 'memoria_mb', 'memoria_poupada_mb'])
+
+
+# ============================================================
+# BUFFER DE REGISTROS (MATERIALIZAÇÃO ÚNICA)
+# ============================================================
+
+class BufferRegistros:
+    """
+    Acumula registros em listas por coluna e DataFrames em blocos,
+    materializando a tabela com um único pd.concat em materializar()
+
+    Evita o custo quadrático de pd.concat a cada registro adicionado.
+    Os DataFrames recebidos não são copiados até à materialização.
+    """
+
+    def __init__(self):
+        self.colunas = {}
+        self.linhas = 0
+        self.blocos = []
+
+    def __len__(self):
+        return self.linhas + sum(len(bloco) for bloco in self.blocos)
+
+    def adicionar(self, registro):
+        """Adiciona um registro (dict coluna -> valor)"""
+        if registro.keys() == self.colunas.keys():
+            for coluna, valor in registro.items():
+                self.colunas[coluna].append(valor)
+        else:
+            for coluna in registro:
+                if coluna not in self.colunas:
+                    self.colunas[coluna] = [None] * self.linhas
+            for coluna, valores in self.colunas.items():
+                valores.append(registro.get(coluna))
+        self.linhas += 1
+
+    def estender(self, registros):
+        """Adiciona uma lista de registros"""
+        for registro in registros:
+            self.adicionar(registro)
+
+    def adicionar_dataframe(self, df):
+        """Adiciona um DataFrame inteiro como bloco (sem cópia)"""
+        self._fechar_bloco()
+        if len(df) > 0:
+            self.blocos.append(df)
+
+    def _fechar_bloco(self):
+        if self.linhas:
+            self.blocos.append(pd.DataFrame(self.colunas))
+        self.colunas = {}
+        self.linhas = 0
+
+    def materializar(self, base=None):
+        """
+        Retorna base + registros acumulados num único DataFrame e esvazia o buffer
+
+        Args:
+            base: DataFrame existente (as suas colunas vêm primeiro)
+        """
+        self._fechar_bloco()
+        blocos = [bloco for bloco in self.blocos if len(bloco) > 0]
+        self.blocos = []
+
+        if base is not None and len(base) > 0:
+            blocos.insert(0, base)
+        if not blocos:
+            return base if base is not None else pd.DataFrame()
+
+        resultado = blocos[0].reset_index(drop=True) if len(blocos) == 1 \
+            else pd.concat(blocos, ignore_index=True)
+
+        if base is not None and len(base) == 0 and len(base.columns) > 0:
+            colunas = list(base.columns) + [c for c in resultado.columns if c not in base.columns]
+            resultado = resultado.reindex(columns=colunas)
+        return resultado
+
+
+# ============================================================
+# ESCRITOR DE TABELAS
+# ============================================================
+
+class EscritorTabelas:
+    """Serializa DataFrames no formato de saída configurado"""
+
+    def __init__(self, formato='csv', compressao=None, logger=None, aplicar_esquema=True):
+        """
+        Args:
+            formato: 'csv', 'parquet' ou 'feather'
+            compressao: Codec (None = padrão do formato)
+            logger: Logger opcional (aviso quando pyarrow não está disponível)
+            aplicar_esquema: Aplica EsquemaTabelas nos formatos binários
+        """
+        formato = (formato or 'csv').lower()
+        if formato not in FORMATOS_SAIDA:
+            raise ValueError(f"Formato de saída não suportado: {formato} (use {', '.join(FORMATOS_SAIDA)})")
+
+        if FORMATOS_SAIDA[formato]['binario'] and not PYARROW_DISPONIVEL:
+            registrar_log(logger, 'aviso', f"pyarrow não instalado: formato '{formato}' indisponível, usando CSV")
+            formato = 'csv'
+            compressao = None
+
+        if compressao is not None and compressao not in COMPRESSOES_SUPORTADAS.get(formato, ()):
+            raise ValueError(f"Compressão '{compressao}' não suportada para {formato}")
+
+        self.formato = formato
+        self.compressao = compressao or FORMATOS_SAIDA[formato]['compressao_padrao']
+        self.aplicar_esquema = aplicar_esquema
+
+    @property
+    def extensao(self):
+        return FORMATOS_SAIDA[self.formato]['extensao']
+
+    @property
+    def binario(self):
+        return FORMATOS_SAIDA[self.formato]['binario']
+
+    def nome_arquivo(self, nome_tabela):
+        """Nome do ficheiro com a extensão do formato (ex: Dim_Sexo.parquet)"""
+        return f"{nome_sem_extensao(nome_tabela)}{self.extensao}"
+
+    def _preparar(self, df, nome_tabela):
+        if self.aplicar_esquema:
+            df = EsquemaTabelas.aplicar(df, nome_tabela)
+        return df.reset_index(drop=True)
+
+    def serializar(self, df, nome_tabela, **opcoes_csv):
+        """
+        Serializa em memória
+
+        Returns:
+            str (CSV) ou bytes (Parquet/Feather), pronto para zip_file.writestr
+        """
+        if not self.binario:
+            buffer = io.StringIO()
+            opcoes = {'index': False, 'encoding': 'utf-8'}
+            opcoes.update(opcoes_csv)
+            df.to_csv(buffer, **opcoes)
+            return buffer.getvalue()
+
+        buffer = io.BytesIO()
+        df = self._preparar(df, nome_tabela)
+        if self.formato == 'parquet':
+            df.to_parquet(buffer, index=False, compression=None if self.compressao == 'none' else self.compressao)
+        else:
+            df.to_feather(buffer, compression=self.compressao)
+        return buffer.getvalue()
+
+    def gravar(self, df, nome_tabela, destino, **opcoes_csv):
+        """
+        Serializa diretamente num ficheiro binário aberto (sem cópia em memória)
+
+        O CSV é escrito em blocos pelo pandas; destino só precisa de write()
+        (ex: fluxo comprimido do ExportadorZip)
+        """
+        if not self.binario:
+            opcoes = {'index': False}
+            opcoes.update(opcoes_csv)
+            encoding = opcoes.pop('encoding', None) or 'utf-8'
+            texto = io.TextIOWrapper(destino, encoding=encoding, newline='')
+            try:
+                df.to_csv(texto, **opcoes)
+                texto.flush()
+            finally:
+                texto.detach()
+            return
+
+        df = self._preparar(df, nome_tabela)
+        if self.formato == 'parquet':
+            df.to_parquet(destino, index=False, compression=None if self.compressao == 'none' else self.compressao)
+        else:
+            df.to_feather(destino, compression=self.compressao)
+
+    def salvar(self, df, pasta, nome_tabela, **opcoes_csv):
+        """Grava a tabela em disco e retorna o caminho"""
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        caminho = pasta / self.nome_arquivo(nome_tabela)
+
+        if not self.binario:
+            opcoes = {'index': False, 'encoding': 'utf-8'}
+            opcoes.update(opcoes_csv)
+            df.to_csv(caminho, **opcoes)
+        elif self.formato == 'parquet':
+            self._preparar(df, nome_tabela).to_parquet(
+                caminho, index=False, compression=None if self.compressao == 'none' else self.compressao
+            )
+        else:
+            self._preparar(df, nome_tabela).to_feather(caminho, compression=self.compressao)
+
+        return caminho
+
+
+# ============================================================
+# LEITURA COM PREFERÊNCIA POR FORMATOS BINÁRIOS
+# ============================================================
+
+def localizar_tabela(pasta, nome_arquivo, preferir_binario=True):
+    """
+    Procura a tabela na pasta, preferindo .parquet/.feather ao .csv
+
+    Um ficheiro binário mais antigo do que o CSV (ex.: CSV regenerado
+    depois pelo script DP-01-A1.py) está desatualizado e é ignorado.
+
+    Args:
+        pasta: Pasta onde procurar
+        nome_arquivo: Nome com ou sem extensão (ex: 'Nacionalidade.csv')
+        preferir_binario: Se False, procura apenas o CSV
+
+    Returns:
+        Path do ficheiro encontrado ou None
+    """
+    pasta = Path(pasta)
+    base = nome_sem_extensao(nome_arquivo)
+    csv = pasta / f"{base}{FORMATOS_SAIDA['csv']['extensao']}"
+    mtime_csv = csv.stat().st_mtime_ns if csv.exists() else None
+
+    formatos = ORDEM_LEITURA if (preferir_binario and PYARROW_DISPONIVEL) else ['csv']
+    for formato in formatos:
+        caminho = pasta / f"{base}{FORMATOS_SAIDA[formato]['extensao']}"
+        if not caminho.exists():
+            continue
+        if formato != 'csv' and mtime_csv is not None and caminho.stat().st_mtime_ns < mtime_csv:
+            continue
+        return caminho
+    return None
+
+
+def ler_tabela(caminho, encoding='utf-8', **opcoes_csv):
+    """Lê uma tabela conforme a extensão do ficheiro"""
+    caminho = Path(caminho)
+    extensao = caminho.suffix.lower()
+
+    if extensao == '.parquet':
+        return pd.read_parquet(caminho)
+    if extensao in ('.feather', '.arrow'):
+        return pd.read_feather(caminho)
+    return pd.read_csv(caminho, encoding=encoding, **opcoes_csv)
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    df_teste = pd.DataFrame({
+        'nacionalidade_id': [1, 2, 3, 4],
+        'nome_nacionalidade': ['Brasil', 'Angola', 'Brasil', 'Angola'],
+        'total': [100, 200, 300, 400]
+    })
+
+    print(f"pyarrow disponível: {PYARROW_DISPONIVEL}")
+    print(f"Tipos declarados: {EsquemaTabelas.tipos_para('Dim_Nacionalidade', df_teste)}")
+
+    registro = RegistroTabelas()
+    registro['Fact_PopulacaoPorNacionalidade'] = pd.DataFrame({
+        'populacao_nacional_id': np.arange(1, 100_001),
+        'nacionalidade_id': np.arange(100_000) % 200 + 1,
+        'percentagem_total': np.round(np.random.default_rng(0).random(100_000) * 100, 2),
+        'nome_nacionalidade': np.array(['Brasil', 'Angola', 'Cabo Verde', 'Ucrânia'])[np.arange(100_000) % 4],
+    })
+    print(registro.relatorio_memoria().round(3).to_string(index=False))
+    print(EsquemaTabelas.comparar_memoria(registro['Fact_PopulacaoPorNacionalidade']))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for formato in FORMATOS_SAIDA:
+            escritor = EscritorTabelas(formato)
+            caminho = escritor.salvar(df_teste, pasta, 'Dim_Nacionalidade')
+            print(f"{formato:>8} -> {caminho.name} ({caminho.stat().st_size} bytes)")
+
+        encontrado = localizar_tabela(pasta, 'Dim_Nacionalidade.csv')
+        print(f"Leitura preferida: {encontrado.name} ({len(ler_tabela(encontrado))} registros)")
+
+    print("\n✓ Módulo formatos_tabela.py carregado com sucesso!")
@@ -0,0 +1,263 @@
+"""
+============================================================
+ÍNDICES DE DESIGUALDADE E SEGREGAÇÃO
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Calcula, de uma só vez e em numpy, os índices do relatório para
+todas as nacionalidades, anos e categorias de uma dimensão:
+
+- Gini e Theil (T) da quota de cada categoria entre nacionalidades
+  (ex.: desigualdade do % com ensino superior entre nacionalidades)
+- Índice de dissimilaridade (Duncan) de cada nacionalidade face às
+  restantes nacionalidades da mesma tabela
+- Quociente de localização de cada nacionalidade em cada categoria
+  (quota da nacionalidade / quota do conjunto das nacionalidades)
+
+Os cálculos recebem arrays (lote x nacionalidade x categoria) e
+vetorizam sobre o lote (anos). Os dados vêm dos cubos de
+cubo_agregados.py: só entram os membros base (sem totais, grupos
+nem linhas que já eram agregados na origem). Nacionalidades sem
+registos num ano não entram nos índices desse ano.
+
+Dimensões (INDICES_POR_CUBO):
+- educacao: níveis de educação (Fact_PopulacaoEducacao)
+- emprego_setor: secções CAE (Fact_EmpregadosPorSetor)
+- emprego_profissao / condicao_economica (ETL Laboral)
+- concessoes_motivo: motivos de concessão AIMA
+
+Resultado em formato longo: dimensao, ano, indice, nacionalidade,
+categoria, valor (nacionalidade/categoria vazias quando o índice
+não é por nacionalidade/categoria).
+
+Uso:
+    python indices_desigualdade.py      # grava output/indices_desigualdade.csv
+
+    indices = AnalisadorDesigualdade(carregar_cubos('output/cubo_agregados.npz')).calcular_todos()
+============================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cubo_agregados import NOME_ARQUIVO_CUBOS, TOTAL, carregar_cubos
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+# Cubo -> eixo das categorias analisadas
+INDICES_POR_CUBO = {
+    'educacao': 'nivel_educacao',
+    'emprego_setor': 'setor',
+    'emprego_profissao': 'profissao',
+    'condicao_economica': 'condicao',
+    'concessoes_motivo': 'motivo',
+}
+
+COLUNAS_RESULTADO = ['dimensao', 'ano', 'indice', 'nacionalidade', 'categoria', 'valor']
+
+NOME_ARQUIVO_INDICES = 'indices_desigualdade.csv'
+
+
+# ============================================================
+# ÍNDICES VETORIZADOS
+# ============================================================
+
+def gini(valores):
+    """
+    Coeficiente de Gini ao longo do último eixo (NaN = ausente)
+
+    Args:
+        valores: array (..., n) com valores não negativos
+
+    Returns:
+        array (...) - NaN quando há menos de 2 valores ou soma zero
+    """
+    valores = np.asarray(valores, dtype='float64')
+    n = np.sum(~np.isnan(valores), axis=-1)
+    # np.sort coloca os NaN no fim: as posições 1..n são os valores presentes
+    ordenados = np.nan_to_num(np.sort(valores, axis=-1))
+    posicoes = np.arange(1, valores.shape[-1] + 1)
+    soma = ordenados.sum(axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ponderada = np.sum((2 * posicoes - n[..., None] - 1) * ordenados, axis=-1)
+        resultado = ponderada / (n * soma)
+    return np.where((n >= 2) & (soma > 0), resultado, np.nan)
+
+
+def theil(valores):
+    """
+    Índice de Theil (T) ao longo do último eixo (NaN = ausente, 0·ln 0 = 0)
+
+    Returns:
+        array (...) - 0 = igualdade, ln(n) = concentração máxima
+    """
+    valores = np.asarray(valores, dtype='float64')
+    presentes = ~np.isnan(valores)
+    n = presentes.sum(axis=-1)
+    soma = np.nansum(valores, axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        razao = valores / (soma / n)[..., None]
+        termos = np.where(presentes & (razao > 0), razao * np.log(razao), 0.0)
+        resultado = termos.sum(axis=-1) / n
+    return np.where((n >= 1) & (soma > 0), resultado, np.nan)
+
+
+def _quotas(contagens):
+    """Quota de cada categoria no total da linha (NaN em linhas vazias)"""
+    totais = contagens.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(totais > 0, contagens / totais, np.nan)
+
+
+def dissimilaridade(contagens):
+    """
+    Índice de dissimilaridade de cada grupo face aos restantes
+
+    Args:
+        contagens: array (..., grupos, categorias)
+
+    Returns:
+        array (..., grupos): 0.5 * Σ |quota do grupo - quota dos restantes|
+    """
+    contagens = np.asarray(contagens, dtype='float64')
+    restantes = contagens.sum(axis=-2, keepdims=True) - contagens
+    return 0.5 * np.abs(_quotas(contagens) - _quotas(restantes)).sum(axis=-1)
+
+
+def quociente_localizacao(contagens):
+    """
+    Quociente de localização de cada grupo em cada categoria
+
+    Args:
+        contagens: array (..., grupos, categorias)
+
+    Returns:
+        array (..., grupos, categorias): > 1 = grupo sobre-representado na categoria
+    """
+    contagens = np.asarray(contagens, dtype='float64')
+    referencia = _quotas(contagens.sum(axis=-2, keepdims=True))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(referencia > 0, _quotas(contagens) / referencia, np.nan)
+
+
+# ============================================================
+# ANALISADOR
+# ============================================================
+
+class AnalisadorDesigualdade:
+    """Índices de desigualdade/segregação para os cubos de agregados"""
+
+    def __init__(self, cubos):
+        """
+        Args:
+            cubos: Dict nome -> CuboAgregado (cubo_agregados.carregar_cubos ou ConstrutorCubos)
+        """
+        self.cubos = cubos
+
+    @staticmethod
+    def _matriz(cubo, eixo_categoria):
+        """
+        Contagens (ano x nacionalidade x categoria) só com membros base;
+        eixos que não sejam estes três ficam fixos em TOTAL (ex.: sexo)
+        """
+        fixos = {e: TOTAL for e in cubo.eixos if e not in ('nacionalidade', 'ano', eixo_categoria)}
+        fatia = cubo.fatia(**fixos)
+
+        anos = fatia.membros_eixo('ano', base=True) if 'ano' in fatia.eixos else [None]
+        nacionalidades = fatia.membros_eixo('nacionalidade', base=True)
+        categorias = fatia.membros_eixo(eixo_categoria, base=True)
+
+        seletores = {
+            'nacionalidade': fatia.posicoes('nacionalidade', nacionalidades),
+            eixo_categoria: fatia.posicoes(eixo_categoria, categorias),
+        }
+        if 'ano' in fatia.eixos:
+            seletores['ano'] = fatia.posicoes('ano', anos)
+
+        contagens = fatia.valores[np.ix_(*(seletores[e] for e in fatia.eixos))]
+        ordem = [fatia.eixos.index(e) for e in ('ano', 'nacionalidade', eixo_categoria) if e in fatia.eixos]
+        contagens = np.transpose(contagens, ordem)
+        if 'ano' not in fatia.eixos:
+            contagens = contagens[None, ...]
+        return contagens, anos, nacionalidades, categorias
+
+    def calcular(self, nome_cubo, eixo_categoria=None):
+        """
+        Todos os índices de um cubo, para todos os anos de uma vez
+
+        Returns:
+            DataFrame com COLUNAS_RESULTADO
+        """
+        cubo = self.cubos[nome_cubo]
+        eixo_categoria = eixo_categoria or INDICES_POR_CUBO[nome_cubo]
+        contagens, anos, nacionalidades, categorias = self._matriz(cubo, eixo_categoria)
+
+        # Nacionalidade sem registos no ano: fora dos índices desse ano
+        vazias = contagens.sum(axis=-1) == 0
+        contagens = np.where(vazias[..., None], np.nan, contagens)
+        quotas = _quotas(contagens)
+        por_categoria = np.moveaxis(quotas, -2, -1)          # ano x categoria x nacionalidade
+        contagens_presentes = np.nan_to_num(contagens)
+
+        n_anos, n_nac, n_cat = contagens.shape
+        ano = np.asarray(anos, dtype=object)
+        nac = np.asarray(nacionalidades, dtype=object)
+        cat = np.asarray(categorias, dtype=object)
+
+        blocos = [
+            ('gini', np.repeat(ano, n_cat), None, np.tile(cat, n_anos), gini(por_categoria)),
+            ('theil', np.repeat(ano, n_cat), None, np.tile(cat, n_anos), theil(por_categoria)),
+            ('dissimilaridade', np.repeat(ano, n_nac), np.tile(nac, n_anos), None,
+             np.where(vazias, np.nan, dissimilaridade(contagens_presentes))),
+            ('quociente_localizacao', np.repeat(ano, n_nac * n_cat), np.tile(np.repeat(nac, n_cat), n_anos),
+             np.tile(cat, n_anos * n_nac),
+             np.where(vazias[..., None], np.nan, quociente_localizacao(contagens_presentes))),
+        ]
+
+        resultado = pd.concat([
+            pd.DataFrame({
+                'dimensao': nome_cubo, 'ano': anos_bloco, 'indice': indice,
+                'nacionalidade': nac_bloco, 'categoria': cat_bloco, 'valor': valores.ravel()
+            })
+            for indice, anos_bloco, nac_bloco, cat_bloco, valores in blocos
+        ], ignore_index=True)
+        resultado['ano'] = pd.to_numeric(resultado['ano']).astype('Int64')
+        return resultado.dropna(subset=['valor']).reset_index(drop=True)[COLUNAS_RESULTADO]
+
+    def calcular_todos(self, cubos=None):
+        """Índices de todas as dimensões de INDICES_POR_CUBO disponíveis, num único DataFrame"""
+        nomes = [n for n in (cubos or INDICES_POR_CUBO) if n in self.cubos]
+        if not nomes:
+            return pd.DataFrame(columns=COLUNAS_RESULTADO)
+        return pd.concat([self.calcular(nome) for nome in nomes], ignore_index=True)
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    print("Gini [1, 1, 1, 1]:", gini([1, 1, 1, 1]))
+    print("Gini [0, 0, 0, 10] / [5, nan, 5]:", gini([[0, 0, 0, 10], [5, np.nan, 5, 5]]))
+    print("Theil [1, 1, 4]:", round(float(theil([1, 1, 4])), 4))
+
+    exemplo = np.array([[10, 90], [50, 50], [90, 10]])
+    print("Dissimilaridade:", dissimilaridade(exemplo).round(3))
+    print("Quociente de localização:\n", quociente_localizacao(exemplo).round(3))
+
+    caminho = Path(__file__).resolve().parent / 'output' / NOME_ARQUIVO_CUBOS
+    if len(sys.argv) > 1:
+        caminho = Path(sys.argv[1])
+    if caminho.exists():
+        indices = AnalisadorDesigualdade(carregar_cubos(caminho)).calcular_todos()
+        destino = caminho.with_name(NOME_ARQUIVO_INDICES)
+        indices.to_csv(destino, index=False, encoding='utf-8-sig')
+        print(indices.groupby(['dimensao', 'indice']).size().to_string())
+        print(f"[OK] {len(indices):,} índices gravados em {destino}")
@@ -0,0 +1,248 @@
+"""
+============================================================
+INGESTÃO DOS RELATÓRIOS AIMA (RIFA / RMA) POR REGISTO DE PARSERS
+Pipelines ETL - AIMA
+============================================================
+Os CSVs extraídos dos relatórios seguem o padrão
+'<RIFA|RMA><ano> - <tipo>.csv' (pastas RIFA2020_csv ... RMA2024_csv
+em 2️⃣ Data Understanding/data/raw/aima/extraidas). Em vez de uma
+cadeia de `if 'concessao-titulos-residencia' in filename` e de
+listas fixas de anos:
+
+- RegistroParsersAIMA: parser registado por padrão do tipo de
+  ficheiro (regex) e, opcionalmente, por família de relatório
+- descobrir_relatorios: todos os (família, ano, ficheiro) de uma
+  fonte (pasta, ZIP ou upload Colab - fontes_dados.py)
+- IngestorAIMA: lê, descodifica e faz o parsing de todos os pares
+  (ano, ficheiro) em paralelo (agendador_dag.py), cada ficheiro
+  uma única vez
+
+Um novo ano (ex.: 'RMA2025_csv/') é ingerido sem alterar código;
+tipos de ficheiro sem parser registado são listados e ignorados.
+
+Usado por:
+- etl_aima_colab_v2.py (DP-02-A2)
+- processar_motivos.py (DP-02-A)
+
+Exemplo:
+    REGISTRO = RegistroParsersAIMA()
+
+    @REGISTRO.registrar('concessoes_motivo', r'concessao-titulos_motivo')
+    def parse_motivos(texto, ano, familia): ...
+
+    dados = IngestorAIMA(REGISTRO).ingerir('2️⃣ Data Understanding/data/raw/aima/extraidas')
+    dados[2023]['concessoes_motivo']
+============================================================
+"""
+
+import re
+from collections import Counter
+from pathlib import Path
+
+from agendador_dag import AgendadorDAG
+from decodificacao_entradas import detetar_codificacao
+from fontes_dados import criar_fonte
+from registro_log import registrar_log
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+FAMILIAS_RELATORIO = ('RIFA', 'RMA')
+
+# 'RIFA2020 - concessao-titulos-residencia.csv' (e a variante ' (1)' do Colab)
+_RE_RELATORIO = re.compile(
+    r'^(?P<familia>' + '|'.join(FAMILIAS_RELATORIO) + r')\s*(?P<ano>\d{4})\s*-\s*'
+    r'(?P<tipo>.+?)(?:\s\(\d+\))?\.csv$',
+    re.IGNORECASE
+)
+
+
+def identificar_relatorio(nome):
+    """
+    Família, ano e tipo de um CSV de relatório AIMA
+
+    Returns:
+        (familia, ano, tipo) - ex.: ('RIFA', 2020, 'concessao-titulos-residencia') - ou None
+    """
+    correspondencia = _RE_RELATORIO.match(Path(str(nome)).name.strip())
+    if correspondencia is None:
+        return None
+    return (
+        correspondencia['familia'].upper(),
+        int(correspondencia['ano']),
+        correspondencia['tipo'].strip().lower()
+    )
+
+
+# ============================================================
+# REGISTO DE PARSERS
+# ============================================================
+
+class RegistroParsersAIMA:
+    """Tipo de ficheiro (regex) e família de relatório -> parser"""
+
+    def __init__(self):
+        self.parsers = []
+
+    def registrar(self, chave, padrao, familias=None, descricao=None, binario=False):
+        """
+        Decorador: regista parser(texto, ano, familia) -> DataFrame
+
+        Args:
+            chave: Nome da tabela produzida (ex.: 'concessoes_motivo')
+            padrao: Regex que tem de corresponder ao tipo inteiro
+                    (ex.: r'populacao-residente[-_]distribuicao-etaria')
+            familias: Famílias a que se aplica (None = todas)
+            descricao: Texto para os logs (padrão: a chave)
+            binario: Se True, o parser recebe os bytes do ficheiro em vez do
+                     texto (ex.: layout_aima.DetetorLayoutAIMA deteta a codificação)
+        """
+        def decorador(funcao):
+            self.parsers.append({
+                'chave': chave,
+                'padrao': re.compile(padrao, re.IGNORECASE),
+                'familias': {f.upper() for f in familias} if familias else None,
+                'descricao': descricao or chave,
+                'funcao': funcao,
+                'binario': binario,
+            })
+            return funcao
+        return decorador
+
+    def procurar(self, tipo, familia):
+        """Primeiro parser registado para o tipo/família (ou None)"""
+        for parser in self.parsers:
+            if parser['familias'] is not None and familia.upper() not in parser['familias']:
+                continue
+            if parser['padrao'].fullmatch(tipo):
+                return parser
+        return None
+
+    def descricao(self, chave):
+        return next((p['descricao'] for p in self.parsers if p['chave'] == chave), chave)
+
+
+# ============================================================
+# DESCOBERTA E INGESTÃO
+# ============================================================
+
+def descobrir_relatorios(fonte, anos=None):
+    """
+    Todos os CSVs de relatórios AIMA de uma fonte
+
+    Args:
+        fonte: FonteDados, pasta (ex.: .../aima/extraidas), .zip ou 'colab'
+        anos: Anos a considerar (None = todos os encontrados)
+
+    Returns:
+        Lista de dicts {nome, familia, ano, tipo}, ordenada por ano e nome
+    """
+    fonte = criar_fonte(fonte)
+    relatorios = []
+    for nome in fonte.listar():
+        identificado = identificar_relatorio(nome)
+        if identificado is None:
+            continue
+        familia, ano, tipo = identificado
+        if anos is not None and ano not in anos:
+            continue
+        relatorios.append({'nome': nome, 'familia': familia, 'ano': ano, 'tipo': tipo})
+    return sorted(relatorios, key=lambda r: (r['ano'], Path(r['nome']).name))
+
+
+def _ler_e_processar(fonte, nome, parser, ano, familia):
+    conteudo = fonte.ler_bytes(nome)
+    if parser['binario']:
+        return parser['funcao'](conteudo, ano, familia)
+    texto = conteudo.decode(detetar_codificacao(conteudo) or 'latin-1')
+    return parser['funcao'](texto, ano, familia)
+
+
+class IngestorAIMA:
+    """Processa em paralelo todos os (ano, ficheiro) de uma fonte com um registo de parsers"""
+
+    def __init__(self, registro, workers=None, logger=None):
+        """
+        Args:
+            registro: RegistroParsersAIMA
+            workers: Threads em paralelo (None = workers_padrao())
+            logger: Logger opcional (info/sucesso/aviso/erro)
+        """
+        self.registro = registro
+        self.workers = workers
+        self.logger = logger
+        self.familias = {}
+        self.arquivos = {}
+        self.sem_parser = []
+        self.erros = {}
+        self.dag = None
+
+    def planear(self, fonte, anos=None):
+        """
+        (ano, chave) -> (ficheiro, parser) para todos os ficheiros com parser
+
+        Tipos sem parser ficam em self.sem_parser; um segundo ficheiro do mesmo
+        tipo no mesmo ano (ex.: reenvio no Colab) é ignorado com aviso.
+        """
+        plano = {}
+        for relatorio in descobrir_relatorios(fonte, anos):
+            ano, familia = relatorio['ano'], relatorio['familia']
+            anterior = self.familias.setdefault(ano, familia)
+            if anterior != familia:
+                registrar_log(self.logger, 'aviso', f"{relatorio['nome']}: {ano} já tem relatórios {anterior} - ignorado")
+                continue
+
+            parser = self.registro.procurar(relatorio['tipo'], familia)
+            if parser is None:
+                self.sem_parser.append(relatorio['nome'])
+                continue
+
+            chave = (ano, parser['chave'])
+            if chave in plano:
+                registrar_log(self.logger, 'aviso',
+                              f"{relatorio['nome']}: {parser['chave']} de {ano} já lido de {plano[chave][0]} - ignorado")
+                continue
+            plano[chave] = (relatorio['nome'], parser)
+        return plano
+
+    def ingerir(self, fonte=None, anos=None):
+        """
+        Lê e processa todos os ficheiros em paralelo
+
+        Args:
+            fonte: FonteDados, pasta, .zip ou 'colab' (None = ETL_FONTE_DADOS)
+            anos: Anos a processar (None = todos os encontrados)
+
+        Returns:
+            dict ano -> {chave: DataFrame}, por ordem de ano. Ficheiros com
+            erro de leitura/parsing são omitidos (ver self.erros)
+        """
+        fonte = criar_fonte(fonte)
+        plano = self.planear(fonte, anos)
+
+        def processar(nome, parser, ano, familia):
+            try:
+                return _ler_e_processar(fonte, nome, parser, ano, familia)
+            except Exception as e:
+                self.erros[nome] = e
+                registrar_log(self.logger, 'erro', f"Erro ao processar {nome}: {e}")
+                return None
+
+        self.dag = AgendadorDAG(self.workers, logger=self.logger, nome="Ingestão AIMA")
+        for (ano, chave), (nome, parser) in plano.items():
+            self.dag.adicionar(f"{ano}:{chave}", processar, nome, parser, ano, self.familias[ano])
+            self.arquivos[(ano, chave)] = nome
+        resultados = self.dag.executar() if plano else {}
+
+        dados = {ano: {} for ano in sorted({ano for ano, _ in plano})}
+        for (ano, chave), _ in plano.items():
+            df = resultados.get(f"{ano}:{chave}")
+            if df is not None:
+                dados[ano][chave] = df
+        return dados
+
+    def resumo(self):
+        """Ficheiros processados por tipo de tabela"""
+        return Counter(chave for _, chave in self.arquivos)
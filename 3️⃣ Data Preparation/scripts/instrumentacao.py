@@ -0,0 +1,358 @@
+"""
+============================================================
+INSTRUMENTAÇÃO DE ETAPAS
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Mede cada etapa dos pipelines (criar_dim_*, criar_fact_*,
+carregar_*, consolidar_*, exportar_*):
+
+- Tempo de relógio e tempo de CPU (da thread que executa a etapa)
+- Linhas de entrada (DataFrames/listas nos argumentos) e de saída
+- Pico de memória Python/NumPy (tracemalloc) durante a etapa,
+  com ETL_TRACEMALLOC=1
+
+Os registos são partilhados por todos os Logger do processo e
+gravados em JSON-lines (um objeto por etapa) junto das saídas.
+
+Notas:
+- A memória é opcional: com tracemalloc as etapas com ciclos
+  Python ficam ~4x mais lentas e os tempos deixam de ser comparáveis
+- Com etapas em paralelo (agendador_dag.py) o pico de memória é do
+  processo inteiro: esses registos ficam com 'concorrente': true
+- Em DAG_MODO='processo' os métodos correm sem instrumentação
+
+Exemplo:
+    logger.instrumentar(transformador)      # envolve os métodos
+    with logger.medir('ler_fontes') as etapa:
+        ...
+        etapa['linhas_saida'] = len(df)
+    logger.gravar_metricas('output/metricas.jsonl')
+    logger.resumo_metricas()
+============================================================
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+
+PREFIXOS_ETAPAS = (
+    'criar_dim_', 'criar_fact_', 'criar_fato_', 'carregar_',
+    'consolidar_', 'processar_', 'exportar_'
+)
+
+COLUNAS_METRICAS = [
+    'execucao', 'etapa', 'modulo', 'classe', 'inicio', 'tempo_s', 'cpu_s',
+    'linhas_entrada', 'linhas_saida', 'memoria_pico_mb', 'nivel',
+    'concorrente', 'thread', 'status', 'erro'
+]
+
+
+def memoria_ativa_padrao():
+    """Medir memória com tracemalloc apenas com ETL_TRACEMALLOC=1"""
+    return os.environ.get('ETL_TRACEMALLOC', '') == '1'
+
+
+def contar_linhas(valor):
+    """
+    Nº de linhas de um resultado ou argumento
+
+    DataFrame/Series: len; objetos com contar_registros() (TabelaBase);
+    listas de registos: len; dicts/tuplos de DataFrames: soma.
+    Outros valores (bool, None, escalares): None
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    if hasattr(valor, 'contar_registros'):
+        return int(valor.contar_registros())
+    if isinstance(valor, dict):
+        partes = [contar_linhas(v) for v in valor.values()]
+        partes = [p for p in partes if p is not None]
+        return sum(partes) if partes else None
+    if isinstance(valor, (list, tuple)):
+        if valor and all(isinstance(v, dict) for v in valor):
+            return len(valor)
+        partes = [contar_linhas(v) for v in valor]
+        partes = [p for p in partes if p is not None]
+        return sum(partes) if partes else None
+    return None
+
+
+def _linhas_argumentos(args, kwargs):
+    partes = [contar_linhas(v) for v in list(args) + list(kwargs.values())]
+    partes = [p for p in partes if p is not None]
+    return sum(partes) if partes else None
+
+
+# ============================================================
+# MÉTODO INSTRUMENTADO
+# ============================================================
+
+def _metodo_original(objeto, nome):
+    """Método da classe (sem instrumentação) ligado ao objeto"""
+    return getattr(type(objeto), nome).__get__(objeto)
+
+
+class MetodoInstrumentado:
+    """Envolve um método ligado; cada chamada gera um registo de métricas"""
+
+    def __init__(self, instrumentacao, metodo, etapa, modulo=None):
+        self.instrumentacao = instrumentacao
+        self.metodo = metodo
+        self.etapa = etapa
+        self.modulo = modulo
+        functools.update_wrapper(self, metodo)
+
+    def __call__(self, *args, **kwargs):
+        classe = type(getattr(self.metodo, '__self__', None)).__name__
+        with self.instrumentacao.medir(self.etapa, self.modulo, _linhas_argumentos(args, kwargs),
+                                       classe=classe) as registo:
+            resultado = self.metodo(*args, **kwargs)
+            if registo.get('linhas_saida') is None:
+                registo['linhas_saida'] = contar_linhas(resultado)
+        return resultado
+
+    def __reduce__(self):
+        # Pools de processos recebem o método original (o coletor não é partilhado)
+        return _metodo_original, (self.metodo.__self__, self.metodo.__name__)
+
+
+# ============================================================
+# COLETOR DE MÉTRICAS
+# ============================================================
+
+class Instrumentacao:
+    """Regista tempo, CPU, linhas e memória de cada etapa (thread-safe)"""
+
+    def __init__(self, memoria=None):
+        """
+        Args:
+            memoria: Medir o pico com tracemalloc (None = memoria_ativa_padrao())
+        """
+        self.memoria = memoria_ativa_padrao() if memoria is None else memoria
+        self.execucao = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.registos = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._abertos = []
+        self._picos = {}
+        self._iniciou_tracemalloc = False
+
+    def _pilha(self):
+        if not hasattr(self._local, 'pilha'):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def medir(self, etapa, modulo=None, linhas_entrada=None, classe=None):
+        """
+        Mede um bloco; devolve o registo (pode-se definir 'linhas_saida')
+
+        Exceções são registadas com status 'erro' e propagadas.
+        """
+        pilha = self._pilha()
+        registo = {
+            'execucao': self.execucao, 'etapa': etapa, 'modulo': modulo, 'classe': classe,
+            'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            'linhas_entrada': linhas_entrada, 'linhas_saida': None,
+            'nivel': len(pilha), 'thread': threading.current_thread().name,
+            'concorrente': False
+        }
+
+        with self._lock:
+            # Etapas de outras threads abertas ao mesmo tempo: ambas ficam marcadas
+            for outro in self._abertos:
+                if outro['thread'] != registo['thread']:
+                    outro['concorrente'] = registo['concorrente'] = True
+            if self.memoria:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._iniciou_tracemalloc = True
+                # O pico é reiniciado a cada etapa; as etapas abertas guardam o pico até aqui
+                self._acumular_pico()
+                tracemalloc.reset_peak()
+                memoria_base = tracemalloc.get_traced_memory()[0]
+                self._picos[id(registo)] = memoria_base
+            self._abertos.append(registo)
+
+        pilha.append(registo)
+        inicio, cpu_inicio = time.perf_counter(), time.thread_time()
+        try:
+            yield registo
+            registo['status'], registo['erro'] = 'ok', None
+        except Exception as e:
+            registo['status'], registo['erro'] = 'erro', f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registo['tempo_s'] = round(time.perf_counter() - inicio, 4)
+            registo['cpu_s'] = round(time.thread_time() - cpu_inicio, 4)
+            pilha.pop()
+            with self._lock:
+                registo['memoria_pico_mb'] = None
+                if self.memoria:
+                    self._acumular_pico()
+                    pico = self._picos.pop(id(registo), memoria_base)
+                    registo['memoria_pico_mb'] = round(max(pico - memoria_base, 0) / 1024 ** 2, 3)
+                self._abertos = [r for r in self._abertos if r is not registo]
+                self.registos.append({coluna: registo.get(coluna) for coluna in COLUNAS_METRICAS})
+
+    def _acumular_pico(self):
+        """Atualiza o pico de cada etapa aberta com o pico atual do tracemalloc"""
+        if not self._abertos or not tracemalloc.is_tracing():
+            return
+        pico = tracemalloc.get_traced_memory()[1]
+        for aberto in self._abertos:
+            chave = id(aberto)
+            self._picos[chave] = max(self._picos.get(chave, 0), pico)
+
+    def anotar(self, **campos):
+        """Atualiza a etapa ativa da thread atual (ex: linhas_saida=n)"""
+        pilha = self._pilha()
+        if pilha:
+            pilha[-1].update(campos)
+
+    def instrumentar(self, funcao, etapa=None, modulo=None):
+        """Devolve a função/método envolvido (as chamadas passam a ser medidas)"""
+        if isinstance(funcao, MetodoInstrumentado):
+            return funcao
+        return MetodoInstrumentado(self, funcao, etapa or funcao.__name__, modulo)
+
+    def instrumentar_objeto(self, objeto, modulo=None, prefixos=PREFIXOS_ETAPAS):
+        """
+        Substitui, no próprio objeto, os métodos cujo nome começa por um
+        dos prefixos (chamadas internas self.criar_* também são medidas)
+
+        Returns:
+            O objeto (para encadear)
+        """
+        for nome in dir(type(objeto)):
+            if not nome.startswith(prefixos):
+                continue
+            metodo = getattr(objeto, nome)
+            if callable(metodo) and not isinstance(metodo, MetodoInstrumentado):
+                setattr(objeto, nome, MetodoInstrumentado(self, metodo, nome, modulo))
+        return objeto
+
+    # ------------------------------------------------------------
+    # RESULTADOS
+    # ------------------------------------------------------------
+
+    def registos_dataframe(self):
+        """Registos como DataFrame (uma linha por etapa, ordem de conclusão)"""
+        with self._lock:
+            return pd.DataFrame(list(self.registos), columns=COLUNAS_METRICAS)
+
+    def gravar_jsonl(self, caminho, acrescentar=False):
+        """
+        Grava os registos em JSON-lines
+
+        Args:
+            caminho: Ficheiro de destino (a pasta é criada se preciso)
+            acrescentar: Acrescentar ao ficheiro em vez de o substituir
+
+        Returns:
+            Path do ficheiro gravado
+        """
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            registos = list(self.registos)
+        with open(caminho, 'a' if acrescentar else 'w', encoding='utf-8') as f:
+            for registo in registos:
+                f.write(json.dumps(registo, ensure_ascii=False, default=str) + '\n')
+        return caminho
+
+    def tabela_resumo(self, limite=None):
+        """
+        Linhas de texto com as etapas ordenadas por tempo (mais lentas primeiro)
+
+        Etapas aninhadas aparecem indentadas; o total soma apenas as de topo.
+        """
+        df = self.registos_dataframe()
+        if df.empty:
+            return ["Nenhuma etapa instrumentada"]
+
+        topo = df[df['nivel'] == 0]
+        linhas = [
+            f"Métricas por etapa ({len(df)} registos, {topo['tempo_s'].sum():.3f}s nas etapas de topo)",
+            f"  {'etapa':<48} {'tempo_s':>8} {'cpu_s':>8} {'entrada':>10} {'saida':>10} {'pico_mb':>9}"
+        ]
+
+        def valor(v, formato):
+            return '-' if v is None or pd.isna(v) else format(v, formato)
+
+        ordenado = df.sort_values('tempo_s', ascending=False, kind='stable')
+        if limite:
+            ordenado = ordenado.head(limite)
+        for r in ordenado.itertuples(index=False):
+            nome = '  ' * int(r.nivel) + r.etapa + (' *' if r.concorrente else '') + \
+                (' [ERRO]' if r.status == 'erro' else '')
+            linhas.append(
+                f"  {nome:<48} {r.tempo_s:>8.3f} {r.cpu_s:>8.3f} "
+                f"{valor(r.linhas_entrada, ',.0f'):>10} {valor(r.linhas_saida, ',.0f'):>10} "
+                f"{valor(r.memoria_pico_mb, '.1f'):>9}"
+            )
+        if df['concorrente'].any():
+            linhas.append("  * executada em paralelo: pico de memória partilhado com outras etapas")
+        return linhas
+
+    def limpar(self):
+        """Descarta os registos e para o tracemalloc (se foi iniciado aqui)"""
+        with self._lock:
+            self.registos = []
+            if self._iniciou_tracemalloc and not self._abertos:
+                tracemalloc.stop()
+                self._iniciou_tracemalloc = False
+
+
+# Coletor partilhado pelos Logger do processo
+INSTRUMENTACAO = Instrumentacao()
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import tempfile
+    import numpy as np
+
+    class TransformadorTeste:
+        def criar_dim_teste(self, n):
+            return pd.DataFrame({'id': np.arange(n)})
+
+        def criar_fact_teste(self, dim):
+            self.criar_dim_teste(10)
+            return pd.concat([dim] * 3, ignore_index=True)
+
+        def exportar_falha(self):
+            raise ValueError("falha simulada")
+
+    coletor = Instrumentacao(memoria=True)
+    transformador = coletor.instrumentar_objeto(TransformadorTeste(), 'TESTE')
+    dim = transformador.criar_dim_teste(200_000)
+    transformador.criar_fact_teste(dim)
+    try:
+        transformador.exportar_falha()
+    except ValueError:
+        pass
+    with coletor.medir('bloco_manual', 'TESTE') as etapa:
+        etapa['linhas_saida'] = 42
+
+    for linha in coletor.tabela_resumo():
+        print(linha)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = coletor.gravar_jsonl(Path(pasta) / 'metricas.jsonl')
+        print(f"\n{sum(1 for _ in open(caminho, encoding='utf-8'))} linhas em {caminho.name}")
+    coletor.limpar()
+
+    print("\n✓ Módulo instrumentacao.py carregado com sucesso!")
@@ -0,0 +1,330 @@
+"""
+============================================================
+VERIFICADOR DE INTEGRIDADE REFERENCIAL
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Verifica FKs de tabelas fato contra as PKs das dimensões sem
+converter colunas em set de Python:
+
+- PKs inteiras: array int64 ordenado + np.isin
+- Outros tipos: pd.Index único + get_indexer
+- Relacionamentos agrupados pela dimensão partilhada: as chaves
+  de cada dimensão são preparadas uma única vez por validação
+
+Cada relacionamento devolve contagens de órfãos (linhas e valores
+distintos) e uma amostra dos índices das linhas órfãs.
+
+IndiceChaves resolve colunas inteiras de chaves naturais nas chaves
+substitutas de uma dimensão (usado pelas classes Lookup*).
+
+Exemplo:
+    verificador = VerificadorIntegridade(tamanho_amostra=5)
+    resultados = verificador.verificar(tabelas, [
+        {'fato': 'Fact_X', 'fk': 'sexo_id', 'dimensao': 'Dim_Sexo', 'pk': 'sexo_id'},
+    ])
+============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+
+COLUNAS_RESULTADO = [
+    'fato', 'fk', 'dimensao', 'pk', 'status', 'linhas_verificadas',
+    'linhas_orfas', 'valores_orfaos', 'amostra_linhas', 'amostra_valores', 'mensagem'
+]
+
+
+# ============================================================
+# CHAVES E MÁSCARA DE ÓRFÃOS
+# ============================================================
+
+def _inteiros(valores):
+    """Converte para int64 se todos os valores forem inteiros (senão None)"""
+    if not (pd.api.types.is_numeric_dtype(valores.dtype) and not pd.api.types.is_bool_dtype(valores.dtype)):
+        return None
+    numeros = valores.to_numpy(dtype='float64', na_value=np.nan) \
+        if not pd.api.types.is_integer_dtype(valores.dtype) else valores.to_numpy(dtype='int64')
+    if numeros.dtype.kind == 'f' and not np.array_equal(numeros, np.round(numeros)):
+        return None
+    return numeros.astype('int64')
+
+
+def preparar_chaves(valores_pk):
+    """
+    Prepara as chaves de uma dimensão para testes de pertença
+
+    Returns:
+        np.ndarray int64 ordenado (PKs inteiras) ou pd.Index único
+    """
+    pk = pd.Series(valores_pk).dropna()
+    inteiros = _inteiros(pk)
+    if inteiros is not None:
+        return np.unique(inteiros)
+    return pd.Index(pk.unique())
+
+
+def mascara_orfaos(serie_fk, chaves, nulos_sao_orfaos=False):
+    """
+    Máscara booleana das linhas cujo valor de FK não existe nas chaves
+
+    Args:
+        serie_fk: Coluna FK (Series)
+        chaves: Resultado de preparar_chaves() ou valores da PK
+        nulos_sao_orfaos: Se True, FKs nulas também contam como órfãs
+
+    Returns:
+        np.ndarray bool com o comprimento da coluna
+    """
+    if not isinstance(chaves, (np.ndarray, pd.Index)):
+        chaves = preparar_chaves(chaves)
+
+    serie_fk = pd.Series(serie_fk)
+    nulos = serie_fk.isna().to_numpy()
+    orfaos = np.zeros(len(serie_fk), dtype=bool)
+    if nulos.all():
+        return nulos.copy() if nulos_sao_orfaos else orfaos
+
+    valores = serie_fk[~nulos]
+    inteiros = _inteiros(valores) if isinstance(chaves, np.ndarray) else None
+    if inteiros is not None:
+        presentes = np.isin(inteiros, chaves)
+    else:
+        indice = chaves if isinstance(chaves, pd.Index) else pd.Index(chaves)
+        presentes = indice.get_indexer(valores.to_numpy()) >= 0
+
+    orfaos[~nulos] = ~presentes
+    if nulos_sao_orfaos:
+        orfaos |= nulos
+    return orfaos
+
+
+def orfaos_fk(serie_fk, chaves, tamanho_amostra=5, nulos_sao_orfaos=False):
+    """
+    Contagens de órfãos de uma coluna FK
+
+    Returns:
+        dict com linhas_verificadas, linhas_orfas, valores_orfaos,
+        amostra_linhas (rótulos do índice) e amostra_valores
+    """
+    serie_fk = pd.Series(serie_fk)
+    mascara = mascara_orfaos(serie_fk, chaves, nulos_sao_orfaos)
+    orfas = serie_fk[mascara]
+    distintos = orfas.drop_duplicates()
+
+    return {
+        'linhas_verificadas': int(len(serie_fk)),
+        'linhas_orfas': int(mascara.sum()),
+        'valores_orfaos': int(len(distintos)),
+        'amostra_linhas': orfas.index[:tamanho_amostra].tolist(),
+        'amostra_valores': distintos.iloc[:tamanho_amostra].tolist(),
+    }
+
+
+# ============================================================
+# RESOLUÇÃO DE FKs EM LOTE
+# ============================================================
+
+class IndiceChaves:
+    """Índice chave natural -> chave substituta (ID) de uma dimensão"""
+
+    def __init__(self, chaves, ids):
+        """
+        Args:
+            chaves: Chaves naturais (únicas; ver de_dict / de_dataframe)
+            ids: Chaves substitutas inteiras, na mesma ordem
+        """
+        self.indice = pd.Index(chaves)
+        self.ids = np.asarray(ids, dtype='int64')
+        if not self.indice.is_unique:
+            raise ValueError("IndiceChaves exige chaves naturais únicas")
+
+    @classmethod
+    def de_dict(cls, mapa):
+        """Índice a partir de um dict chave -> id (ids nulos são ignorados)"""
+        pares = [(chave, id_) for chave, id_ in mapa.items() if not pd.isna(id_)]
+        return cls([chave for chave, _ in pares], [id_ for _, id_ in pares])
+
+    @classmethod
+    def de_dataframe(cls, df, coluna_chave, coluna_id, manter='last'):
+        """
+        Índice a partir de colunas de uma dimensão
+
+        Args:
+            manter: Chave repetida fica com o 'last' (como dict/to_dict) ou 'first' id
+        """
+        validos = df[df[coluna_id].notna()]
+        validos = validos[~validos[coluna_chave].duplicated(keep=manter)]
+        return cls(validos[coluna_chave].to_numpy(), validos[coluna_id].to_numpy())
+
+    def __len__(self):
+        return len(self.indice)
+
+    def resolver(self, valores):
+        """
+        Resolve uma coluna de chaves naturais numa só passagem
+
+        Args:
+            valores: Series, array ou lista de chaves naturais
+
+        Returns:
+            (ids, nao_resolvidos): Series Int64 com o índice da entrada
+            (NA onde a chave não existe ou é nula) e máscara booleana das
+            linhas não resolvidas
+        """
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores, dtype=object)
+        if len(self.indice) == 0:
+            posicoes = np.full(len(serie), -1, dtype='intp')
+        else:
+            posicoes = self.indice.get_indexer(serie.to_numpy())
+        nao_resolvidos = posicoes < 0
+
+        ids = np.zeros(len(serie), dtype='int64')
+        ids[~nao_resolvidos] = self.ids[posicoes[~nao_resolvidos]]
+        ids = pd.Series(pd.arrays.IntegerArray(ids, nao_resolvidos.copy()), index=serie.index, name=serie.name)
+        return ids, nao_resolvidos
+
+
+def resumo_nao_resolvidas(valores, nao_resolvidos, tamanho_amostra=5):
+    """
+    Contagens das chaves não resolvidas (para relatórios)
+
+    Returns:
+        dict com linhas, valores distintos (não nulos) e amostra de valores
+    """
+    serie = pd.Series(valores) if not isinstance(valores, pd.Series) else valores
+    orfas = serie[np.asarray(nao_resolvidos)]
+    distintos = orfas.dropna().drop_duplicates()
+    return {
+        'linhas': int(len(orfas)),
+        'valores': int(len(distintos)),
+        'amostra_valores': distintos.iloc[:tamanho_amostra].tolist(),
+    }
+
+
+# ============================================================
+# VERIFICADOR (TODOS OS RELACIONAMENTOS NUMA PASSAGEM)
+# ============================================================
+
+class VerificadorIntegridade:
+    """Valida relacionamentos FK -> PK agrupados por dimensão"""
+
+    def __init__(self, tamanho_amostra=5, nulos_sao_orfaos=False):
+        """
+        Args:
+            tamanho_amostra: Nº máximo de linhas/valores órfãos na amostra
+            nulos_sao_orfaos: Se True, FKs nulas contam como órfãs
+        """
+        self.tamanho_amostra = tamanho_amostra
+        self.nulos_sao_orfaos = nulos_sao_orfaos
+        self.resultados = []
+
+    def _resultado(self, rel, status, mensagem=None, **contagens):
+        resultado = {coluna: None for coluna in COLUNAS_RESULTADO}
+        resultado.update({
+            'fato': rel['fato'], 'fk': rel['fk'], 'dimensao': rel['dimensao'], 'pk': rel['pk'],
+            'status': status, 'mensagem': mensagem,
+            'linhas_verificadas': 0, 'linhas_orfas': 0, 'valores_orfaos': 0,
+            'amostra_linhas': [], 'amostra_valores': []
+        })
+        resultado.update(contagens)
+        return resultado
+
+    def verificar(self, tabelas, relacionamentos):
+        """
+        Valida todos os relacionamentos
+
+        Args:
+            tabelas: dict nome -> DataFrame
+            relacionamentos: lista de dicts com 'fato', 'fk', 'dimensao', 'pk'
+
+        Returns:
+            Lista de resultados (um dict por relacionamento, na ordem dada).
+            status: 'ok', 'orfaos', 'tabela_ausente' ou 'coluna_ausente'
+        """
+        resultados = [None] * len(relacionamentos)
+
+        # Agrupar por (dimensão, PK) para preparar cada conjunto de chaves uma vez
+        grupos = {}
+        for posicao, rel in enumerate(relacionamentos):
+            grupos.setdefault((rel['dimensao'], rel['pk']), []).append(posicao)
+
+        for (dimensao, pk), posicoes in grupos.items():
+            chaves = None
+            if dimensao in tabelas and pk in tabelas[dimensao].columns:
+                chaves = preparar_chaves(tabelas[dimensao][pk])
+
+            for posicao in posicoes:
+                rel = relacionamentos[posicao]
+                resultados[posicao] = self._verificar_relacionamento(rel, tabelas, chaves)
+
+        self.resultados = resultados
+        return resultados
+
+    def _verificar_relacionamento(self, rel, tabelas, chaves):
+        if rel['fato'] not in tabelas:
+            return self._resultado(rel, 'tabela_ausente', f"Tabela de fato {rel['fato']} não encontrada")
+        if rel['dimensao'] not in tabelas:
+            return self._resultado(rel, 'tabela_ausente', f"Tabela de dimensão {rel['dimensao']} não encontrada")
+        if rel['fk'] not in tabelas[rel['fato']].columns:
+            return self._resultado(rel, 'coluna_ausente', f"FK {rel['fk']} não existe em {rel['fato']}")
+        if chaves is None:
+            return self._resultado(rel, 'coluna_ausente', f"PK {rel['pk']} não existe em {rel['dimensao']}")
+
+        contagens = orfaos_fk(
+            tabelas[rel['fato']][rel['fk']], chaves, self.tamanho_amostra, self.nulos_sao_orfaos
+        )
+        if contagens['linhas_orfas'] == 0:
+            return self._resultado(rel, 'ok', **contagens)
+
+        mensagem = (
+            f"ERRO DE INTEGRIDADE: {rel['fato']}.{rel['fk']} -> "
+            f"{rel['dimensao']}.{rel['pk']}: "
+            f"{contagens['valores_orfaos']} valores órfãos encontrados "
+            f"({contagens['linhas_orfas']} linhas, ex.: {contagens['amostra_valores']})"
+        )
+        return self._resultado(rel, 'orfaos', mensagem, **contagens)
+
+    def erros(self):
+        """Mensagens dos relacionamentos com problemas"""
+        return [r['mensagem'] for r in self.resultados if r['status'] != 'ok']
+
+    def resultados_dataframe(self):
+        """Resultados como DataFrame (uma linha por relacionamento)"""
+        return pd.DataFrame(self.resultados, columns=COLUNAS_RESULTADO)
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import time
+
+    dim_sexo = pd.DataFrame({'sexo_id': [1, 2], 'tipo_sexo': ['M', 'F']})
+    dim_nac = pd.DataFrame({'nacionalidade_id': np.arange(1, 201), 'nome': [f"P{i}" for i in range(200)]})
+
+    rng = np.random.default_rng(0)
+    n = 2_000_000
+    fato = pd.DataFrame({
+        'sexo_id': rng.integers(1, 3, n),
+        'nacionalidade_id': rng.integers(1, 202, n).astype('float64'),
+    })
+    fato.loc[::1000, 'nacionalidade_id'] = np.nan
+
+    tabelas = {'Dim_Sexo': dim_sexo, 'Dim_Nacionalidade': dim_nac, 'Fact_Teste': fato}
+    relacionamentos = [
+        {'fato': 'Fact_Teste', 'fk': 'sexo_id', 'dimensao': 'Dim_Sexo', 'pk': 'sexo_id'},
+        {'fato': 'Fact_Teste', 'fk': 'nacionalidade_id', 'dimensao': 'Dim_Nacionalidade', 'pk': 'nacionalidade_id'},
+        {'fato': 'Fact_Ausente', 'fk': 'sexo_id', 'dimensao': 'Dim_Sexo', 'pk': 'sexo_id'},
+    ]
+
+    inicio = time.time()
+    verificador = VerificadorIntegridade()
+    verificador.verificar(tabelas, relacionamentos)
+    print(f"Verificação de {n:,} linhas x {len(relacionamentos)} relacionamentos: {time.time() - inicio:.3f}s")
+    print(verificador.resultados_dataframe()[['fato', 'fk', 'status', 'linhas_orfas', 'valores_orfaos', 'amostra_linhas']])
+    for erro in verificador.erros():
+        print(f"  - {erro}")
+
+    print("\n✓ Módulo integridade_referencial.py carregado com sucesso!")
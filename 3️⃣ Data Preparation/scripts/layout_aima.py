@@ -0,0 +1,378 @@
+"""
+============================================================
+DETEÇÃO DE LAYOUT DOS FICHEIROS AIMA (RIFA / RMA)
+Pipelines ETL - AIMA
+============================================================
+Os CSVs de motivos (e outros quadros AIMA) mudam de forma entre
+relatórios: nos RIFA 2020-2022 os países estão nas linhas e os
+motivos nas colunas ("formato largo"); nos RMA 2023+ os motivos
+estão nas linhas ("formato longo"), com cabeçalhos como 'MOTIVO',
+'Motivo', 'Concessões' ou 'Total de Residentes'. Em vez de ramos
+por ano e mapas de colunas fixos, cada ficheiro é classificado
+uma única vez:
+
+- Codificação (decodificacao_entradas.detetar_codificacao),
+  separador e linha de cabeçalho, numa amostra de bytes
+- Papel de cada coluna (nacionalidade, motivo, total, ano), pelo
+  nome e pelo tipo dos valores; formato largo ou longo
+- Especificação guardada por impressão digital do ficheiro
+  (em memória e, opcionalmente, num JSON): as execuções seguintes
+  saltam a sondagem e fazem uma leitura vetorizada com
+  usecols/dtype
+
+Qualquer dos formatos é devolvido em formato longo normalizado:
+nacionalidade (vazia nos RMA), motivo, total.
+
+Usado por:
+- processar_motivos.py (DP-02-A)
+- padronizar_colunas_motivos (DP-02-A2/etl_motivos_residencia_colab.py)
+
+Exemplo:
+    detetor = DetetorLayoutAIMA(caminho_cache=CAMINHO_CACHE_LAYOUTS)
+    df = detetor.ler_arquivo('RIFA2020 - concessao-titulos_motivo.csv')
+    detetor.guardar_cache()
+============================================================
+"""
+
+import csv
+import io
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from conversor_numerico import ConversorNumerico
+from decodificacao_entradas import (
+    CODIFICACOES_CANDIDATAS, TAMANHO_AMOSTRA, detetar_codificacao, impressao_digital_bytes
+)
+from resolvedor_nacionalidades import dobrar_texto
+
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+# Entra na chave da cache: mudar as regras de deteção invalida as especificações antigas
+VERSAO_LAYOUT = 2
+
+CAMINHO_CACHE_LAYOUTS = Path(__file__).resolve().parent / 'output' / 'layouts_aima.json'
+
+SEPARADORES_CANDIDATOS = (',', ';', '\t', '|')
+
+# Linhas da amostra usadas para o separador, o cabeçalho e os tipos
+LINHAS_SONDAGEM = 50
+
+# Papel -> padrão no nome da coluna (sem acentos/maiúsculas). Nacionalidade e
+# motivo só em colunas de texto; total e ano só em colunas numéricas
+PAPEIS_COLUNAS = {
+    'ano': re.compile(r'^(ano|year)$'),
+    'nacionalidade': re.compile(r'nacionalidade|\bpais\b|country'),
+    'motivo': re.compile(r'motivo'),
+    'total': re.compile(r'total|concess|quantidade|numero|residentes|pessoas'),
+}
+
+COLUNAS_NORMALIZADAS = ['nacionalidade', 'motivo', 'total']
+
+_RE_INTEIRO = re.compile(r'^[-+]?\d+$')
+
+
+# ============================================================
+# CLASSIFICAÇÃO DAS COLUNAS
+# ============================================================
+
+def _eh_numerica(serie):
+    """Coluna numérica: todos os valores não vazios convertem (formato INE/AIMA)"""
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return not pd.api.types.is_bool_dtype(serie.dtype)
+    _, relatorio = ConversorNumerico.converter_serie(serie, retornar_relatorio=True)
+    return relatorio['convertidos'] > 0 and relatorio['falhas'] == 0
+
+
+def _papel(coluna, numerica):
+    chave = dobrar_texto(coluna)
+    for papel, padrao in PAPEIS_COLUNAS.items():
+        if (papel in ('ano', 'total')) == numerica and padrao.search(chave):
+            return papel
+    return None
+
+
+def classificar_colunas(df):
+    """
+    Papel de cada coluna de uma tabela de motivos AIMA
+
+    Args:
+        df: DataFrame (ou amostra) com o cabeçalho já aplicado
+
+    Returns:
+        dict com formato ('largo' | 'longo'), coluna_nacionalidade,
+        coluna_motivo, coluna_total, coluna_ano (None se ausentes) e
+        colunas_motivos (formato largo: uma coluna por motivo)
+    """
+    numericas = {col: _eh_numerica(df[col]) for col in df.columns}
+    papeis = {}
+    for col in df.columns:
+        papel = _papel(col, numericas[col])
+        if papel is not None:
+            papeis.setdefault(papel, col)
+
+    colunas_motivos = [
+        col for col in df.columns
+        if numericas[col] and col not in (papeis.get('total'), papeis.get('ano'))
+    ]
+    largo = 'motivo' not in papeis and len(colunas_motivos) >= 2
+    texto = [col for col in df.columns if not numericas[col]]
+
+    if largo:
+        papeis.setdefault('nacionalidade', texto[0] if texto else None)
+    else:
+        # Motivos nas linhas: a única coluna numérica que sobra é o total
+        if 'total' not in papeis and len(colunas_motivos) == 1:
+            papeis['total'] = colunas_motivos[0]
+        livres = [col for col in texto if col != papeis.get('nacionalidade')]
+        if 'motivo' not in papeis and livres:
+            papeis['motivo'] = livres[0]
+        colunas_motivos = []
+
+    return {
+        'formato': 'largo' if largo else 'longo',
+        'coluna_nacionalidade': papeis.get('nacionalidade'),
+        'coluna_motivo': papeis.get('motivo'),
+        'coluna_total': papeis.get('total'),
+        'coluna_ano': papeis.get('ano'),
+        'colunas_motivos': colunas_motivos,
+    }
+
+
+def para_formato_longo(df, papeis):
+    """
+    Tabela de motivos em formato longo normalizado
+
+    Args:
+        df: Tabela lida
+        papeis: Resultado de classificar_colunas (ou especificação do detetor)
+
+    Returns:
+        DataFrame com as colunas não classificadas (ex.: 'ano', 'fonte')
+        seguidas de nacionalidade, motivo e total; motivo sem espaços nas pontas
+    """
+    if papeis['formato'] == 'largo':
+        identificadores = [
+            col for col in df.columns
+            if col not in papeis['colunas_motivos'] and col != papeis['coluna_total']
+        ]
+        longo = df.melt(id_vars=identificadores, value_vars=papeis['colunas_motivos'],
+                        var_name='motivo', value_name='total')
+        longo = longo.rename(columns={papeis['coluna_nacionalidade']: 'nacionalidade'})
+    else:
+        renomear = {
+            papeis['coluna_nacionalidade']: 'nacionalidade',
+            papeis['coluna_motivo']: 'motivo',
+            papeis['coluna_total']: 'total',
+        }
+        longo = df.rename(columns={k: v for k, v in renomear.items() if k is not None})
+
+    if 'nacionalidade' not in longo.columns:
+        longo['nacionalidade'] = pd.NA
+    longo['motivo'] = longo['motivo'].astype(str).str.strip()
+    if not pd.api.types.is_numeric_dtype(longo['total'].dtype):
+        longo['total'] = ConversorNumerico.converter_serie(longo['total'])
+
+    outras = [col for col in longo.columns if col not in COLUNAS_NORMALIZADAS]
+    return longo[outras + COLUNAS_NORMALIZADAS]
+
+
+# ============================================================
+# SONDAGEM DO FICHEIRO
+# ============================================================
+
+def _detetar_separador(linhas):
+    """Separador com mais linhas com o mesmo número (>= 2) de campos"""
+    melhor, pontuacao_melhor = ',', (0, 0)
+    for separador in SEPARADORES_CANDIDATOS:
+        larguras = [len(r) for r in csv.reader(linhas, delimiter=separador) if any(c.strip() for c in r)]
+        if not larguras:
+            continue
+        largura, vezes = Counter(larguras).most_common(1)[0]
+        pontuacao = (vezes / len(larguras), largura) if largura >= 2 else (0, 0)
+        if pontuacao > pontuacao_melhor:
+            melhor, pontuacao_melhor = separador, pontuacao
+    return melhor
+
+
+def _detetar_cabecalho(linhas):
+    """Primeira linha só com texto seguida de uma linha com algum número"""
+    largura = Counter(len(r) for r in linhas if any(c.strip() for c in r)).most_common(1)[0][0]
+    for i, (linha, seguinte) in enumerate(zip(linhas, linhas[1:])):
+        preenchidas = [c for c in linha if c.strip()]
+        if len(linha) != largura or len(preenchidas) < 2:
+            continue
+        sem_numeros = all(ConversorNumerico.converter_valor(c) is None for c in preenchidas)
+        if sem_numeros and any(ConversorNumerico.converter_valor(c) is not None for c in seguinte):
+            return i
+    return 0
+
+
+def sondar_layout(conteudo, candidatas=CODIFICACOES_CANDIDATAS, tamanho_amostra=TAMANHO_AMOSTRA):
+    """
+    Especificação de leitura de um ficheiro AIMA a partir de uma amostra
+
+    Returns:
+        dict JSON-serializável: codificacao, separador, linha_cabecalho,
+        colunas (cabeçalho completo), tipos (dtype por coluna usada) e os
+        papéis de classificar_colunas
+    """
+    amostra = conteudo[:tamanho_amostra]
+    # Codificação sobre o conteúdo inteiro (já em memória): um byte não ASCII
+    # depois da amostra não pode invalidar a decisão
+    codificacao = detetar_codificacao(conteudo, candidatas)
+    if codificacao is None:
+        raise ValueError(f"Nenhuma codificação de {tuple(candidatas)} descodifica o ficheiro")
+
+    linhas = amostra.decode(codificacao, errors='ignore').lstrip('\ufeff').splitlines()
+    if len(conteudo) > tamanho_amostra:
+        linhas = linhas[:-1]          # última linha possivelmente cortada
+    linhas = linhas[:LINHAS_SONDAGEM]
+
+    separador = _detetar_separador(linhas)
+    tabela = list(csv.reader(linhas, delimiter=separador))
+    linha_cabecalho = _detetar_cabecalho(tabela)
+    colunas = tabela[linha_cabecalho]
+    corpo = [r + [''] * (len(colunas) - len(r)) for r in tabela[linha_cabecalho + 1:] if any(c.strip() for c in r)]
+    amostra_df = pd.DataFrame([r[:len(colunas)] for r in corpo], columns=colunas, dtype=object)
+
+    papeis = classificar_colunas(amostra_df)
+    usadas = [
+        col for col in colunas
+        if col in papeis['colunas_motivos'] or col in (
+            papeis['coluna_nacionalidade'], papeis['coluna_motivo'], papeis['coluna_total'], papeis['coluna_ano']
+        )
+    ]
+
+    # Inteiros simples na amostra: leitura direta como Int64; o resto (milhares,
+    # decimais, marcadores) é lido como texto e convertido pelo ConversorNumerico
+    tipos = {}
+    for col in usadas:
+        if col in (papeis['coluna_nacionalidade'], papeis['coluna_motivo']):
+            tipos[col] = 'str'
+        else:
+            valores = amostra_df[col].astype(str).str.strip()
+            valores = valores[valores != '']
+            tipos[col] = 'Int64' if len(valores) and valores.str.match(_RE_INTEIRO).all() else 'str'
+
+    return {
+        'versao': VERSAO_LAYOUT,
+        'codificacao': codificacao,
+        'separador': separador,
+        'linha_cabecalho': linha_cabecalho,
+        'colunas': colunas,
+        'usecols': usadas,
+        'tipos': tipos,
+        **papeis,
+    }
+
+
+# ============================================================
+# DETETOR COM CACHE
+# ============================================================
+
+class DetetorLayoutAIMA:
+    """Classifica cada ficheiro AIMA uma vez e lê-o com a especificação guardada"""
+
+    def __init__(self, caminho_cache=None, candidatas=CODIFICACOES_CANDIDATAS,
+                 tamanho_amostra=TAMANHO_AMOSTRA):
+        """
+        Args:
+            caminho_cache: JSON com as especificações anteriores (None = só em memória)
+            candidatas: Codificações a experimentar, por ordem
+            tamanho_amostra: Bytes usados na sondagem e na impressão digital
+        """
+        self.caminho_cache = Path(caminho_cache) if caminho_cache else None
+        self.candidatas = tuple(candidatas)
+        self.tamanho_amostra = tamanho_amostra
+        self.especificacoes = self._carregar_cache()
+        self.contagens = Counter()
+
+    def _carregar_cache(self):
+        """Especificações guardadas numa execução anterior"""
+        if self.caminho_cache is None or not self.caminho_cache.exists():
+            return {}
+        try:
+            with open(self.caminho_cache, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def guardar_cache(self):
+        """Grava as especificações no JSON (se houver caminho_cache)"""
+        if self.caminho_cache is None:
+            return
+        self.caminho_cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.caminho_cache, 'w', encoding='utf-8') as f:
+            json.dump(self.especificacoes, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+    def detetar(self, conteudo):
+        """Especificação do ficheiro (sondada só na primeira vez que o conteúdo aparece)"""
+        chave = f"v{VERSAO_LAYOUT}:{impressao_digital_bytes(conteudo, self.tamanho_amostra)}"
+        if chave in self.especificacoes:
+            self.contagens['em_cache'] += 1
+            return self.especificacoes[chave]
+
+        especificacao = sondar_layout(conteudo, self.candidatas, self.tamanho_amostra)
+        self.contagens['sondados'] += 1
+        self.especificacoes[chave] = especificacao
+        return especificacao
+
+    @staticmethod
+    def ler_com_especificacao(conteudo, especificacao):
+        """
+        Leitura vetorizada (usecols/dtype) e conversão para o formato longo;
+        a especificação fica em df.attrs['layout']
+        """
+        opcoes = dict(
+            sep=especificacao['separador'], encoding=especificacao['codificacao'],
+            skiprows=especificacao['linha_cabecalho'], usecols=especificacao['usecols'],
+            skip_blank_lines=True
+        )
+        try:
+            df = pd.read_csv(io.BytesIO(conteudo), dtype=especificacao['tipos'], **opcoes)
+        except (ValueError, TypeError):
+            # Valor não inteiro fora da amostra: lê como texto e converte
+            df = pd.read_csv(io.BytesIO(conteudo), dtype=str, **opcoes)
+        longo = para_formato_longo(df, especificacao)
+        longo.attrs['layout'] = especificacao
+        return longo
+
+    def ler(self, conteudo):
+        """
+        Tabela em formato longo normalizado a partir dos bytes do ficheiro
+
+        Returns:
+            DataFrame com nacionalidade, motivo, total (e ano, se existir)
+        """
+        return self.ler_com_especificacao(conteudo, self.detetar(conteudo))
+
+    def ler_arquivo(self, caminho):
+        """Como ler(), a partir de um caminho"""
+        return self.ler(Path(caminho).read_bytes())
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    largo = (
+        "País,Total de Títulos,Reagrupamento Familiar,Atividade Profissional ,Estudo\n"
+        "Angola,4829,2062,512,1705\nBrasil,42245,19855,15335,5407\n"
+    ).encode('utf-8')
+    longo = "MOTIVO;Concessões\nAcordo CPLP ;149.174\nEstudo;23.876\n".encode('cp1252')
+
+    detetor = DetetorLayoutAIMA()
+    for conteudo in (largo, longo, largo):
+        especificacao = detetor.detetar(conteudo)
+        print(f"{especificacao['formato']:>5} sep={especificacao['separador']!r} "
+              f"{especificacao['codificacao']} tipos={especificacao['tipos']}")
+        print(detetor.ler(conteudo).to_string(index=False), "\n")
+    print("Contagens:", dict(detetor.contagens))
@@ -0,0 +1,404 @@
+"""
+============================================================
+MANIFESTO DE BUILD INCREMENTAL
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Regista, para cada estágio (EDUCACAO, LABORAL, AIMA):
+- hash de conteúdo (SHA-256) de cada ficheiro de entrada
+- hash de conteúdo de cada tabela de saída
+- de que entradas depende cada tabela e que estágio a produziu
+
+Numa nova execução apenas as tabelas cujas entradas mudaram são
+reconstruídas; as restantes são lidas da cache do build anterior.
+Se nenhuma entrada mudou, o estágio inteiro é ignorado.
+
+Ficheiros gerados em output/:
+- manifesto_build.json   (manifesto)
+- .cache_build/<ESTAGIO>/ (tabelas do último build)
+
+Variável de ambiente ETL_REBUILD_COMPLETO=1 força reconstrução total.
+============================================================
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import types
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+
+from formatos_tabela import EscritorTabelas, PYARROW_DISPONIVEL, ler_tabela
+
+
+# ============================================================
+# FUNÇÕES DE HASH
+# ============================================================
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um ficheiro (lido em blocos de 1 MB)"""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def arquivos_codigo(*modulos):
+    """
+    Ficheiros .py da pasta scripts/ de que os módulos dependem
+
+    Segue, recursivamente, os módulos e os objetos (classes, funções,
+    instâncias) importados por cada módulo: um ETL que importa
+    RESOLVEDOR_NACIONALIDADES depende de resolvedor_nacionalidades.py e
+    dos módulos locais que este importa. Alterar qualquer um deles muda
+    o hash de código do estágio e força a reconstrução.
+
+    Args:
+        modulos: Módulos ou nomes de módulos (ex.: sys.modules[__name__])
+
+    Returns:
+        Lista ordenada de Paths
+    """
+    pasta = Path(__file__).resolve().parent
+    pendentes = [sys.modules[m] if isinstance(m, str) else m for m in modulos]
+    arquivos = set()
+    while pendentes:
+        modulo = pendentes.pop()
+        arquivo = getattr(modulo, '__file__', None)
+        if not arquivo or Path(arquivo).resolve().parent != pasta or Path(arquivo).resolve() in arquivos:
+            continue
+        arquivos.add(Path(arquivo).resolve())
+        for valor in list(vars(modulo).values()):
+            if isinstance(valor, types.ModuleType):
+                pendentes.append(valor)
+                continue
+            nome = getattr(valor, '__module__', None)
+            if isinstance(nome, str) and nome in sys.modules:
+                pendentes.append(sys.modules[nome])
+    return sorted(arquivos)
+
+
+def hash_tabela(df):
+    """SHA-256 do conteúdo de um DataFrame (colunas, tipos e valores)"""
+    sha = hashlib.sha256()
+    sha.update('|'.join(f"{col}:{tipo}" for col, tipo in df.dtypes.astype(str).items()).encode('utf-8'))
+    sha.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return sha.hexdigest()
+
+
+# ============================================================
+# PLANO DE BUILD
+# ============================================================
+
+class PlanoBuild:
+    """Resultado da comparação entre as entradas atuais e o manifesto"""
+
+    def __init__(self, estagio, entradas, assinaturas, reconstruir, reutilizar, motivos, forcado=False):
+        self.estagio = estagio
+        self.entradas = entradas          # chave -> {'caminho', 'hash', ...}
+        self.assinaturas = assinaturas    # tabela -> assinatura das dependências
+        self.reconstruir = reconstruir    # tabelas que precisam ser reconstruídas
+        self.reutilizar = reutilizar      # tabelas lidas da cache
+        self.motivos = motivos            # tabela -> motivo da reconstrução
+        self.forcado = forcado
+
+    @property
+    def estagio_inalterado(self):
+        """True se há um build anterior e nenhuma tabela precisa ser reconstruída"""
+        return bool(self.reutilizar) and not self.reconstruir and not self.forcado
+
+    def entradas_necessarias(self, dependencias):
+        """Chaves de entrada usadas pelas tabelas a reconstruir"""
+        chaves = set()
+        for tabela in self.reconstruir:
+            chaves.update(_resolver_dependencias(dependencias.get(tabela, []), self.entradas))
+        return chaves
+
+
+def _resolver_dependencias(padroes, entradas):
+    """Expande padrões ('input/*.csv') para as chaves de entrada existentes"""
+    chaves = []
+    for padrao in padroes:
+        chaves.extend(sorted(c for c in entradas if fnmatch.fnmatchcase(c, padrao)))
+    return list(dict.fromkeys(chaves))
+
+
+# ============================================================
+# MANIFESTO
+# ============================================================
+
+class ManifestoBuild:
+    """Manifesto de hashes de entradas/saídas para rebuilds incrementais"""
+
+    VERSAO = 1
+    NOME_ARQUIVO = 'manifesto_build.json'
+    PASTA_CACHE = '.cache_build'
+
+    def __init__(self, pasta_output, logger=None):
+        self.pasta_output = Path(pasta_output)
+        self.caminho = self.pasta_output / self.NOME_ARQUIVO
+        self.logger = logger
+        self.dados = self._carregar()
+
+    def _log(self, msg):
+        if self.logger is not None:
+            self.logger.info(msg)
+
+    def _carregar(self):
+        vazio = {'versao': self.VERSAO, 'estagios': {}, 'tabelas': {}}
+        if not self.caminho.exists():
+            return vazio
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            self._log(f"Manifesto ilegível ({self.caminho.name}) - build completo")
+            return vazio
+        if dados.get('versao') != self.VERSAO:
+            return vazio
+        return dados
+
+    def salvar(self):
+        """Grava o manifesto de forma atómica (ficheiro temporário + rename)"""
+        self.pasta_output.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temporario, self.caminho)
+
+    # ------------------------------------------------------------
+    # ENTRADAS
+    # ------------------------------------------------------------
+
+    def hashes_entradas(self, estagio, entradas):
+        """
+        Calcula o hash de cada ficheiro de entrada
+
+        Reaproveita o hash do manifesto quando tamanho e data de
+        modificação não mudaram (evita reler ficheiros grandes).
+
+        Args:
+            estagio: Nome do estágio
+            entradas: dict chave lógica -> Path (ex: 'DP-01-A/Nacionalidade.csv')
+        """
+        anteriores = self.dados['estagios'].get(estagio, {}).get('entradas', {})
+        resultado = {}
+        for chave, caminho in entradas.items():
+            caminho = Path(caminho)
+            if not caminho.exists():
+                continue
+            info = caminho.stat()
+            anterior = anteriores.get(chave, {})
+            if (anterior.get('caminho') == str(caminho) and anterior.get('tamanho') == info.st_size
+                    and anterior.get('mtime_ns') == info.st_mtime_ns):
+                hash_atual = anterior['hash']
+            else:
+                hash_atual = hash_arquivo(caminho)
+            resultado[chave] = {
+                'caminho': str(caminho),
+                'hash': hash_atual,
+                'tamanho': info.st_size,
+                'mtime_ns': info.st_mtime_ns
+            }
+        return resultado
+
+    # ------------------------------------------------------------
+    # PLANEAMENTO
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _chave_tabela(estagio, tabela):
+        return f"{estagio}/{tabela}"
+
+    def planejar(self, estagio, entradas, dependencias, codigo=None, forcar=False):
+        """
+        Decide que tabelas reconstruir
+
+        Args:
+            estagio: Nome do estágio (ex: 'AIMA')
+            entradas: dict chave lógica -> Path dos ficheiros de entrada
+            dependencias: dict tabela -> lista de chaves/padrões de entrada
+            codigo: Ficheiros de código do estágio (mudança invalida tudo)
+            forcar: Reconstrói todas as tabelas
+
+        Returns:
+            PlanoBuild
+        """
+        hashes = self.hashes_entradas(estagio, entradas)
+
+        hash_codigo = hashlib.sha256()
+        for arquivo in (codigo or []):
+            if Path(arquivo).exists():
+                hash_codigo.update(hash_arquivo(arquivo).encode('ascii'))
+        hash_codigo = hash_codigo.hexdigest()
+
+        estado = self.dados['estagios'].get(estagio, {})
+        artefato = estado.get('artefato')
+        artefato_ausente = not artefato or not Path(artefato).exists()
+
+        assinaturas, reconstruir, reutilizar, motivos = {}, [], [], {}
+        for tabela, padroes in dependencias.items():
+            chaves = _resolver_dependencias(padroes, hashes)
+            if not chaves:
+                continue  # Nenhuma entrada disponível: tabela não é produzida
+
+            sha = hashlib.sha256(hash_codigo.encode('ascii'))
+            for chave in chaves:
+                sha.update(f"{chave}={hashes[chave]['hash']};".encode('utf-8'))
+            assinaturas[tabela] = sha.hexdigest()
+
+            registo = self.dados['tabelas'].get(self._chave_tabela(estagio, tabela))
+            if forcar:
+                motivo = 'rebuild completo'
+            elif registo is None:
+                motivo = 'sem build anterior'
+            elif registo.get('assinatura') != assinaturas[tabela]:
+                alteradas = [c for c in chaves
+                             if registo.get('entradas', {}).get(c) != hashes[c]['hash']]
+                motivo = f"entradas alteradas: {', '.join(alteradas)}" if alteradas else 'codigo alterado'
+            elif not registo.get('cache') or not Path(registo['cache']).exists():
+                motivo = 'cache ausente'
+            elif artefato_ausente:
+                motivo = 'artefato ausente'
+            else:
+                reutilizar.append(tabela)
+                continue
+            reconstruir.append(tabela)
+            motivos[tabela] = motivo
+
+        return PlanoBuild(estagio, hashes, assinaturas, reconstruir, reutilizar, motivos, forcado=forcar)
+
+    def dependentes(self, chave_entrada):
+        """Tabelas (de qualquer estágio) que dependem de uma entrada"""
+        return sorted(
+            chave for chave, registo in self.dados['tabelas'].items()
+            if any(c == chave_entrada or c.endswith('/' + chave_entrada) for c in registo.get('entradas', {}))
+        )
+
+    # ------------------------------------------------------------
+    # CACHE DE TABELAS
+    # ------------------------------------------------------------
+
+    def _escritor_cache(self):
+        formato = 'parquet' if PYARROW_DISPONIVEL else 'csv'
+        return EscritorTabelas(formato, aplicar_esquema=False)
+
+    def carregar_tabela(self, estagio, tabela):
+        """Lê da cache uma tabela do build anterior"""
+        registo = self.dados['tabelas'][self._chave_tabela(estagio, tabela)]
+        return ler_tabela(registo['cache'])
+
+    def reutilizar_tabelas(self, plano, destino_por_tabela):
+        """
+        Lê da cache as tabelas não reconstruídas
+
+        Args:
+            plano: PlanoBuild
+            destino_por_tabela: função tabela -> dict onde colocar o DataFrame
+        """
+        for tabela in plano.reutilizar:
+            destino = destino_por_tabela(tabela)
+            if tabela not in destino:
+                destino[tabela] = self.carregar_tabela(plano.estagio, tabela)
+                self._log(f"[CACHE] {tabela} reutilizada ({len(destino[tabela])} registros)")
+
+    def registrar(self, plano, tabelas, dependencias, artefato=None):
+        """
+        Regista as tabelas produzidas e o artefato final do estágio
+
+        Args:
+            plano: PlanoBuild usado nesta execução
+            tabelas: dict tabela -> DataFrame (todas as tabelas do estágio)
+            dependencias: dict tabela -> lista de chaves/padrões de entrada
+            artefato: Caminho do ficheiro final (ex: ZIP consolidado)
+        """
+        escritor = self._escritor_cache()
+        pasta_cache = self.pasta_output / self.PASTA_CACHE / plano.estagio
+
+        # Remove registos do estágio que deixaram de ser produzidos
+        prefixo = f"{plano.estagio}/"
+        for chave in [c for c in self.dados['tabelas'] if c.startswith(prefixo)]:
+            if chave[len(prefixo):] not in tabelas:
+                del self.dados['tabelas'][chave]
+
+        for tabela, df in tabelas.items():
+            chave = self._chave_tabela(plano.estagio, tabela)
+            if tabela in plano.reutilizar and chave in self.dados['tabelas']:
+                continue
+            chaves = _resolver_dependencias(dependencias.get(tabela, []), plano.entradas)
+            caminho_cache = escritor.salvar(df, pasta_cache, tabela)
+            self.dados['tabelas'][chave] = {
+                'estagio': plano.estagio,
+                'assinatura': plano.assinaturas.get(tabela),
+                'entradas': {c: plano.entradas[c]['hash'] for c in chaves},
+                'hash': hash_tabela(df),
+                'registros': len(df),
+                'cache': str(caminho_cache)
+            }
+
+        self.dados['estagios'][plano.estagio] = {
+            'entradas': plano.entradas,
+            'tabelas': sorted(tabelas),
+            'artefato': str(artefato) if artefato else None,
+            'atualizado_em': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def artefato(self, estagio):
+        """Caminho do artefato do último build do estágio (ou None)"""
+        return self.dados['estagios'].get(estagio, {}).get('artefato')
+
+    def resumo(self, plano):
+        """Linhas de texto descrevendo o plano (para o logger)"""
+        linhas = [f"Tabelas a reconstruir: {len(plano.reconstruir)} | reutilizadas: {len(plano.reutilizar)}"]
+        for tabela in plano.reconstruir:
+            linhas.append(f"  - {tabela}: {plano.motivos[tabela]}")
+        return linhas
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        (pasta / 'Nacionalidade.csv').write_text('nacionalidade_id,nome\n1,Brasil\n', encoding='utf-8')
+        (pasta / 'Concessoes.csv').write_text('ano,total\n2023,10\n', encoding='utf-8')
+
+        entradas = {
+            'base/Nacionalidade.csv': pasta / 'Nacionalidade.csv',
+            'aima/Concessoes.csv': pasta / 'Concessoes.csv'
+        }
+        dependencias = {
+            'Dim_Nacionalidade': ['base/Nacionalidade.csv'],
+            'Fact_Concessoes': ['aima/*.csv']
+        }
+
+        def executar():
+            manifesto = ManifestoBuild(pasta / 'output')
+            plano = manifesto.planejar('TESTE', entradas, dependencias)
+            tabelas = {t: pd.read_csv(entradas[_resolver_dependencias(dependencias[t], plano.entradas)[0]])
+                       for t in plano.reconstruir}
+            manifesto.reutilizar_tabelas(plano, lambda t: tabelas)
+            artefato = pasta / 'output' / 'artefato.zip'
+            artefato.parent.mkdir(exist_ok=True)
+            artefato.write_bytes(b'zip')
+            manifesto.registrar(plano, tabelas, dependencias, artefato)
+            manifesto.salvar()
+            return plano
+
+        print(f"1ª execução - reconstruir: {executar().reconstruir}")
+        print(f"2ª execução - estágio inalterado: {executar().estagio_inalterado}")
+        (pasta / 'Nacionalidade.csv').write_text('nacionalidade_id,nome\n1,Brasil\n2,Angola\n', encoding='utf-8')
+        print(f"Após alterar Nacionalidade.csv - reconstruir: {executar().reconstruir}")
+        print(f"Dependentes de Nacionalidade.csv: {ManifestoBuild(pasta / 'output').dependentes('Nacionalidade.csv')}")
+
+    print("\n✓ Módulo manifesto_build.py carregado com sucesso!")
@@ -0,0 +1,34 @@
+"""
+============================================================
+REGISTO NUM LOGGER OPCIONAL
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Os módulos partilhados recebem um logger opcional: o Logger de
+cada pipeline (info/sucesso/aviso/erro, nem todos têm sucesso),
+um objeto com apenas info, ou None. registrar_log encaminha a
+mensagem para o método do nível pedido, com info como recurso.
+
+Usado por:
+- fontes_dados, ingestao_aima, dimensoes_conformes (sem logger: silêncio)
+- carga_warehouse, cubo_agregados (sem logger: print, uso em linha de comando)
+- conversor_numerico, formatos_tabela (avisos)
+============================================================
+"""
+
+
+def registrar_log(logger, nivel, mensagem, imprimir=False):
+    """
+    Envia a mensagem para logger.<nivel> (logger.info se não existir)
+
+    Args:
+        logger: Logger dos pipelines ou None
+        nivel: 'info', 'sucesso', 'aviso' ou 'erro'
+        mensagem: Texto a registar
+        imprimir: Sem logger, imprime a mensagem em vez de a descartar
+    """
+    if logger is None:
+        if imprimir:
+            print(mensagem)
+        return
+    registrar = getattr(logger, nivel, None) or logger.info
+    registrar(mensagem)
@@ -0,0 +1,277 @@
+"""
+============================================================
+RESOLVEDOR DE NACIONALIDADES COMPARTILHADO
+Pipelines ETL - Educação, Laboral e AIMA
+============================================================
+Um único serviço para padronizar nomes de nacionalidade/país:
+
+- Reparação de mojibake (UTF-8 lido como cp1252/latin-1 e os
+  caracteres cirílicos dos CSVs laborais exportados em cp866),
+  com a tabela compilada de decodificacao_entradas
+- Dobragem de acentos, maiúsculas e pontuação ("Guiné Bissau",
+  "GUINE-BISSAU" e "Guiné-Bissau" têm a mesma chave)
+- Índice invertido chave dobrada -> nome canónico, construído uma
+  vez a partir de VARIANTES_NACIONALIDADES e dos nomes-alvo
+- Correspondência aproximada por trigramas (coeficiente de Dice)
+  para o que sobra, com cache por chave dobrada
+- Resolução vetorizada de colunas (um cálculo por valor distinto)
+
+Os nomes-alvo definem a grafia devolvida: com os nomes de uma
+dimensão (ex.: Dim_Nacionalidade com "China") todas as variantes
+da classe ("República Popular da China", "Chinese"...) resolvem
+para o nome existente na dimensão.
+
+Usado por:
+- Formatadores.normalizar_nome_nacionalidade / TransformadorDimensoesBase (ETL_EDUCACAO)
+- Formatadores.normalizar_nacionalidade / TransformadorDimensoesAIMA (ETL_AIMA)
+- Extrator2011 / ConsolidadorTemporal (ETL_EDUCACAO_CONSOLIDADO_v3.py)
+- ETLLaboralProcessor e distribuicao_setorial_colab.py (DP-01-B1)
+- construir_dimensoes (DP-02-A2/etl_aima_colab_v2.py)
+
+Exemplo:
+    resolvedor = ResolvedorNacionalidades.de_dimensao(
+        dim_nacionalidade, 'nome_nacionalidade', 'nacionalidade_id'
+    )
+    ids = resolvedor.resolver_ids(df['nacionalidade_aima_raw'])
+============================================================
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+from decodificacao_entradas import SUBSTITUICOES_CIRILICO, reparar_texto  # noqa: F401
+from integridade_referencial import IndiceChaves
+
+
+# ============================================================
+# VARIANTES CONHECIDAS (nome preferido -> variantes)
+# ============================================================
+
+# Não é preciso listar variantes que só diferem em acentos, maiúsculas
+# ou pontuação: a dobragem já as junta ("Romenia", "Guine Bissau")
+VARIANTES_NACIONALIDADES = {
+    'Brasil': ['Brazil', 'Brazilian'],
+    'Angola': ['Angolan'],
+    'Cabo Verde': ['Cape Verde'],
+    'Guiné-Bissau': ['Guinea-Bissau'],
+    'São Tomé e Príncipe': ['S. Tomé e Príncipe', 'São Tomé Príncipe', 'Sao Tome and Principe'],
+    'Moçambique': ['Mozambique'],
+    'Portugal': ['Portuguese', 'Portuguesa', 'Nacionalidade portuguesa'],
+    'Nacionalidade estrangeira': ['Estrangeira', 'Estrangeiros'],
+    'Espanha': ['Spain', 'Spanish'],
+    'França': ['France', 'French'],
+    'Reino Unido': [
+        'United Kingdom', 'UK', 'British', 'Reino Unido (British Subject)',
+        'Grã-Bretanha', 'Grã-Bretanha (British Subject)'
+    ],
+    'Itália': ['Italy', 'Italian'],
+    'Alemanha': ['Germany', 'German'],
+    'Roménia': ['Romania', 'Romanian'],
+    'Ucrânia': ['Ukraine', 'Ukrainian'],
+    'República da Moldávia': ['Moldova', 'Moldávia'],
+    'Rússia': ['Russia', 'Russian', 'Federação Russa'],
+    'República Popular da China': ['China', 'Chinese'],
+    'Índia': ['India', 'Indian'],
+    'Paquistão': ['Pakistan', 'Pakistani'],
+    'Bangladesh': ['Bangladeshi'],
+    'Nepal': ['Nepalese'],
+    'Estados Unidos da América': ['Estados Unidos América', 'EUA', 'USA', 'United States'],
+    'Apátridas': ['Apátrida', 'Stateless'],
+}
+
+_RE_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+LIMIAR_SEMELHANCA = 0.8
+
+
+# ============================================================
+# NORMALIZAÇÃO DE TEXTO
+# ============================================================
+
+def reparar_mojibake(texto):
+    """
+    Desfaz dupla codificação comum nos CSVs de origem
+    Ex.: 'RomÃ©nia' -> 'Roménia', 'Ucrуnia' -> 'Ucrãnia'
+    """
+    return reparar_texto(texto)
+
+
+def dobrar_texto(texto):
+    """
+    Chave de comparação: sem mojibake, acentos, maiúsculas e pontuação
+    Ex.: ' Guiné Bissau ' -> 'guine bissau', 'S. Tomé' -> 's tome'
+    """
+    texto = unicodedata.normalize('NFKD', reparar_mojibake(str(texto)))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return _RE_SEPARADORES.sub(' ', texto).strip()
+
+
+def _trigramas(chave):
+    """Trigramas de caracteres da chave (com margens)"""
+    chave = f"  {chave} "
+    return {chave[i:i + 3] for i in range(len(chave) - 2)}
+
+
+# ============================================================
+# RESOLVEDOR
+# ============================================================
+
+class ResolvedorNacionalidades:
+    """Resolve nomes de nacionalidade para um conjunto de nomes-alvo"""
+
+    def __init__(self, nomes_alvo=None, variantes=None, padrao=None, limiar=LIMIAR_SEMELHANCA):
+        """
+        Args:
+            nomes_alvo: Grafias a devolver (None = nomes preferidos de VARIANTES_NACIONALIDADES)
+            variantes: Dict nome preferido -> variantes (None = VARIANTES_NACIONALIDADES)
+            padrao: Nome-alvo devolvido por resolver() quando nada corresponde
+            limiar: Semelhança mínima (Dice sobre trigramas) para aceitar correspondência aproximada
+        """
+        variantes = VARIANTES_NACIONALIDADES if variantes is None else variantes
+        if nomes_alvo is None:
+            nomes_alvo = list(variantes)
+        self.nomes_alvo = [str(nome).strip() for nome in nomes_alvo if not pd.isna(nome)]
+        self.limiar = limiar
+        self.ids = {}
+        self._indice = {}
+        self._trigramas = {}
+        self._posting = {}
+        self._cache = {}
+        self.contagens = Counter()
+        self.padrao = None
+
+        self._construir_indice(variantes)
+        if padrao is not None:
+            self.padrao = self._indice.get(dobrar_texto(padrao))
+
+    @classmethod
+    def de_dimensao(cls, df, coluna_nome, coluna_id, padrao=None, **kwargs):
+        """
+        Resolvedor com os nomes de uma dimensão e o mapa nome -> ID
+
+        Args:
+            padrao: Nome da dimensão usado como último recurso (ignorado se não existir)
+        """
+        resolvedor = cls(df[coluna_nome].tolist(), padrao=padrao, **kwargs)
+        for nome, id_ in zip(df[coluna_nome], df[coluna_id]):
+            if not pd.isna(nome) and not pd.isna(id_):
+                resolvedor.ids.setdefault(str(nome).strip(), id_)
+        return resolvedor
+
+    def _construir_indice(self, variantes):
+        """Índice invertido chave dobrada -> nome-alvo (e postings de trigramas)"""
+        for nome in self.nomes_alvo:
+            self._indice.setdefault(dobrar_texto(nome), nome)
+
+        # Cada classe de variantes resolve para o nome-alvo que pertence a ela
+        for preferido, lista in variantes.items():
+            chaves = [dobrar_texto(preferido)] + [dobrar_texto(v) for v in lista]
+            alvo = next((self._indice[c] for c in chaves if c in self._indice), None)
+            if alvo is None:
+                continue
+            for chave in chaves:
+                self._indice.setdefault(chave, alvo)
+
+        for chave in self._indice:
+            trigramas = _trigramas(chave)
+            self._trigramas[chave] = trigramas
+            for trigrama in trigramas:
+                self._posting.setdefault(trigrama, []).append(chave)
+
+    def _aproximado(self, chave):
+        """Chave indexada mais semelhante (Dice >= limiar) ou None"""
+        trigramas = _trigramas(chave)
+        comuns = Counter()
+        for trigrama in trigramas:
+            comuns.update(self._posting.get(trigrama, ()))
+
+        melhor, melhor_score = None, 0.0
+        for candidata, n_comuns in comuns.most_common():
+            score = 2 * n_comuns / (len(trigramas) + len(self._trigramas[candidata]))
+            if score > melhor_score:
+                melhor, melhor_score = candidata, score
+        return melhor if melhor_score >= self.limiar else None
+
+    def _resolver_chave(self, chave):
+        """Nome-alvo para uma chave dobrada (memoizado), ou None"""
+        if chave in self._cache:
+            return self._cache[chave]
+
+        if chave in self._indice:
+            alvo, metodo = self._indice[chave], 'indice'
+        else:
+            candidata = self._aproximado(chave) if chave else None
+            alvo = self._indice[candidata] if candidata else None
+            metodo = 'aproximado' if alvo else 'sem_correspondencia'
+
+        self._cache[chave] = alvo
+        self.contagens[metodo] += 1
+        return alvo
+
+    def resolver(self, nome):
+        """Nome-alvo correspondente (ou o padrão / None se não houver)"""
+        if nome is None or pd.isna(nome):
+            return None
+        alvo = self._resolver_chave(dobrar_texto(nome))
+        return alvo if alvo is not None else self.padrao
+
+    def normalizar(self, nome):
+        """Como resolver(), mas devolve o nome limpo quando não há correspondência"""
+        if nome is None or pd.isna(nome):
+            return None
+        alvo = self._resolver_chave(dobrar_texto(nome))
+        return alvo if alvo is not None else str(nome).strip()
+
+    def resolver_serie(self, serie, manter_original=False):
+        """
+        Versão vetorizada de resolver/normalizar (um cálculo por valor distinto)
+
+        Args:
+            manter_original: True = normalizar() (sem correspondência fica o nome limpo)
+        """
+        serie = serie if isinstance(serie, pd.Series) else pd.Series(serie, dtype=object)
+        funcao = self.normalizar if manter_original else self.resolver
+        unicos = serie.dropna().unique()
+        return serie.map({valor: funcao(valor) for valor in unicos})
+
+    def resolver_ids(self, serie):
+        """IDs da dimensão (Int64, NA sem correspondência) para uma coluna de nomes"""
+        ids, _ = IndiceChaves.de_dict(self.ids).resolver(self.resolver_serie(serie))
+        return ids
+
+    def estatisticas(self):
+        """Contagem de chaves distintas resolvidas por método"""
+        return dict(self.contagens)
+
+
+# Resolvedor padrão (nomes preferidos de VARIANTES_NACIONALIDADES)
+RESOLVEDOR_NACIONALIDADES = ResolvedorNacionalidades()
+
+
+# ============================================================
+# TESTE DO MÓDULO
+# ============================================================
+
+if __name__ == "__main__":
+    amostra = pd.Series([
+        'Romenia', 'RomÃ©nia', 'GUINE BISSAU', 'Sao tome e Principe', 'Reino Unido (British Subject)',
+        'Republica Popular da China', 'Ucranai', 'Venezuela', None
+    ])
+    print("Teste do Resolvedor de Nacionalidades:")
+    for bruto, valor in zip(amostra, RESOLVEDOR_NACIONALIDADES.resolver_serie(amostra, manter_original=True)):
+        print(f"  {bruto!r:>32} -> {valor}")
+
+    dimensao = pd.DataFrame({
+        'nacionalidade_id': [6, 11, 16],
+        'nome_nacionalidade': ['China', 'Nacionalidade estrangeira', 'Roménia']
+    })
+    resolvedor = ResolvedorNacionalidades.de_dimensao(
+        dimensao, 'nome_nacionalidade', 'nacionalidade_id'
+    )
+    print(f"IDs: {resolvedor.resolver_ids(amostra).tolist()}")
+    print(f"Estatísticas: {resolvedor.estatisticas()}")
+
+    print("\n✓ Módulo resolvedor_nacionalidades.py carregado com sucesso!")